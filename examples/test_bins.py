@@ -0,0 +1,23 @@
+# simple test of bins tool
+# requires files/dump.kinase
+
+d = dump("files/dump.kinase")
+d.map(1, "id", 2, "type", 3, "x", 4, "y", 5, "z")
+d.unscale()
+
+b = bins(20, -6.2, 6.2)
+b.compute(d, "x")
+print("Counts along x", b.counts)
+
+b = bins([10, 10], [-6.2, -6.2], [6.2, 6.2])
+b.outside = "clip"
+b.compute(d, ["x", "y"], None, 1)
+print("# of types", b.ntypes, "counts of type 1 per x bin", b.tcounts[0].sum(1))
+
+d = dump("files/dump.kinase", 0)
+d.map(1, "id", 2, "type", 3, "x", 4, "y", 5, "z")
+b = bins(10, 0.0, 1.0)
+n = b.stream(d, "z")
+print("Streamed", n, "snapshots, scaled z counts", b.counts)
+
+print("all done ... type CTRL-D to exit Pizza.py")
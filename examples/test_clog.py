@@ -1,8 +1,8 @@
 # simple test of clog tool
 # requires files/log.ccell
-# creates tmp.clog and tmp.clog.two
+# creates tmp.clog, tmp.clog.two and tmp.clog.npz
 
-c = log("files/log.ccell")
+c = clog("files/log.ccell")
 
 print("# of vectors =", c.nvec)
 print("length of vectors =", c.nlen)
@@ -12,5 +12,10 @@ time, a, b = c.get("Step", "prey", "predator")
 print(a, b)
 c.write("tmp.clog")
 c.write("tmp.clog.two", "Step", "prey")
+c.write("tmp.clog.npz")
+c = clog("tmp.clog.npz")
+print("names of binary vectors =", c.names)
+c = clog("files/log.ccell tmp.clog.npz", "", 0)
+print("length of averaged vectors =", c.nlen)
 
 print("all done ... type CTRL-D to exit Pizza.py")
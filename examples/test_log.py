@@ -1,6 +1,6 @@
 # simple test of log tool
 # requires files/log.obstacle
-# creates tmp.log and tmp.log.two
+# creates tmp.log, tmp.log.two and tmp.log.npz
 
 lg = log("files/log.obstacle")
 
@@ -12,5 +12,8 @@ time, temp, press = lg.get("Step", "Temp", "Press")
 print(temp, press)
 lg.write("tmp.log")
 lg.write("tmp.log.two", "Step", "E_pair")
+lg.write("tmp.log.npz")
+lg = log("tmp.log.npz")
+print("names of binary vectors =", lg.names)
 
 print("all done ... type CTRL-D to exit Pizza.py")
@@ -0,0 +1,40 @@
+# simple test of neighbor tool
+# requires files/dump.peptide
+
+import numpy as np
+
+d = dump("files/dump.peptide")
+d.map(1, "id", 2, "type", 3, "x", 4, "y", 5, "z")
+d.unscale()
+n = neighbor(d)
+
+i, j, rsq = n.pairs(0, 1.0)
+print("# of pairs closer than 1.0 in step 0 =", len(i))
+i, j, rsq = n.pairs(0, 3.0, 1, 2)
+print("# of type 1/2 pairs closer than 3.0 in step 0 =", len(i))
+count = n.count(0, 3.0, 1, 2)
+print("max # of type 2 atoms near a type 1 atom =", max(count))
+
+# typed pairs must be the untyped pairs of those types, as selected atoms
+
+type = np.array(d.vecs(0, "type"))
+i, j, rsq = n.pairs(0, 3.0)
+i1, j1 = np.where(type[i] == 13, i, j), np.where(type[i] == 13, j, i)
+mixed = (type[i1] == 13) & (type[j1] == 14)
+order = np.lexsort((j1[mixed], i1[mixed]))
+ti, tj, trsq = n.pairs(0, 3.0, 13, 14)
+print("type 13/14 pairs match untyped pairs =",
+      np.array_equal(i1[mixed][order], ti) and
+      np.array_equal(j1[mixed][order], tj))
+same = (type[i] == 13) & (type[j] == 13)
+ti, tj, trsq = n.pairs(0, 3.0, 13, 13)
+print("type 13/13 pairs match untyped pairs =",
+      np.array_equal(i[same], ti) and np.array_equal(j[same], tj))
+count = n.count(0, 3.0, 13, 13)
+group = np.flatnonzero(type == 13)
+expect = np.bincount(np.concatenate((i[same], j[same])),
+                     minlength=len(type))
+print("type 13/13 counts match untyped pairs =",
+      np.array_equal(count, expect[group]))
+
+print("all done ... type CTRL-D to exit Pizza.py")
@@ -0,0 +1,30 @@
+# simple test of png tool
+# requires files/dump.kinase
+# creates tmp*.png
+
+from __future__ import print_function, absolute_import
+from vizinfo import colors
+from builtins import range
+
+d = dump("files/dump.kinase")
+p = png(d)
+
+p.bg("white")
+p.rotate(60, 130)
+p.box(1)
+p.file = "tmp"
+
+print("kill image window when ready to contine ...")
+p.show(0)
+p.all()
+
+p.acol([1, 4, 6, 8, 9], ["gray", "red", "blue", "green", "yellow"])
+p.arad(list(range(9)), 0.3)
+p.shade = 0.5
+
+a = p.pixels(0)
+print("image of", a.shape[1], "x", a.shape[0], "pixels")
+p.pan(60, 130, 1, 60, 30, 0.5)
+p.all(0, 10, 0)
+
+print("all done ... type CTRL-D to exit Pizza.py")
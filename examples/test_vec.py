@@ -1,6 +1,6 @@
 # simple test of vec tool
 # requires files/vec.txt
-# creates tmp.vec and tmp.vec.two
+# creates tmp.vec, tmp.vec.two and tmp.vec.npz
 
 v = vec("files/vec.txt")
 
@@ -12,5 +12,8 @@ time, temp, press = v.get(1, "col2", 6)
 print(temp, press)
 v.write("tmp.vec")
 v.write("tmp.vec.two", "col1", 3)
+v.write("tmp.vec.npz")
+v = vec("tmp.vec.npz")
+print("names of binary vectors =", v.names)
 
 print("all done ... type CTRL-D to exit Pizza.py")
@@ -11,59 +11,20 @@
 # Author:  Steve Plimpton (Sandia)
 
 # for all snapshots, for each type1 atom, count # of type2 atoms within cutoff
-# will be very slow (N^2) if are too many type1 atoms
+# pairs are found via the cell lists of the neighbor tool
 
 # enable script to run from Python directly w/out Pizza.py
 
 import sys
+import numpy as np
 from dump import dump
+from neighbor import neighbor
 from gnu import gnu
 if "argv" not in globals():
     argv = sys.argv
 
 # main script
 
-# function to compute distance sq between 2 atoms with PBC
-
-
-def distance(atom1, atom2, box):
-    x1 = atom1[2]
-    y1 = atom1[3]
-    z1 = atom1[4]
-    x2 = atom2[2]
-    y2 = atom2[3]
-    z2 = atom2[4]
-
-    delx = x2 - x1
-    dely = y2 - y1
-    delz = z2 - z1
-
-    xprd = box[3] - box[0]
-    yprd = box[4] - box[1]
-    zprd = box[5] - box[2]
-
-    if abs(delx) > 0.5 * xprd:
-        if delx < 0.0:
-            delx += xprd
-        else:
-            delx -= xprd
-    if abs(dely) > 0.5 * yprd:
-        if dely < 0.0:
-            dely += yprd
-        else:
-            dely -= yprd
-    if abs(delz) > 0.5 * zprd:
-        if delz < 0.0:
-            delz += zprd
-        else:
-            delz -= zprd
-
-    distsq = delx * delx + dely * dely + delz * delz
-    return distsq
-
-# main script
-
-
 if len(argv) < 6:
     raise Exception("cluster.py type1 type2 cutoff nbin dump.1 dump.2 ...")
 
@@ -79,10 +40,10 @@ d = dump(files)
 d.aselect.test("$type == %d or $type == %d" % (type1, type2))
 
 # loop over snapshots
-# viz returns list of atoms in one snapshot
+# count() returns # of type2 atoms within cutoff of each type1 atom
 
-cutsq = cutoff * cutoff
-cluster = nbin * [0]
+n = neighbor(d)
+cluster = np.zeros(nbin, dtype=int)
 
 print("Clustering ...")
 
@@ -91,36 +52,13 @@ while 1:
     which, time, flag = d.iterator(flag)
     if flag == -1:
         break
-    time, box, atoms, bonds, tris = d.viz(which)
     print(time, end=' ')
     sys.stdout.flush()
 
-    # loop over all type1 atoms
-
-    n = len(atoms)
-    for i in range(n):
-        itype = atoms[i][1]
-        if itype != type1:
-            continue
-        ncount = 0
-
-        # loop over all type2 atoms
-        # increment cluster count if distance is within cutoff
-
-        for j in range(n):
-            jtype = atoms[j][1]
-            if jtype != type2 or i == j:
-                continue
-            distsq = distance(atoms[i], atoms[j], box)
-            if distsq < cutsq:
-                ncount += 1
-
-        # increment histogram count
+    # increment histogram count, last bin holds all larger clusters
 
-        if ncount >= nbin:
-            cluster[nbin - 1] += 1
-        else:
-            cluster[ncount] += 1
+    ncount = n.count(time, cutoff, type1, type2)
+    cluster += np.bincount(np.minimum(ncount, nbin - 1), minlength=nbin)
 
 print()
 print("Cluster size and count:")
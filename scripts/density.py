@@ -14,6 +14,7 @@
 
 import sys
 from dump import dump
+from bins import bins
 if "argv" not in globals():
     argv = sys.argv
 
@@ -27,53 +28,26 @@ nbins = int(argv[2])
 outfile = argv[3]
 files = ' '.join(argv[4:])
 
-# read snapshots one-at-a-time
+# read snapshots one-at-a-time, coords stay scaled (0-1)
+# bins are centered on i/nbins and periodic, as is the box
+# each atom adds nbins/vol to its bin so counts are densities
 
-d = dump(files, 0)
-d.map(1, "id", 2, "type", 3, "x", 4, "y", 5, "z")
-
-first = 1
-nsnaps = 0
-while 1:
-    time = next(d)
-    if time == -1:
-        break
 
-    if first:
-        tmp, ntypes = d.minmax("type")
-        ntypes = int(ntypes)
-        bin = nbins * [0]
-        for i in range(nbins):
-            bin[i] = ntypes * [0]
-        first = 0
+def weight(snap):
+    vol = (snap.xhi - snap.xlo) * (snap.yhi - snap.ylo) * \
+        (snap.zhi - snap.zlo)
+    return nbins / vol
 
-    box = (d.snaps[-1].xlo, d.snaps[-1].ylo, d.snaps[-1].zlo,
-           d.snaps[-1].xhi, d.snaps[-1].yhi, d.snaps[-1].zhi)
-    vol = (box[3] - box[0]) * (box[4] - box[1]) * (box[5] - box[2])
 
-    if direction == "x":
-        type, x = d.vecs(time, "type", "x")
-    elif direction == "y":
-        type, x = d.vecs(time, "type", "y")
-    elif direction == "z":
-        type, x = d.vecs(time, "type", "z")
-
-    type = list(map(int, type))
-    natoms = len(type)
-    for i in range(natoms):
-        type[i] -= 1
+d = dump(files, 0)
+d.map(1, "id", 2, "type", 3, "x", 4, "y", 5, "z")
 
-    for i in range(natoms):
-        ibin = int(nbins * x[i] + 0.5)
-        if (ibin < 0):
-            ibin += nbins
-        if (ibin > nbins - 1):
-            ibin -= nbins
-        bin[ibin][type[i]] += nbins / vol
-    nsnaps += 1
-    print(time, end=' ')
+b = bins(nbins, -0.5 / nbins, 1.0 - 0.5 / nbins)
+b.outside = "wrap"
+nsnaps = b.stream(d, direction, weight, 1)
+ntypes = b.ntypes
+bin = b.tcounts
 
-print()
 print(
     "Printing ",
     direction,
@@ -85,6 +59,6 @@ fp = open(outfile, "w")
 for i in range(nbins):
     print(float(i) / float(nbins), end=' ', file=fp)
     for j in range(ntypes):
-        print(conversion * bin[i][j] / nsnaps, end=' ', file=fp)
+        print(conversion * bin[j][i] / nsnaps, end=' ', file=fp)
     print(file=fp)
 fp.close()
@@ -18,6 +18,7 @@
 import sys
 import numpy as np
 from dump import dump
+from bins import bins
 if "argv" not in globals():
     argv = sys.argv
 
@@ -45,90 +46,55 @@ if zmax == zmin:
 outfile = argv[5]
 files = ' '.join(argv[6:])
 
-# read snapshots one-at-a-time
+# read snapshots one-at-a-time, coords stay scaled (0-1)
+# bin along the 2 planar axes, atoms outside nbins x nbins go to edge bins
+# vertical slice is taken on the scaled vertical coord times box length
+# each atom in the slice adds nbins*nbins/vol to its bin
+
+if direction == "z":
+    cols = ["x", "y"]
+    bidirect = 'x/y'
+    axes = (0, 1, 2)
+elif direction == "y":
+    cols = ["x", "z"]
+    bidirect = 'x/z'
+    axes = (0, 2, 1)
+elif direction == "x":
+    cols = ["y", "z"]
+    bidirect = 'y/z'
+    axes = (1, 2, 0)
+
+
+def weight(snap):
+    global zmin, zmax
+    box = (snap.xlo, snap.ylo, snap.zlo, snap.xhi, snap.yhi, snap.zhi)
+    dx = box[axes[0] + 3] - box[axes[0]]
+    dy = box[axes[1] + 3] - box[axes[1]]
+    dz = box[axes[2] + 3] - box[axes[2]]
+    zmax = min(zmax, box[axes[2] + 3])
+    zmin = max(zmin, box[axes[2]])
+    vol = dx * dy * float(zmax - zmin)
+
+    zloc = snap.atoms[:, d.names[direction]] * dz
+    inside = (zloc >= zmin) & (zloc <= zmax)
+    return np.where(inside, nbins * nbins / vol, 0.0)
+
 
 d = dump(files, 0)
 d.map(1, "id", 2, "type", 3, "x", 4, "y", 5, "z")
-bidirect = 'x/y'
-first = 1
-nsnaps = 0
-dx = 0
-dy = 0
-x0 = 0
-y0 = 0
-vol = 0
-
-while 1:
-    time = next(d)
-    if time == -1:
-        break
-
-    if first:
-        tmp, ntypes = d.minmax("type")
-        ntypes = int(ntypes)
-        bin = np.zeros(shape=(nbins, nbins, ntypes))
-        first = 0
-
-    box = (d.snaps[-1].xlo, d.snaps[-1].ylo, d.snaps[-1].zlo,
-           d.snaps[-1].xhi, d.snaps[-1].yhi, d.snaps[-1].zhi)
-    vol = (box[3] - box[0]) * (box[4] - box[1]) * (box[5] - box[2])
-
-    if direction == "z":
-        type, x, y, z = d.vecs(time, "type", "x", "y", "z")
-        bidirect = 'x/y'
-        dx = box[3] - box[0]
-        dy = box[4] - box[1]
-        dz = box[5] - box[2]
-        x0 = box[0] + float(dx) / float(nbins) / 2.0
-        y0 = box[1] + float(dy) / float(nbins) / 2.0
-        zmax = min(zmax, box[5])
-        zmin = max(zmin, box[2])
-    elif direction == "y":
-        type, x, y, z = d.vecs(time, "type", "x", "z", "y")
-        bidirect = 'x/z'
-        dx = box[3] - box[0]
-        dy = box[5] - box[2]
-        dz = box[4] - box[1]
-        x0 = box[0] + float(dx) / float(nbins) / 2.0
-        y0 = box[2] + float(dy) / float(nbins) / 2.0
-        zmax = min(zmax, box[4])
-        zmin = max(zmin, box[1])
-    elif direction == "x":
-        type, x, y, z = d.vecs(time, "type", "y", "z", "x")
-        bidirect = 'y/z'
-        dx = box[4] - box[1]
-        dy = box[5] - box[2]
-        dz = box[3] - box[0]
-        x0 = box[1] + float(dx) / float(nbins) / 2.0
-        y0 = box[2] + float(dy) / float(nbins) / 2.0
-        zmax = min(zmax, box[3])
-        zmin = max(zmin, box[0])
-    vol = dx * dy * float(zmax - zmin)
 
-    type = list(map(int, type))
-    natoms = len(type)
-    for i in range(natoms):
-        type[i] -= 1
-
-    for i in range(natoms):
-        ibin = int(nbins * x[i])
-        jbin = int(nbins * y[i])
-        zloc = float(z[i]) * float(dz)
-        if zloc < zmin or zloc > zmax:
-            continue
-        if (ibin < 0):
-            ibin = 0
-        if (ibin > nbins - 1):
-            ibin = nbins - 1
-        if (jbin < 0):
-            jbin = 0
-        if (jbin > nbins - 1):
-            jbin = nbins - 1
-        bin[jbin][ibin][type[i]] += nbins * nbins / vol
-    nsnaps += 1
-    print(time, end=' ')
-
-print()
+b = bins([nbins, nbins], [0.0, 0.0], [1.0, 1.0])
+b.outside = "clip"
+nsnaps = b.stream(d, cols, weight, 1)
+ntypes = b.ntypes
+bin = b.tcounts.transpose(2, 1, 0)
+
+box = b.box
+dx = box[axes[0] + 3] - box[axes[0]]
+dy = box[axes[1] + 3] - box[axes[1]]
+x0 = box[axes[0]] + float(dx) / float(nbins) / 2.0
+y0 = box[axes[1]] + float(dy) / float(nbins) / 2.0
+
 print(
     "Printing %s-mapped density distribution for %s-slice [%.2f,%.2f] in mol/L to %s" %
      (bidirect, direction, zmin, zmax, outfile))
@@ -8,68 +8,44 @@
 # Author:  Paul Crozier (Sandia)
 
 # print out 2 atoms less than maxcut apart (with PBC)
+# pairs are found via the cell lists of the neighbor tool
 
+# enable script to run from Python directly w/out Pizza.py
+
+import sys
 from math import sqrt
+from dump import dump
+from neighbor import neighbor
+if "argv" not in globals():
+    argv = sys.argv
+
+# main script
 
 if len(argv) < 3:
     raise Exception("distance.py maxcut dump.file1 dump.file2 ...")
 
 maxcut = float(argv[1])
-maxcut_sq = maxcut * maxcut
 
 files = ' '.join(argv[2:])		        # dump files
 d = dump(files, 0)
 d.map(1, "id", 2, "type", 3, "x", 4, "y", 5, "z")
+n = neighbor(d)
 
 while 1:
-    time = next(d)
+    time = d.next()
     if time < 0:
         break
     d.unscale(time)
 
-    box = (d.snaps[-1].xlo, d.snaps[-1].ylo, d.snaps[-1].zlo,
-           d.snaps[-1].xhi, d.snaps[-1].yhi, d.snaps[-1].zhi)
     d.aselect.all(time)
-    id, type, x, y, z = d.vecs(time, "id", "type", "x", "y", "z")
-    n = len(x)
-
-    xprd = box[3] - box[0]
-    yprd = box[4] - box[1]
-    zprd = box[5] - box[2]
-
-    for i in range(n):
-        for j in range(i + 1, n):
-
-            delx = x[j] - x[i]
-            if abs(delx) > 0.5 * xprd:
-                if delx < 0.0:
-                    delx += xprd
-                else:
-                    delx -= xprd
-            if (delx * delx < maxcut_sq):
-
-                dely = y[j] - y[i]
-                if abs(dely) > 0.5 * yprd:
-                    if dely < 0.0:
-                        dely += yprd
-                    else:
-                        dely -= yprd
-                if ((dely * dely + delx * delx) < maxcut_sq):
-
-                    delz = z[j] - z[i]
-                    if abs(delz) > 0.5 * zprd:
-                        if delz < 0.0:
-                            delz += zprd
-                        else:
-                            delz -= zprd
-
-                    rsq = delx * delx + dely * dely + delz * delz
-
-                    if rsq < maxcut_sq:
-                        print(
-                            "time = %d, id[i] = %d, id[j] = %d,"
-                            " type[i] = %d, type[j] = %d, distance = %g" %
-                            (time, id[i], id[j], type[i], type[j], sqrt(rsq)))
+    id, type = d.vecs(time, "id", "type")
+    i, j, rsq = n.pairs(time, maxcut)
+
+    for m in range(len(i)):
+        print("time = %d, id[i] = %d, id[j] = %d,"
+              " type[i] = %d, type[j] = %d, distance = %g" %
+              (time, id[i[m]], id[j[m]], type[i[m]], type[j[m]],
+               sqrt(rsq[m])))
 
     d.tselect.none()
     d.tselect.one(time)
@@ -0,0 +1,247 @@
+#!/usr/bin/python
+
+# Script:  lppbench.py
+# Purpose: benchmark the dump -> VTK hot path on synthetic LIGGGHTS dumps
+# Syntax:  lppbench.py [-a atoms] [-c columns] [-s snapshots] [-z]
+#                      [-p cpunums] [-r repeat] [-d dir] [-o outfile]
+#          -a atoms = # of atoms per snapshot (default 10000)
+#          -c columns = # of per-atom columns, at least 5 (default 15)
+#          -s snapshots = # of snapshots, one dump file each (default 8)
+#          -z = write gzipped dump files
+#          -p cpunums = comma separated process counts for lpp (default 1)
+#          -r repeat = repetitions per benchmark, best is kept (default 3)
+#          -d dir = directory for the synthetic dumps (default lppbench.tmp)
+#          -o outfile = JSON file results are written to (default lppbench.json)
+# Example: lppbench.py -a 100000 -s 16 -p 1,2,4,8 -o bench.json
+# Author:  LPP developers
+
+# times dump.read_snapshot, aselect.test, sort, vtk.particleGran,
+#   dump.write and the whole lpp command line tool
+# every result holds the best and mean time of all repetitions
+#   and the resulting atoms per second
+
+# enable script to run from Python directly w/out Pizza.py
+
+import sys, os, getopt, gzip, json, platform, subprocess, time
+from time import perf_counter
+from os import popen
+import numpy as np
+import dump as dumpmodule
+import vtk
+from dump import dump
+if "argv" not in globals():
+    argv = sys.argv
+
+try:
+    from DEFAULTS import PIZZA_GUNZIP
+except BaseException:
+    PIZZA_GUNZIP = "gunzip"
+
+BASE = ["id", "type", "x", "y", "z", "vx", "vy", "vz", "fx", "fy", "fz",
+        "omegax", "omegay", "omegaz", "radius"]
+
+# -----------------------------------------------------------------------
+# column names for a dump with ncol columns
+# columns beyond the standard granular ones are f_extra[i] values
+
+
+def colnames(ncol):
+    if ncol < 5:
+        raise Exception("lppbench.py needs at least 5 columns")
+    names = BASE[:ncol]
+    for i in range(ncol - len(names)):
+        names.append("f_extra[%d]" % (i + 1))
+    return names
+
+# -----------------------------------------------------------------------
+# write one dump file per snapshot, atoms in random ID order
+
+
+def generate(dir, natoms, ncol, nsnaps, gz):
+    names = colnames(ncol)
+    rng = np.random.RandomState(12345)
+    fmt = ["%d", "%d"] + ["%.8g"] * (ncol - 2)
+    files = []
+    for i in range(nsnaps):
+        step = 1000 * i
+        atoms = rng.rand(natoms, ncol)
+        atoms[:, 0] = rng.permutation(natoms) + 1
+        atoms[:, 1] = rng.randint(1, 4, natoms)
+        file = os.path.join(dir, "dump%d.liggghts" % step)
+        if gz:
+            file += ".gz"
+            f = gzip.open(file, "wt")
+        else:
+            f = open(file, "w")
+        f.write("ITEM: TIMESTEP\n%d\nITEM: NUMBER OF ATOMS\n%d\n" %
+                (step, natoms))
+        f.write("ITEM: BOX BOUNDS pp pp pp\n0 1\n0 1\n0 1\n")
+        f.write("ITEM: ATOMS %s\n" % " ".join(names))
+        np.savetxt(f, atoms, fmt=fmt)
+        f.close()
+        files.append(file)
+    return files
+
+# -----------------------------------------------------------------------
+# suppress the progress output of the tools while timing them
+
+
+class quiet:
+    def __enter__(self):
+        self.stdout = sys.stdout
+        sys.stdout = open(os.devnull, "w")
+
+    def __exit__(self, *args):
+        sys.stdout.close()
+        sys.stdout = self.stdout
+
+# -----------------------------------------------------------------------
+# run func repeat times, setup is called untimed before each run
+# func returns the # of atoms it processed
+
+
+def measure(name, func, repeat, setup=None, **extra):
+    times = []
+    for i in range(repeat):
+        if setup:
+            setup()
+        with quiet():
+            t0 = perf_counter()
+            natoms = func()
+            times.append(perf_counter() - t0)
+    best = min(times)
+    result = {"name": name, "best": best, "mean": sum(times) / len(times),
+              "repeat": repeat, "atoms": natoms,
+              "atoms_per_sec": natoms / best if best > 0 else 0.0}
+    result.update(extra)
+    print("%-24s %10.4f sec %14.0f atoms/sec" %
+          (name, best, result["atoms_per_sec"]))
+    return result
+
+# -----------------------------------------------------------------------
+# main script
+
+try:
+    optlist, args = getopt.getopt(argv[1:], "a:c:s:zp:r:d:o:")
+except getopt.GetoptError:
+    raise Exception("Syntax: lppbench.py [-a atoms] [-c columns] "
+                    "[-s snapshots] [-z] [-p cpunums] [-r repeat] "
+                    "[-d dir] [-o outfile]")
+opts = dict(optlist)
+natoms = int(opts.get("-a", 10000))
+ncol = int(opts.get("-c", 15))
+nsnaps = int(opts.get("-s", 8))
+gz = "-z" in opts
+cpunums = [int(p) for p in opts.get("-p", "1").split(",")]
+repeat = int(opts.get("-r", 3))
+dir = opts.get("-d", "lppbench.tmp")
+outfile = opts.get("-o", "lppbench.json")
+
+if not os.path.isdir(dir):
+    os.makedirs(dir)
+print("generating %d snapshots of %d atoms with %d columns in %s ..." %
+      (nsnaps, natoms, ncol, dir))
+files = generate(dir, natoms, ncol, nsnaps, gz)
+total = natoms * nsnaps
+results = []
+
+# dump.read_snapshot on every file, unscaled raw reading only
+
+
+def read_snapshots():
+    d = dump(files[0], 0)
+    for file in files:
+        if file[-3:] == ".gz":
+            f = popen("%s -c %s" % (PIZZA_GUNZIP, file), 'r')
+        else:
+            f = open(file, 'r')
+        d.read_snapshot(f)
+        f.close()
+    return total
+
+
+results.append(measure("dump.read_snapshot", read_snapshots, repeat))
+
+with quiet():
+    d = dump({"filelist": files, "debugMode": False})
+original = [snap.atoms.copy() for snap in d.snaps]
+
+
+def restore():
+    for snap, atoms in zip(d.snaps, original):
+        snap.atoms = atoms.copy()
+    with quiet():
+        d.tselect.all()
+
+
+def select():
+    d.aselect.test("$type == 1 and $x < 0.5")
+    return total
+
+
+results.append(measure("aselect.test", select, repeat, restore))
+
+
+def sort():
+    d.sort()
+    return total
+
+
+results.append(measure("dump.sort", sort, repeat, restore))
+
+vtkfile = os.path.join(dir, "bench.vtk")
+
+
+def particleGran():
+    nvalues = len(d.snaps[0].atoms[0])
+    for snap in d.snaps:
+        vtk.particleGran(vtkfile, snap.atoms, d.names, nvalues)
+    return total
+
+
+results.append(measure("vtk.particleGran", particleGran, repeat, restore))
+
+dumpfile = os.path.join(dir, "bench.dump")
+
+
+def write():
+    d.write(dumpfile)
+    return total
+
+
+results.append(measure("dump.write", write, repeat, restore))
+
+# whole lpp command line tool in a separate Python process
+# process counts beyond the # of available cores are skipped
+
+lpp = os.path.join(os.path.dirname(os.path.abspath(dumpmodule.__file__)),
+                   "lpp.py")
+outdir = os.path.join(dir, "vtk") + os.sep
+if not os.path.isdir(outdir):
+    os.makedirs(outdir)
+for cpunum in cpunums:
+    if cpunum > os.cpu_count():
+        print("skipping lpp with %d processes, only %d cores available" %
+              (cpunum, os.cpu_count()))
+        continue
+    cmd = [sys.executable, lpp, "--quiet", "--cpunum", str(cpunum),
+           "--chunksize", str(max(1, nsnaps // cpunum)), "-o", outdir] + files
+
+    def run():
+        subprocess.check_call(cmd, stdout=subprocess.DEVNULL)
+        return total
+
+    results.append(measure("lpp -cpunum %d" % cpunum, run, repeat,
+                           cpunum=cpunum))
+
+# record parameters, environment and results
+
+report = {"date": time.strftime("%Y-%m-%d %H:%M:%S"),
+          "python": platform.python_version(), "numpy": np.__version__,
+          "platform": platform.platform(), "cores": os.cpu_count(),
+          "atoms": natoms, "columns": ncol, "snapshots": nsnaps, "gzip": gz,
+          "results": results}
+f = open(outfile, "w")
+json.dump(report, f, indent=2)
+f.close()
+print("results written to %s" % outfile)
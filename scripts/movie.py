@@ -2,11 +2,12 @@
 
 # Script:  movie.py
 # Purpose: create images from LAMMPS dump snapshots
-# Syntax:  movie.py raster/svg theta phi dump.1 dump.2 ...
+# Syntax:  movie.py [-p N] raster/svg theta phi dump.1 dump.2 ...
+#          -p N = render frames with N processes (default 1)
 #          raster/svg = style of image to create
 # theta/phi = vertical (z) and azimuthal angle to view from
 #          files = one or more dump files
-# Example: movie.py svg 60 130 dump.*
+# Example: movie.py -p 4 svg 60 130 dump.*
 # Author:  Steve Plimpton (Sandia)
 
 # enable script to run from Python directly w/out Pizza.py
@@ -20,15 +21,21 @@ if "argv" not in globals():
 
 # main script
 
-if len(argv) < 5:
-    raise Exception("Syntax: movie.py raster/svg theta phi dump.1 ...")
+args = argv[1:]
+cpunum = 1
+if len(args) > 1 and args[0] == "-p":
+    cpunum = int(args[1])
+    args = args[2:]
+if len(args) < 4:
+    raise Exception("Syntax: movie.py [-p N] raster/svg theta phi dump.1 ...")
 
-style = argv[1]
-theta = float(argv[2])
-phi = float(argv[3])
-files = ' '.join(argv[4:])
+style = args[0]
+theta = float(args[1])
+phi = float(args[2])
+files = ' '.join(args[3:])
 
 d = dump(files)
 exec("viz = %s(d)" % style)
 viz.rotate(theta, phi)
+viz.cpunum = cpunum
 viz.all()
@@ -0,0 +1,192 @@
+#!/usr/bin/python
+
+# Script:  writebench.py
+# Purpose: benchmark the xyz, cfg and pdbfile writers against
+#          the former writers that print one atom at a time
+# Syntax:  writebench.py [-a atoms] [-s snapshots] [-r repeat]
+#                        [-d dir] [-o outfile]
+#          -a atoms = # of atoms per snapshot (default 10000)
+#          -s snapshots = # of snapshots (default 8)
+#          -r repeat = repetitions per benchmark, best is kept (default 3)
+#          -d dir = directory for the dump and output files
+#                   (default writebench.tmp)
+#          -o outfile = JSON file results are written to
+#                       (default writebench.json)
+# Example: writebench.py -a 100000 -s 20 -o write.json
+# Author:  LPP developers
+
+# every tool writes all snapshots into one file via one()
+# the per-atom writers are kept here as reference and must produce
+#   the same files, except pdbfile which no longer indents its lines
+
+# enable script to run from Python directly w/out Pizza.py
+
+import sys, os, getopt, json, platform, time
+from time import perf_counter
+import numpy as np
+from dump import dump
+from xyz import xyz
+from cfg import cfg
+from pdbfile import pdbfile
+if "argv" not in globals():
+    argv = sys.argv
+
+# -----------------------------------------------------------------------
+# write one dump file with nsnaps snapshots of natoms atoms
+
+
+def generate(file, natoms, nsnaps):
+    rng = np.random.RandomState(12345)
+    f = open(file, "w")
+    for i in range(nsnaps):
+        atoms = rng.rand(natoms, 5) * 10.0
+        atoms[:, 0] = np.arange(natoms) + 1
+        atoms[:, 1] = rng.randint(1, 4, natoms)
+        f.write("ITEM: TIMESTEP\n%d\nITEM: NUMBER OF ATOMS\n%d\n" %
+                (1000 * i, natoms))
+        f.write("ITEM: BOX BOUNDS pp pp pp\n0 10\n0 10\n0 10\n")
+        f.write("ITEM: ATOMS id type x y z\n")
+        np.savetxt(f, atoms, fmt=["%d", "%d", "%.8g", "%.8g", "%.8g"])
+    f.close()
+
+# -----------------------------------------------------------------------
+# former per-atom writers of one snapshot
+
+
+def xyz_atoms(f, time, box, atoms):
+    print(len(atoms), file=f)
+    print("Atoms", file=f)
+    for atom in atoms:
+        itype = int(atom[1])
+        print(itype, atom[2], atom[3], atom[4], file=f)
+
+
+def cfg_atoms(f, time, box, atoms):
+    xlen = box[3] - box[0]
+    ylen = box[4] - box[1]
+    zlen = box[5] - box[2]
+    print("Number of particles = %d " % len(atoms), file=f)
+    print("# Timestep %d \n#\nA = 1.0 Angstrom" % time, file=f)
+    print("H0(1,1) = %20.10f A " % xlen, file=f)
+    print("H0(1,2) = 0.0 A ", file=f)
+    print("H0(1,3) = 0.0 A ", file=f)
+    print("H0(2,1) = 0.0 A ", file=f)
+    print("H0(2,2) = %20.10f A " % ylen, file=f)
+    print("H0(2,3) = 0.0 A ", file=f)
+    print("H0(3,1) = 0.0 A ", file=f)
+    print("H0(3,2) = 0.0 A ", file=f)
+    print("H0(3,3) = %20.10f A " % zlen, file=f)
+    print("#", file=f)
+    for atom in atoms:
+        itype = int(atom[1])
+        xfrac = (atom[2] - box[0]) / xlen
+        yfrac = (atom[3] - box[1]) / ylen
+        zfrac = (atom[4] - box[2]) / zlen
+        print("1.0  %d   %15.10f  %15.10f  %15.10f  0.0 0.0 0.0 " %
+              (itype, xfrac, yfrac, zfrac), file=f)
+
+
+def pdb_atoms(f, time, box, atoms):
+    for atom in atoms:
+        begin = "ATOM %6d %2d   R00     1    " % (atom[0], atom[1])
+        middle = "%8.3f%8.3f%8.3f" % (atom[2], atom[3], atom[4])
+        end = "  1.00  0.00    NONE"
+        print(begin + middle + end, file=f)
+    print("END", file=f)
+
+# -----------------------------------------------------------------------
+# all snapshots of d into file via a former per-atom writer
+
+
+def legacy(d, file, atomwriter):
+    f = open(file, "w")
+    n = flag = 0
+    while 1:
+        which, time, flag = d.iterator(flag)
+        if flag == -1:
+            break
+        time, box, atoms, bonds, tris, lines = d.viz(which)
+        atomwriter(f, time, box, atoms)
+    f.close()
+
+# -----------------------------------------------------------------------
+# suppress the progress output of the tools while timing them
+
+
+class quiet:
+    def __enter__(self):
+        self.stdout = sys.stdout
+        sys.stdout = open(os.devnull, "w")
+
+    def __exit__(self, *args):
+        sys.stdout.close()
+        sys.stdout = self.stdout
+
+# -----------------------------------------------------------------------
+# best time of repeat runs of func
+
+
+def measure(func, repeat):
+    times = []
+    for i in range(repeat):
+        with quiet():
+            t0 = perf_counter()
+            func()
+            times.append(perf_counter() - t0)
+    return min(times)
+
+# -----------------------------------------------------------------------
+# main script
+
+try:
+    optlist, args = getopt.getopt(argv[1:], "a:s:r:d:o:")
+except getopt.GetoptError:
+    raise Exception("Syntax: writebench.py [-a atoms] [-s snapshots] "
+                    "[-r repeat] [-d dir] [-o outfile]")
+opts = dict(optlist)
+natoms = int(opts.get("-a", 10000))
+nsnaps = int(opts.get("-s", 8))
+repeat = int(opts.get("-r", 3))
+dir = opts.get("-d", "writebench.tmp")
+outfile = opts.get("-o", "writebench.json")
+
+if not os.path.isdir(dir):
+    os.makedirs(dir)
+print("generating %d snapshots of %d atoms in %s ..." %
+      (nsnaps, natoms, dir))
+dumpfile = os.path.join(dir, "bench.dump")
+generate(dumpfile, natoms, nsnaps)
+with quiet():
+    d = dump(dumpfile)
+total = natoms * nsnaps
+
+tools = [("xyz", xyz(d), xyz_atoms), ("cfg", cfg(d), cfg_atoms),
+         ("pdbfile", pdbfile(d), pdb_atoms)]
+results = []
+for name, tool, atomwriter in tools:
+    old = os.path.join(dir, "legacy." + name)
+    new = os.path.join(dir, "array." + name)
+    told = measure(lambda: legacy(d, old, atomwriter), repeat)
+    tnew = measure(lambda: tool.one(new), repeat)
+    if name == "pdbfile":
+        new += ".pdb"
+    same = open(old).read() == open(new).read()
+    size = os.path.getsize(new)
+    results.append({"name": name, "legacy": told, "array": tnew,
+                    "speedup": told / tnew if tnew > 0 else 0.0,
+                    "atoms_per_sec": total / tnew if tnew > 0 else 0.0,
+                    "bytes": size, "identical": same})
+    print("%-8s legacy %8.4f sec  array %8.4f sec  speedup %5.1f  %s" %
+          (name, told, tnew, told / tnew if tnew > 0 else 0.0,
+           "identical" if same else "DIFFERENT"))
+
+# record parameters, environment and results
+
+report = {"date": time.strftime("%Y-%m-%d %H:%M:%S"),
+          "python": platform.python_version(), "numpy": np.__version__,
+          "platform": platform.platform(), "atoms": natoms,
+          "snapshots": nsnaps, "results": results}
+f = open(outfile, "w")
+json.dump(report, f, indent=2)
+f.close()
+print("results written to %s" % outfile)
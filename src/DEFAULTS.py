@@ -25,7 +25,9 @@
 
 # PIZZA_TOOLS = ["~/mystuff/new_pizza_tools"]
 # PIZZA_SCRIPTS = ["~/mystuff/new_pizza_scripts"]
-PIZZA_EXCLUDE = ["pizza", "DEFAULTS", "vizinfo", "dump2force"]
+PIZZA_EXCLUDE = ["pizza", "DEFAULTS", "vizinfo", "lpptimer",
+                 "snapreader", "textwriter", "renderfarm", "framecache",
+                 "columnfile"]
 
 # --------------
 # --------------
@@ -52,6 +54,13 @@ PIZZA_EXCLUDE = ["pizza", "DEFAULTS", "vizinfo", "dump2force"]
 
 # --------------
 
+# THUMBS = directory where thumbnails of image files are kept
+# tools that use it: image
+
+# PIZZA_THUMBS = "~/.pizza/thumbs"
+
+# --------------
+
 # GNUPLOT = the GnuPlot plotting package
 # GNUTERM = terminal setting used by GnuPlot
 # tools that use it: gnu
@@ -17,6 +17,8 @@ import os
 import sys
 from tkinter import *
 from ImageTk import PhotoImage
+import Image
+from framecache import framecache
 oneline = "Animate a series of image files"
 
 docstr = """
@@ -34,10 +36,15 @@ a.last()		      go to last frame
 
 a.frame(31)    	              set frame slider
 a.delay(0.4)     	      set delay slider
+
+  image files are read when first shown, while one is shown
+    the next ones are read ahead in the background
+  up to 64 of the most recently shown images are kept in memory
 """
 
 # History
 #   8/05, Matt Jones (BYU): original version
+#   10/26, images read on demand into a bounded cache with prefetching
 
 # ToDo list
 #   make image window non-resizable while displaying an image
@@ -46,7 +53,9 @@ a.delay(0.4)     	      set delay slider
 # Variables
 #   tkroot = root of entire Tk
 #   files = list of file names
-#   images = list of Tkimage objects
+#   images = framecache of decoded images
+#   photo = Tkimage object of displayed image
+#   shown = frame of photo
 #   nframes = number of images
 #   index = current frame (0 to N-1)
 #   loop_flag = set to 1 or -1 when play or back pushed
@@ -57,6 +66,11 @@ a.delay(0.4)     	      set delay slider
 
 # Imports and external programs
 
+# KEEP = max # of decoded images kept in memory
+# AHEAD = # of images read ahead of the displayed one
+
+KEEP = 64
+AHEAD = 8
 
 # Class definition
 
@@ -80,17 +94,17 @@ class animate:
         if self.nframes == 0:
             raise Exception("No files to load")
 
-        # load all images
-
-        self.images = []
-        for i in range(self.nframes):
-            self.images.append(PhotoImage(file=self.files[i]))
-
         # grab Tk instance from main
 
         from __main__ import tkroot
         self.tkroot = tkroot
 
+        # images are read when displayed, see load()
+
+        self.images = framecache(self.load, self.nframes, KEEP, AHEAD)
+        self.photo = PhotoImage(self.images.get(0))
+        self.shown = 0
+
         # GUI control window
 
         win1 = Toplevel(tkroot)
@@ -145,7 +159,7 @@ class animate:
         # image window
 
         win2 = Toplevel(tkroot)
-        self.image_pane = Label(win2, image=self.images[0])
+        self.image_pane = Label(win2, image=self.photo)
         self.image_pane.pack(side=BOTTOM)
         tkroot.update_idletasks()              # force window to appear
 
@@ -227,11 +241,23 @@ class animate:
     # display a frame corresponding to iframe
 
     def display(self, iframe):
-        self.image_pane.configure(image=self.images[iframe])
+        if iframe != self.shown:
+            self.photo = PhotoImage(self.images.get(iframe))
+            self.shown = iframe
+        self.image_pane.configure(image=self.photo)
         self.slider_frame.set(iframe)
         textstr = "Frame: %d    File: %s" % (iframe, self.files[iframe])
         self.label_frame.configure(text=textstr)
 
+    # --------------------------------------------------------------------
+    # decode image file iframe, called by framecache
+    # Tk image is made when displayed since only main thread may use Tk
+
+    def load(self, iframe):
+        im = Image.open(self.files[iframe])
+        im.load()
+        return im
+
     # --------------------------------------------------------------------
 
     def frame(self, value):
@@ -9,12 +9,8 @@
 # bdump tool
 
 from __future__ import print_function, absolute_import
-import types
-import glob
-import re
-import subprocess
-import sys
-from os import popen
+import numpy as np
+from snapreader import snapreader, Snap
 oneline = "Read dump files with bond info"
 
 docstr = """
@@ -52,12 +48,14 @@ time,box,atoms,bonds,tris,lines = b.viz(index)   return list of viz objects
 
 # History
 #   11/10, Steve Plimpton (SNL): original version
+#   10/26, reading shared with ldump, mdump, tdump via snapreader class
 
 # Variables
 #   flist = list of dump file names
 #   increment = 1 if reading snapshots one-at-a-time
 #   nextfile = which file to read from via next()
 #   eof = ptr into current file for where to read via next()
+#   lazy = 1 if snapshot values are only parsed when first accessed
 #   nsnaps = # of snapshots
 #   snaps = list of snapshots
 #   names = dictionary of column names:
@@ -67,197 +65,22 @@ time,box,atoms,bonds,tris,lines = b.viz(index)   return list of viz objects
 #     natoms = # of atoms
 #     atoms[i][j] = 2d array of floats, i = 0 to natoms-1, j = 0 to ncols-1
 
-# Imports and external programs
-
-
-try:
-    import numpy as np
-    oldnumeric = False
-except BaseException:
-    import Numeric as np
-    oldnumeric = True
-
-try:
-    from DEFAULTS import PIZZA_GUNZIP
-except BaseException:
-    PIZZA_GUNZIP = "gunzip"
-
 # Class definition
 
 
-class bdump:
-
-    # --------------------------------------------------------------------
-
-    def __init__(self, *list):
-        self.snaps = []
-        self.nsnaps = 0
-        self.names = {}
-
-        # flist = list of all dump file names
-
-        words = list[0].split()
-        self.flist = []
-        for word in words:
-            self.flist += glob.glob(word)
-        if len(self.flist) == 0 and len(list) == 1:
-            raise Exception("no bdump file specified")
-
-        if len(list) == 1:
-            self.increment = 0
-            self.read_all()
-        else:
-            self.increment = 1
-            self.nextfile = 0
-            self.eof = 0
-
-    # --------------------------------------------------------------------
-
-    def read_all(self):
-
-        # read all snapshots from each file
-        # test for gzipped files
-
-        for file in self.flist:
-            if file[-3:] == ".gz":
-                f = popen("%s -c %s" % (PIZZA_GUNZIP, file), 'r')
-            else:
-                f = open(file)
-
-            snap = self.read_snapshot(f)
-            while snap:
-                self.snaps.append(snap)
-                print(snap.time, end=' ')
-                sys.stdout.flush()
-                snap = self.read_snapshot(f)
-
-            f.close()
-        print()
-
-        # sort entries by timestep, cull duplicates
-
-        self.snaps.sort(self.compare_time)
-        self.cull()
-        self.nsnaps = len(self.snaps)
-        print("read %d snapshots" % self.nsnaps)
-
-    # --------------------------------------------------------------------
-    # read next snapshot from list of files
-
-    def next(self):
-
-        if not self.increment:
-            raise Exception("cannot read incrementally")
-
-        # read next snapshot in current file using eof as pointer
-        # if fail, try next file
-        # if new snapshot time stamp already exists, read next snapshot
-
-        while 1:
-            f = open(self.flist[self.nextfile], 'rb')
-            f.seek(self.eof)
-            snap = self.read_snapshot(f)
-            if not snap:
-                self.nextfile += 1
-                if self.nextfile == len(self.flist):
-                    return -1
-                f.close()
-                self.eof = 0
-                continue
-            self.eof = f.tell()
-            f.close()
-            try:
-                self.findtime(snap.time)
-                continue
-            except BaseException:
-                break
-
-        self.snaps.append(snap)
-        snap = self.snaps[self.nsnaps]
-        self.nsnaps += 1
-
-        return snap.time
-
-    # --------------------------------------------------------------------
-    # read a single snapshot from file f
-    # return snapshot or 0 if failed
-    # assign column names if not already done and file is self-describing
-    # convert xs,xu to x
-
-    def read_snapshot(self, f):
-        try:
-            snap = Snap()
-            item = f.readline()
-            snap.time = int(f.readline().split()[0])    # just grab 1st field
-            item = f.readline()
-            snap.natoms = int(f.readline())
-            item = f.readline()
-
-            if snap.natoms:
-                words = f.readline().split()
-                ncol = len(words)
-                for i in range(1, snap.natoms):
-                    words += f.readline().split()
-                floats = list(map(float, words))
-                if oldnumeric:
-                    atoms = np.zeros((snap.natoms, ncol), np.Float)
-                else:
-                    atoms = np.zeros((snap.natoms, ncol), np.float)
-                start = 0
-                stop = ncol
-                for i in range(snap.natoms):
-                    atoms[i] = floats[start:stop]
-                    start = stop
-                    stop += ncol
-            else:
-                atoms = None
-            snap.atoms = atoms
-            return snap
-        except BaseException:
-            return 0
-
-    # --------------------------------------------------------------------
-    # map atom column names
-
-    def map(self, *pairs):
-        if len(pairs) % 2 != 0:
-            raise Exception("bdump map() requires pairs of mappings")
-        for i in range(0, len(pairs), 2):
-            j = i + 1
-            self.names[pairs[j]] = pairs[i] - 1
+class bdump(snapreader):
 
     # --------------------------------------------------------------------
-    # return vector of snapshot time stamps
+    # read header of a single snapshot from file f
+    # values are read by snapreader
 
-    def time(self):
-        vec = self.nsnaps * [0]
-        i = 0
-        for snap in self.snaps:
-            vec[i] = snap.time
-            i += 1
-        return vec
-
-    # --------------------------------------------------------------------
-    # sort snapshots on time stamp
-
-    def compare_time(self, a, b):
-        if a.time < b.time:
-            return -1
-        elif a.time > b.time:
-            return 1
-        else:
-            return 0
-
-    # --------------------------------------------------------------------
-    # delete successive snapshots with duplicate time stamp
-
-    def cull(self):
-        i = 1
-        while i < len(self.snaps):
-            if self.snaps[i].time == self.snaps[i - 1].time:
-                del self.snaps[i]
-            else:
-                i += 1
+    def read_header(self, f, snap):
+        item = f.readline()
+        snap.time = int(f.readline().split()[0])    # just grab 1st field
+        item = f.readline()
+        snap.natoms = int(f.readline())
+        item = f.readline()
+        return "atoms", snap.natoms
 
     # --------------------------------------------------------------------
     # return list of bonds to viz for snapshot isnap
@@ -286,17 +109,9 @@ class bdump:
         # create line list from id,type,atom1,atom2
         # abs() of type since could be negative
 
-        bonds = []
-        for i in range(snap.natoms):
-            atom = snap.atoms[i]
-            bonds.append([int(atom[id]), abs(int(atom[type])),
-                          int(atom[atom1]), int(atom[atom2])])
-
-        return time, None, None, bonds, None, None
-
-# --------------------------------------------------------------------
-# one snapshot
-
+        if not snap.natoms:
+            return time, None, None, [], None, None
+        bonds = snap.atoms[:, [id, type, atom1, atom2]].astype(int)
+        bonds[:, 1] = np.abs(bonds[:, 1])
 
-class Snap:
-    pass
+        return time, None, None, bonds.tolist(), None, None
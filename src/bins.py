@@ -0,0 +1,210 @@
+# Pizza.py toolkit, www.cs.sandia.gov/~sjplimp/pizza.html
+# Steve Plimpton, sjplimp@sandia.gov, Sandia National Laboratories
+#
+# Copyright (2005) Sandia Corporation.  Under the terms of Contract
+# DE-AC04-94AL85000 with Sandia Corporation, the U.S. Government retains
+# certain rights in this software.  This software is distributed under
+# the GNU General Public License.
+
+# bins tool
+
+from __future__ import print_function, absolute_import
+import numpy as np
+
+oneline = "Accumulate 1d/2d/3d binned atom counts over snapshots"
+
+docstr = """
+b = bins(N,lo,hi)                   N bins between lo and hi
+b = bins([Nx,Ny],[xlo,ylo],[xhi,yhi])        2d bins, same for 3d
+
+b.outside = "clip"                  treatment of coords outside lo-hi
+
+  "drop" = ignore them (default), "clip" = add them to the edge bins,
+  "wrap" = map them periodically into lo-hi
+
+b.add(x)                            bin N coords, x = N values or NxD array
+b.add(x,type)                       also count per atom type (1-Ntype)
+b.add(x,type,w)                     weight atoms with w (scalar or N values)
+
+b.snap(d,N,"z")                     bin selected atoms of timestep N of dump d
+b.snap(d,N,["x","y"],"mass",1)      weighted by a column, counted per type
+b.compute(d,"z")                    bin all selected snapshots of dump d
+n = b.stream(d,"z")                 read and bin remaining snapshots of d
+
+  cols = one column name per bin dimension, coords are used as stored
+  weight = column name, scalar, list of values or None for plain counts
+  types = 1 to also count per atom type (type column of d)
+  stream() works on dumps opened for incremental reading, dump("file",0)
+    reads snapshots via next(), bins them, and discards them again
+    so memory use is bounded by one snapshot
+    weight can also be a function f(snap) returning a scalar or N values
+    stream() returns the # of snapshots binned
+    a timestep repeated in a later file is skipped, as dump() does
+
+b.counts                            binned (weighted) counts, shape Nx,Ny,...
+b.tcounts                           same per type, shape Ntype,Nx,Ny,...
+b.nsnaps                            # of snapshots binned by snap()
+b.box                               box of last snapshot binned by snap()
+x = b.centers(dim)                  bin centers in dimension dim (0 to D-1)
+x = b.edges(dim)                    N+1 bin edges in dimension dim
+b.reset()                           zero all counts
+"""
+
+# History
+#   10/26, shared binning engine for histo and the density scripts
+
+# ToDo list
+
+# Variables
+#   nbins,lo,hi,delta = # of bins, bounds, bin size in each dimension
+#   outside = "drop", "clip" or "wrap"
+#   counts = D-dimensional array of counts
+#   tcounts = counts per type, None if no types were added
+#   ntypes = # of types in tcounts
+#   nsnaps = # of snapshots binned
+#   box = box of last snapshot binned
+
+# Class definition
+
+class bins:
+
+  # --------------------------------------------------------------------
+
+  def __init__(self,nbins,lo,hi):
+    self.nbins = np.array(nbins,dtype=np.int64).reshape(-1)
+    self.lo = np.array(lo,dtype=float).reshape(-1)
+    self.hi = np.array(hi,dtype=float).reshape(-1)
+    if not len(self.nbins) == len(self.lo) == len(self.hi):
+      raise Exception("bins requires one nbin,lo,hi per dimension")
+    if len(self.nbins) > 3 or (self.nbins < 1).any():
+      raise Exception("bins requires 1-3 dimensions with >= 1 bin each")
+    self.delta = (self.hi - self.lo) / self.nbins
+    self.outside = "drop"
+    self.box = None
+    self.reset()
+
+  # --------------------------------------------------------------------
+
+  def reset(self):
+    self.counts = np.zeros(self.nbins)
+    self.tcounts = None
+    self.ntypes = 0
+    self.nsnaps = 0
+
+  # --------------------------------------------------------------------
+
+  def centers(self,dim=0):
+    return self.lo[dim] + (np.arange(self.nbins[dim]) + 0.5)*self.delta[dim]
+
+  # --------------------------------------------------------------------
+
+  def edges(self,dim=0):
+    return self.lo[dim] + np.arange(self.nbins[dim]+1)*self.delta[dim]
+
+  # --------------------------------------------------------------------
+  # bin coords x, optionally by type and weighted
+  # all bins are addressed by one flat index so a single bincount suffices
+
+  def add(self,x,type=None,weight=None):
+    ndim = len(self.nbins)
+    x = np.asarray(x,dtype=float).reshape(-1,ndim)
+    index = np.floor((x - self.lo)/self.delta).astype(np.int64)
+
+    keep = None
+    if self.outside == "clip":
+      index = np.clip(index,0,self.nbins-1)
+    elif self.outside == "wrap":
+      index = np.mod(index,self.nbins)
+    elif self.outside == "drop":
+      keep = ((index >= 0) & (index < self.nbins)).all(axis=1)
+    else:
+      raise Exception("bins outside must be drop, clip or wrap")
+
+    if weight is not None:
+      weight = np.asarray(weight,dtype=float)
+      if weight.ndim == 0: weight = np.full(len(x),float(weight))
+    if type is not None:
+      type = np.asarray(type).astype(np.int64).reshape(-1)
+      typed = type >= 1
+      if keep is None: keep = typed
+      else: keep &= typed
+
+    if keep is not None:
+      index = index[keep]
+      if weight is not None: weight = weight[keep]
+      if type is not None: type = type[keep]
+
+    ncells = int(self.nbins.prod())
+    flat = np.ravel_multi_index(index.T,self.nbins)
+    self.counts += np.bincount(flat,weights=weight,
+                               minlength=ncells).reshape(self.nbins)
+
+    if type is None: return
+    ntypes = max(self.ntypes,int(type.max()) if len(type) else 0)
+    if self.tcounts is None:
+      self.tcounts = np.zeros([ntypes] + list(self.nbins))
+    elif ntypes > self.ntypes:
+      grown = np.zeros([ntypes] + list(self.nbins))
+      grown[:self.ntypes] = self.tcounts
+      self.tcounts = grown
+    self.ntypes = ntypes
+    flat += (type-1)*ncells
+    self.tcounts += np.bincount(flat,weights=weight,
+                                minlength=ntypes*ncells).reshape(self.tcounts.shape)
+
+  # --------------------------------------------------------------------
+  # bin selected atoms of one timestep of a dump
+
+  def snap(self,data,n,cols,weight=None,types=0):
+    self.snapone(data,data.snaps[data.findtime(n)],cols,weight,types)
+
+  # --------------------------------------------------------------------
+  # bin selected atoms of all selected timesteps of a dump
+
+  def compute(self,data,cols,weight=None,types=0):
+    for snap in data.snaps:
+      if snap.tselect: self.snapone(data,snap,cols,weight,types)
+
+  # --------------------------------------------------------------------
+  # read remaining snapshots of an incremental dump one at a time
+  # each snapshot is removed from the dump again once it is binned
+  # seen = timesteps already read, since removed snapshots no longer
+  #   let dump.next() skip a timestep repeated in a later file
+
+  def stream(self,data,cols,weight=None,types=0):
+    seen = set([snap.time for snap in data.snaps])
+    n = 0
+    while 1:
+      time = data.next()
+      if time == -1: break
+      snap = data.snaps[-1]
+      if time not in seen:
+        seen.add(time)
+        w = weight
+        if callable(weight): w = weight(snap)
+        self.snapone(data,snap,cols,w,types)
+        n += 1
+      del data.snaps[-1]
+      del data.fileNums[-1]
+      data.nsnaps -= 1
+      data.nselect -= 1
+    return n
+
+  # --------------------------------------------------------------------
+
+  def snapone(self,data,snap,cols,weight,types):
+    if isinstance(cols,str): cols = [cols]
+    self.box = [snap.xlo,snap.ylo,snap.zlo,snap.xhi,snap.yhi,snap.zhi]
+    self.nsnaps += 1
+    if not snap.natoms: return
+
+    select = snap.aselect != 0
+    atoms = snap.atoms[select]
+    x = atoms[:,[data.names[col] for col in cols]]
+    type = None
+    if types: type = atoms[:,data.names["type"]]
+    if isinstance(weight,str): weight = atoms[:,data.names[weight]]
+    elif weight is not None and np.ndim(weight) > 0:
+      weight = np.asarray(weight,dtype=float)
+      if len(weight) == snap.natoms: weight = weight[select]
+    self.add(x,type,weight)
@@ -16,6 +16,7 @@ import glob
 import sys
 from os import popen
 from copy import deepcopy
+import numpy as np
 oneline = "Read, create, manipulate ChemCell data files"
 
 docstr = """
@@ -62,6 +63,8 @@ c.bins(ID,nx,ny)                   set binning parameters for a surf
   triangulation of a shell is just done for the outer sphere
   for surftri(), one or more tri indices (1-N) must be listed
   for surfselect(), test is string like "$x < 2.0 and $y > 0.0"
+    test is applied to all vertices at once if it works on arrays,
+    e.g. "($x < 2.0) & ($y > 0.0)", else to one vertex at a time
   bins are used when particles are created inside/outside a surf
 
 c.part(ID,n,id_in)  	           create N particles inside object id_in
@@ -73,6 +76,8 @@ c.partsurf(ID,id_on)               change surf of existing 2d particle group
 c.seed(43284)			   set random # seed (def = 12345)
 
   generate particle positions randomly (unless otherwise noted)
+  part() and part2d() create and test candidate points in batches,
+    with same random # sequence and result as one point at a time
   for part(), id_in and id_out must be IDs of a surf, region, or union object
     inside a union object means inside any of the lower-level objects
     outside a union object means outside all of the lower-level objects
@@ -152,6 +157,7 @@ time,box,atoms,bonds,tris,lines = c.viz(index)   return list of viz objects
 
 # History
 #   11/05, Steve Plimpton (SNL): original version
+#   10/26, part(), part2d(), surfselect() test and create points in batches
 
 # ToDo list
 
@@ -545,42 +551,32 @@ class cdata:
         obj.vertices = []
         obj.triangles = []
 
-        # replace $var with o.vertices reference and compile test string
-
-        cmd1 = teststr.replace("$x", "o.vertices[v1][0]")
-        cmd1 = cmd1.replace("$y", "o.vertices[v1][1]")
-        cmd1 = "flag1 = " + cmd1.replace("$z", "o.vertices[v1][2]")
-        ccmd1 = compile(cmd1, '', 'single')
-
-        cmd2 = teststr.replace("$x", "o.vertices[v2][0]")
-        cmd2 = cmd2.replace("$y", "o.vertices[v2][1]")
-        cmd2 = "flag2 = " + cmd2.replace("$z", "o.vertices[v2][2]")
-        ccmd2 = compile(cmd2, '', 'single')
-
-        cmd3 = teststr.replace("$x", "o.vertices[v3][0]")
-        cmd3 = cmd3.replace("$y", "o.vertices[v3][1]")
-        cmd3 = "flag3 = " + cmd3.replace("$z", "o.vertices[v3][2]")
-        ccmd3 = compile(cmd3, '', 'single')
-
-        # loop over triangles in id_surf
-        # 3 vertices must satisfy all 3 tests for tri's inclusion in new surf
-        # obj
-
-        for tri in o.triangles:
-            v1 = tri[0] - 1
-            v2 = tri[1] - 1
-            v3 = tri[2] - 1
-            exec(ccmd1)
-            exec(ccmd2)
-            exec(ccmd3)
-            if flag1 and flag2 and flag3:
-                obj.vertices.append(o.vertices[v1][:])
-                obj.vertices.append(o.vertices[v2][:])
-                obj.vertices.append(o.vertices[v3][:])
-                obj.triangles.append(
-                    [obj.nvert + 1, obj.nvert + 2, obj.nvert + 3])
-                obj.nvert += 3
-                obj.ntri += 1
+        # apply test string to all vertices as arrays $x,$y,$z
+        # a test that does not work on arrays, e.g. one using "and",
+        #   is applied to one vertex at a time
+
+        vertices = np.array(o.vertices, dtype=float).reshape(-1, 3)
+        cmd = teststr.replace("$x", "x").replace("$y", "y").replace("$z", "z")
+        ccmd = compile(cmd, '', 'eval')
+        try:
+            flags = eval(ccmd, globals(), {"x": vertices[:, 0],
+                                           "y": vertices[:, 1],
+                                           "z": vertices[:, 2]})
+            flags = np.broadcast_to(np.asarray(flags, dtype=bool),
+                                    (len(vertices),))
+        except (ValueError, TypeError):
+            flags = np.array([bool(eval(ccmd, globals(),
+                                        {"x": v[0], "y": v[1], "z": v[2]}))
+                              for v in o.vertices], dtype=bool)
+
+        # 3 vertices must satisfy test for tri's inclusion in new surf obj
+
+        triangles = np.array(o.triangles, dtype=int).reshape(-1, 3) - 1
+        keep = triangles[flags[triangles].all(1)]
+        obj.ntri = len(keep)
+        obj.nvert = 3 * obj.ntri
+        obj.vertices = vertices[keep.ravel()].tolist()
+        obj.triangles = (np.arange(obj.nvert) + 1).reshape(-1, 3).tolist()
 
         # make any connections in new set of triangles
 
@@ -635,19 +631,33 @@ class cdata:
         zsize = zhi - zlo
 
         # generate particles until have enough that satisfy in/out constraints
+        # candidates are made and tested a batch at a time
+        # batch size follows the fraction accepted so far
+        # random #s of candidates after the last one needed are given back
 
         count = attempt = 0
+        batch = max(npart, 1000)
         while count < npart:
-            attempt += 1
-            x = xlo + self.random() * xsize
-            y = ylo + self.random() * ysize
-            z = zlo + self.random() * zsize
-            if not in_obj.inside(x, y, z):
-                continue
-            if out_id and out_obj.inside(x, y, z):
-                continue
-            obj.xyz.append([x, y, z])
-            count += 1
+            n = min(batch, CHUNK)
+            r = self.random.batch(3 * n).reshape(n, 3)
+            x = xlo + r[:, 0] * xsize
+            y = ylo + r[:, 1] * ysize
+            z = zlo + r[:, 2] * zsize
+            flags = in_obj.inside_array(x, y, z)
+            if out_id:
+                flags &= ~out_obj.inside_array(x, y, z)
+            hits = np.nonzero(flags)[0][:npart - count]
+            used = n
+            if count + len(hits) == npart:
+                used = int(hits[-1]) + 1
+                self.random.skip(-3 * (n - used))
+            obj.xyz += np.column_stack((x[hits], y[hits], z[hits])).tolist()
+            count += len(hits)
+            attempt += used
+            if count:
+                batch = int(1.1 * (npart - count) * attempt / count) + 100
+            else:
+                batch = 2 * n
 
         obj.center()
         print("Created %d particles in %d attempts" % (count, attempt))
@@ -675,10 +685,19 @@ class cdata:
             raise Exception("Illegal ID to place particles on")
         totalarea = on_obj.area()
 
-        for count in range(npart):
-            area = self.random() * totalarea
-            pt, norm = on_obj.loc2d(area, self.random)
-            obj.xyz.append(pt)
+        # objects whose loc2d() uses 2 random #s place all particles at once
+
+        if hasattr(on_obj, "loc2d_array"):
+            for i in range(0, npart, CHUNK):
+                n = min(CHUNK, npart - i)
+                r = self.random.batch(3 * n).reshape(n, 3)
+                pts = on_obj.loc2d_array(r[:, 0] * totalarea, r[:, 1], r[:, 2])
+                obj.xyz += pts.tolist()
+        else:
+            for count in range(npart):
+                area = self.random() * totalarea
+                pt, norm = on_obj.loc2d(area, self.random)
+                obj.xyz.append(pt)
 
         obj.center()
         print("Created %d particles on area of %g" % (npart, totalarea))
@@ -1372,6 +1391,11 @@ class cdata:
 EPSILON = 1.0e-6
 BIG = 1.0e20
 
+# max # of points per batch, max # of point/triangle pairs tested at once
+
+CHUNK = 100000
+PAIRS = 1 << 22
+
 REGION = 1
 SURFACE = 2
 GROUP = 3
@@ -1397,14 +1421,37 @@ IR = 2836
 class Random:
     def __init__(self, seed):
         self.seed = seed
+        self.powers = np.zeros(0, dtype=np.int64)
 
     def __call__(self):
-        k = self.seed / IQ
+        k = self.seed // IQ
         self.seed = IA * (self.seed - k * IQ) - IR * k
         if self.seed < 0:
             self.seed += IM
         return AM * self.seed
 
+    # next n random #s as an array, same as n calls
+    # k-th seed after this one = seed * IA^k mod IM
+    # powers = IA^1 ... IA^N mod IM, doubled in length until long enough
+
+    def batch(self, n):
+        if len(self.powers) < n:
+            powers = np.array([IA], dtype=np.int64)
+            while len(powers) < n:
+                step = pow(IA, len(powers), IM)
+                powers = np.concatenate((powers, powers * step % IM))
+            self.powers = powers
+        if not n:
+            return np.zeros(0)
+        seeds = self.powers[:n] * self.seed % IM
+        self.seed = int(seeds[-1])
+        return AM * seeds
+
+    # move seed n #s ahead, or back if n < 0
+
+    def skip(self, n):
+        self.seed = self.seed * pow(IA, n % (IM - 1), IM) % IM
+
 # --------------------------------------------------------------------
 # triangulated surface
 
@@ -1487,6 +1534,23 @@ class Surface:
                 for j in range(jlo, jhi + 1):
                     self.bin[i][j].append(m)
 
+        # same bins as flat arrays for inside_array(), bin i,j = i*nbiny + j
+        # corners = ntri x 3 x 3 coords of triangle vertices
+        # bounds = 4 x ntri xlo,xhi,ylo,yhi of 2d triangles
+
+        bins = [self.bin[i][j] for i in range(self.nbinx)
+                for j in range(self.nbiny)]
+        self.bincount = np.array([len(bin) for bin in bins], dtype=int)
+        self.binstart = np.cumsum(self.bincount) - self.bincount
+        self.bintri = np.array([m for bin in bins for m in bin], dtype=int)
+        vertices = np.array(self.vertices, dtype=float).reshape(-1, 3)
+        triangles = np.array(self.triangles, dtype=int).reshape(-1, 3)
+        self.corners = vertices[triangles - 1]
+        self.bounds = np.array([self.corners[:, :, 0].min(1),
+                                self.corners[:, :, 0].max(1),
+                                self.corners[:, :, 1].min(1),
+                                self.corners[:, :, 1].max(1)])
+
         print("Done with binning")
 
     # check for inside assumes that surf is a closed set of triangles
@@ -1575,6 +1639,90 @@ class Surface:
 
         return hit % 2
 
+    # inside() for arrays of points, return array of True/False
+    # each point is paired with every triangle in its bin,
+    #   up to PAIRS pairs are tested at once with the same steps as inside()
+    # points are sorted by bin so pairs read triangles in order
+    # a point is inside if an odd number of its pairs intersect
+
+    def inside_array(self, x, y, z):
+        x = np.asarray(x, dtype=float)
+        y = np.asarray(y, dtype=float)
+        z = np.asarray(z, dtype=float)
+        hits = np.zeros(len(x), dtype=int)
+
+        ix = ((x - self.xlo) * self.dxinv).astype(int)
+        iy = ((y - self.ylo) * self.dyinv).astype(int)
+        pts = np.nonzero((ix >= 0) & (ix < self.nbinx) &
+                         (iy >= 0) & (iy < self.nbiny))[0]
+        bins = ix[pts] * self.nbiny + iy[pts]
+        order = np.argsort(bins, kind="stable")
+        pts, bins = pts[order], bins[order]
+        counts = self.bincount[bins]
+        total = np.cumsum(counts)
+
+        first = 0
+        while first < len(pts):
+            last = np.searchsorted(total, total[first] - counts[first] + PAIRS,
+                                   side="right")
+            last = max(last, first + 1)
+            n = counts[first:last]
+            offset = np.arange(n.sum()) - np.repeat(np.cumsum(n) - n, n)
+            point = np.repeat(pts[first:last], n)
+            itri = self.bintri[np.repeat(self.binstart[bins[first:last]], n) +
+                               offset]
+            hit = self.intersect(x[point], y[point], z[point], itri)
+            hits += np.bincount(point[hit], minlength=len(x))
+            first = last
+
+        return hits % 2 == 1
+
+    # True for each pair of point x,y,z and triangle itri where
+    #   line segment from x,y,z to x,y,INF intersects the tri
+    # pairs outside the tri's 2d bounding box are dropped first
+
+    def intersect(self, x, y, z, itri):
+        xlo, xhi, ylo, yhi = self.bounds
+        near = (x >= xlo[itri]) & (x <= xhi[itri]) & \
+            (y >= ylo[itri]) & (y <= yhi[itri])
+        pairs = np.nonzero(near)[0]
+        x, y, z = x[pairs], y[pairs], z[pairs]
+        corners = self.corners[itri[pairs]]
+        v1 = corners[:, 0]
+        v2 = corners[:, 1]
+        v3 = corners[:, 2]
+
+        # is x,y inside 2d triangle ?
+
+        c1 = (v2[:, 0] - v1[:, 0]) * (y - v1[:, 1]) - \
+            (v2[:, 1] - v1[:, 1]) * (x - v1[:, 0])
+        c2 = (v3[:, 0] - v2[:, 0]) * (y - v2[:, 1]) - \
+            (v3[:, 1] - v2[:, 1]) * (x - v2[:, 0])
+        c3 = (v1[:, 0] - v3[:, 0]) * (y - v3[:, 1]) - \
+            (v1[:, 1] - v3[:, 1]) * (x - v3[:, 0])
+        out = (c1 < 0) & ((c2 > 0) | (c3 > 0))
+        out |= (c1 > 0) & ((c2 < 0) | (c3 < 0))
+        out |= (c1 == 0) & (((c2 < 0) & (c3 > 0)) | ((c2 > 0) & (c3 < 0)))
+
+        # z of x,y point on plane of tri, as in inside()
+        # tris seen edge-on give nan and are not hit
+
+        px = x - v1[:, 0]
+        py = y - v1[:, 1]
+        vx = v2[:, 0] - v1[:, 0]
+        vy = v2[:, 1] - v1[:, 1]
+        wx = v3[:, 0] - v2[:, 0]
+        wy = v3[:, 1] - v2[:, 1]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            alpha = np.where(wy != 0,
+                             (px - py * wx / wy) / (vx - vy * wx / wy),
+                             py / vy)
+            beta = np.where(wx != 0, (px - alpha * vx) / wx,
+                            (py - alpha * vy) / wy)
+            pz = alpha * (v2[:, 2] - v1[:, 2]) + beta * (v3[:, 2] - v2[:, 2])
+            near[pairs] = ~out & (z <= pz + v1[:, 2])
+        return near
+
     # surface area
     # areas = cummulative total area of all triangles
     # triangle area = 1/2 of magnitude of cross product of 2 edge vectors
@@ -1618,6 +1766,19 @@ class Surface:
         list = v1 + v2 + v3
         return [x, y, z], normal(list[0:3], list[3:6], list[6:9])
 
+    # loc2d() for arrays of areas and its 2 random #s, return N x 3 points
+
+    def loc2d_array(self, area, r1, r2):
+        i = np.minimum(np.searchsorted(self.areas, area, side="right"),
+                       self.ntri - 1)
+        triangles = np.array(self.triangles, dtype=int).reshape(-1, 3)[i] - 1
+        vertices = np.array(self.vertices, dtype=float).reshape(-1, 3)
+        v1 = vertices[triangles[:, 0]]
+        v2 = vertices[triangles[:, 1]]
+        v3 = vertices[triangles[:, 2]]
+        r1, r2 = np.maximum(r1, r2)[:, None], np.minimum(r1, r2)[:, None]
+        return v1 + r1 * (v2 - v1) + r2 * (v3 - v2)
+
 # --------------------------------------------------------------------
 # group of particles
 
@@ -1679,6 +1840,13 @@ class Box:
             return 0
         return 1
 
+    # inside() for arrays of points, return array of True/False
+
+    def inside_array(self, x, y, z):
+        return (x >= self.xlo) & (x <= self.xhi) & \
+            (y >= self.ylo) & (y <= self.yhi) & \
+            (z >= self.zlo) & (z <= self.zhi)
+
     # triangulate the region
     # set nvert,ntri,vertices,triangles,connections
     # convert vertices from unit box to lo/hi box
@@ -1749,6 +1917,25 @@ class Box:
             return [self.xlo + r1 * xsize, self.ylo +
                     r2 * ysize, self.zhi], [0, 0, 1]
 
+    # loc2d() for arrays of areas and its 2 random #s, return N x 3 points
+    # face = which of 6 faces, in the order loc2d() tests them
+
+    def loc2d_array(self, area, r1, r2):
+        lo = np.array([self.xlo, self.ylo, self.zlo])
+        hi = np.array([self.xhi, self.yhi, self.zhi])
+        face = np.minimum(np.searchsorted(self.areas[:5], area, side="left"),
+                          5)
+        dim = face // 2
+        pts = np.empty((len(area), 3))
+        pts[:] = lo
+        first = np.where(dim == 0, 1, 0)
+        second = np.where(dim == 2, 1, 2)
+        rows = np.arange(len(area))
+        pts[rows, first] += r1 * (hi - lo)[first]
+        pts[rows, second] += r2 * (hi - lo)[second]
+        pts[rows, dim] = np.where(face % 2, hi[dim], lo[dim])
+        return pts
+
     # ChemCell text to create the region
 
     def command(self):
@@ -1785,6 +1972,14 @@ class Sphere:
             return 0
         return 1
 
+    # inside() for arrays of points, return array of True/False
+
+    def inside_array(self, x, y, z):
+        dx = x - self.x
+        dy = y - self.y
+        dz = z - self.z
+        return dx * dx + dy * dy + dz * dz <= self.rsq
+
     # triangulate the region
     # set nvert,ntri,vertices,triangles,connections
     # convert vertices from unit box to sphere at (x,y,z) with radius r
@@ -1859,6 +2054,13 @@ class Shell(Sphere):
             return 0
         return 1
 
+    def inside_array(self, x, y, z):
+        dx = x - self.x
+        dy = y - self.y
+        dz = z - self.z
+        rsq = dx * dx + dy * dy + dz * dz
+        return (rsq <= self.rsq) & (rsq >= self.innersq)
+
     def command(self):
         return "%s shell %g %g %g %g %g" % (self.id, self.x, self.y, self.z,
                                             self.r, self.rinner)
@@ -1914,6 +2116,13 @@ class Cylinder:
             return 0
         return 1
 
+    # inside() for arrays of points, return array of True/False
+
+    def inside_array(self, x, y, z):
+        d1, d2, d3 = axial(self.axis, self.c1, self.c2, x, y, z)
+        return (d1 * d1 + d2 * d2 <= self.rsq) & \
+            (d3 >= self.lo) & (d3 <= self.hi)
+
     # triangulate the region
     # set nvert,ntri,vertices,triangles,connections
     # convert vertices from unit box to cylinder with correct axis
@@ -2080,6 +2289,14 @@ class Capped:
                 return 0
         return 1
 
+    # inside() for arrays of points, return array of True/False
+    # d3 clipped to lo,hi is nearest point on axis, as for the 2 caps
+
+    def inside_array(self, x, y, z):
+        d1, d2, d3 = axial(self.axis, self.c1, self.c2, x, y, z)
+        d3 = d3 - np.clip(d3, self.lo, self.hi)
+        return d1 * d1 + d2 * d2 + d3 * d3 <= self.rsq
+
     # triangulate the region
     # set nvert,ntri,vertices,triangles,connections
     # convert vertices from unit box to cylinder with correct axis
@@ -2283,6 +2500,14 @@ class Union:
                 return 1
         return 0
 
+    # inside() for arrays of points, return array of True/False
+
+    def inside_array(self, x, y, z):
+        flags = np.zeros(len(x), dtype=bool)
+        for obj in self.objs:
+            flags |= obj.inside_array(x, y, z)
+        return flags
+
     # surface area of union
     # areas = cummulative total area for child objects
 
@@ -2304,6 +2529,17 @@ class Union:
             area -= self.areas[i]
         return self.objs[i].loc2d(area, random)
 
+# --------------------------------------------------------------------
+# offsets of arrays of points from axis c1,c2 of a cylinder, and along it
+
+
+def axial(axis, c1, c2, x, y, z):
+    if axis == 'x':
+        return y - c1, z - c2, x
+    elif axis == 'y':
+        return x - c1, z - c2, y
+    return x - c1, y - c2, z
+
 # --------------------------------------------------------------------
 # return c = a x b
 
@@ -10,6 +10,8 @@
 
 from __future__ import print_function, absolute_import
 import sys
+import numpy as np
+import textwriter
 oneline = "Convert LAMMPS snapshots to AtomEye CFG format"
 
 docstr = """
@@ -25,6 +27,7 @@ c.single(N,"file")      write snapshot for timestep N to file.cfg
 
 # History
 #   11/06, Aidan Thompson (SNL): original version
+#   10/26, atoms written as whole arrays via textwriter
 
 # ToDo list
 # should decide if dump is scaled or not, since CFG prints in scaled coords
@@ -67,32 +70,7 @@ class cfg:
                 break
             time, box, atoms, bonds, tris, lines = self.data.viz(which)
 
-            xlen = box[3] - box[0]
-            ylen = box[4] - box[1]
-            zlen = box[5] - box[2]
-
-            print("Number of particles = %d " % len(atoms), file=f)
-            print("# Timestep %d \n#\nA = 1.0 Angstrom" % time, file=f)
-            print("H0(1,1) = %20.10f A " % xlen, file=f)
-            print("H0(1,2) = 0.0 A ", file=f)
-            print("H0(1,3) = 0.0 A ", file=f)
-            print("H0(2,1) = 0.0 A ", file=f)
-            print("H0(2,2) = %20.10f A " % ylen, file=f)
-            print("H0(2,3) = 0.0 A ", file=f)
-            print("H0(3,1) = 0.0 A ", file=f)
-            print("H0(3,2) = 0.0 A ", file=f)
-            print("H0(3,3) = %20.10f A " % zlen, file=f)
-            print("#", file=f)
-
-            for atom in atoms:
-                itype = int(atom[1])
-                xfrac = (atom[2] - box[0]) / xlen
-                yfrac = (atom[3] - box[1]) / ylen
-                zfrac = (atom[4] - box[2]) / zlen
-#        print >>f,"1.0  %d   %15.10f  %15.10f  %15.10f  %15.10f  %15.10f  %15.10f " % (itype,xfrac,yfrac,zfrac,atom[5],atom[6],atom[7])
-                print(
-                    "1.0  %d   %15.10f  %15.10f  %15.10f  0.0 0.0 0.0 " %
-                    (itype, xfrac, yfrac, zfrac), file=f)
+            self.write(f, time, box, atoms)
 
             print(time, end=' ')
             sys.stdout.flush()
@@ -116,43 +94,9 @@ class cfg:
                 break
             time, box, atoms, bonds, tris, lines = self.data.viz(which)
 
-            if n < 10:
-                file = root + "000" + str(n)
-            elif n < 100:
-                file = root + "00" + str(n)
-            elif n < 1000:
-                file = root + "0" + str(n)
-            else:
-                file = root + str(n)
-            file += ".cfg"
+            file = textwriter.numbered(root, n, ".cfg")
             f = open(file, "w")
-
-            xlen = box[3] - box[0]
-            ylen = box[4] - box[1]
-            zlen = box[5] - box[2]
-
-            print("Number of particles = %d " % len(atoms), file=f)
-            print("# Timestep %d \n#\nA = 1.0 Angstrom" % time, file=f)
-            print("H0(1,1) = %20.10f A " % xlen, file=f)
-            print("H0(1,2) = 0.0 A ", file=f)
-            print("H0(1,3) = 0.0 A ", file=f)
-            print("H0(2,1) = 0.0 A ", file=f)
-            print("H0(2,2) = %20.10f A " % ylen, file=f)
-            print("H0(2,3) = 0.0 A ", file=f)
-            print("H0(3,1) = 0.0 A ", file=f)
-            print("H0(3,2) = 0.0 A ", file=f)
-            print("H0(3,3) = %20.10f A " % zlen, file=f)
-            print("#", file=f)
-
-            for atom in atoms:
-                itype = int(atom[1])
-                xfrac = (atom[2] - box[0]) / xlen
-                yfrac = (atom[3] - box[1]) / ylen
-                zfrac = (atom[4] - box[2]) / zlen
-#        print >>f,"1.0  %d   %15.10f  %15.10f  %15.10f  %15.10f  %15.10f  %15.10f " % (itype,xfrac,yfrac,zfrac,atom[5],atom[6],atom[7])
-                print(
-                    "1.0  %d   %15.10f  %15.10f  %15.10f  0.0 0.0 0.0 " %
-                    (itype, xfrac, yfrac, zfrac), file=f)
+            self.write(f, time, box, atoms)
 
             print(time, end=' ')
             sys.stdout.flush()
@@ -174,7 +118,13 @@ class cfg:
         which = self.data.findtime(time)
         time, box, atoms, bonds, tris, lines = self.data.viz(which)
         f = open(file, "w")
+        self.write(f, time, box, atoms)
+        f.close()
+
+    # --------------------------------------------------------------------
+    # write one snapshot in scaled coords, all atoms formatted as one array
 
+    def write(self, f, time, box, atoms):
         xlen = box[3] - box[0]
         ylen = box[4] - box[1]
         zlen = box[5] - box[2]
@@ -192,14 +142,9 @@ class cfg:
         print("H0(3,3) = %20.10f A " % zlen, file=f)
         print("#", file=f)
 
-        for atom in atoms:
-            itype = int(atom[1])
-            xfrac = (atom[2] - box[0]) / xlen
-            yfrac = (atom[3] - box[1]) / ylen
-            zfrac = (atom[4] - box[2]) / zlen
-#        print >>f,"1.0  %d   %15.10f  %15.10f  %15.10f  %15.10f  %15.10f  %15.10f " % (itype,xfrac,yfrac,zfrac,atom[5],atom[6],atom[7])
-            print(
-                "1.0  %d   %15.10f  %15.10f  %15.10f  0.0 0.0 0.0 " %
-                (itype, xfrac, yfrac, zfrac), file=f)
-
-        f.close()
+        atoms = np.asarray(atoms, dtype=float).reshape(-1, 5)
+        frac = (atoms[:, 2:5] - np.array(box[0:3])) / \
+            np.array([xlen, ylen, zlen])
+        textwriter.columns(
+            f, "1.0  %d   %15.10f  %15.10f  %15.10f  0.0 0.0 0.0 \n",
+            atoms[:, 1].astype(int), frac[:, 0], frac[:, 1], frac[:, 2])
@@ -10,7 +10,9 @@
 
 from __future__ import print_function, absolute_import
 import math
-from data import data
+import numpy as np
+from data import data, Section
+import textwriter
 oneline = "Create bead-spring chains for LAMMPS input"
 
 docstr = """
@@ -22,6 +24,7 @@ c.mtype = 2    		    set type of monomers (def = 1)
 c.btype = 1           	    set type of bonds (def = 1)
 c.blen = 0.97               set length of bonds (def = 0.97)
 c.dmin = 1.02               set min dist from i-1 to i+1 site (def = 1.02)
+c.legacy = 1                1 = one monomer at a time, 0 = array walks (def)
 
 c.id = "chain"              set molecule ID to chain # (default)
 c.id = "end1"               set molecule ID to count from one end of chain
@@ -31,12 +34,16 @@ c.build(100,10)		    create 100 chains, each of length 10
 
   can be invoked multiple times interleaved with different settings
   must fill box with total of N monomers
+  legacy = 0 grows all chains of a build() together from a NumPy generator
+  legacy = 1 reproduces the monomer-by-monomer sequence of original version
+  both give the same chain statistics, but not the same coordinates
 
 c.write("data.file")        write out all built chains to LAMMPS data file
 """
 
 # History
 #   8/05, Steve Plimpton (SNL): original version
+#   10/26, chains grown as arrays, legacy option for original sequence
 
 # ToDo list
 
@@ -49,8 +56,11 @@ c.write("data.file")        write out all built chains to LAMMPS data file
 #   blen = length of bonds
 #   dmin = minimum distance from i-1 to i+1
 #   id = "chain","end1",or "end2"
-#   atoms = list of atoms
-#   bonds = list of bonds
+#   legacy = 1 for scalar build with original random # sequence
+#   rng = NumPy random generator for array builds, seeded from seed
+#   rngseed = seed the generator was created with
+#   atoms = list of atom arrays, one per build
+#   bonds = list of bond arrays, one per build
 #   xprd,yprd,zprd = x,y,z box size
 #   xlo,ylo,zlo = -xyz prd / 2
 #   xhi,yhi,zhi = x,y,zprd /2
@@ -79,6 +89,9 @@ class chain:
         self.blen = 0.97
         self.dmin = 1.02
         self.id = "chain"
+        self.legacy = 0
+        self.rng = None
+        self.rngseed = None
         self.atoms = []
         self.bonds = []
 
@@ -100,16 +113,85 @@ class chain:
     # --------------------------------------------------------------------
 
     def build(self, n, nper):
-        for ichain in range(n):
-            atoms = []
-            bonds = []
-            id_atom_prev = id_mol_prev = id_bond_prev = 0
-            if len(self.atoms):
-                id_atom_prev = self.atoms[-1][0]
-                id_mol_prev = self.atoms[-1][1]
-            if len(self.bonds):
-                id_bond_prev = self.bonds[-1][0]
+        if self.id not in ("chain", "end1", "end2"):
+            raise Exception("chain ID is not a valid value")
+        if self.legacy:
+            xyz, image = self.walk_legacy(n, nper)
+        else:
+            xyz, image = self.walk(n, nper)
+
+        id_atom_prev = id_mol_prev = id_bond_prev = 0
+        for atoms in self.atoms:
+            if len(atoms):
+                id_atom_prev = atoms[-1, 0]
+                id_mol_prev = atoms[-1, 1]
+        for bonds in self.bonds:
+            if len(bonds):
+                id_bond_prev = bonds[-1, 0]
+
+        imonomer = np.tile(np.arange(nper), n)
+        if self.id == "chain":
+            idmol = id_mol_prev + 1 + np.repeat(np.arange(n), nper)
+        elif self.id == "end1":
+            idmol = imonomer + 1
+        elif self.id == "end2":
+            idmol = imonomer + 1
+            idmol = np.where(idmol > nper / 2, nper - imonomer, idmol)
+
+        atoms = np.empty((n * nper, 9))
+        atoms[:, 0] = id_atom_prev + np.arange(n * nper) + 1
+        atoms[:, 1] = idmol
+        atoms[:, 2] = self.mtype
+        atoms[:, 3:6] = xyz
+        atoms[:, 6:9] = image
+
+        # a bond from each monomer but the first to the one before it
+
+        second = atoms[imonomer > 0, 0]
+        bonds = np.empty((len(second), 4), dtype=int)
+        bonds[:, 0] = id_bond_prev + np.arange(len(second)) + 1
+        bonds[:, 1] = self.btype
+        bonds[:, 2] = second - 1
+        bonds[:, 3] = second
+
+        self.atoms.append(atoms)
+        self.bonds.append(bonds)
+
+    # --------------------------------------------------------------------
+    # grow n chains of nper monomers one step at a time
+    # each step places the next monomer of all chains at once,
+    #   chains whose new monomer is within dmin of monomer i-2 retry
+    # return wrapped coords and image flags, chain by chain
+
+    def walk(self, n, nper):
+        rng = self.generator()
+        lo = np.array([self.xlo, self.ylo, self.zlo])
+        prd = np.array([self.xprd, self.yprd, self.zprd])
+
+        xyz = np.empty((n, nper, 3))
+        if nper:
+            xyz[:, 0] = lo + rng.random_sample((n, 3)) * prd
+        for imonomer in range(1, nper):
+            todo = np.arange(n)
+            while len(todo):
+                new = xyz[todo, imonomer - 1] + \
+                    self.blen * directions(rng, len(todo))
+                if imonomer >= 2:
+                    delta = new - xyz[todo, imonomer - 2]
+                    ok = np.sqrt((delta * delta).sum(1)) > self.dmin
+                else:
+                    ok = np.ones(len(todo), dtype=bool)
+                xyz[todo[ok], imonomer] = new[ok]
+                todo = todo[~ok]
+
+        return self.pbc_array(xyz.reshape(-1, 3))
 
+    # --------------------------------------------------------------------
+    # original monomer-by-monomer build, same args and return as walk()
+
+    def walk_legacy(self, n, nper):
+        atoms = []
+        for ichain in range(n):
             for imonomer in range(nper):
                 if imonomer == 0:
                     x = self.xlo + self.random() * self.xprd
@@ -127,60 +209,45 @@ class chain:
                             rsq = dx * dx + dy * dy + dz * dz
                         r = math.sqrt(rsq)
                         dx, dy, dz = dx / r, dy / r, dz / r
-                        x = atoms[-1][3] + dx * self.blen
-                        y = atoms[-1][4] + dy * self.blen
-                        z = atoms[-1][5] + dz * self.blen
+                        x = atoms[-1][0] + dx * self.blen
+                        y = atoms[-1][1] + dy * self.blen
+                        z = atoms[-1][2] + dz * self.blen
                         restriction = False
                         if imonomer >= 2:
-                            dx = x - atoms[-2][3]
-                            dy = y - atoms[-2][4]
-                            dz = z - atoms[-2][5]
+                            dx = x - atoms[-2][0]
+                            dy = y - atoms[-2][1]
+                            dz = z - atoms[-2][2]
                             if math.sqrt(
                                     dx * dx + dy * dy + dz * dz) <= self.dmin:
                                 restriction = True
 
                 x, y, z, ix, iy, iz = self.pbc(x, y, z, ix, iy, iz)
-                idatom = id_atom_prev + imonomer + 1
-                if self.id == "chain":
-                    idmol = id_mol_prev + 1
-                elif self.id == "end1":
-                    idmol = imonomer + 1
-                elif self.id == "end2":
-                    idmol = imonomer + 1
-                    if idmol > nper / 2:
-                        idmol = nper - imonomer
-                else:
-                    raise Exception("chain ID is not a valid value")
-
-                atoms.append([idatom, idmol, self.mtype, x, y, z, ix, iy, iz])
-                if imonomer:
-                    bondid = id_bond_prev + imonomer
-                    bonds.append([bondid, self.btype, idatom - 1, idatom])
+                atoms.append([x, y, z, ix, iy, iz])
 
-            self.atoms += atoms
-            self.bonds += bonds
+        atoms = np.array(atoms, dtype=float).reshape(-1, 6)
+        return atoms[:, :3], atoms[:, 3:]
 
     # --------------------------------------------------------------------
 
     def write(self, file):
-        if len(self.atoms) != self.n:
+        atoms = np.concatenate(self.atoms + [np.zeros((0, 9))])
+        bonds = np.concatenate(self.bonds + [np.zeros((0, 4), dtype=int)])
+        if len(atoms) != self.n:
             raise Exception("%d monomers instead of requested %d" %
-                            (len(self.atoms), self.n))
+                            (len(atoms), self.n))
 
-        list = [atom[2] for atom in self.atoms]
-        atypes = max(list)
+        atypes = int(atoms[:, 2].max())
 
         btypes = 0
-        if len(self.bonds):
-            list = [bond[1] for bond in self.bonds]
-            btypes = max(list)
+        if len(bonds):
+            btypes = int(bonds[:, 1].max())
 
         # create the data file
 
         d = data()
         d.title = "LAMMPS FENE chain data file"
-        d.headers["atoms"] = len(self.atoms)
-        d.headers["bonds"] = len(self.bonds)
+        d.headers["atoms"] = len(atoms)
+        d.headers["bonds"] = len(bonds)
         d.headers["atom types"] = atypes
         d.headers["bond types"] = btypes
         d.headers["xlo xhi"] = (self.xlo, self.xhi)
@@ -192,19 +259,11 @@ class chain:
             lines.append("%d 1.0\n" % (i + 1))
         d.sections["Masses"] = lines
 
-        lines = []
-        for atom in self.atoms:
-            line = "%d %d %d %g %g %g %d %d %d\n" % \
-                   (atom[0], atom[1], atom[2], atom[3], atom[4], atom[5],
-                    atom[6], atom[7], atom[8])
-            lines.append(line)
-        d.sections["Atoms"] = lines
+        lines = textwriter.lines("%d %d %d %g %g %g %d %d %d", *atoms.T)
+        d.sections["Atoms"] = Section([line + "\n" for line in lines])
 
-        lines = []
-        for bond in self.bonds:
-            line = "%d %d %d %d\n" % (bond[0], bond[1], bond[2], bond[3])
-            lines.append(line)
-        d.sections["Bonds"] = lines
+        lines = textwriter.lines("%d %d %d %d", *bonds.T.astype(float))
+        d.sections["Bonds"] = Section([line + "\n" for line in lines])
 
         d.write(file)
 
@@ -231,10 +290,29 @@ class chain:
             iz += 1
         return x, y, z, ix, iy, iz
 
+    # --------------------------------------------------------------------
+    # wrap N x 3 unwrapped coords into periodic box
+    # return wrapped coords and N x 3 image flags
+
+    def pbc_array(self, xyz):
+        lo = np.array([self.xlo, self.ylo, self.zlo])
+        prd = np.array([self.xprd, self.yprd, self.zprd])
+        image = np.floor((xyz - lo) / prd)
+        return xyz - image * prd, image
+
+    # --------------------------------------------------------------------
+    # NumPy generator for array builds, created again if seed is reset
+
+    def generator(self):
+        if self.rng is None or self.rngseed != self.seed:
+            self.rng = np.random.RandomState(self.seed)
+            self.rngseed = self.seed
+        return self.rng
+
     # --------------------------------------------------------------------
 
     def random(self):
-        k = self.seed / IQ
+        k = self.seed // IQ
         self.seed = IA * (self.seed - k * IQ) - IR * k
         if self.seed < 0:
             self.seed += IM
@@ -249,3 +327,18 @@ AM = 1.0 / IM
 IA = 16807
 IQ = 127773
 IR = 2836
+
+# --------------------------------------------------------------------
+# n random unit vectors, points in a cube rejected outside unit sphere
+
+
+def directions(rng, n):
+    dirs = np.empty((n, 3))
+    todo = np.arange(n)
+    while len(todo):
+        d = 2.0 * rng.random_sample((len(todo), 3)) - 1.0
+        rsq = (d * d).sum(1)
+        ok = (rsq <= 1.0) & (rsq > 0.0)
+        dirs[todo[ok]] = d[ok] / np.sqrt(rsq[ok])[:, None]
+        todo = todo[~ok]
+    return dirs
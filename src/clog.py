@@ -13,6 +13,9 @@ import glob
 import re
 import sys
 from os import popen
+from subprocess import Popen, PIPE
+import numpy as np
+import columnfile
 oneline = "Read ChemCell and SPPARKS log files and extract time-series data"
 
 docstr = """
@@ -21,11 +24,19 @@ c = clog("log1 log2.gz")             can be gzipped
 c = clog("file*")                    wildcard expands to multiple files
 c = clog("log.cell","Time")          2nd arg = start string for time section
 c = clog("log.cell","",0)            3rd arg = average all runs
+c = clog("log.*","","Time")          3rd arg = vector that aligns runs
+c = clog("conc.npz log.cell")        read binary column files written by write()
 
   incomplete and duplicate thermo entries are deleted
   if specify 2nd arg, it delimits a time section
   no 2nd arg or empty string, use default which is ChemCell specific
   if specify any 3rd arg, average all runs, assume all start at time 0
+    runs are interpolated to the time stamps of the longest run,
+    aligned on the vector named by 3rd arg,
+    else on "Time" if it exists, else on the 1st vector
+    a run only adds to the average up to its last time stamp
+  files ending in .npz or .parquet are read as binary column files,
+    they can be mixed with log files if they hold the same vectors
 
 nvec = c.nvec                        # of vectors of thermo info
 nlen = c.nlen                        length of each vectors
@@ -33,13 +44,18 @@ names = c.names                      list of vector names
 a,b,... = c.get("A","B",...)         return one or more vectors of values
 c.write("file.txt")	 	     write all vectors to a file
 c.write("file.txt","A","B",...)      write listed vectors to a file
+c.write("file.npz","A","B",...)      write vectors as binary columns
 
   get and write allow abbreviated (uniquely) vector names
+  get returns NumPy arrays that are views into the stored data
+  file ending in .npz = NumPy arrays, .parquet = Parquet (needs pyarrow)
 """
 
 # History
 #   1/06, Steve Plimpton (SNL): original version
 #   2/09, modified to allow different firststr for different log files
+#   10/26, write and read binary column files (.npz, .parquet)
+#   10/26, data stored as 2d NumPy array, runs averaged on a common time grid
 
 # ToDo list
 
@@ -48,8 +64,11 @@ c.write("file.txt","A","B",...)      write listed vectors to a file
 #   nlen = length of each vector
 #   names = list of vector names
 #   ptr = dictionary, key = name, value = index into data for which column
-#   data[i][j] = 2d array of floats, i = 0 to # of entries, j = 0 to nvecs-1
+#   data[i][j] = 2d NumPy array of floats,
+#     i = 0 to # of entries, j = 0 to nvecs-1
 #   firststr = string that begins a time-series section in log file
+#   ave = 1 if runs are averaged, else 0
+#   align = name of vector runs are aligned on when averaged, "" = default
 
 # Imports and external programs
 
@@ -70,9 +89,10 @@ class clog:
         self.nvec = 0
         self.names = []
         self.ptr = {}
-        self.data = []
+        self.data = np.zeros((0, 0))
         self.firststr = "Step Time"
         self.ave = 0
+        self.align = ""
 
         # flist = list of all log file names
 
@@ -87,6 +107,8 @@ class clog:
             self.firststr = list[1]
         if len(list) == 3:
             self.ave = 1
+            if isinstance(list[2], str):
+                self.align = list[2]
 
         self.read_all()
 
@@ -94,21 +116,26 @@ class clog:
     # read all log data from all files
 
     def read_all(self):
-        self.read_header(self.flist[0])
+        texts = [file for file in self.flist if not columnfile.cached(file)]
+        self.read_header((texts + self.flist)[0])
         if self.nvec == 0:
             raise Exception("log file has no values")
 
         # read all files
 
         for file in self.flist:
-            self.read_one(file)
+            if columnfile.cached(file):
+                self.read_cached(file)
+            else:
+                self.read_one(file)
         print()
 
         # if no average, sort entries by timestep, cull duplicates
         # if average, call self.average()
 
         if self.ave == 0:
-            self.data.sort(self.compare)
+            order = np.argsort(self.data[:, 0], kind="stable")
+            self.data = self.data[order]
             self.cull()
         else:
             self.average()
@@ -122,27 +149,7 @@ class clog:
         if len(keys) == 0:
             raise Exception("no log vectors specified")
 
-        map = []
-        for key in keys:
-            if key in self.ptr:
-                map.append(self.ptr[key])
-            else:
-                count = 0
-                for i in range(self.nvec):
-                    if self.names[i].find(key) == 0:
-                        count += 1
-                        index = i
-                if count == 1:
-                    map.append(index)
-                else:
-                    raise Exception("unique log vector %s not found" % key)
-
-        vecs = []
-        for i in range(len(keys)):
-            vecs.append(self.nlen * [0])
-            for j in range(self.nlen):
-                vecs[i][j] = self.data[j][map[i]]
-
+        vecs = [self.data[:, i] for i in self.columns(keys)]
         if len(keys) == 1:
             return vecs[0]
         else:
@@ -152,85 +159,109 @@ class clog:
 
     def write(self, filename, *keys):
         if len(keys):
-            map = []
-            for key in keys:
-                if key in self.ptr:
-                    map.append(self.ptr[key])
-                else:
-                    count = 0
-                    for i in range(self.nvec):
-                        if self.names[i].find(key) == 0:
-                            count += 1
-                            index = i
-                    if count == 1:
-                        map.append(index)
-                    else:
-                        raise Exception("unique log vector %s not found" % key)
+            cols = self.columns(keys)
         else:
-            map = list(range(self.nvec))
+            cols = list(range(self.nvec))
+
+        if columnfile.cached(filename):
+            columnfile.write(filename, [self.names[i] for i in cols],
+                             self.data[:, cols])
+            return
 
         f = open(filename, "w")
-        for i in range(self.nlen):
-            for j in range(len(map)):
-                print(self.data[i][map[j]], end=' ', file=f)
-            print(file=f)
+        for row in self.data[:, cols].tolist():
+            print(" ".join([str(value) for value in row]), end=' \n', file=f)
         f.close()
 
     # --------------------------------------------------------------------
+    # column indices of vector names, names can be unique abbreviations
 
-    def compare(self, a, b):
-        if a[0] < b[0]:
-            return -1
-        elif a[0] > b[0]:
-            return 1
-        else:
-            return 0
+    def columns(self, keys):
+        cols = []
+        for key in keys:
+            if key in self.ptr:
+                cols.append(self.ptr[key])
+            else:
+                count = 0
+                for i in range(self.nvec):
+                    if self.names[i].find(key) == 0:
+                        count += 1
+                        index = i
+                if count == 1:
+                    cols.append(index)
+                else:
+                    raise Exception("unique log vector %s not found" % key)
+        return cols
 
     # --------------------------------------------------------------------
+    # delete entries with same timestep as previous entry
 
     def cull(self):
-        i = 1
-        while i < len(self.data):
-            if self.data[i][0] == self.data[i - 1][0]:
-                del self.data[i]
-            else:
-                i += 1
+        if len(self.data) > 1:
+            keep = np.ones(len(self.data), dtype=bool)
+            keep[1:] = self.data[1:, 0] != self.data[:-1, 0]
+            self.data = self.data[keep]
 
     # --------------------------------------------------------------------
+    # average entries of all runs, a run starts at each entry with time 0
+    # each run is linearly interpolated to the time stamps of the longest run
+    # lo,hi = entries of a run that bracket each grid time, w = weight of hi
+    # a run adds to a grid time only within its own time range,
+    #   so runs that end early do not count beyond their end
+    # runs with identical time stamps are averaged entry by entry
 
     def average(self):
-        counts = []
-        data = []
-        nlen = 0
-
-        i = j = 0
-        while i < len(self.data):
-            if self.data[i][0] == 0:
-                j = 0
-            if j >= nlen:
-                counts.append(0)
-                data.append(self.nvec * [0])
-                nlen += 1
-            counts[j] += 1
-            for m in range(self.nvec):
-                data[j][m] += self.data[i][m]
-            j += 1
-            i += 1
-
-        for i in range(nlen):
-            for j in range(self.nvec):
-                data[i][j] /= counts[j]
-
-        self.nlen = nlen
-        self.data = data
+        if len(self.data) == 0:
+            return
+        data = self.data
+        if self.align:
+            col = self.columns([self.align])[0]
+        elif "Time" in self.ptr:
+            col = self.ptr["Time"]
+        else:
+            col = 0
+        time = data[:, col]
+
+        starts = np.flatnonzero(data[:, 0] == 0)
+        if len(starts) == 0 or starts[0] != 0:
+            starts = np.concatenate([[0], starts])
+        ends = np.append(starts[1:], len(data))
+        longest = np.argmax(ends - starts)
+        grid = time[starts[longest]:ends[longest]]
+
+        lo = np.empty((len(starts), len(grid)), dtype=int)
+        for i in range(len(starts)):
+            lo[i] = np.searchsorted(time[starts[i]:ends[i]], grid,
+                                    side="right") - 1 + starts[i]
+        first = starts[:, None]
+        last = ends[:, None] - 1
+        valid = (lo >= first) & (grid <= time[last])
+        lo = np.clip(lo, first, last)
+        hi = np.minimum(lo + 1, last)
+
+        dt = time[hi] - time[lo]
+        w = np.zeros(lo.shape)
+        np.divide(grid - time[lo], dt, out=w, where=dt > 0)
+        w *= valid
+        values = data[lo] * (valid - w)[:, :, None] + data[hi] * w[:, :, None]
+
+        counts = valid.sum(0)
+        self.data = values.sum(0) / counts[:, None]
+        self.nlen = len(self.data)
 
     # --------------------------------------------------------------------
 
     def read_header(self, file):
-        if file[-3:] == ".gz":
-            txt = popen("%s -c %s" % (PIZZA_GUNZIP, file), 'r').read()
-        else:
-            txt = open(file).read()
+        if columnfile.cached(file):
+            self.names = columnfile.header(file)
+            self.ptr = dict([(name, i) for i, name in enumerate(self.names)])
+            self.nvec = len(self.names)
+            self.data = np.zeros((0, self.nvec))
+            return
+
+        f = self.openfile(file)
+        txt = f.read().decode("ascii", "replace")
+        f.close()
 
         s1 = txt.find(self.firststr)
         s2 = txt.find("\n", s1)
@@ -241,6 +272,28 @@ class clog:
             self.ptr[words[i]] = i
 
         self.nvec = len(self.names)
+        self.data = np.zeros((0, self.nvec))
+
+    # --------------------------------------------------------------------
+    # open file for binary reading, gunzip on the fly
+
+    def openfile(self, file):
+        if file[-3:] == ".gz":
+            return Popen("%s -c %s" % (PIZZA_GUNZIP, file), shell=True,
+                         stdout=PIPE).stdout
+        return open(file, 'rb')
+
+    # --------------------------------------------------------------------
+    # append all entries of a binary column file, written by write()
+
+    def read_cached(self, file):
+        names, data = columnfile.read(file)
+        if names != self.names:
+            raise Exception("log file %s has different vectors" % file)
+        if len(data):
+            self.data = np.concatenate([self.data, data])
+            print(int(data[-1][0]), end=' ')
+            sys.stdout.flush()
 
     # --------------------------------------------------------------------
 
@@ -250,20 +303,17 @@ class clog:
         # read entire (rest of) file into txt
 
         file = list[0]
-        if file[-3:] == ".gz":
-            f = popen("%s -c %s" % (PIZZA_GUNZIP, file), 'rb')
-        else:
-            f = open(file, 'rb')
-
+        f = self.openfile(file)
         if len(list) == 2:
             f.seek(list[1])
-        txt = f.read()
+        txt = f.read().decode("ascii", "replace")
         if file[-3:] == ".gz":
             eof = 0
         else:
             eof = f.tell()
         f.close()
 
+        chunks = []
         start = last = 0
         while not last:
 
@@ -309,17 +359,40 @@ class clog:
             chunk = txt[s1:s2 - 1]
             start = s2
 
-            # split chunk into entries
-            # parse each entry for numeric fields, append to data
+            # convert chunk to 2d array of entries
 
-            lines = chunk.split("\n")
-            for line in lines:
-                words = line.split()
-                self.data.append(list(map(float, words)))
+            values = self.parse(chunk)
+            if len(values):
+                chunks.append(values)
 
-            # print last timestep of chunk
+                # print last timestep of chunk
 
-            print(int(self.data[len(self.data) - 1][0]), end=' ')
-            sys.stdout.flush()
+                print(int(values[-1][0]), end=' ')
+                sys.stdout.flush()
 
+        if chunks:
+            self.data = np.concatenate([self.data] + chunks)
         return eof
+
+    # --------------------------------------------------------------------
+    # convert one chunk of entries to a 2d array of floats
+    # all values are converted by a single NumPy call, unless some entries
+    #   have a wrong # of values, which are then skipped
+
+    def parse(self, chunk):
+        nvec = self.nvec
+        words = chunk.split()
+        if len(words) % nvec == 0:
+            try:
+                return np.array(words, dtype=float).reshape(-1, nvec)
+            except ValueError:
+                pass
+        rows = []
+        for line in chunk.split("\n"):
+            words = line.split()
+            if len(words) == nvec:
+                try:
+                    rows.append([float(word) for word in words])
+                except ValueError:
+                    pass
+        return np.array(rows, dtype=float).reshape(-1, nvec)
@@ -0,0 +1,87 @@
+# columnfile functions, not a top-level Pizza.py tool
+
+# History
+#   10/26, binary column export and import of log, clog and vec
+
+# ToDo list
+
+# Variables
+#   SUFFIXES = file suffixes of binary column files
+
+# Imports and external programs
+
+from __future__ import print_function, absolute_import
+import numpy as np
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:
+    pyarrow = None
+
+# a column file holds N vectors of equal length plus their names
+# file.npz = NumPy zip archive with arrays "names" and "data" (nlen x nvec)
+# file.parquet = Parquet table with one float column per vector,
+#   needs the optional pyarrow package
+# both are read back without parsing text, in one call per file
+
+SUFFIXES = (".npz", ".parquet")
+
+# --------------------------------------------------------------------
+# return 1 if file name is a binary column file
+
+
+def cached(file):
+    return file.endswith(SUFFIXES)
+
+# --------------------------------------------------------------------
+# write data (nlen x nvec array) and its nvec column names to file
+
+
+def write(file, names, data):
+    data = np.asarray(data, dtype=float).reshape(-1, len(names))
+    if file.endswith(".npz"):
+        with open(file, "wb") as f:
+            np.savez(f, names=np.array(names, dtype=str), data=data)
+    else:
+        check(file)
+        columns = [pyarrow.array(data[:, i]) for i in range(len(names))]
+        pyarrow.parquet.write_table(
+            pyarrow.table(columns, names=list(names)), file)
+
+# --------------------------------------------------------------------
+# return list of column names stored in file without reading the data
+
+
+def header(file):
+    if file.endswith(".npz"):
+        with np.load(file) as f:
+            return f["names"].tolist()
+    check(file)
+    return list(pyarrow.parquet.read_schema(file).names)
+
+# --------------------------------------------------------------------
+# return list of column names and nlen x nvec array of floats in file
+
+
+def read(file):
+    if file.endswith(".npz"):
+        with np.load(file) as f:
+            names = f["names"].tolist()
+            data = f["data"]
+        return names, data.reshape(-1, len(names))
+    check(file)
+    table = pyarrow.parquet.read_table(file)
+    data = np.empty((table.num_rows, table.num_columns))
+    for i in range(table.num_columns):
+        data[:, i] = table.column(i).to_numpy()
+    return list(table.column_names), data
+
+# --------------------------------------------------------------------
+
+
+def check(file):
+    if not file.endswith(".parquet"):
+        raise Exception("column file %s is not .npz or .parquet" % file)
+    if pyarrow is None:
+        raise Exception("pyarrow package is needed for Parquet file %s" % file)
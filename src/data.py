@@ -10,6 +10,8 @@
 
 from __future__ import print_function, absolute_import
 from os import popen
+from itertools import islice
+import numpy as np
 oneline = "Read, write, manipulate LAMMPS data files"
 
 docstr = """
@@ -23,6 +25,8 @@ q = d.get("Atoms",4)
 
   1 arg = all columns returned as 2d array of floats
   2 args = Nth column returned as vector of floats
+  a section is parsed into an array by one NumPy call when first used
+  get() returns copies, use replace() to change values
 
 d.reorder("Atoms",1,3,2,4,5)     reorder columns (1-N) in a data file section
 
@@ -31,6 +35,7 @@ d.reorder("Atoms",1,3,2,4,5)     reorder columns (1-N) in a data file section
 d.title = "My LAMMPS data file"	 set title of the data file
 d.headers["atoms"] = 1500        set a header value
 d.sections["Bonds"] = lines      set a section to list of lines (with newlines)
+lines = d.sections["Bonds"]      section as list-like object of lines
 d.delete("bonds")		 delete a keyword or section of data file
 d.delete("Bonds")
 d.replace("Atoms",5,vec)      	 replace Nth column of section with vector
@@ -43,6 +48,7 @@ index,time,flag = d.iterator(0/1)          loop over single data file snapshot
 time,box,atoms,bonds,tris,lines = d.viz(index)   return list of viz objects
 
   iterator() and viz() are compatible with equivalent dump calls
+  bond atoms are looked up by atom ID
   iterator() called with arg = 0 first time, with arg = 1 on subsequent calls
     index = timestep index within dump object (only 0 for data file)
     time = timestep value (only 0 for data file)
@@ -57,11 +63,16 @@ time,box,atoms,bonds,tris,lines = d.viz(index)   return list of viz objects
     lines = NULL
 
 d.write("data.new")             write a LAMMPS data file
+
+  unchanged sections are written as they were read
+  changed sections are written from their array, columns with only
+    integer values as integers
 """
 
 # History
 #   8/05, Steve Plimpton (SNL): original version
 #   11/07, added triclinic box support
+#   10/26, sections parsed lazily into NumPy arrays
 
 # ToDo list
 
@@ -69,7 +80,11 @@ d.write("data.new")             write a LAMMPS data file
 #   title = 1st line of data file
 #   names = dictionary with atom attributes as keys, col #s as values
 #   headers = dictionary with header name as key, value or tuple as values
-#   sections = dictionary with section name as key, array of lines as values
+#   sections = dictionary with section name as key, Section or list of lines
+#     as values
+#   Section = lines of one section, parsed into an array on first use
+#     lines = list of lines, None if array was changed since
+#     values = 2d array of floats, None if not yet parsed
 #   nselect = 1 = # of snapshots
 
 # Imports and external programs
@@ -140,10 +155,7 @@ class data:
                             "data section %s has no matching header value" %
                             line)
                     f.readline()
-                    list = []
-                    for i in range(headers[length]):
-                        list.append(f.readline())
-                    sections[keyword] = list
+                    sections[keyword] = Section(islice(f, headers[length]))
             if not found:
                 raise Exception("invalid section %s in data file" % line)
             f.readline()
@@ -171,23 +183,9 @@ class data:
 
     def get(self, *list):
         if len(list) == 1:
-            field = list[0]
-            array = []
-            lines = self.sections[field]
-            for line in lines:
-                words = line.split()
-                values = list(map(float, words))
-                array.append(values)
-            return array
+            return self.section(list[0]).array().copy()
         elif len(list) == 2:
-            field = list[0]
-            n = list[1] - 1
-            vec = []
-            lines = self.sections[field]
-            for line in lines:
-                words = line.split()
-                vec.append(float(words[n]))
-            return vec
+            return self.section(list[0]).array()[:, list[1] - 1].copy()
         else:
             raise Exception("invalid arguments for data.get()")
 
@@ -195,52 +193,41 @@ class data:
     # reorder columns in a data file field
 
     def reorder(self, name, *order):
-        n = len(order)
-        natoms = len(self.sections[name])
-        oldlines = self.sections[name]
-        newlines = natoms * [""]
-        for index in order:
-            for i in range(len(newlines)):
-                words = oldlines[i].split()
-                newlines[i] += words[index - 1] + " "
-        for i in range(len(newlines)):
-            newlines[i] += "\n"
-        self.sections[name] = newlines
+        section = self.section(name)
+        columns = [index - 1 for index in order]
+        section.floats = section.flags()[columns]
+        section.values = section.array()[:, columns]
+        section.end = " \n"
+        section.lines = None
 
     # --------------------------------------------------------------------
     # replace a column of named section with vector of values
 
     def replace(self, name, icol, vector):
-        lines = self.sections[name]
-        newlines = []
-        j = icol - 1
-        for i in range(len(lines)):
-            line = lines[i]
-            words = line.split()
-            words[j] = str(vector[i])
-            newline = ' '.join(words) + '\n'
-            newlines.append(newline)
-        self.sections[name] = newlines
+        section = self.section(name)
+        section.flags()
+        section.array()[:, icol - 1] = vector
+        section.end = "\n"
+        section.lines = None
+
+    # --------------------------------------------------------------------
+    # return named section as Section, convert a list of lines set by user
+
+    def section(self, name):
+        section = self.sections[name]
+        if not isinstance(section, Section):
+            section = self.sections[name] = Section(section)
+        return section
 
     # --------------------------------------------------------------------
     # replace x,y,z in Atoms with x,y,z values from snapshot ntime of dump object
     # assumes id,x,y,z are defined in both data and dump files
+    # dump coords are unscaled when the dump is read
     # also replaces ix,iy,iz if they are defined
 
     def newxyz(self, dm, ntime):
-        nsnap = dm.findtime(ntime)
-
-        if dm.scaled(nsnap):
-            scaleflag = 1
-        else:
-            scaleflag = 0
         dm.sort(ntime)
-
-        if scaleflag:
-            dm.unscale(ntime)
         x, y, z = dm.vecs(ntime, "x", "y", "z")
-        if scaleflag:
-            dm.scale(ntime)
 
         self.replace("Atoms", self.names['x'] + 1, x)
         self.replace("Atoms", self.names['y'] + 1, y)
@@ -285,8 +272,12 @@ class data:
             keyword = pair[0]
             if keyword in self.sections:
                 print("\n%s\n" % keyword, file=f)
-                for line in self.sections[keyword]:
-                    print(line, end=' ', file=f)
+                section = self.sections[keyword]
+                if isinstance(section, Section):
+                    section.write(f)
+                else:
+                    for line in section:
+                        print(line, end=' ', file=f)
         f.close()
 
     # --------------------------------------------------------------------
@@ -325,37 +316,31 @@ class data:
 
         # create atom list needed by viz from id,type,x,y,z
 
-        atoms = []
-        atomlines = self.sections["Atoms"]
-        for line in atomlines:
-            words = line.split()
-            atoms.append([int(words[id]), int(words[type]),
-                          float(words[x]), float(words[y]), float(words[z])])
+        values = self.section("Atoms").array()
+        atoms = values[:, [id, type, x, y, z]]
 
         # create list of current bond coords from list of bonds
-        # assumes atoms are sorted so can lookup up the 2 atoms in each bond
+        # the 2 atoms of each bond are looked up by ID
 
         bonds = []
         if "Bonds" in self.sections:
-            bondlines = self.sections["Bonds"]
-            for line in bondlines:
-                words = line.split()
-                bid, btype = int(words[0]), int(words[1])
-                atom1, atom2 = int(words[2]), int(words[3])
-                atom1words = atomlines[atom1 - 1].split()
-                atom2words = atomlines[atom2 - 1].split()
-                bonds.append(
-                    [
-                        bid, btype, float(
-                            atom1words[x]), float(
-                            atom1words[y]), float(
-                            atom1words[z]), float(
-                            atom2words[x]), float(
-                            atom2words[y]), float(
-                                atom2words[z]), float(
-                                    atom1words[type]), float(
-                                        atom2words[type])])
-
+            bvalues = self.section("Bonds").array()
+            ids = values[:, id]
+            order = np.argsort(ids, kind="stable")
+            index = []
+            for col in (2, 3):
+                i = np.searchsorted(ids[order], bvalues[:, col])
+                i = np.minimum(i, len(ids) - 1)
+                if (ids[order][i] != bvalues[:, col]).any():
+                    raise Exception("bond atom is not in data Atoms section")
+                index.append(order[i])
+            atom1 = values[index[0]]
+            atom2 = values[index[1]]
+            bonds = np.column_stack((bvalues[:, 0:2],
+                                     atom1[:, [x, y, z]], atom2[:, [x, y, z]],
+                                     atom1[:, type], atom2[:, type])).tolist()
+
+        atoms = atoms.tolist()
         tris = []
         lines = []
         return 0, box, atoms, bonds, tris, lines
@@ -401,3 +386,117 @@ skeywords = [["Masses", "atom types"],
              ["AngleAngleTorsion Coeffs", "dihedral types"],
              ["BondBond13 Coeffs", "dihedral types"],
              ["AngleAngle Coeffs", "improper types"]]
+
+# --------------------------------------------------------------------
+# lines of one data file section
+# lines are parsed into an array of floats by one NumPy call when needed
+# once the array is changed, lines are re-created from it
+# floats = 1 for each column written as float, 0 for integer,
+#   a column is float if any of its original tokens has ".", "e" or "E"
+# end = text that ends each re-created line
+
+
+class Section:
+
+    def __init__(self, lines):
+        self.lines = list(lines)
+        self.values = None
+        self.floats = None
+        self.end = "\n"
+
+    def __len__(self):
+        if self.lines is None:
+            return len(self.values)
+        return len(self.lines)
+
+    def __iter__(self):
+        return iter(self.text())
+
+    def __getitem__(self, i):
+        return self.text()[i]
+
+    # ------------------------------------------------------------------
+    # parse lines into a 2d array, comments after # are ignored
+
+    def array(self):
+        if self.values is None:
+            if not self.lines:
+                self.values = np.zeros((0, 0))
+                return self.values
+            try:
+                self.values = np.loadtxt(self.lines, ndmin=2)
+            except ValueError:
+                raise Exception("data section is not a table of numbers")
+        return self.values
+
+    # ------------------------------------------------------------------
+    # flag float columns, called while the original lines still exist
+
+    def flags(self):
+        if self.floats is None:
+            self.floats = float_columns(self.lines, self.array())
+        return self.floats
+
+    # ------------------------------------------------------------------
+    # list of lines, formatted from the array if it was changed
+
+    def text(self):
+        if self.lines is None:
+            self.lines = "".join(self.rows()).splitlines(True)
+        return self.lines
+
+    # ------------------------------------------------------------------
+    # write each line followed by a space, as data.write() always did
+
+    def write(self, f):
+        if self.lines is None:
+            for text in self.rows():
+                f.write(text.replace("\n", "\n "))
+        else:
+            f.write("".join([line + " " for line in self.lines]))
+
+    # ------------------------------------------------------------------
+
+    def rows(self):
+        return format_rows(self.values, self.floats, self.end)
+
+# --------------------------------------------------------------------
+# format rows of a 2d array as text, yields blocks of CHUNK rows
+# float columns are written like str() of a float, others as integers
+# a column is float if flagged in floats or if it has non-integer values
+
+
+CHUNK = 100000
+
+
+def format_rows(values, floats=None, end="\n"):
+    if len(values) == 0:
+        return
+    whole = (values == np.round(values)).all(axis=0) & \
+        (np.abs(values) < 2**53).all(axis=0)
+    if floats is None:
+        floats = ~whole
+    else:
+        floats = floats | ~whole
+    fmt = " ".join(["%r" if flag else "%d" for flag in floats]) + end
+    for i in range(0, len(values), CHUNK):
+        block = values[i:i + CHUNK]
+        yield (fmt * len(block)) % tuple(block.ravel().tolist())
+
+# --------------------------------------------------------------------
+# flag columns whose original tokens contain ".", "e" or "E" as floats
+# only columns with all integer values need their tokens checked
+
+
+def float_columns(lines, values):
+    floats = (values != np.round(values)).any(axis=0)
+    check = np.flatnonzero(~floats)
+    if len(check) == 0:
+        return floats
+    words = " ".join([line.split("#")[0] for line in lines]).split()
+    ncol = values.shape[1]
+    for j in check:
+        text = "".join(words[j::ncol])
+        if "." in text or "e" in text or "E" in text:
+            floats[j] = True
+    return floats
@@ -187,6 +187,7 @@ d.extra(obj)				   extract bond/tri/line info from obj
 #   lineflag = 0 if no lines, 1 if they are defined statically, 2 if dynamic
 #   linelist = static list of lines to return w/ viz() for all snapshots
 #   objextra = object to get bonds,tris,lines from dynamically
+#   timer = optional lpptimer object, collects per-file read/parse timings
 #   Snap = one snapshot
 #     time = time stamp
 #     tselect = 0/1 if this snapshot selected
@@ -220,6 +221,7 @@ class dump:
     self.multiprocflag = 0
     self.fileNums = []
     self.objextra = None
+    self.timer = None
 
     outputfl = True
     if isinstance(input[0],dict): # multiprocessing code (the [0] comes from the asteriks in the argumentlist)
@@ -230,6 +232,9 @@ class dump:
 
       if outputfl: print("number of subprocess:", os.getpid())
 
+      # optional lpptimer object collecting per-file read/parse timings
+      if "timer" in dictionary: self.timer = dictionary["timer"]
+
       self.flist = dictionary["filelist"]
       self.multiprocflag = 1
       self.increment = 0
@@ -258,19 +263,25 @@ class dump:
 
     if outputfl: print("reading dump file...")
     for i, file in enumerate(self.flist):
+      self.tread = self.tparse = 0.0
+      natoms = 0
       if file[-3:] == ".gz":
         f = popen("%s -c %s" % (PIZZA_GUNZIP,file),'r')
       else: f = open(file,'r')
       snap = self.read_snapshot(f)
       while snap:
         self.snaps.append(snap)
+        natoms += snap.natoms
         if outputfl: print(snap.time,end=' ')
         self.fileNums.append(snap.time)
         sys.stdout.flush()
         snap = self.read_snapshot(f)
 
       f.close()
-      
+      if self.timer:
+        self.timer.add("read",self.tread,file,bytes_in=os.path.getsize(file))
+        self.timer.add("parse",self.tparse,file,atoms=natoms)
+
     if outputfl: print()
 
     # sort entries by timestep, cull duplicates
@@ -341,7 +352,7 @@ class dump:
     snap = self.snaps[self.nsnaps]
     snap.tselect = 1
     snap.nselect = snap.natoms
-    for i in range(snap.natoms): snap.aselect[i] = 1
+    snap.aselect[:] = 1
     self.nsnaps += 1
     self.nselect += 1
 
@@ -353,9 +364,12 @@ class dump:
   # assign column names if not already done and file is self-describing
   # set scale_original to 0/1/-1 for unscaled/scaled/unknown
   # convert xs,xu to x
+  # if a timer is attached, time spent reading lines is added to tread
+  #   and time spent converting them to floats is added to tparse
 
   def read_snapshot(self,f):
     try:
+      if self.timer: tstart = self.timer.clock()
       snap = Snap()
       item = f.readline()
       snap.time = int(f.readline().split()[0])    # just grab 1st field
@@ -405,19 +419,17 @@ class dump:
       
 
       if snap.natoms:
-        words = f.readline().split()
-        ncol = len(words)
-        for i in range(1,snap.natoms):
-          words += f.readline().split()
-        floats = list(map(float,words))
-        atoms = np.zeros((snap.natoms,ncol), dtype=float)
-        start = 0
-        stop = ncol
-        for i in range(snap.natoms):
-          atoms[i] = floats[start:stop]
-          start = stop
-          stop += ncol
-      else: atoms = None
+        lines = [f.readline() for i in range(snap.natoms)]
+        if self.timer:
+          tread = self.timer.clock()
+          self.tread += tread - tstart
+        ncol = len(lines[0].split())
+        words = lines[0][:0].join(lines).split()
+        atoms = np.array(words,dtype=float).reshape(snap.natoms,ncol)
+        if self.timer: self.tparse += self.timer.clock() - tread
+      else:
+        atoms = None
+        if self.timer: self.tread += self.timer.clock() - tstart
       snap.atoms = atoms
       return snap
     except:
@@ -903,12 +915,11 @@ class dump:
   # delete successive snapshots with duplicate time stamp
 
   def cull(self):
-    i = 1
-    while i < len(self.snaps):
-      if self.snaps[i].time == self.snaps[i-1].time:
-        del self.snaps[i]
-      else:
-        i += 1
+    snaps = []
+    for snap in self.snaps:
+      if snaps and snap.time == snaps[-1].time: continue
+      snaps.append(snap)
+    self.snaps = snaps
 
   # --------------------------------------------------------------------
   # iterate over selected snapshots
@@ -949,38 +960,35 @@ class dump:
     z = self.names["z"]
 
     # create atom list needed by viz from id,type,x,y,z
-    # need Numeric/Numpy mode here
 
-    atoms = []
-    for i in range(snap.natoms):
-      if not snap.aselect[i]: continue
-      atom = snap.atoms[i]
-      atoms.append([atom[id],atom[type],atom[x],atom[y],atom[z]])
+    if snap.natoms:
+      atoms = snap.atoms[snap.aselect != 0][:,[id,type,x,y,z]]
+    else: atoms = np.zeros((0,5))
 
     # create list of bonds from static or dynamic bond list
     # then generate bond coords from bondlist
-    # alist = dictionary of atom IDs for atoms list
-    # lookup bond atom IDs in alist and grab their coords
-    # try is used since some atoms may be unselected
+    # bond atom IDs are looked up in the sorted IDs of the atoms list
     #   any bond with unselected atom is not added to bonds
-    # need Numeric/Numpy mode here
+    #   for duplicate IDs the last atom with that ID is used
 
     bonds = []
     if self.bondflag:
       if self.bondflag == 1: bondlist = self.bondlist
       elif self.bondflag == 2:
         tmp1,tmp2,tmp3,bondlist,tmp4,tmp5 = self.objextra.viz(time,1)
-      alist = {}
-      for i in range(len(atoms)): alist[int(atoms[i][0])] = i
-      for bond in bondlist:
-        try:
-          i = alist[bond[2]]
-          j = alist[bond[3]]
-          atom1 = atoms[i]
-          atom2 = atoms[j]
-          bonds.append([bond[0],bond[1],atom1[2],atom1[3],atom1[4],
-                        atom2[2],atom2[3],atom2[4],atom1[1],atom2[1]])
-        except: continue
+      bondlist = np.array(bondlist,dtype=float).reshape(-1,4)
+      if len(atoms) and len(bondlist):
+        ids = atoms[:,0].astype(np.int64)
+        order = np.argsort(ids,kind="stable")
+        ids = ids[order]
+        ends = bondlist[:,2:4].astype(np.int64)
+        found = np.searchsorted(ids,ends,side="right") - 1
+        keep = ((found >= 0) & (ids[found] == ends)).all(axis=1)
+        i = order[found[keep,0]]
+        j = order[found[keep,1]]
+        bonds = np.column_stack((bondlist[keep,0:2],atoms[i,2:5],atoms[j,2:5],
+                                 atoms[i,1],atoms[j,1])).tolist()
+    atoms = atoms.tolist()
 
     # create list of tris from static or dynamic tri list
     # if dynamic, could eliminate tris for unselected atoms
@@ -1050,12 +1058,7 @@ class dump:
     if isinstance(arg, object) and ".data" in str(arg.__class__):
       self.bondflag = 0
       try:
-        bondlist = []
-        bondlines = arg.sections["Bonds"]
-        for line in bondlines:
-          words = line.split()
-          bondlist.append([int(words[0]),int(words[1]),
-                           int(words[2]),int(words[3])])
+        bondlist = arg.get("Bonds")[:,0:4].astype(int).tolist()
         if bondlist:
           self.bondflag = 1
           self.bondlist = bondlist
@@ -1213,12 +1216,12 @@ class aselect:
     if len(args) == 0:                           # all selected timesteps
       for snap in data.snaps:
         if not snap.tselect: continue
-        for i in range(snap.natoms): snap.aselect[i] = 1
+        snap.aselect[:] = 1
         snap.nselect = snap.natoms
     else:                                        # one timestep
       n = data.findtime(args[0])
       snap = data.snaps[n]
-      for i in range(snap.natoms): snap.aselect[i] = 1
+      snap.aselect[:] = 1
       snap.nselect = snap.natoms
 
   # --------------------------------------------------------------------
@@ -12,379 +12,382 @@ Austrian Academy of Sciences, mark.bentley@oeaw.ac.at)
 
 contributing author: Stefan Radl, TU Graz (radl@tugraz.at)
 
-evtk is used to write binary VTK files:
+Binary VTK files are written by a built-in writer (raw appended data).
+Alternatively evtk can be used to write them:
 https://bitbucket.org/pauloh/pyevtk
 
 The pizza.py bdump command is used to handle LIGGGHTS dump files and
 therefore PYTHONPATH must include the pizza/src location.
 
-NOTE: bdump is NOT included in granular pizza, and should be taken
-from the standard LAMMPS pizza package!
-
 NOTE: it is impossible to tell from the bdump header which values
 have been requested in the compute, so check that your compute
 and dump match the format here - this will be checked in future!
 
+Usage from the command line:
+  dump2force.py [--tmin N] [--tmax N] [--evtk] [-o dir] <filename>
+
 """
 
 from __future__ import print_function, absolute_import
-from evtk.vtk import VtkFile, VtkGroup, VtkUnstructuredGrid
 from bdump import bdump
 import numpy as np
+import getopt
 import sys
 import os
 
-# TODO: use a try/except here to check for missing modules, and fallback to ASCII VTK if evtk not found
-# TODO: ask for timestep or timestep range as input (code is NOT efficient and large files = long runtimes!)
+try:
+    from evtk.vtk import VtkFile, VtkGroup, VtkUnstructuredGrid
+except ImportError:
+    VtkFile = VtkGroup = VtkUnstructuredGrid = None
+
 # TODO: write celldata for contact area and heat flux (if present)
 
-# Check for command line arguments
-if len(sys.argv) != 2:
-    sys.exit('Usage: dump2force.py <filename>, where filename is a SINGLE filename; typically dump.<runname>')
+oneline = "Convert LIGGGHTS contact dumps into VTK force networks"
 
-elif len(sys.argv) == 2:  # we have one input param, that should be parsed as a filename
-    filename = str(sys.argv[1])
-    if not os.path.isfile(filename):
-        sys.exit('File ' + filename + ' does not exist!')
+docstr = """
+f = dump2force("dump.run")            contact dump file, read one step at a time
+f = dump2force("dump.run",1000,5000)  only timesteps 1000 <= t <= 5000
 
-splitname = filename.split('.')
+  dump must hold the columns of compute pair/gran/local id pos force:
+    x1 y1 z1 x2 y2 z2 id1 id2 periodic fx fy fz
 
-if len(splitname) == 2 and splitname[0].lower() == 'dump':
-    fileprefix = splitname[1]
-else:
-    fileprefix = splitname[0]
+f.evtk = 1                            write files via evtk instead of built-in
 
-inputpath = os.path.abspath(filename)
-inputdir = os.path.split(inputpath)[0]
+n = f.write()                         write prefix_N.vtu + prefix.pvd files
+n = f.write("out","force")            write to directory out with root name
 
-# create a sub-directory for the output .vtu files
-outputdir = os.path.join(inputdir, fileprefix)
-try:
-    os.mkdir(outputdir)
-except BaseException:
-    pass
-
-# Read in the dump file - since we can have many contacts (i.e. >> nparticles)
-# and many timesteps I will deal with one timestep at a time in memory,
-# write to the appropriate .vtu file for a single timestep, then move on.
-
-forcedata = bdump(filename, 0)
-
-groupfile = fileprefix
-groupfile = os.path.join(inputdir, groupfile)
-groupfile = VtkGroup(groupfile)
-
-fileindex = 0
-timestep = next(forcedata)
-
-
-# check that we have the right number of colums (>11)
-#
-# NOTE: the first timesteps are often blank, and then natoms returns 0, so this doesn't really work...
-#
-if forcedata.snaps[fileindex].natoms != 0 and len(
-        forcedata.snaps[0].atoms[0]) < 12:
-    print("Error - dump file requires at least all parameters from a compute pair/gran/local id pos force (12 in total)")
-    sys.exit()
-
-# loop through available timesteps
-#
-while timestep >= 0:
-
-    # default data are stored as pos1 (3) pos2 (3) id1 id2 periodic_flag force (3) -> 12 columns
-    #
-    # if contactArea is enabled, that's one more (13) and heatflux (14)
-    #
-    # assign names to atom columns (1-N)
-    forcedata.map(
-        1,
-        "x1",
-        2,
-        "y1",
-        3,
-        "z1",
-        4,
-        "x2",
-        5,
-        "y2",
-        6,
-        "z2",
-        7,
-        "id1",
-        8,
-        "id2",
-        9,
-        "periodic",
-        10,
-        "fx",
-        11,
-        "fy",
-        12,
-        "fz")
-    # forcedata.map(1,"x1",2,"y1",3,"z1",4,"x2",5,"y2",6,"z2",7,"id1",8,"id2",9,"periodic",10,"fx",11,"fy",12,"fz",13,"area",14,"heatflux")
-
-    # check for contact data (some timesteps may have no particles in contact)
-    #
-    # NB. if one loads two datasets into ParaView with defined timesteps, but in which
-    # one datasets has some missing, data for the previous timestep are still displayed -
-    # this means that it is better here to generate "empty" files for these
-    # timesteps.
-
-    if forcedata.snaps[fileindex].natoms == 0:
-        vtufile = fileprefix + '_' + str(timestep) + '.vtu'
-        vtufile = os.path.join(outputdir, vtufile)
-        vtuwrite = open(vtufile, 'w')
-        vtuwrite.write("""<?xml version="1.0"?>
-<VTKFile byte_order="LittleEndian" version="0.1" type="UnstructuredGrid">
-<UnstructuredGrid>
-        <Piece NumberOfCells="0" NumberOfPoints="0">
-                <Cells>
-                        <DataArray NumberOfComponents="1" offset="0" type="Int64" Name="connectivity"/>
-                        <DataArray NumberOfComponents="1" offset="0" type="Int64" Name="offsets"/>
-                        <DataArray NumberOfComponents="1" offset="0" type="Int64" Name="types"/>
-
-                </Cells>
-        </Piece>
-</UnstructuredGrid>
-</VTKFile>""")
-
-    else:
-        # ******************************************
-        # Cell and connection lists
-        # ******************************************
-        # number of cells = number of interactions (i.e. entries in the dump
-        # file, includes periodic connections!)
-        ncells = len(forcedata.snaps[fileindex].atoms)
-
-        # number of periodic interactions
-        periodic = np.array(
-            forcedata.snaps[fileindex].atoms[:, forcedata.names["periodic"]], dtype=bool)
-        nperiodic = sum(periodic)
-
-        # number of non-periodic interactions (which will be written out)
-        nconnex = ncells - nperiodic
-
-        # extract the IDs as an array of integers
-        id1 = np.array(
-            forcedata.snaps[fileindex].atoms[:, forcedata.names["id1"]], dtype=int)
-        id2 = np.array(
-            forcedata.snaps[fileindex].atoms[:, forcedata.names["id2"]], dtype=int)
-
-        # and convert to lists
-        id1 = id1.tolist()
-        id2 = id2.tolist()
-
-        # concatenate into a single list
-        ids = []
-        ids = id1[:]
-        ids.extend(id2)
-
-        # convert to a set and back to remove duplicates, then sort
-        ids = list(set(ids))
-        ids.sort()
-
-        # number of points = number of unique IDs (particles)
-        npoints = len(ids)
-
-        print(
-            'Timestep:',
-            str(timestep),
-            'npoints=',
-            str(npoints),
-            'ncells=',
-            str(ncells),
-            'nperiodic=',
-            nperiodic,
-            'nconnex=',
-            str(nconnex))
-
-        # ******************************************
-        # Cell Data
-        # ******************************************
-        # extract the length of each connection (for all cells, including
-        # periodic)
-        connectionLength = (np.array(forcedata.snaps[fileindex].atoms[:,
-                                                                      forcedata.names["x1"]],
-                                     dtype=np.float64) - np.array(forcedata.snaps[fileindex].atoms[:,
-                                                                                                   forcedata.names["x2"]],
-                                                                  dtype=np.float64))**2 + (np.array(forcedata.snaps[fileindex].atoms[:,
-                                                                                                                                     forcedata.names["y1"]],
-                                                                                                    dtype=np.float64) - np.array(forcedata.snaps[fileindex].atoms[:,
-                                                                                                                                                                  forcedata.names["y2"]],
-                                                                                                                                 dtype=np.float64))**2 + (np.array(forcedata.snaps[fileindex].atoms[:,
-                                                                                                                                                                                                    forcedata.names["z1"]],
-                                                                                                                                                                   dtype=np.float64) - np.array(forcedata.snaps[fileindex].atoms[:,
-                                                                                                                                                                                                                                 forcedata.names["z2"]],
-                                                                                                                                                                                                dtype=np.float64))**2
-        connectionLength = np.sqrt(connectionLength)
-
-        # extract the length of the force
-        force = np.sqrt(np.array(forcedata.snaps[fileindex].atoms[:,
-                                                                  forcedata.names["fx"]],
-                                 dtype=np.float64)**2 + np.array(forcedata.snaps[fileindex].atoms[:,
-                                                                                                  forcedata.names["fy"]],
-                                                                 dtype=np.float64)**2 + np.array(forcedata.snaps[fileindex].atoms[:,
-                                                                                                                                  forcedata.names["fz"]],
-                                                                                                 dtype=np.float64)**2)
-
-        # create cleaned list of valid data for each connection
-        forceClean = np.zeros(nconnex, dtype=np.float64)
-        connectionLengthClean = np.zeros(nconnex, dtype=np.float64)
-
-        iConnex = 0
-        for pair in range(ncells):
-            if np.invert(periodic[pair]):
-                connectionLengthClean[iConnex] = connectionLength[pair]
-                forceClean[iConnex] = force[pair]
-                iConnex += 1
-
-        # And, optionally, contact area and heat flux (using the same connectivity)
-        # area = np.array(forcedata.snaps[fileindex].atoms[:,forcedata.names["area"]],dtype=np.float64)
-        # heatflux = np.array(forcedata.snaps[fileindex].atoms[:,forcedata.names["heatflux"]],dtype=np.float64)
-
-        # Now we have enough data to create the file:
-        # Points - (x,y,z) (npoints)
-        # Cells
-        #   Connectivity - connections (nconnex,2)
-        #   Offset - offset (nconnex)
-        #   type - celltype (nconnex)
-        # Celldata
-        #   force    (nconnex)
-        #   area     (nconnex)
-        #   heatflux (nconnex)
-
-        # ******************************************
-        # Point data = location of each unique particle & Connectivity List
-        # ******************************************
-
-        # The order of this data is important since we use the position of each particle
-        # in this list to reference particle connectivity! We will use the order of the
-        # sorted ids array to determine this.
-
-        # create empty arrays to hold x,y,z data
-        x = np.zeros(npoints, dtype=np.float64)
-        y = np.zeros(npoints, dtype=np.float64)
-        z = np.zeros(npoints, dtype=np.float64)
-
-        counter = 0
-        for id in ids:
-            if id in id1:
-                index = id1.index(id)
-                xtemp, ytemp, ztemp = forcedata.snaps[fileindex].atoms[index, forcedata.names["x1"]], \
-                    forcedata.snaps[fileindex].atoms[index, forcedata.names["y1"]], \
-                    forcedata.snaps[fileindex].atoms[index, forcedata.names["z1"]]
+  default directory and root name are derived from the dump file name:
+    dump.run -> directory run/, files run_N.vtu, group file run.pvd
+  the .pvd group file is written next to the output directory
+  steps without contacts are written as empty files
+  returns # of steps written
+
+ids,points,conn,force,length = network(atoms,names)   network of one step
+
+  ids = sorted unique particle IDs, points = their x,y,z (Nx3)
+  conn = pairs of point indices for non-periodic contacts (flat 2*M)
+  force = force magnitude, length = connection length per contact
+"""
+
+# History
+#   Mark Bentley, Stefan Radl: original script
+#   10/26, importable tool, vectorized network, built-in VTU writer
+
+# Variables
+#   forcedata = bdump object read incrementally
+#   tmin,tmax = range of timesteps to convert, None = unbounded
+#   evtk = 0/1 to write via built-in writer or evtk
+
+# default data are stored as pos1 (3) pos2 (3) id1 id2 periodic_flag force (3)
+# -> 12 columns, if contactArea is enabled that's one more (13) and heatflux (14)
+
+COLUMNS = ["x1", "y1", "z1", "x2", "y2", "z2", "id1", "id2", "periodic",
+           "fx", "fy", "fz"]
+
+# Class definition
+
+
+class dump2force:
+
+    # --------------------------------------------------------------------
+
+    def __init__(self, filename, tmin=None, tmax=None):
+        if not os.path.isfile(filename):
+            raise Exception("File " + filename + " does not exist!")
+        self.filename = filename
+        self.tmin = tmin
+        self.tmax = tmax
+        self.evtk = 0
+
+        # Read in the dump file - since we can have many contacts (i.e. >> nparticles)
+        # and many timesteps we deal with one timestep at a time in memory
+
+        self.forcedata = bdump(filename, 0)
+        pairs = []
+        for i, name in enumerate(COLUMNS):
+            pairs += [i + 1, name]
+        self.forcedata.map(*pairs)
+
+    # --------------------------------------------------------------------
+    # write one .vtu file per selected timestep and a .pvd group file
+
+    def write(self, outputdir=None, fileprefix=None):
+        if self.evtk and VtkFile is None:
+            raise Exception("evtk package is not available")
+
+        splitname = os.path.basename(self.filename).split('.')
+        if fileprefix is None:
+            if len(splitname) == 2 and splitname[0].lower() == 'dump':
+                fileprefix = splitname[1]
+            else:
+                fileprefix = splitname[0]
+
+        inputdir = os.path.split(os.path.abspath(self.filename))[0]
+        if outputdir is None:
+            outputdir = os.path.join(inputdir, fileprefix)
+        groupdir = os.path.split(os.path.abspath(outputdir))[0]
+        if not os.path.isdir(outputdir):
+            os.mkdir(outputdir)
+
+        groupfile = os.path.join(groupdir, fileprefix)
+        if self.evtk:
+            group = VtkGroup(groupfile)
+        else:
+            group = []
+
+        forcedata = self.forcedata
+        seen = set([snap.time for snap in forcedata.snaps])
+        n = 0
+        while 1:
+            timestep = forcedata.next()
+            if timestep < 0:
+                break
+            if self.tmax is not None and timestep > self.tmax:
+                break
+            snap = forcedata.snaps[-1]
+
+            # only the current snapshot is kept in memory
+            # seen = timesteps already read, since removed snapshots no longer
+            #   let next() skip a timestep repeated in a later file
+
+            del forcedata.snaps[-1]
+            forcedata.nsnaps -= 1
+            if timestep in seen:
+                continue
+            seen.add(timestep)
+            if self.tmin is not None and timestep < self.tmin:
+                continue
+
+            # check that we have the right number of colums (>11)
+            # NOTE: the first timesteps are often blank, and then natoms returns 0
+
+            if snap.natoms != 0 and len(snap.atoms[0]) < 12:
+                raise Exception("dump file requires at least all parameters "
+                                "from a compute pair/gran/local id pos force "
+                                "(12 in total)")
+
+            # check for contact data (some timesteps may have no particles in contact)
+            #
+            # NB. if one loads two datasets into ParaView with defined timesteps, but in which
+            # one datasets has some missing, data for the previous timestep are still displayed -
+            # this means that it is better here to generate "empty" files for these
+            # timesteps.
+
+            if snap.natoms:
+                ids, points, connections, force, length = \
+                    network(snap.atoms, forcedata.names)
+                print('Timestep:', str(timestep), 'npoints=', len(ids),
+                      'ncells=', snap.natoms, 'nperiodic=',
+                      snap.natoms - len(force), 'nconnex=', len(force))
+            else:
+                points = np.zeros((0, 3))
+                connections = np.zeros(0, dtype=np.int64)
+                force = length = np.zeros(0)
+
+            vtufile = os.path.join(outputdir,
+                                   fileprefix + '_' + str(timestep) + '.vtu')
+            if self.evtk:
+                evtkGrid(vtufile, points, connections, force, length)
+                group.addFile(filepath=os.path.relpath(vtufile, groupdir),
+                              sim_time=timestep)
             else:
-                index = id2.index(id)
-                xtemp, ytemp, ztemp = forcedata.snaps[fileindex].atoms[index, forcedata.names["x2"]], \
-                    forcedata.snaps[fileindex].atoms[index, forcedata.names["y2"]], \
-                    forcedata.snaps[fileindex].atoms[index, forcedata.names["z2"]]
-
-            x[counter] = xtemp
-            y[counter] = ytemp
-            z[counter] = ztemp
-            counter += 1
-
-        # Now create the connectivity list - this corresponds to pairs of IDs, but referencing
-        # the order of the ids array, so now we loop through 0..ncells and have to connect
-        # id1 and id2, so I need to see where in ids these correspond to
-
-        # If the periodic flag is set for a given interactions, DO NOT connect the points
-        # (to avoid lines that cross the simulation domain)
-
-        # Mask out periodic interactions from the cell (connectivity) array
-        # newList = [word for (word, mask) in zip(s,b) if mask]
-        id1_masked = [
-            ident for (
-                ident,
-                mask) in zip(
-                id1,
-                np.invert(periodic)) if mask]
-        id2_masked = [
-            ident for (
-                ident,
-                mask) in zip(
-                id2,
-                np.invert(periodic)) if mask]
-
-        # create an empty array to hold particle pairs and particle
-        # connectionLength
-        connections = np.zeros(2 * nconnex, dtype=int)
-
-        for pair in range(nconnex):
-            connections[2 * pair], connections[2 * pair + \
-                1] = ids.index(id1_masked[pair]), ids.index(id2_masked[pair])
-        # The offset array is simply generated from 2*(1..ncells)
-        offset = (np.arange(nconnex, dtype=int) + 1) * 2
-
-        # The type array is simply ncells x 3 (i.e. a VTKLine type)
-        celltype = np.ones(nconnex, dtype=int) * 3
-
-        # ******************************************
-        # Write DATA to FILE (binary)
-        # ******************************************
-
-        # create a VTK unstructured grid (.vtu) file
-        vtufile = fileprefix + '_' + str(timestep)
-        vtufile = os.path.join(outputdir, vtufile)
-        w = VtkFile(vtufile, VtkUnstructuredGrid)
-        vtufile += '.vtu'
-
-        w.openGrid()
-        w.openPiece(npoints=npoints, ncells=nconnex)
-
-        # Set up Points (x,y,z) data XML
-        w.openElement("Points")
-        w.addData("points", (x, y, z))
-        w.closeElement("Points")
-
-        # Set up Cell data
-        w.openElement("Cells")
-        w.addData("connectivity", connections)
-        w.addData("offsets", offset)
-        w.addData("types", celltype)
-        w.closeElement("Cells")
-
-        # Set up force data
-        w.openData("Cell")
-        w.addData("force", forceClean)
-        # w.addData("area", area)
-        # w.addData("heatflux", heatflux)
-#        w.closeData("Cell")
-
-        # Set up connectionLength data
-#        w.openData("Cell")
-        w.addData("connectionLength", connectionLengthClean)
-        w.closeData("Cell")
-
-        # and contact area
-        # w.openData("Cell")
-        # w.addData("area", area)
-        # w.closeData("Cell")
-
-        # and heat flux
-        # w.openData("Cell")
-        # w.addData("heatflux", heatflux)
-        # w.closeData("Cell")
-
-        # Wrap up
-        w.closePiece()
-        w.closeGrid()
-
-        # Append binary data
-        w.appendData((x, y, z))
-        w.appendData(connections).appendData(offset).appendData(celltype)
-        w.appendData(forceClean).appendData(connectionLengthClean)
-        w.save()
-
-    # Add this file to the group of all timesteps
-    groupfile.addFile(
-        filepath=os.path.relpath(
-            vtufile,
-            inputdir),
-        sim_time=timestep)
-
-    fileindex += 1
-    timestep = next(forcedata)
-
-# end of main loop - close group file
-groupfile.save()
+                vtuGrid(vtufile, points, connections,
+                        [("force", force), ("connectionLength", length)])
+                group.append((timestep, os.path.relpath(vtufile, groupdir)))
+            n += 1
+
+        # end of main loop - close group file
+
+        if self.evtk:
+            group.save()
+        else:
+            pvdGroup(groupfile + ".pvd", group)
+        return n
+
+# --------------------------------------------------------------------
+# force network of one snapshot of contacts
+# points are the unique particle IDs, sorted, located at the first position
+#   they appear with: as id1 if they ever are id1, else as id2
+# If the periodic flag is set for a given interaction, DO NOT connect the points
+#   (to avoid lines that cross the simulation domain)
+
+
+def network(atoms, names):
+    periodic = atoms[:, names["periodic"]] != 0
+    keep = np.invert(periodic)
+    id1 = atoms[:, names["id1"]].astype(np.int64)
+    id2 = atoms[:, names["id2"]].astype(np.int64)
+    pos1 = atoms[:, [names["x1"], names["y1"], names["z1"]]]
+    pos2 = atoms[:, [names["x2"], names["y2"], names["z2"]]]
+
+    # unique() returns the index of the first occurrence of each ID,
+    # all id1 entries come before the id2 entries
+
+    ids, first = np.unique(np.concatenate((id1, id2)), return_index=True)
+    points = np.concatenate((pos1, pos2))[first]
+
+    # connectivity references the position of each ID in the sorted ids
+
+    connections = np.empty(2 * int(keep.sum()), dtype=np.int64)
+    connections[0::2] = np.searchsorted(ids, id1[keep])
+    connections[1::2] = np.searchsorted(ids, id2[keep])
+
+    f = atoms[keep][:, [names["fx"], names["fy"], names["fz"]]]
+    force = np.sqrt(np.einsum("ij,ij->i", f, f))
+    delta = (pos1 - pos2)[keep]
+    length = np.sqrt(np.einsum("ij,ij->i", delta, delta))
+    return ids, points, connections, force, length
+
+# --------------------------------------------------------------------
+# write lines between points as binary VTK unstructured grid
+# all arrays are appended as raw little-endian blocks, each preceded
+# by its size in bytes as UInt64
+
+
+def vtuGrid(file, points, connections, celldata):
+    npoints = len(points)
+    ncells = len(connections) // 2
+    blocks = [np.ascontiguousarray(points, dtype="<f8"),
+              np.ascontiguousarray(connections, dtype="<i8"),
+              2 * np.arange(1, ncells + 1, dtype="<i8"),
+              np.full(ncells, 3, dtype="u1")]
+    for name, values in celldata:
+        blocks.append(np.ascontiguousarray(values, dtype="<f8"))
+
+    offsets = []
+    offset = 0
+    for block in blocks:
+        offsets.append(offset)
+        offset += 8 + block.nbytes
+
+    f = open(file, "wb")
+    header = ['<?xml version="1.0"?>',
+              '<VTKFile type="UnstructuredGrid" version="1.0" '
+              'byte_order="LittleEndian" header_type="UInt64">',
+              '<UnstructuredGrid>',
+              '<Piece NumberOfPoints="%d" NumberOfCells="%d">' %
+              (npoints, ncells),
+              '<Points>',
+              '<DataArray type="Float64" NumberOfComponents="3" '
+              'format="appended" offset="%d"/>' % offsets[0],
+              '</Points>',
+              '<Cells>',
+              '<DataArray type="Int64" Name="connectivity" '
+              'format="appended" offset="%d"/>' % offsets[1],
+              '<DataArray type="Int64" Name="offsets" '
+              'format="appended" offset="%d"/>' % offsets[2],
+              '<DataArray type="UInt8" Name="types" '
+              'format="appended" offset="%d"/>' % offsets[3],
+              '</Cells>',
+              '<CellData>']
+    for i, (name, values) in enumerate(celldata):
+        header.append('<DataArray type="Float64" Name="%s" '
+                      'format="appended" offset="%d"/>' % (name, offsets[4 + i]))
+    header += ['</CellData>',
+               '</Piece>',
+               '</UnstructuredGrid>',
+               '<AppendedData encoding="raw">']
+    f.write(("\n".join(header) + "\n_").encode("ascii"))
+    for block in blocks:
+        f.write(np.array([block.nbytes], dtype="<u8").tobytes())
+        f.write(block.tobytes())
+    f.write(b"\n</AppendedData>\n</VTKFile>\n")
+    f.close()
+
+# --------------------------------------------------------------------
+# write ParaView collection file, steps = list of (timestep,file)
+
+
+def pvdGroup(file, steps):
+    f = open(file, "w")
+    print('<?xml version="1.0"?>', file=f)
+    print('<VTKFile type="Collection" version="0.1" byte_order="LittleEndian">',
+          file=f)
+    print('<Collection>', file=f)
+    for timestep, vtufile in steps:
+        print('<DataSet timestep="%s" group="" part="0" file="%s"/>' %
+              (timestep, vtufile), file=f)
+    print('</Collection>', file=f)
+    print('</VTKFile>', file=f)
+    f.close()
+
+# --------------------------------------------------------------------
+# write lines between points via evtk
+
+
+def evtkGrid(vtufile, points, connections, force, length):
+    npoints = len(points)
+    nconnex = len(force)
+    x = np.ascontiguousarray(points[:, 0], dtype=np.float64)
+    y = np.ascontiguousarray(points[:, 1], dtype=np.float64)
+    z = np.ascontiguousarray(points[:, 2], dtype=np.float64)
+    connections = connections.astype(int)
+
+    # The offset array is simply generated from 2*(1..ncells)
+    offset = (np.arange(nconnex, dtype=int) + 1) * 2
+
+    # The type array is simply ncells x 3 (i.e. a VTKLine type)
+    celltype = np.ones(nconnex, dtype=int) * 3
+
+    w = VtkFile(vtufile[:-4], VtkUnstructuredGrid)
+    w.openGrid()
+    w.openPiece(npoints=npoints, ncells=nconnex)
+
+    w.openElement("Points")
+    w.addData("points", (x, y, z))
+    w.closeElement("Points")
+
+    w.openElement("Cells")
+    w.addData("connectivity", connections)
+    w.addData("offsets", offset)
+    w.addData("types", celltype)
+    w.closeElement("Cells")
+
+    w.openData("Cell")
+    w.addData("force", force)
+    w.addData("connectionLength", length)
+    w.closeData("Cell")
+
+    w.closePiece()
+    w.closeGrid()
+
+    w.appendData((x, y, z))
+    w.appendData(connections).appendData(offset).appendData(celltype)
+    w.appendData(force).appendData(length)
+    w.save()
+
+# --------------------------------------------------------------------
+
+
+def printHelp():
+    print("usage: dump2force.py [options] <filename>, where filename is a "
+          "SINGLE filename; typically dump.<runname>")
+    print("--tmin N : first timestep to convert")
+    print("--tmax N : last timestep to convert")
+    print("--evtk   : write files via the evtk package")
+    print("-o dir   : output directory (default: <runname> next to the dump)")
+
+
+if __name__ == "__main__":
+    try:
+        optlist, args = getopt.gnu_getopt(sys.argv[1:], 'o:',
+                                          ['tmin=', 'tmax=', 'evtk', 'help'])
+    except getopt.GetoptError as e:
+        sys.exit(str(e))
+    optdict = dict(optlist)
+    if "--help" in optdict or len(args) != 1:
+        printHelp()
+        sys.exit()
+
+    tmin = tmax = None
+    if "--tmin" in optdict:
+        tmin = int(optdict["--tmin"])
+    if "--tmax" in optdict:
+        tmax = int(optdict["--tmax"])
+    try:
+        f = dump2force(args[0], tmin, tmax)
+    except Exception as e:
+        sys.exit(str(e))
+    if "--evtk" in optdict:
+        f.evtk = 1
+    f.write(optdict.get("-o"))
@@ -9,14 +9,17 @@
 # ensight tool
 
 from __future__ import print_function, absolute_import
-import types
 import sys
+import numpy as np
+import textwriter
 oneline = "Convert LAMMPS snapshots or meshes to Ensight format"
 
 docstr = """
 e = ensight(d)	     d = object with atoms or elements (dump,data,mdump)
 e.change = 1         set to 1 if element nodal xyz change with time (def = 0)
+e.change = 2         write element geometry only for steps where it changes
 e.maxtype = 10       max particle type, set if query to data will be bad
+e.binary = 1         write C binary instead of ASCII Ensight Gold files (def = 0)
 
 e.one()
 e.one("new")
@@ -31,6 +34,9 @@ e.one("new","cns","Centro","eng","Energy")
                      Centro,Energy = Ensight name for the variable
 
 e.increment()        same args as one(), but process dump out-of-core
+                     snapshots are read one at a time via next() and
+                     discarded once written, d = dump("file",0)
+                     maxtype is taken from the 1st snapshot if not set
 
 e.many()             same args as one(), but create multiple Ensight files
                      tmp0000.xyz, tmp0001.xyz, etc
@@ -38,20 +44,33 @@ e.many()             same args as one(), but create multiple Ensight files
                      new0000.eng, new0001.eng, etc
 
 e.single(N)          same args as one() prepended by N, but write a single snap
+
+  binary files hold whole coordinate and variable arrays as 4-byte
+    ints and floats, Ensight and ParaView read them without text parsing
+  change = 2 compares the mesh of each step to the last written one
+    via a content hash of its nodes and elements (mdump meshkey())
+    geometry is written for the 1st step and each step the mesh changed
+    by many() into files numbered by that step, e.g. tmp0000.xyz, tmp0042.xyz
+    variable files are still written for every step
 """
 
 # History
 #   10/06, Steve Plimpton (SNL): original version
+#   10/26, change = 2 writes meshes only when their geometry changes
+#   10/26, C binary files, arrays written at once instead of per value
 
 # ToDo list
-#   binary files
 #   create vector or tensor variable files, not just scalar
 #     via pair of args like ["vx","vy","vz"],"vel"
 
 # Variables
 #   data = data file to read from
 #   which = 0 for particles, 1 for elements
+#   binary = 0/1 for ASCII/C binary files
 #   change = 0 for unchanging mesh coords, 1 for changing mesh coords (def = 0)
+#            2 for mesh coords written only when they change
+#   lastkey = content hash of last written mesh
+#   gsteps = steps mesh geometry was written for
 
 # Imports and external programs
 
@@ -66,14 +85,15 @@ class ensight:
     def __init__(self, data):
         self.change = 0
         self.maxtype = 0
+        self.binary = 0
         self.data = data
-        if type(data) is types.InstanceType and ".dump" in str(data.__class__):
+        if ".dump" in str(data.__class__):
             self.which = 0
-        elif type(data) is types.InstanceType and ".data" in str(data.__class__):
+        elif ".data" in str(data.__class__):
             self.which = 0
-        elif type(data) is types.InstanceType and ".mdump" in str(data.__class__):
+        elif ".mdump" in str(data.__class__):
             self.which = 1
-        elif type(data) is types.InstanceType and ".cdata" in str(data.__class__):
+        elif ".cdata" in str(data.__class__):
             self.which = 1
         else:
             raise Exception("unrecognized object passed to ensight")
@@ -96,24 +116,17 @@ class ensight:
         if self.which == 0 and self.maxtype == 0:
             self.maxtype = self.data.maxtype()
 
-        # write Ensight *.case header file
-
-        f = open("%s.case" % root, "w")
-        times = self.data.time()
-        self.case_file(f, root, pairs, 0, len(times), times)
-        f.close()
-
         # open additional files
 
-        f = open(root + ".xyz", "w")
+        f = self.open(root + ".xyz", 1)
         vfiles = []
         for pair in pairs:
-            vfiles.append(open(root + "." + pair[0], "w"))
+            vfiles.append(self.open(root + "." + pair[0]))
 
         # loop over snapshots
         # write coords into xyz file, variables into their files
 
-        first = 1
+        times = []
         n = flag = etype = 0
         while 1:
             which, time, flag = self.data.iterator(flag)
@@ -121,28 +134,23 @@ class ensight:
                 break
 
             if self.which == 0:
-                print("BEGIN TIME STEP", file=f)
+                self.string(f, "BEGIN TIME STEP")
                 time, box, atoms, bonds, tris, lines = self.data.viz(which)
                 self.coord_file_atoms(f, box, atoms)
-                print("END TIME STEP", file=f)
-            elif self.change == 0 and first:
-                print("BEGIN TIME STEP", file=f)
-                time, box, nodes, elements, nvalues, evalues = self.data.mviz(
-                    which)
-                self.coord_file_elements(f, box, nodes, elements)
-                etype = len(elements[0])
-                first = 0
-                print("END TIME STEP", file=f)
-            elif self.change:
-                print("BEGIN TIME STEP", file=f)
+                self.string(f, "END TIME STEP")
+            else:
                 time, box, nodes, elements, nvalues, evalues = self.data.mviz(
                     which)
-                self.coord_file_elements(f, box, nodes, elements)
                 etype = len(elements[0])
-                print("END TIME STEP", file=f)
+                if self.geometry(which, n):
+                    if self.change:
+                        self.string(f, "BEGIN TIME STEP")
+                    self.coord_file_elements(f, box, nodes, elements)
+                    if self.change:
+                        self.string(f, "END TIME STEP")
 
             for i in range(len(pairs)):
-                print("BEGIN TIME STEP", file=vfiles[i])
+                self.string(vfiles[i], "BEGIN TIME STEP")
                 values = self.data.vecs(time, pairs[i][0])
                 if self.which == 0:
                     self.variable_file_atoms(
@@ -150,8 +158,9 @@ class ensight:
                 else:
                     self.variable_file_elements(
                         vfiles[i], pairs[i][1], etype, values)
-                print("END TIME STEP", file=vfiles[i])
+                self.string(vfiles[i], "END TIME STEP")
 
+            times.append(time)
             print(time, end=' ')
             sys.stdout.flush()
             n += 1
@@ -162,6 +171,12 @@ class ensight:
         for f in vfiles:
             f.close()
 
+        # write Ensight *.case header file now that know geometry steps
+
+        f = open("%s.case" % root, "w")
+        self.case_file(f, root, pairs, 0, len(times), times)
+        f.close()
+
         print("\nwrote %s snapshots in Ensight format" % n)
 
     # --------------------------------------------------------------------
@@ -177,55 +192,47 @@ class ensight:
         for i in range(0, len(args), 2):
             pairs.append([args[i], args[i + 1]])
 
-        # max # of types for all steps in Ensight files
-
-        if self.which == 0 and self.maxtype == 0:
-            self.maxtype = self.data.maxtype()
-
         # open additional files
 
-        f = open(root + ".xyz", "w")
+        f = self.open(root + ".xyz", 1)
         vfiles = []
         for pair in pairs:
-            vfiles.append(open(root + "." + pair[0], "w"))
+            vfiles.append(self.open(root + "." + pair[0]))
 
-        # loop over snapshots
+        # loop over snapshots, only the current one is kept in memory
         # write coords into xyz file, variables into their files
+        # max # of types for all steps in Ensight files from 1st snapshot
 
         times = []
-        first = 1
         n = etype = 0
         while 1:
-            time = next(self.data)
+            time = self.data.next()
             if time == -1:
                 break
             times.append(time)
             self.data.tselect.one(time)
             self.data.delete()
+            if self.which == 0 and self.maxtype == 0:
+                self.maxtype = self.data.maxtype()
 
             if self.which == 0:
-                print("BEGIN TIME STEP", file=f)
+                self.string(f, "BEGIN TIME STEP")
                 time, box, atoms, bonds, tris, lines = self.data.viz(0)
                 self.coord_file_atoms(f, box, atoms)
-                print("END TIME STEP", file=f)
-            elif self.change == 0 and first:
-                print("BEGIN TIME STEP", file=f)
-                time, box, nodes, elements, nvalues, evalues = self.data.mviz(
-                    0)
-                self.coord_file_elements(f, box, nodes, elements)
-                etype = len(elements[0])
-                first = 0
-                print("END TIME STEP", file=f)
-            elif self.change:
-                print("BEGIN TIME STEP", file=f)
+                self.string(f, "END TIME STEP")
+            else:
                 time, box, nodes, elements, nvalues, evalues = self.data.mviz(
                     0)
-                self.coord_file_elements(f, box, nodes, elements)
                 etype = len(elements[0])
-                print("END TIME STEP", file=f)
+                if self.geometry(0, n):
+                    if self.change:
+                        self.string(f, "BEGIN TIME STEP")
+                    self.coord_file_elements(f, box, nodes, elements)
+                    if self.change:
+                        self.string(f, "END TIME STEP")
 
             for i in range(len(pairs)):
-                print("BEGIN TIME STEP", file=vfiles[i])
+                self.string(vfiles[i], "BEGIN TIME STEP")
                 values = self.data.vecs(time, pairs[i][0])
                 if self.which == 0:
                     self.variable_file_atoms(
@@ -233,7 +240,7 @@ class ensight:
                 else:
                     self.variable_file_elements(
                         vfiles[i], pairs[i][1], etype, values)
-                print("END TIME STEP", file=vfiles[i])
+                self.string(vfiles[i], "END TIME STEP")
 
             print(time, end=' ')
             sys.stdout.flush()
@@ -271,19 +278,12 @@ class ensight:
         if self.which == 0 and self.maxtype == 0:
             self.maxtype = self.data.maxtype()
 
-        # write Ensight *.case header file
-
-        f = open("%s.case" % root, "w")
-        times = self.data.time()
-        self.case_file(f, root, pairs, 1, len(times), times)
-        f.close()
-
         # loop over snapshots
         # generate unique filenames
         # write coords into one xyz file per snapshot, variables into their
         # files
 
-        first = 1
+        times = []
         n = flag = etype = 0
         while 1:
             which, time, flag = self.data.iterator(flag)
@@ -309,39 +309,41 @@ class ensight:
                     files.append(root + str(n) + "." + pair[0])
 
             if self.which == 0:
-                f = open(file, "w")
+                f = self.open(file, 1)
                 time, box, atoms, bonds, tris, lines = self.data.viz(which)
                 self.coord_file_atoms(f, box, atoms)
                 f.close()
-            elif self.change == 0 and first:
-                f = open(root + ".xyz", "w")
-                time, box, nodes, elements, nvalues, evalues = self.data.mviz(
-                    which)
-                self.coord_file_elements(f, box, nodes, elements)
-                etype = len(elements[0])
-                first = 0
-                f.close()
-            elif self.change:
-                f = open(file, "w")
+            else:
                 time, box, nodes, elements, nvalues, evalues = self.data.mviz(
                     which)
-                self.coord_file_elements(f, box, nodes, elements)
                 etype = len(elements[0])
-                f.close()
+                if self.geometry(which, n):
+                    if self.change == 0:
+                        file = root + ".xyz"
+                    f = self.open(file, 1)
+                    self.coord_file_elements(f, box, nodes, elements)
+                    f.close()
 
             for i in range(len(pairs)):
                 values = self.data.vecs(time, pairs[i][0])
-                f = open(files[i], "w")
+                f = self.open(files[i])
                 if self.which == 0:
                     self.variable_file_atoms(f, pairs[i][1], atoms, values)
                 else:
                     self.variable_file_elements(f, pairs[i][1], etype, values)
                 f.close()
 
+            times.append(time)
             print(time, end=' ')
             sys.stdout.flush()
             n += 1
 
+        # write Ensight *.case header file now that know geometry steps
+
+        f = open("%s.case" % root, "w")
+        self.case_file(f, root, pairs, 1, len(times), times)
+        f.close()
+
         print("\nwrote %s snapshots in Ensight format" % n)
 
     # --------------------------------------------------------------------
@@ -364,37 +366,68 @@ class ensight:
 
         # write Ensight *.case header file
 
+        self.gsteps = [0]
         f = open("%s.case" % root, "w")
         self.case_file(f, root, pairs, 0, 1, [time])
         f.close()
 
         # write coords into xyz file, variables into their files
+        # case file declares them as single-file transient files with 1 step,
+        #   all but an unchanging mesh are enclosed in BEGIN/END TIME STEP
 
         which = self.data.findtime(time)
         etype = 0
 
-        f = open(root + ".xyz", "w")
+        f = self.open(root + ".xyz", 1)
         if self.which == 0:
+            self.string(f, "BEGIN TIME STEP")
             time, box, atoms, bonds, tris, lines = self.data.viz(which)
             self.coord_file_atoms(f, box, atoms)
+            self.string(f, "END TIME STEP")
         else:
+            if self.change:
+                self.string(f, "BEGIN TIME STEP")
             time, box, nodes, elements, nvalues, evalues = self.data.mviz(
                 which)
             self.coord_file_elements(f, box, nodes, elements)
             etype = len(elements[0])
+            if self.change:
+                self.string(f, "END TIME STEP")
         f.close()
 
         for i in range(len(pairs)):
             values = self.data.vecs(time, pairs[i][0])
-            f = open(root + "." + pairs[i][0], "w")
+            f = self.open(root + "." + pairs[i][0])
+            self.string(f, "BEGIN TIME STEP")
             if self.which == 0:
                 self.variable_file_atoms(f, pairs[i][1], atoms, values)
             else:
                 self.variable_file_elements(f, pairs[i][1], etype, values)
+            self.string(f, "END TIME STEP")
             f.close()
 
+    # --------------------------------------------------------------------
+    # return 1 if mesh geometry of snapshot which is written for step n
+    # change = 2 skips steps whose mesh has the same content hash as the
+    #   last written one, gsteps = steps geometry was written for
+
+    def geometry(self, which, n):
+        if n == 0:
+            self.lastkey = None
+            self.gsteps = []
+        if self.change == 0 and n:
+            return 0
+        if self.change == 2:
+            key = self.data.meshkey(which)
+            if key == self.lastkey:
+                return 0
+            self.lastkey = key
+        self.gsteps.append(n)
+        return 1
+
     # --------------------------------------------------------------------
     # write Ensight case file
+    # with change = 2 geometry uses its own time set 2 and file set 2
 
     def case_file(self, f, root, pairs, multifile, nsnaps, times):
         print("# Ensight case file\n", file=f)
@@ -410,6 +443,10 @@ class ensight:
         else:
             if self.change == 0:
                 print("GEOMETRY\nmodel: %s.xyz\n" % root, file=f)
+            elif self.change == 2 and multifile:
+                print("GEOMETRY\nmodel: 2 %s****.xyz\n" % root, file=f)
+            elif self.change == 2:
+                print("GEOMETRY\nmodel: 2 2 %s.xyz\n" % root, file=f)
             elif multifile:
                 print("GEOMETRY\nmodel: %s****.xyz\n" % root, file=f)
             else:
@@ -451,10 +488,32 @@ class ensight:
         print(file=f)
         print(file=f)
 
+        gflag = self.which == 1 and self.change == 2
+        if gflag:
+            print("time set: 2", file=f)
+            print("number of steps:", len(self.gsteps), file=f)
+            if multifile:
+                print("filename numbers:", file=f)
+                for i in range(len(self.gsteps)):
+                    print(self.gsteps[i], end=' ', file=f)
+                    if i % 10 == 9:
+                        print(file=f)
+                print(file=f)
+            print("time values:", file=f)
+            for i in range(len(self.gsteps)):
+                print(times[self.gsteps[i]], end=' ', file=f)
+                if i % 10 == 9:
+                    print(file=f)
+            print(file=f)
+            print(file=f)
+
         if not multifile:
             print("FILE", file=f)
             print("file set: 1", file=f)
             print("number of steps:", nsnaps, file=f)
+            if gflag:
+                print("file set: 2", file=f)
+                print("number of steps:", len(self.gsteps), file=f)
 
     # --------------------------------------------------------------------
     # write Ensight coordinates for atoms
@@ -462,87 +521,60 @@ class ensight:
     # one part = coords for all atoms of a single type
 
     def coord_file_atoms(self, f, box, atoms):
-        print("Particle geometry\nfor a collection of atoms", file=f)
-        print("node id given", file=f)
-        print("element id off", file=f)
-        print("extents", file=f)
-        print("%12.5e%12.5e" % (box[0], box[3]), file=f)
-        print("%12.5e%12.5e" % (box[1], box[4]), file=f)
-        print("%12.5e%12.5e" % (box[2], box[5]), file=f)
-
+        self.string(f, "Particle geometry")
+        self.string(f, "for a collection of atoms")
+        self.string(f, "node id given")
+        self.string(f, "element id off")
+        self.extents(f, box)
+
+        atoms = np.asarray(atoms, dtype=float).reshape(-1, 5)
+        types = atoms[:, 1].astype(int)
         for type in range(1, self.maxtype + 1):
-            print("part", file=f)
-            print("%10d" % type, file=f)
-            print("type", type, file=f)
-            print("coordinates", file=f)
-            group = [atom for atom in atoms if int(atom[1]) == type]
-            print("%10d" % len(group), file=f)
-            for atom in group:
-                print("%10d" % int(atom[0]), file=f)
-            for atom in group:
-                print("%12.5e" % atom[2], file=f)
-            for atom in group:
-                print("%12.5e" % atom[3], file=f)
-            for atom in group:
-                print("%12.5e" % atom[4], file=f)
-            print("point", file=f)
-            print("%10d" % len(group), file=f)
-            for i in range(1, len(group) + 1):
-                print("%10d" % i, file=f)
+            group = atoms[types == type]
+            self.string(f, "part")
+            self.ints(f, [type])
+            self.string(f, "type %d" % type)
+            self.string(f, "coordinates")
+            self.ints(f, [len(group)])
+            self.ints(f, group[:, 0])
+            self.floats(f, group[:, 2])
+            self.floats(f, group[:, 3])
+            self.floats(f, group[:, 4])
+            self.string(f, "point")
+            self.ints(f, [len(group)])
+            self.ints(f, np.arange(1, len(group) + 1))
 
     # --------------------------------------------------------------------
     # write Ensight coordinates for elements
 
     def coord_file_elements(self, f, box, nodes, elements):
-        print("Element geometry\nfor a collection of elements", file=f)
-        print("node id given", file=f)
-        print("element id given", file=f)
-        print("extents", file=f)
-        print("%12.5e%12.5e" % (box[0], box[3]), file=f)
-        print("%12.5e%12.5e" % (box[1], box[4]), file=f)
-        print("%12.5e%12.5e" % (box[2], box[5]), file=f)
-
-        print("part", file=f)
-        print("%10d" % 1, file=f)
-        print("all elements", file=f)
-        print("coordinates", file=f)
-        print("%10d" % len(nodes), file=f)
-        for node in nodes:
-            print("%10d" % int(node[0]), file=f)
-        for node in nodes:
-            print("%12.5e" % node[2], file=f)
-        for node in nodes:
-            print("%12.5e" % node[3], file=f)
-        for node in nodes:
-            print("%12.5e" % node[4], file=f)
+        self.string(f, "Element geometry")
+        self.string(f, "for a collection of elements")
+        self.string(f, "node id given")
+        self.string(f, "element id given")
+        self.extents(f, box)
+
+        nodes = np.asarray(nodes, dtype=float)
+        elements = np.asarray(elements, dtype=float)
+        self.string(f, "part")
+        self.ints(f, [1])
+        self.string(f, "all elements")
+        self.string(f, "coordinates")
+        self.ints(f, [len(nodes)])
+        self.ints(f, nodes[:, 0])
+        self.floats(f, nodes[:, 2])
+        self.floats(f, nodes[:, 3])
+        self.floats(f, nodes[:, 4])
 
         if len(elements[0]) == 5:
-            print("tria3", file=f)
+            self.string(f, "tria3")
         elif len(elements[0]) == 6:
-            print("tetra4", file=f)
+            self.string(f, "tetra4")
         else:
             raise Exception("unrecognized element type")
-        print("%10d" % len(elements), file=f)
-
-        for element in elements:
-            print("%10d" % int(element[0]), file=f)
-        if len(elements[0]) == 5:
-            for element in elements:
-                print(
-                    "%10d%10d%10d" %
-                    (int(
-                        element[2]), int(
-                        element[3]), int(
-                        element[4])), file=f)
-        elif len(elements[0]) == 6:
-            for element in elements:
-                print(
-                    "%10d%10d%10d%10d" %
-                    (int(
-                        element[2]), int(
-                        element[3]), int(
-                        element[4]), int(
-                        element[5])), file=f)
+        self.ints(f, [len(elements)])
+        self.ints(f, elements[:, 0])
+        self.ints(f, elements[:, 2:])
 
     # --------------------------------------------------------------------
     # write Ensight variable values for atoms
@@ -550,26 +582,82 @@ class ensight:
     # one part = values for all atoms of a single type
 
     def variable_file_atoms(self, f, name, atoms, values):
-        print("Particle %s" % name, file=f)
+        self.string(f, "Particle %s" % name)
+        types = np.asarray(atoms, dtype=float).reshape(-1, 5)[:, 1]
+        types = types.astype(int)
+        values = np.asarray(values, dtype=float)
         for type in range(1, self.maxtype + 1):
-            print("part", file=f)
-            print("%10d" % type, file=f)
-            print("coordinates", file=f)
-            group = [values[i] for i in range(len(atoms))
-                     if int(atoms[i][1]) == type]
-            for value in group:
-                print("%12.5e" % value, file=f)
+            self.string(f, "part")
+            self.ints(f, [type])
+            self.string(f, "coordinates")
+            self.floats(f, values[types == type])
 
     # --------------------------------------------------------------------
     # write Ensight variable values for elements
 
     def variable_file_elements(self, f, name, etype, values):
-        print("Element %s" % name, file=f)
-        print("part", file=f)
-        print("%10d" % 1, file=f)
+        self.string(f, "Element %s" % name)
+        self.string(f, "part")
+        self.ints(f, [1])
         if etype == 5:
-            print("tria3", file=f)
+            self.string(f, "tria3")
         elif etype == 6:
-            print("tetra4", file=f)
-        for value in values:
-            print("%12.5e" % value, file=f)
+            self.string(f, "tetra4")
+        self.floats(f, values)
+
+    # --------------------------------------------------------------------
+    # open an Ensight file for writing
+    # binary geometry files start with "C Binary", variable files do not
+
+    def open(self, file, geometry=0):
+        if not self.binary:
+            return open(file, "w")
+        f = open(file, "wb")
+        if geometry:
+            self.string(f, "C Binary")
+        return f
+
+    # --------------------------------------------------------------------
+    # write a line of text, 80 characters in binary files
+
+    def string(self, f, text):
+        if self.binary:
+            f.write(text.encode()[:80].ljust(80, b"\0"))
+        else:
+            print(text, file=f)
+
+    # --------------------------------------------------------------------
+    # write extents of box
+
+    def extents(self, f, box):
+        self.string(f, "extents")
+        values = [box[0], box[3], box[1], box[4], box[2], box[5]]
+        if self.binary:
+            self.floats(f, values)
+        else:
+            f.write("%12.5e%12.5e\n%12.5e%12.5e\n%12.5e%12.5e\n" %
+                    tuple(values))
+
+    # --------------------------------------------------------------------
+    # write array of ints, one value per line in ASCII files
+    # 2d arrays are written one row per line
+
+    def ints(self, f, values):
+        values = np.asarray(values)
+        if self.binary:
+            f.write(values.astype(np.int32).tobytes())
+        else:
+            values = values.astype(np.int64)
+            if values.ndim == 1:
+                values = values.reshape(-1, 1)
+            textwriter.write(f, "%10d" * values.shape[1] + "\n", values)
+
+    # --------------------------------------------------------------------
+    # write array of floats, one value per line in ASCII files
+
+    def floats(self, f, values):
+        values = np.asarray(values, dtype=float)
+        if self.binary:
+            f.write(values.astype(np.float32).tobytes())
+        else:
+            textwriter.write(f, "%12.5e\n", values.reshape(-1, 1))
@@ -0,0 +1,148 @@
+# framecache class, not a top-level Pizza.py tool
+
+# History
+#   10/26, frames of gl and vcr read on demand with background prefetch
+
+# ToDo list
+
+# Variables
+#   load = function returning frame N, called by caller or prefetch thread
+#   nframes = # of frames (0 to N-1)
+#   size = max # of frames kept in memory
+#   ahead = # of frames read ahead of the current frame
+#   frames = dictionary of kept frames, least recently used first
+#   current = last requested frame
+#   step = direction of travel, 1 = forward, -1 = backward
+#   want = frames the prefetch thread reads next, in order
+#   loading = frame the prefetch thread is reading now, None if idle
+#   lock = condition that guards frames and want, wakes the thread
+
+# Imports and external programs
+
+from __future__ import print_function, absolute_import
+import threading
+from collections import OrderedDict
+
+# Class definition
+# frames are read once requested and kept up to size frames
+# after each request the next ahead frames in the direction of travel are
+#   read by a background thread, so stepping through frames does not wait
+#   on reading them while the caller is busy drawing the current one
+
+
+class framecache:
+
+    # --------------------------------------------------------------------
+
+    def __init__(self, load, nframes, size=16, ahead=4):
+        self.load = load
+        self.nframes = nframes
+        self.ahead = ahead
+        self.size = max(size, ahead + 1)
+        self.frames = OrderedDict()
+        self.current = 0
+        self.step = 1
+        self.want = []
+        self.loading = None
+        self.lock = threading.Condition()
+        self.thread = None
+        self.done = 0
+
+    # --------------------------------------------------------------------
+    # return frame index, read it now if it was not read ahead
+    # if the prefetch thread is reading it, wait for it instead of
+    #   reading the same frame twice at the same time
+
+    def get(self, index):
+        with self.lock:
+            if index != self.current:
+                self.step = 1 if index > self.current else -1
+            self.current = index
+            if index in self.want:
+                self.want.remove(index)
+            while index == self.loading:
+                self.lock.wait()
+            frame = self.frames.get(index)
+            if frame is not None:
+                self.frames.move_to_end(index)
+
+        if frame is None:
+            frame = self.load(index)
+            with self.lock:
+                self.store(index, frame)
+
+        self.prefetch()
+        return frame
+
+    # --------------------------------------------------------------------
+    # queue frames ahead of current one that are not kept yet
+
+    def prefetch(self):
+        if self.ahead <= 0:
+            return
+        with self.lock:
+            self.want = []
+            for i in range(1, self.ahead + 1):
+                index = self.current + i * self.step
+                if 0 <= index < self.nframes and index not in self.frames:
+                    self.want.append(index)
+            if not self.want:
+                return
+            if not self.thread:
+                self.thread = threading.Thread(target=self.run)
+                self.thread.daemon = True
+                self.thread.start()
+            self.lock.notify_all()
+
+    # --------------------------------------------------------------------
+    # prefetch thread, reads wanted frames until close()
+    # a frame that fails to read is skipped, get() then reads it again
+    #   and raises the error to the caller
+
+    def run(self):
+        while 1:
+            with self.lock:
+                while not self.want and not self.done:
+                    self.lock.wait()
+                if self.done:
+                    return
+                index = self.want.pop(0)
+                if index in self.frames:
+                    continue
+                self.loading = index
+            try:
+                frame = self.load(index)
+            except BaseException:
+                frame = None
+            with self.lock:
+                self.loading = None
+                if frame is not None and not self.done:
+                    self.store(index, frame)
+                self.lock.notify_all()
+
+    # --------------------------------------------------------------------
+    # keep frame, drop least recently used frames beyond size
+    # caller holds lock
+
+    def store(self, index, frame):
+        self.frames[index] = frame
+        self.frames.move_to_end(index)
+        while len(self.frames) > self.size:
+            oldest = next(iter(self.frames))
+            if oldest == self.current:
+                self.frames.move_to_end(oldest)
+                oldest = next(iter(self.frames))
+            del self.frames[oldest]
+
+    # --------------------------------------------------------------------
+    # stop prefetch thread and drop all frames
+
+    def close(self):
+        with self.lock:
+            self.done = 1
+            self.want = []
+            self.frames.clear()
+            self.lock.notify_all()
+        if self.thread:
+            self.thread.join()
+            self.thread = None
@@ -8,9 +8,11 @@
 
 # gl tool
 from __future__ import print_function, absolute_import
-from math import sin, cos, sqrt, pi, acos
+from math import sin, cos, tan, sqrt, pi, acos
 import sys
+import numpy as np
 from vizinfo import vizinfo
+from framecache import framecache
 import Image
 from OpenGL.GLUT import *
 from OpenGL.Tk import *
@@ -92,11 +94,22 @@ g.ortho(0/1)                perspective (0) vs orthographic (1) view
 g.clip('xlo',0.25)          clip in xyz from lo/hi at box fraction (0-1)
 g.reload()                  force all data to be reloaded
 g.cache = 0/1               turn off/on GL cache lists (def = on)
+g.arrays = 0/1              turn off/on atom vertex arrays (def = on)
+g.points = 0/1              draw atoms as spheres (0) or round points (1)
+g.ahead = 4                 # of frames read ahead during playback (def = 4)
+g.keep = 16                 max # of frames kept in memory (def = 16)
 theta,phi,x,y,scale,up = g.gview()   grab all current view parameters
 g.sview(theta,phi,x,y,scale,up)      set all view parameters
 
   data reload is necessary if dump selection is used to change the data
+  frames are read from the data when first displayed, while one is shown
+    the next ones are read ahead in the background
+  ahead and keep take effect on the next reload()
+  all() also reads snapshots ahead unless a select string is used
   cache lists usually improve graphics performance
+  vertex arrays draw all atoms of one type with a few GL calls,
+    which makes vcr playback of large snapshots interactive
+  points are faster than spheres, but are flat and not lit
   gview returns values to use in other commands:
     theta,phi are args to rotate()
     x,y are args to shift()
@@ -106,6 +119,8 @@ g.sview(theta,phi,x,y,scale,up)      set all view parameters
 
 # History
 #   9/05, Steve Plimpton (SNL): original version
+#   10/26, atoms drawn from per-type vertex arrays, frames kept as arrays
+#   10/26, frames read on demand into a bounded cache with prefetching
 
 # ToDo list
 #   when do aselect with select str while looping N times on same timestep
@@ -127,9 +142,21 @@ g.sview(theta,phi,x,y,scale,up)      set all view parameters
 #   view[3] = direction towards eye in simulation box (unit vector)
 #   up[3] = screen up direction in simulation box (unit vector)
 #   right[3] = screen right direction in simulation box (unit vector)
+#   arrays = 0/1 for drawing atoms one by one or from vertex arrays
+#   points = 0/1 for drawing atoms from arrays as spheres or round points
+#   mesh = unit sphere vertices and triangles for a block of atoms
+#   ahead = # of frames read ahead of the displayed one
+#   keep = max # of frames kept in memory
+#   frames = framecache of frames read since reload()
+#   which = data index of each frame
+#   timeframes = timestep of each frame
 
 # Imports and external programs
 
+# spheres from vertex arrays are drawn a block of atoms at a time,
+#   with at most VERTICES vertices, so arrays for one block stay small
+
+VERTICES = 1 << 19
 
 # Class definition
 
@@ -173,6 +200,12 @@ class gl:
         self.calllist = [0]         # indexed by 1-Ntype, so start with 0 index
         self.cache = 1
         self.cachelist = 0
+        self.arrays = 1
+        self.points = 0
+        self.mesh = None
+        self.ahead = 4
+        self.keep = 16
+        self.frames = None
 
         self.boxdraw = []
         self.atomdraw = []
@@ -529,52 +562,55 @@ class gl:
         self.w.tkRedraw()
 
     # --------------------------------------------------------------------
-    # grab all selected snapshots from data object
-    # add GL-specific info to each bond
+    # find all selected snapshots of data object
+    # frames are read when displayed, see load()
 
     def reload(self):
         print("Loading data into gl tool ...")
         data = self.data
 
+        if self.frames:
+            self.frames.close()
+        self.which = []
         self.timeframes = []
-        self.boxframes = []
-        self.atomframes = []
-        self.bondframes = []
-        self.triframes = []
-        self.lineframes = []
-
-        box = []
+        self.maxbox = None
         if self.boxflag == 2:
-            box = data.maxbox()
+            self.maxbox = data.maxbox()
 
         flag = 0
         while 1:
             which, time, flag = data.iterator(flag)
             if flag == -1:
                 break
-            time, boxone, atoms, bonds, tris, lines = data.viz(which)
-            if self.boxflag < 2:
-                box = boxone
-            if bonds:
-                self.bonds_augment(bonds)
-
+            self.which.append(which)
             self.timeframes.append(time)
-            self.boxframes.append(box)
-            self.atomframes.append(atoms)
-            self.bondframes.append(bonds)
-            self.triframes.append(tris)
-            self.lineframes.append(lines)
-
             print(time, end=' ')
             sys.stdout.flush()
         print()
 
         self.nframes = len(self.timeframes)
-        self.distance = compute_distance(self.boxframes[0])
-        self.center = compute_center(self.boxframes[0])
+        self.frames = framecache(self.load, self.nframes, self.keep,
+                                 self.ahead)
+        box = self.frames.get(0)[1]
+        self.distance = compute_distance(box)
+        self.center = compute_center(box)
         self.ready = 1
         self.setview()
 
+    # --------------------------------------------------------------------
+    # read one frame from data object, called by framecache
+    # atoms are stored as one array
+    # add GL-specific info to each bond
+
+    def load(self, index):
+        time, box, atoms, bonds, tris, lines = \
+            self.data.viz(self.which[index])
+        if self.maxbox:
+            box = self.maxbox
+        if bonds:
+            self.bonds_augment(bonds)
+        return time, box, np.array(atoms, dtype=float), bonds, tris, lines
+
     # --------------------------------------------------------------------
 
     def nolabel(self):
@@ -644,22 +680,31 @@ class gl:
         # loop over all selected steps
         # distance from 1st snapshot box or max box for all selected steps
         # recompute box center on 1st step or if panning
+        # w/out select string, next snapshots are read while one is drawn
 
         if len(list) <= 1:
 
-            n = nstart
-            i = flag = 0
+            steps = []
+            flag = 0
             while 1:
                 which, time, flag = data.iterator(flag)
                 if flag == -1:
                     break
+                steps.append((which, time))
+            if self.select == "":
+                frames = framecache(lambda i: data.viz(steps[i][0]),
+                                    len(steps), self.ahead + 1, self.ahead)
 
+            n = nstart
+            for i, (which, time) in enumerate(steps):
                 fraction = float(i) / (ncount - 1)
 
                 if self.select != "":
                     newstr = self.select % fraction
                     data.aselect.test(newstr, time)
-                time, boxone, atoms, bonds, tris, lines = data.viz(which)
+                    time, boxone, atoms, bonds, tris, lines = data.viz(which)
+                else:
+                    time, boxone, atoms, bonds, tris, lines = frames.get(i)
 
                 if self.boxflag < 2:
                     box = boxone
@@ -704,9 +749,11 @@ class gl:
 
                 print(time, end=' ')
                 sys.stdout.flush()
-                i += 1
                 n += 1
 
+            if self.select == "":
+                frames.close()
+
         # loop ncount times on same step
         # distance from 1st snapshot box or max box for all selected steps
         # recompute box center on 1st step or if panning
@@ -774,16 +821,13 @@ class gl:
     # --------------------------------------------------------------------
 
     def display(self, index):
-        self.boxdraw = self.boxframes[index]
-        self.atomdraw = self.atomframes[index]
-        self.bonddraw = self.bondframes[index]
-        self.tridraw = self.triframes[index]
-        self.linedraw = self.lineframes[index]
+        time, self.boxdraw, self.atomdraw, self.bonddraw, self.tridraw, \
+            self.linedraw = self.frames.get(index)
 
         self.ready = 1
         self.cachelist = -self.cachelist
         self.w.tkRedraw()
-        return (self.timeframes[index], len(self.atomdraw))
+        return (time, len(self.atomdraw))
 
     # --------------------------------------------------------------------
     # draw the GL scene
@@ -887,10 +931,13 @@ class gl:
 #        glEnable(GL_LIGHTING)
 
             if not self.clipflag:
-                for atom in self.atomdraw:
-                    glTranslatef(atom[2], atom[3], atom[4])
-                    glCallList(self.calllist[int(atom[1])])
-                    glTranslatef(-atom[2], -atom[3], -atom[4])
+                if self.arrays:
+                    self.draw_atoms(self.atomdraw)
+                else:
+                    for atom in self.atomdraw:
+                        glTranslatef(atom[2], atom[3], atom[4])
+                        glCallList(self.calllist[int(atom[1])])
+                        glTranslatef(-atom[2], -atom[3], -atom[4])
 
                 if self.bonddraw:
                     bound = 0.25 * self.distance
@@ -916,7 +963,7 @@ class gl:
                             obj, rad, rad, bond[10], self.nsides, self.nsides)
                         glPopMatrix()
 
-                if self.tridraw:
+                if len(self.tridraw):
                     fillflag = self.vizinfo.tfill[int(self.tridraw[0][1])]
 
                     if fillflag != 1:
@@ -968,13 +1015,17 @@ class gl:
                 zlo = box[2] + self.clipzlo * (box[5] - box[2])
                 zhi = box[2] + self.clipzhi * (box[5] - box[2])
 
-                for atom in self.atomdraw:
-                    x, y, z = atom[2], atom[3], atom[4]
-                    if x >= xlo and x <= xhi and y >= ylo and y <= yhi and \
-                            z >= zlo and z <= zhi:
-                        glTranslatef(x, y, z)
-                        glCallList(self.calllist[int(atom[1])])
-                        glTranslatef(-x, -y, -z)
+                if self.arrays:
+                    self.draw_atoms(self.atomdraw,
+                                    (xlo, xhi, ylo, yhi, zlo, zhi))
+                else:
+                    for atom in self.atomdraw:
+                        x, y, z = atom[2], atom[3], atom[4]
+                        if x >= xlo and x <= xhi and y >= ylo and \
+                                y <= yhi and z >= zlo and z <= zhi:
+                            glTranslatef(x, y, z)
+                            glCallList(self.calllist[int(atom[1])])
+                            glTranslatef(-x, -y, -z)
 
                 if self.bonddraw:
                     bound = 0.25 * self.distance
@@ -1008,7 +1059,7 @@ class gl:
                                 obj, rad, rad, bond[10], self.nsides, self.nsides)
                             glPopMatrix()
 
-                if self.tridraw:
+                if len(self.tridraw):
                     fillflag = self.vizinfo.tfill[int(self.tridraw[0][1])]
 
                     if fillflag != 1:
@@ -1071,6 +1122,110 @@ class gl:
 
         glFlush()
 
+    # --------------------------------------------------------------------
+    # draw atoms from vertex arrays, atoms of one type at once
+    # only atom coords are new for each frame, mesh arrays are reused
+    # clip = xlo,xhi,ylo,yhi,zlo,zhi bounds of drawn atoms, if any
+
+    def draw_atoms(self, atoms, clip=None):
+        atoms = np.asarray(atoms, dtype=float)
+        if not len(atoms):
+            return
+        if clip:
+            xlo, xhi, ylo, yhi, zlo, zhi = clip
+            x, y, z = atoms[:, 2], atoms[:, 3], atoms[:, 4]
+            atoms = atoms[(x >= xlo) & (x <= xhi) & (y >= ylo) &
+                          (y <= yhi) & (z >= zlo) & (z <= zhi)]
+            if not len(atoms):
+                return
+        types = atoms[:, 1].astype(int)
+        xyz = atoms[:, 2:5].astype(np.float32)
+        if types.max() > self.vizinfo.nacolor:
+            raise Exception("atom type too big")
+
+        order = np.argsort(types, kind="stable")
+        xyz = xyz[order]
+        used, first, count = np.unique(types[order], return_index=True,
+                                       return_counts=True)
+
+        glEnableClientState(GL_VERTEX_ARRAY)
+        if self.points:
+            glDisable(GL_LIGHTING)
+            glEnable(GL_POINT_SMOOTH)
+            if self.orthoflag:
+                pixels = self.xpixels / (0.5 * self.eye)
+            else:
+                pixels = self.xpixels / (2.0 * self.eye * tan(pi / 12))
+        else:
+            glEnableClientState(GL_NORMAL_ARRAY)
+            vertices, normals, index, copies = self.sphere_mesh()
+            nindex = len(index) // copies
+
+        for itype, i, n in zip(used, first, count):
+            red, green, blue = self.vizinfo.acolor[itype]
+            rad = self.vizinfo.arad[itype]
+            glColor3f(red, green, blue)
+            if self.points:
+                glPointSize(max(1.0, 2.0 * rad * pixels))
+                glVertexPointer(3, GL_FLOAT, 0, xyz[i:i + n])
+                glDrawArrays(GL_POINTS, 0, n)
+                continue
+            glMaterialfv(GL_FRONT, GL_EMISSION, [red, green, blue, 1.0])
+            glMaterialf(GL_FRONT, GL_SHININESS, self.shiny)
+            shape = (rad * vertices).astype(np.float32)
+            for j in range(i, i + n, copies):
+                block = xyz[j:min(j + copies, i + n)]
+                m = len(block)
+                verts = block[:, np.newaxis, :] + shape
+                glVertexPointer(3, GL_FLOAT, 0, verts.reshape(-1, 3))
+                glNormalPointer(GL_FLOAT, 0, normals[:m * len(shape)])
+                glDrawElements(GL_TRIANGLES, m * nindex, GL_UNSIGNED_INT,
+                               index[:m * nindex])
+
+        if self.points:
+            glDisable(GL_POINT_SMOOTH)
+            glEnable(GL_LIGHTING)
+        else:
+            glDisableClientState(GL_NORMAL_ARRAY)
+        glDisableClientState(GL_VERTEX_ARRAY)
+
+    # --------------------------------------------------------------------
+    # unit sphere with nslices,nstacks as in glutSolidSphere
+    # return its vertices, plus normals and triangle indices of
+    #   copies = # of spheres drawn at once
+    # recomputed when quality changes
+
+    def sphere_mesh(self):
+        if self.mesh and self.mesh[0] == (self.nslices, self.nstacks):
+            return self.mesh[1:]
+        nslices, nstacks = self.nslices, self.nstacks
+        theta = pi * np.arange(nstacks + 1) / nstacks
+        phi = 2.0 * pi * np.arange(nslices) / nslices
+        vertices = np.empty((nstacks + 1, nslices, 3))
+        vertices[:, :, 0] = np.outer(np.sin(theta), np.cos(phi))
+        vertices[:, :, 1] = np.outer(np.sin(theta), np.sin(phi))
+        vertices[:, :, 2] = np.cos(theta)[:, np.newaxis]
+        vertices = vertices.reshape(-1, 3)
+
+        # 2 triangles per quad of the grid, except at the poles
+
+        i, j = np.mgrid[0:nstacks, 0:nslices]
+        a = i * nslices + j
+        b = i * nslices + (j + 1) % nslices
+        c = a + nslices
+        d = b + nslices
+        upper = np.stack((a, c, b), -1)[1:].reshape(-1, 3)
+        lower = np.stack((b, c, d), -1)[:-1].reshape(-1, 3)
+        faces = np.concatenate((upper, lower)).ravel()
+
+        nvert = len(vertices)
+        copies = max(1, VERTICES // nvert)
+        normals = np.tile(vertices.astype(np.float32), (copies, 1))
+        offset = nvert * np.arange(copies, dtype=np.uint32)
+        index = (faces.astype(np.uint32) + offset[:, np.newaxis]).ravel()
+        self.mesh = ((nslices, nstacks), vertices, normals, index, copies)
+        return self.mesh[1:]
+
     # --------------------------------------------------------------------
     # make new call list for each atom type
     # called when atom color/rad/quality is changed
@@ -22,6 +22,7 @@ x,y = h.compute('x',N,lo,hi)        compute histogram in dim with N bins
 
 # History
 #   12/05, Steve Plimpton (SNL): original version
+#   10/26, binning done by the bins tool
 
 # ToDo list
 
@@ -30,6 +31,8 @@ x,y = h.compute('x',N,lo,hi)        compute histogram in dim with N bins
 
 # Imports and external programs
 
+from bins import bins
+
 # Class definition
 
 
@@ -52,43 +55,25 @@ class histo:
         else:
             raise Exception("illegal dim value")
 
-        y = nbins * [0]
-
-        count = 0
-        n = flag = 0
-        while 1:
-            which, time, flag = self.data.iterator(flag)
-            if flag == -1:
-                break
-            time, box, atoms, bonds, tris, lines = self.data.viz(which)
-
-            if not lo:
-                if dim == 'x':
-                    lo = box[0]
-                    hi = box[3]
-                elif dim == 'y':
-                    lo = box[1]
-                    hi = box[4]
-                elif dim == 'z':
-                    lo = box[2]
-                    hi = box[5]
-
-            delta = (hi - lo) / nbins
-            invdelta = 1.0 / delta
-
-            for atom in atoms:
-                coord = atom[idim]
-                ibin = int((coord - lo) * invdelta)
-                if ibin < 0 or ibin >= nbins:
-                    continue
-                y[ibin] += 1
-                count += 1
-
-            n += 1
-
-        x = nbins * [0]
-        for i in range(nbins):
-            x[i] = (i + 0.5) * delta
+        # bounds default to box of first selected snapshot
+        # atoms outside lo-hi are not counted
+
+        snaps = [snap for snap in self.data.snaps if snap.tselect]
+        if not snaps:
+            raise Exception("no snapshots selected")
+        if lo is None or hi is None:
+            box = [snaps[0].xlo, snaps[0].ylo, snaps[0].zlo,
+                   snaps[0].xhi, snaps[0].yhi, snaps[0].zhi]
+            lo = box[idim - 2]
+            hi = box[idim + 1]
+
+        b = bins(nbins, lo, hi)
+        b.compute(self.data, dim)
+
+        n = b.nsnaps
+        count = int(b.counts.sum())
+        x = b.centers().tolist()
+        y = b.counts.astype(int).tolist()
 
         print("histogram snapshots = ", n)
         print(
@@ -10,14 +10,16 @@
 
 from __future__ import print_function, absolute_import
 import glob
+import hashlib
+import multiprocessing
 import re
 import subprocess
-import ImageTk
-import Image
 import os
 import sys
 from math import *
 from tkinter import *
+import ImageTk
+import Image
 import Pmw
 oneline = "View and manipulate images"
 
@@ -30,6 +32,9 @@ i = image()			no display window opened if no arg
   image suffixes for blank string = *.png, *.bmp, *.gif, *.tiff, *.tif
   click on a thumbnail to view it full-size
   click on thumbnail again to remove full-sized version
+  thumbnails are kept in the PIZZA_THUMBS dir, set in DEFAULTS.py
+    (def = ~/.pizza/thumbs), and made again when an image file changes
+  missing thumbnails are made in parallel on all cores
 
 i.view("*.png *.gif")	        display thumbnails of matching images
 
@@ -52,13 +57,18 @@ i.montage("-geometry 512x512","i*.png","new.png")       1st arg is switch
 # History
 #   8/05, Matt Jones (BYU): original version
 #   9/05, Steve Plimpton: added convert() and montage() methods
+#   10/26, thumbnails cached on disk, full-size images read when viewed
 
 # ToDo list
+#   remove cached thumbnails of images that no longer exist
 
 # Variables
+#   THUMBSIZE = max width and height of thumbnails in pixels
 
 # Imports and external programs
 
+THUMBSIZE = 60
+
 
 try:
     from DEFAULTS import PIZZA_CONVERT
@@ -68,6 +78,10 @@ try:
     from DEFAULTS import PIZZA_MONTAGE
 except BaseException:
     PIZZA_MONTAGE = "montage"
+try:
+    from DEFAULTS import PIZZA_THUMBS
+except BaseException:
+    PIZZA_THUMBS = "~/.pizza/thumbs"
 
 # Class definition
 
@@ -110,6 +124,8 @@ class image:
             hull_height=500)
         pane = scroll.interior()
 
+        thumbs = thumbfiles(files)
+
         ncolumns = 4
         for i in range(len(files)):
 
@@ -119,29 +135,18 @@ class image:
                 rowframe = Frame(pane)
             oneframe = Frame(rowframe)
 
-            # create a thumbnail of image
-
-            im = Image.open(files[i])
-            imt = im.copy()
-            imt.thumbnail((60, 60), Image.ANTIALIAS)
-            basename = os.path.basename(files[i])
-            imt.save("tmp." + basename)
-            thumbnail = ImageTk.PhotoImage(file="tmp." + basename)
-            os.remove("tmp." + basename)
-
-            # read in full size image
-            # create a thumbnail object that links to it
+            # create a thumbnail object that reads full size image when shown
             # create button that calls the thumbnail, label with filename
             # buttton needs to store thumbnail else it is garbage collected
 
-            big = ImageTk.PhotoImage(file=files[i])
-            obj = thumbnails(gui, files[i], big, thumbnail)
+            thumbnail = ImageTk.PhotoImage(file=thumbs[i])
+            obj = thumbnails(gui, files[i], thumbnail)
             Button(
                 oneframe,
                 image=thumbnail,
                 command=obj.display).pack(
                 side=TOP)
-            Label(oneframe, text=basename).pack(side=BOTTOM)
+            Label(oneframe, text=os.path.basename(files[i])).pack(side=BOTTOM)
 
             # pack into row frame
 
@@ -230,9 +235,9 @@ class image:
 
 class thumbnails:
 
-    def __init__(self, root, name, bigimage, thumbimage):
+    def __init__(self, root, name, thumbimage):
         self.root = root
-        self.big = bigimage
+        self.big = None
         self.thumb = thumbimage
         self.name = name
         self.bigexist = 0
@@ -240,22 +245,75 @@ class thumbnails:
 
     def display(self):
 
-        # destroy the big image window
+        # destroy the big image window and release the big image
 
         if self.bigexist:
             self.bigexist = 0
+            self.big = None
             if self.window:
                 self.window.destroy()
                 self.window = None
 
-        # create a new window with the big image
+        # read the big image, create a new window with it
 
         else:
             self.bigexist = 1
+            self.big = ImageTk.PhotoImage(file=self.name)
             self.window = Toplevel(self.root)
             Label(self.window, text=self.name).pack(side=TOP)
             Label(self.window, image=self.big).pack(side=BOTTOM)
 
+# --------------------------------------------------------------------
+# return thumbnail file of each image file
+# thumbnail name is a hash of image path, modification time and size,
+#   so a changed image gets a new thumbnail
+# thumbnails not in PIZZA_THUMBS dir are made by a pool of processes
+
+
+def thumbfiles(files):
+    dir = os.path.expanduser(PIZZA_THUMBS)
+    if not os.path.isdir(dir):
+        os.makedirs(dir)
+    thumbs = []
+    missing = []
+    for file in files:
+        stat = os.stat(file)
+        key = "%s %r %d" % (os.path.abspath(file), stat.st_mtime,
+                            stat.st_size)
+        thumb = os.path.join(dir, hashlib.md5(key.encode()).hexdigest() +
+                             ".png")
+        thumbs.append(thumb)
+        if not os.path.exists(thumb):
+            missing.append((file, thumb))
+
+    nprocs = min(multiprocessing.cpu_count(), len(missing))
+    if nprocs > 1:
+        pool = multiprocessing.Pool(nprocs)
+        try:
+            pool.map(makethumb, missing, 1 + len(missing) // (4 * nprocs))
+        finally:
+            pool.terminate()
+            pool.join()
+    else:
+        for job in missing:
+            makethumb(job)
+    return thumbs
+
+# --------------------------------------------------------------------
+# write thumbnail of one image file as PNG
+# written to a temporary file first, so no partial thumbnail is ever read
+
+
+def makethumb(job):
+    file, thumb = job
+    im = Image.open(file)
+    if im.mode not in ("1", "L", "LA", "P", "RGB", "RGBA"):
+        im = im.convert("RGB")
+    im.thumbnail((THUMBSIZE, THUMBSIZE), Image.ANTIALIAS)
+    tmp = "%s.%d" % (thumb, os.getpid())
+    im.save(tmp, "PNG")
+    os.replace(tmp, thumb)
+
 # --------------------------------------------------------------------
 # list of file extensions to test for
 # could add any extensions that PIL recognizes
@@ -9,12 +9,8 @@
 # ldump tool
 
 from __future__ import print_function, absolute_import
-import types
-import glob
-import re
-import subprocess
-import sys
-from os import popen
+import numpy as np
+from snapreader import snapreader, Snap
 oneline = "Read dump files with line segment info"
 
 docstr = """
@@ -58,12 +54,14 @@ l.owrap(...)		          wrap lines to same image as their atoms
 
 # History
 #   11/10, Steve Plimpton (SNL): original version
+#   10/26, reading shared with bdump, mdump, tdump via snapreader class
 
 # Variables
 #   flist = list of dump file names
 #   increment = 1 if reading snapshots one-at-a-time
 #   nextfile = which file to read from via next()
 #   eof = ptr into current file for where to read via next()
+#   lazy = 1 if snapshot values are only parsed when first accessed
 #   nsnaps = # of snapshots
 #   snaps = list of snapshots
 #   names = dictionary of column names:
@@ -74,212 +72,31 @@ l.owrap(...)		          wrap lines to same image as their atoms
 #     xlo,xhi,ylo,yhi,zlo,zhi = box bounds (float)
 #     atoms[i][j] = 2d array of floats, i = 0 to natoms-1, j = 0 to ncols-1
 
-# Imports and external programs
-
-
-try:
-    import numpy as np
-    oldnumeric = False
-except BaseException:
-    import Numeric as np
-    oldnumeric = True
-
-try:
-    from DEFAULTS import PIZZA_GUNZIP
-except BaseException:
-    PIZZA_GUNZIP = "gunzip"
-
 # Class definition
 
 
-class ldump:
-
-    # --------------------------------------------------------------------
-
-    def __init__(self, *list):
-        self.snaps = []
-        self.nsnaps = 0
-        self.names = {}
-
-        # flist = list of all dump file names
-
-        words = list[0].split()
-        self.flist = []
-        for word in words:
-            self.flist += glob.glob(word)
-        if len(self.flist) == 0 and len(list) == 1:
-            raise Exception("no ldump file specified")
-
-        if len(list) == 1:
-            self.increment = 0
-            self.read_all()
-        else:
-            self.increment = 1
-            self.nextfile = 0
-            self.eof = 0
-
-    # --------------------------------------------------------------------
-
-    def read_all(self):
-
-        # read all snapshots from each file
-        # test for gzipped files
-
-        for file in self.flist:
-            if file[-3:] == ".gz":
-                f = popen("%s -c %s" % (PIZZA_GUNZIP, file), 'r')
-            else:
-                f = open(file)
-
-            snap = self.read_snapshot(f)
-            while snap:
-                self.snaps.append(snap)
-                print(snap.time, end=' ')
-                sys.stdout.flush()
-                snap = self.read_snapshot(f)
-
-            f.close()
-        print()
-
-        # sort entries by timestep, cull duplicates
-
-        self.snaps.sort(self.compare_time)
-        self.cull()
-        self.nsnaps = len(self.snaps)
-        print("read %d snapshots" % self.nsnaps)
-
-    # --------------------------------------------------------------------
-    # read next snapshot from list of files
-
-    def next(self):
-
-        if not self.increment:
-            raise Exception("cannot read incrementally")
-
-        # read next snapshot in current file using eof as pointer
-        # if fail, try next file
-        # if new snapshot time stamp already exists, read next snapshot
-
-        while 1:
-            f = open(self.flist[self.nextfile], 'rb')
-            f.seek(self.eof)
-            snap = self.read_snapshot(f)
-            if not snap:
-                self.nextfile += 1
-                if self.nextfile == len(self.flist):
-                    return -1
-                f.close()
-                self.eof = 0
-                continue
-            self.eof = f.tell()
-            f.close()
-            try:
-                self.findtime(snap.time)
-                continue
-            except BaseException:
-                break
-
-        self.snaps.append(snap)
-        snap = self.snaps[self.nsnaps]
-        self.nsnaps += 1
-
-        return snap.time
+class ldump(snapreader):
 
     # --------------------------------------------------------------------
-    # read a single snapshot from file f
-    # return snapshot or 0 if failed
-
-    def read_snapshot(self, f):
-        try:
-            snap = Snap()
-            item = f.readline()
-            snap.time = int(f.readline().split()[0])    # just grab 1st field
-            item = f.readline()
-            snap.natoms = int(f.readline())
-
-            item = f.readline()
-            words = f.readline().split()
-            snap.xlo, snap.xhi = float(words[0]), float(words[1])
-            words = f.readline().split()
-            snap.ylo, snap.yhi = float(words[0]), float(words[1])
-            words = f.readline().split()
-            snap.zlo, snap.zhi = float(words[0]), float(words[1])
-
-            item = f.readline()
-
-            if snap.natoms:
-                words = f.readline().split()
-                ncol = len(words)
-                for i in range(1, snap.natoms):
-                    words += f.readline().split()
-                floats = list(map(float, words))
-                if oldnumeric:
-                    atoms = np.zeros((snap.natoms, ncol), np.Float)
-                else:
-                    atoms = np.zeros((snap.natoms, ncol), np.float)
-                start = 0
-                stop = ncol
-                for i in range(snap.natoms):
-                    atoms[i] = floats[start:stop]
-                    start = stop
-                    stop += ncol
-            else:
-                atoms = None
-            snap.atoms = atoms
-            return snap
-        except BaseException:
-            return 0
-
-    # --------------------------------------------------------------------
-    # map atom column names
-
-    def map(self, *pairs):
-        if len(pairs) % 2 != 0:
-            raise Exception("ldump map() requires pairs of mappings")
-        for i in range(0, len(pairs), 2):
-            j = i + 1
-            self.names[pairs[j]] = pairs[i] - 1
-
-    # --------------------------------------------------------------------
-    # return vector of snapshot time stamps
-
-    def time(self):
-        vec = self.nsnaps * [0]
-        i = 0
-        for snap in self.snaps:
-            vec[i] = snap.time
-            i += 1
-        return vec
-
-    # --------------------------------------------------------------------
-    # sort snapshots on time stamp
-
-    def compare_time(self, a, b):
-        if a.time < b.time:
-            return -1
-        elif a.time > b.time:
-            return 1
-        else:
-            return 0
-
-    # --------------------------------------------------------------------
-
-    def findtime(self, n):
-        for i in range(self.nsnaps):
-            if self.snaps[i].time == n:
-                return i
-        raise Exception("no step %d exists" % n)
-
-    # --------------------------------------------------------------------
-    # delete successive snapshots with duplicate time stamp
-
-    def cull(self):
-        i = 1
-        while i < len(self.snaps):
-            if self.snaps[i].time == self.snaps[i - 1].time:
-                del self.snaps[i]
-            else:
-                i += 1
+    # read header of a single snapshot from file f
+    # values are read by snapreader
+
+    def read_header(self, f, snap):
+        item = f.readline()
+        snap.time = int(f.readline().split()[0])    # just grab 1st field
+        item = f.readline()
+        snap.natoms = int(f.readline())
+
+        item = f.readline()
+        words = f.readline().split()
+        snap.xlo, snap.xhi = float(words[0]), float(words[1])
+        words = f.readline().split()
+        snap.ylo, snap.yhi = float(words[0]), float(words[1])
+        words = f.readline().split()
+        snap.zlo, snap.zhi = float(words[0]), float(words[1])
+
+        item = f.readline()
+        return "atoms", snap.natoms
 
     # --------------------------------------------------------------------
     # return list of lines to viz for snapshot isnap
@@ -311,16 +128,15 @@ class ldump:
         # create line list from id,type,end1x,end1y,end2x,end2y
         # don't add line if all 4 values are 0 since not a line
 
-        lines = []
-        for i in range(snap.natoms):
-            atom = snap.atoms[i]
-            e1x = atom[end1x]
-            e1y = atom[end1y]
-            e2x = atom[end2x]
-            e2y = atom[end2y]
-            if e1x == 0.0 and e1y == 0.0 and e2x == 0.0 and e2y == 0.0:
-                continue
-            lines.append([atom[id], atom[type], e1x, e1y, 0.0, e2x, e2y, 0.0])
+        if not snap.natoms:
+            return time, box, None, None, None, []
+        atoms = snap.atoms
+        ends = atoms[:, [end1x, end1y, end2x, end2y]]
+        keep = (ends != 0.0).any(axis=1)
+        lines = np.zeros((len(atoms), 8))
+        lines[:, 0:2] = atoms[:, [id, type]]
+        lines[:, [2, 3, 5, 6]] = ends
+        lines = lines[keep].tolist()
 
         return time, box, None, None, None, lines
 
@@ -364,10 +180,3 @@ class ldump:
             atoms[i][end1y] += dely
             atoms[i][end2x] += delx
             atoms[i][end2y] += dely
-
-# --------------------------------------------------------------------
-# one snapshot
-
-
-class Snap:
-    pass
@@ -13,6 +13,9 @@ import glob
 import re
 import sys
 from os import popen
+from subprocess import Popen, PIPE
+import numpy as np
+import columnfile
 oneline = "Read LAMMPS log files and extract thermodynamic data"
 
 docstr = """
@@ -20,14 +23,20 @@ l = log("file1")                     read in one or more log files
 l = log("log1 log2.gz")              can be gzipped
 l = log("file*")                     wildcard expands to multiple files
 l = log("log.lammps",0)              two args = store filename, but don't read
+l = log("thermo.npz log.lammps")     read binary column files written by write()
 
   incomplete and duplicate thermo entries are deleted
+  files ending in .npz or .parquet are read as binary column files,
+    they can be mixed with log files if they hold the same vectors
 
 time = l.next()                      read new thermo info from file
 
   used with 2-argument constructor to allow reading thermo incrementally
   return time stamp of last thermo read
   return -1 if no new thermo since last read
+  return -1 until the 1st thermo header has been completely written
+  only text appended since the last read is scanned,
+    in blocks of bounded size, so the file is never held in memory
 
 nvec = l.nvec                        # of vectors of thermo info
 nlen = l.nlen                        length of each vectors
@@ -35,12 +44,19 @@ names = l.names                      list of vector names
 t,pe,... = l.get("Time","KE",...)    return one or more vectors of values
 l.write("file.txt")	 	     write all vectors to a file
 l.write("file.txt","Time","PE",...)  write listed vectors to a file
+l.write("file.npz","Time","PE",...)  write vectors as binary columns
 
   get and write allow abbreviated (uniquely) vector names
+  file ending in .npz = NumPy arrays, .parquet = Parquet (needs pyarrow)
+    vector names are stored with the values, text is one line per entry
+  get returns NumPy arrays that are views into the stored thermo data
 """
 
 # History
 #   8/05, Steve Plimpton (SNL): original version
+#   10/26, thermo stored as 2d NumPy array, get() returns column views
+#   10/26, block-wise streaming reader, parse state kept across next()
+#   10/26, write and read binary column files (.npz, .parquet)
 
 # ToDo list
 
@@ -49,14 +65,21 @@ l.write("file.txt","Time","PE",...)  write listed vectors to a file
 #   nlen = length of each vector
 #   names = list of vector names
 #   ptr = dictionary, key = name, value = index into data for which column
-#   data[i][j] = 2d array of floats, i = 0 to # of entries, j = 0 to nvecs-1
+#   data[i][j] = 2d NumPy array of floats,
+#     i = 0 to # of entries, j = 0 to nvecs-1
 #   style = style of LAMMPS log file, 1 = multi, 2 = one, 3 = gran
 #   firststr = string that begins a thermo section in log file
 #   increment = 1 if log file being read incrementally
 #   eof = ptr into incremental file for where to start next read
+#     uncompressed offset for gzipped files
+#   inside = 1 if reader is within a thermo section, 0 if between runs
+#   pending = text read but not yet parsed, partial line or entry
 
 # Imports and external programs
 
+# files are read in blocks of BLOCK bytes, only complete entries are parsed
+
+BLOCK = 1 << 22
 
 try:
     from DEFAULTS import PIZZA_GUNZIP
@@ -74,7 +97,8 @@ class log:
         self.nvec = 0
         self.names = []
         self.ptr = {}
-        self.data = []
+        self.data = np.zeros((0, 0))
+        self.reset()
 
         # flist = list of all log file names
 
@@ -90,27 +114,37 @@ class log:
             self.read_all()
         else:
             if len(self.flist) > 1:
-                # # raise Exception("can only incrementally read one log file")
-                self.increment = 1
+                raise Exception("can only incrementally read one log file")
+            if len(self.flist) == 0:
+                self.flist = words[:1]
+            if columnfile.cached(self.flist[0]):
+                raise Exception("cannot incrementally read a column file")
+            self.increment = 1
             self.eof = 0
 
     # --------------------------------------------------------------------
     # read all thermo from all files
 
     def read_all(self):
-        self.read_header(self.flist[0])
+        texts = [file for file in self.flist if not columnfile.cached(file)]
+        self.read_header((texts + self.flist)[0])
         if self.nvec == 0:
             raise Exception("log file has no values")
 
         # read all files
 
         for file in self.flist:
-            self.read_one(file)
+            self.reset()
+            if columnfile.cached(file):
+                self.read_cached(file)
+            else:
+                self.read_one(file)
         print()
 
         # sort entries by timestep, cull duplicates
 
-        self.data.sort(self.compare)
+        order = np.argsort(self.data[:, 0], kind="stable")
+        self.data = self.data[order]
         self.cull()
         self.nlen = len(self.data)
         print("read %d log entries" % self.nlen)
@@ -130,7 +164,11 @@ class log:
             if self.nvec == 0:
                 return -1
 
+        n = len(self.data)
         self.eof = self.read_one(self.flist[0], self.eof)
+        self.nlen = len(self.data)
+        if self.nlen == n:
+            return -1
         return int(self.data[-1][0])
 
     # --------------------------------------------------------------------
@@ -139,27 +177,7 @@ class log:
         if len(keys) == 0:
             raise Exception("no log vectors specified")
 
-        map = []
-        for key in keys:
-            if key in self.ptr:
-                map.append(self.ptr[key])
-            else:
-                count = 0
-                for i in range(self.nvec):
-                    if self.names[i].find(key) == 0:
-                        count += 1
-                        index = i
-                if count == 1:
-                    map.append(index)
-                else:
-                    raise Exception("unique log vector %s not found" % key)
-
-        vecs = []
-        for i in range(len(keys)):
-            vecs.append(self.nlen * [0])
-            for j in range(self.nlen):
-                vecs[i][j] = self.data[j][map[i]]
-
+        vecs = [self.data[:, i] for i in self.columns(keys)]
         if len(keys) == 1:
             return vecs[0]
         else:
@@ -169,75 +187,98 @@ class log:
 
     def write(self, filename, *keys):
         if len(keys):
-            map = []
-            for key in keys:
-                if key in self.ptr:
-                    map.append(self.ptr[key])
-                else:
-                    count = 0
-                    for i in range(self.nvec):
-                        if self.names[i].find(key) == 0:
-                            count += 1
-                            index = i
-                    if count == 1:
-                        map.append(index)
-                    else:
-                        raise Exception("unique log vector %s not found" % key)
+            cols = self.columns(keys)
         else:
-            map = list(range(self.nvec))
+            cols = list(range(self.nvec))
+
+        if columnfile.cached(filename):
+            columnfile.write(filename, [self.names[i] for i in cols],
+                             self.data[:, cols])
+            return
 
         f = open(filename, "w")
-        for i in range(self.nlen):
-            for j in range(len(map)):
-                print(self.data[i][map[j]], end=' ', file=f)
-            print(file=f)
+        for row in self.data[:, cols].tolist():
+            print(" ".join([str(value) for value in row]), end=' \n', file=f)
         f.close()
 
     # --------------------------------------------------------------------
+    # column indices of vector names, names can be unique abbreviations
 
-    def compare(self, a, b):
-        if a[0] < b[0]:
-            return -1
-        elif a[0] > b[0]:
-            return 1
-        else:
-            return 0
+    def columns(self, keys):
+        cols = []
+        for key in keys:
+            if key in self.ptr:
+                cols.append(self.ptr[key])
+            else:
+                count = 0
+                for i in range(self.nvec):
+                    if self.names[i].find(key) == 0:
+                        count += 1
+                        index = i
+                if count == 1:
+                    cols.append(index)
+                else:
+                    raise Exception("unique log vector %s not found" % key)
+        return cols
 
     # --------------------------------------------------------------------
+    # delete entries with same timestep as previous entry
 
     def cull(self):
-        i = 1
-        while i < len(self.data):
-            if self.data[i][0] == self.data[i - 1][0]:
-                del self.data[i]
-            else:
-                i += 1
+        if len(self.data) > 1:
+            keep = np.ones(len(self.data), dtype=bool)
+            keep[1:] = self.data[1:, 0] != self.data[:-1, 0]
+            self.data = self.data[keep]
 
     # --------------------------------------------------------------------
 
     def read_header(self, file):
+        if columnfile.cached(file):
+            self.names = columnfile.header(file)
+            self.ptr = dict([(name, i) for i, name in enumerate(self.names)])
+            self.nvec = len(self.names)
+            self.data = np.zeros((0, self.nvec))
+            return
+
         str_multi = "----- Step"
         str_one = "Step "
 
-        if file[-3:] == ".gz":
-            txt = popen("%s -c %s" % (PIZZA_GUNZIP, file), 'r').read()
-        else:
-            txt = open(file).read()
-
-        if txt.find(str_multi) >= 0:
-            self.firststr = str_multi
-            self.style = 1
-        elif txt.find(str_one) >= 0:
-            self.firststr = str_one
-            self.style = 2
-        else:
+        # read lines up to end of 1st thermo entry only
+        # complete = 1 once the header line and its newline (one) or
+        #   the line closing the 1st entry (multi) has been read,
+        #   a file still being written may end inside the header
+
+        f = self.openfile(file)
+        lines = []
+        complete = 0
+        for line in f:
+            line = line.decode("ascii", "replace")
+            if not lines:
+                if line.find(str_multi) >= 0:
+                    firststr = str_multi
+                    style = 1
+                    lines.append(line[line.find(str_multi):])
+                elif line.find(str_one) >= 0:
+                    firststr = str_one
+                    style = 2
+                    lines.append(line[line.find(str_one):])
+                    complete = line.endswith("\n")
+                    break
+            elif line[:2] == "--" or line.find("Loop time of") == 0:
+                complete = 1
+                break
+            else:
+                lines.append(line)
+        f.close()
+        if not complete:
             return
 
+        self.firststr = firststr
+        self.style = style
+
         if self.style == 1:
-            s1 = txt.find(self.firststr)
-            s2 = txt.find("\n--", s1)
             pattern = "\\s(\\S*)\\s*="
-            keywords = re.findall(pattern, txt[s1:s2])
+            keywords = re.findall(pattern, "".join(lines))
             keywords.insert(0, "Step")
             i = 0
             for keyword in keywords:
@@ -246,112 +287,175 @@ class log:
                 i += 1
 
         else:
-            s1 = txt.find(self.firststr)
-            s2 = txt.find("\n", s1)
-            line = txt[s1:s2]
-            words = line.split()
+            words = lines[0].split()
             for i in range(len(words)):
                 self.names.append(words[i])
                 self.ptr[words[i]] = i
 
         self.nvec = len(self.names)
+        self.data = np.zeros((0, self.nvec))
 
     # --------------------------------------------------------------------
+    # open file for binary reading, gunzip on the fly
 
-    def read_one(self, *list):
+    def openfile(self, file):
+        if file[-3:] == ".gz":
+            return Popen("%s -c %s" % (PIZZA_GUNZIP, file), shell=True,
+                         stdout=PIPE).stdout
+        return open(file, 'rb')
 
-        # if 2nd arg exists set file ptr to that value
-        # read entire (rest of) file into txt
+    # --------------------------------------------------------------------
+    # reset parse state before reading a new file
 
-        file = list[0]
-        if file[-3:] == ".gz":
-            f = popen("%s -c %s" % (PIZZA_GUNZIP, file), 'rb')
-        else:
-            f = open(file, 'rb')
+    def reset(self):
+        self.inside = 0
+        self.pending = b""
 
-        if len(list) == 2:
-            f.seek(list[1])
-        txt = f.read()
-        if file[-3:] == ".gz":
-            eof = 0
-        else:
-            eof = f.tell()
-        f.close()
+    # --------------------------------------------------------------------
+    # append all entries of a binary column file, written by write()
+
+    def read_cached(self, file):
+        names, data = columnfile.read(file)
+        if names != self.names:
+            raise Exception("log file %s has different vectors" % file)
+        if len(data):
+            self.data = np.concatenate([self.data, data])
+            print(int(data[-1][0]), end=' ')
+            sys.stdout.flush()
 
-        start = last = 0
-        while not last:
-
-            # chunk = contiguous set of thermo entries (line or multi-line)
-            # s1 = 1st char on 1st line of chunk
-            # s2 = 1st char on line after chunk
-            # set last = 1 if this is last chunk in file, leave 0 otherwise
-            # set start = position in file to start looking for next chunk
-            # rewind eof if final entry is incomplete
-
-            s1 = txt.find(self.firststr, start)
-            s2 = txt.find("Loop time of", start + 1)
-
-            if s1 >= 0 and s2 >= 0 and s1 < s2:    # found s1,s2 with s1 before s2
-                if self.style == 2:
-                    s1 = txt.find("\n", s1) + 1
-            elif s1 >= 0 and s2 >= 0 and s2 < s1:  # found s1,s2 with s2 before s1
-                s1 = 0
-            elif s1 == -1 and s2 >= 0:             # found s2, but no s1
-                last = 1
-                s1 = 0
-            elif s1 >= 0 and s2 == -1:             # found s1, but no s2
-                last = 1
-                if self.style == 1:
-                    s2 = txt.rfind("\n--", s1) + 1
-                else:
-                    s1 = txt.find("\n", s1) + 1
-                    s2 = txt.rfind("\n", s1) + 1
-                eof -= len(txt) - s2
-            elif s1 == -1 and s2 == -1:            # found neither
-                # could be end-of-file section
-                # or entire read was one chunk
-
-                if txt.find("Loop time of",
-                            start) == start:   # end of file, so exit
-                    # reset eof to "Loop"
-                    eof -= len(txt) - start
-                    break
+    # --------------------------------------------------------------------
 
-                last = 1                                      # entire read is a chunk
-                s1 = 0
-                if self.style == 1:
-                    s2 = txt.rfind("\n--", s1) + 1
-                else:
-                    s2 = txt.rfind("\n", s1) + 1
-                eof -= len(txt) - s2
-                if s1 == s2:
-                    break
+    def read_one(self, *args):
 
-            chunk = txt[s1:s2 - 1]
-            start = s2
+        # if 2nd arg exists start reading at that offset
+        # gzipped files cannot seek, their uncompressed text is skipped
+        # read file in blocks, only complete lines are scanned
+        # pending = unparsed rest, carried over to next block or next read
 
-            # split chunk into entries
-            # parse each entry for numeric fields, append to data
+        file = args[0]
+        offset = 0
+        if len(args) == 2:
+            offset = args[1]
 
-            if self.style == 1:
-                sections = chunk.split("\n--")
-                pat1 = re.compile("Step\\s*(\\S*)\\s")
-                pat2 = re.compile("=\\s*(\\S*)")
-                for section in sections:
-                    word1 = [re.search(pat1, section).group(1)]
-                    word2 = re.findall(pat2, section)
-                    words = word1 + word2
-                    self.data.append(list(map(float, words)))
+        f = self.openfile(file)
+        skip = 0
+        if file[-3:] == ".gz":
+            skip = offset
+        elif offset:
+            f.seek(offset)
+
+        eof = offset
+        chunks = []
+        while 1:
+            block = f.read(BLOCK)
+            if not block:
+                break
+            if skip:
+                if len(block) <= skip:
+                    skip -= len(block)
+                    continue
+                block = block[skip:]
+                skip = 0
+            eof += len(block)
+
+            txt = self.pending + block
+            n = txt.rfind(b"\n") + 1
+            self.pending = self.scan(txt[:n], chunks) + txt[n:]
+        f.close()
+
+        # print last timestep read
+
+        if chunks:
+            self.data = np.concatenate([self.data] + chunks)
+            print(int(self.data[-1][0]), end=' ')
+            sys.stdout.flush()
+        return eof
 
+    # --------------------------------------------------------------------
+    # scan complete lines of text for thermo entries, append them to chunks
+    # inside = 1 while between a thermo header and the next "Loop time of"
+    # return text of trailing incomplete entry, it is parsed with next block
+
+    def scan(self, txt, chunks):
+        firststr = self.firststr.encode()
+        pos = 0
+        while pos < len(txt):
+            if not self.inside:
+                s1 = txt.find(firststr, pos)
+                if s1 < 0:
+                    return b""
+                if self.style == 1:
+                    pos = txt.rfind(b"\n", 0, s1) + 1
+                else:
+                    pos = txt.find(b"\n", s1) + 1
+                self.inside = 1
+                continue
+
+            s2 = txt.find(b"Loop time of", pos)
+            if s2 >= 0:
+                values = self.parse(txt[pos:s2])
+                self.inside = 0
+                pos = s2 + 1
+            elif self.style == 1:
+                # last section may still be incomplete
+                s2 = txt.rfind(b"\n--", pos) + 1
+                if s2 <= pos:
+                    return txt[pos:]
+                values = self.parse(txt[pos:s2 - 1])
+                if len(values):
+                    chunks.append(values)
+                return txt[s2:]
             else:
-                lines = chunk.split("\n")
-                for line in lines:
-                    words = line.split()
-                    self.data.append(list(map(float, words)))
+                values = self.parse(txt[pos:])
+                pos = len(txt)
+            if len(values):
+                chunks.append(values)
+        return b""
 
-            # print last timestep of chunk
+    # --------------------------------------------------------------------
+    # convert one chunk of thermo entries to a 2d array of floats
+    # all values of a chunk are converted by a single NumPy call,
+    #   unless the chunk has entries with a wrong # of values, e.g. due to
+    #   warnings printed between thermo lines, which are then skipped
 
-            print(int(self.data[len(self.data) - 1][0]), end=' ')
-            sys.stdout.flush()
+    def parse(self, chunk):
+        nvec = self.nvec
+        rows = []
 
-        return eof
+        if self.style == 1:
+            pat1 = re.compile(b"Step\\s*(\\S*)\\s")
+            pat2 = re.compile(b"=\\s*(\\S*)")
+            steps = re.findall(pat1, chunk)
+            values = re.findall(pat2, chunk)
+            if len(values) == len(steps) * (nvec - 1):
+                try:
+                    data = np.empty((len(steps), nvec))
+                    data[:, 0] = np.array(steps, dtype=float)
+                    data[:, 1:] = np.array(values, dtype=float).reshape(-1, nvec - 1)
+                    return data
+                except ValueError:
+                    pass
+            for section in chunk.split(b"\n--"):
+                words = re.findall(pat1, section)[:1] + re.findall(pat2, section)
+                if len(words) == nvec:
+                    try:
+                        rows.append([float(word) for word in words])
+                    except ValueError:
+                        pass
+
+        else:
+            words = chunk.split()
+            if len(words) % nvec == 0:
+                try:
+                    return np.array(words, dtype=float).reshape(-1, nvec)
+                except ValueError:
+                    pass
+            for line in chunk.split(b"\n"):
+                words = line.split()
+                if len(words) == nvec:
+                    try:
+                        rows.append([float(word) for word in words])
+                    except ValueError:
+                        pass
+
+        return np.array(rows, dtype=float).reshape(-1, nvec)
@@ -8,6 +8,7 @@ import sys
 import multiprocessing
 import glob
 import vtk
+import lpptimer
 from math import ceil
 from math import floor
 from dump import dump
@@ -38,6 +39,7 @@ class lpp:
     self.overwrite   = True
     self.Nth         = 1
     self.timesteps   = "all"
+    self.timing      = None
 
     if "--chunksize" in kwargs:
       try:
@@ -82,6 +84,12 @@ class lpp:
       self.debugMode = False
     else: self.output = True
 
+    # collect per-stage timings, report is stored in self.timing
+    # and written to the given file (JSON, or CSV if name ends with .csv)
+    timingfl = "--timing" in kwargs
+    timingFile = ""
+    if timingfl: timingFile = kwargs["--timing"]
+
     if self.output:
       print("starting LIGGGHTS memory optimized parallel post processing")
       print("chunksize:", self.chunksize, "-->",self.chunksize,\
@@ -129,13 +137,16 @@ class lpp:
       "output":output,\
       "overwrite":self.overwrite,\
       "timesteps":self.timesteps,\
+      "timing":timingfl,\
       "Nth":self.Nth} \
       for i in range(len(self.slices))]
 
     if self.debugMode: print("dumpInput:",dumpInput)
 
     numberOfRuns = len(dumpInput)
-    
+    records = []
+    peaks = {}
+
     i = 0
     while i < len(dumpInput):
 
@@ -153,7 +164,7 @@ class lpp:
       # job_server.close()
       # job_server.join()
       try:
-        job_server.map_async(lppWorker, dumpInput[i:i+self.cpunum]).get(9999999)
+        results = job_server.map_async(lppWorker, dumpInput[i:i+self.cpunum]).get(9999999)
       except Exception as e:
         job_server.terminate()
         raise e
@@ -161,6 +172,11 @@ class lpp:
         job_server.close()
         job_server.join()
 
+      if timingfl:
+        for result in results:
+          records += result["records"]
+          peaks[result["worker"]] = result["peak_rss_kb"]
+
       i += self.cpunum
 
     endtime = time.time()
@@ -168,6 +184,12 @@ class lpp:
       print("wrote", listlen, "granular snapshots in VTK format")
       print("time needed:", endtime-starttime, "sec")
 
+    if timingfl:
+      self.timing = lpptimer.report(records,peaks,endtime-starttime)
+      if timingFile != "":
+        lpptimer.writeReport(self.timing,timingFile)
+        if self.output: print("timing report written to", timingFile)
+
 def lppWorker(input):
   flist = input["filelist"]
   debugMode = input["debugMode"]
@@ -175,6 +197,8 @@ def lppWorker(input):
   overwrite = input["overwrite"]
   Nth = input["Nth"]
   timesteps = input["timesteps"]
+  timer = None
+  if input.get("timing"): timer = lpptimer.lpptimer()
 
   # generate name of manyGran
   splitfname = flist[0].rsplit(".")
@@ -214,8 +238,9 @@ def lppWorker(input):
 
   # call dump, vtk, manyGran on shortFlist
   try:
-    d = dump({"filelist":shortFlist, "debugMode":debugMode})
+    d = dump({"filelist":shortFlist, "debugMode":debugMode, "timer":timer})
 
+    if timer: tstart = timer.clock()
     if timesteps != "all":
       tsteps = timesteps.split(",")
       filterstring = ""
@@ -231,15 +256,21 @@ def lppWorker(input):
       d.tselect.skip(Nth)
 
     d.delete()
+    if timer:
+      timer.add("select",timer.clock()-tstart,
+                atoms=sum([snap.natoms for snap in d.snaps]))
 
     v = vtk.vtk(d)
 
     if debugMode: print("\nfileNums: ", d.fileNums, "\n")
 
-    v.manyGran(granName,fileNos=d.fileNums, output=debugMode)
+    v.manyGran(granName,fileNos=d.fileNums, output=debugMode, timer=timer)
   except KeyboardInterrupt:
     raise
 
+  if timer:
+    return {"worker":timer.worker, "records":timer.records,
+            "peak_rss_kb":timer.peakrss()}
   return 0
 
 def printHelp():
@@ -254,13 +285,14 @@ def printHelp():
   print("--no-overwrite: disables overwriting of already post-processed files.")
   print("--timesteps: time steps to be converted, input as comma seperated list.")
   print("--Nth: every Nth time step will be converted, cannot be combined with timesteps.")
+  print("--timing fname: write per-worker/per-file/per-stage timings to fname (JSON, or CSV if fname ends with .csv)")
   print("For details, read README_GRANULAR.txt")
 
 
 if __name__ == "__main__":
   if len(sys.argv) > 1:
     # parse options
-    optlist, args = getopt.gnu_getopt(sys.argv[1:],'o:',['chunksize=','cpunum=','Nth=','timesteps=','debug','help','quiet','no-overwrite'])
+    optlist, args = getopt.gnu_getopt(sys.argv[1:],'o:',['chunksize=','cpunum=','Nth=','timesteps=','timing=','debug','help','quiet','no-overwrite'])
     optdict = dict(optlist)
     if "--help" in optdict:
       printHelp()
@@ -0,0 +1,133 @@
+# lpptimer class, not a top-level Pizza.py tool
+
+# History
+#   10/26, per-stage timing and throughput instrumentation for lpp
+
+# ToDo list
+
+# Variables
+#   worker = id of the process the records were taken in
+#   records = list of dictionaries, one per (file,stage) measurement
+#     worker,file,stage,seconds,bytes_in,bytes_out,atoms
+
+# Imports and external programs
+
+from __future__ import print_function, absolute_import
+import os
+import json
+
+try:
+  from time import perf_counter as clock
+except ImportError:
+  from time import time as clock
+
+try:
+  import resource
+except ImportError:
+  resource = None
+
+STAGES = ["read", "parse", "select", "write"]
+FIELDS = ["worker", "file", "stage", "seconds", "bytes_in", "bytes_out", "atoms"]
+
+# Class definition
+
+class lpptimer:
+  """
+  Collects per-worker, per-file and per-stage timings of lpp runs
+
+  t = lpptimer()                    timer for the current process
+  t0 = t.clock()                    current time stamp
+  t.add("read",dt,file,...)         record one measurement
+  t.peakrss()                       peak resident set size of process in kB
+
+  records of several timers are merged by report(), which returns a
+  dictionary with a summary, per-worker totals and the raw records
+  writeReport() stores such a report as JSON or CSV
+  """
+
+  # --------------------------------------------------------------------
+
+  def __init__(self,worker=None):
+    if worker is None: worker = os.getpid()
+    self.worker = worker
+    self.records = []
+
+  # --------------------------------------------------------------------
+
+  def clock(self):
+    return clock()
+
+  # --------------------------------------------------------------------
+
+  def add(self,stage,seconds,file="",bytes_in=0,bytes_out=0,atoms=0):
+    self.records.append({"worker":self.worker, "file":file, "stage":stage,
+                         "seconds":seconds, "bytes_in":bytes_in,
+                         "bytes_out":bytes_out, "atoms":atoms})
+
+  # --------------------------------------------------------------------
+  # peak RSS of this process in kB, None if not available (e.g. Windows)
+  # ru_maxrss is reported in bytes on Mac OS X and in kB elsewhere
+
+  def peakrss(self):
+    if resource is None: return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if os.uname()[0] == "Darwin": rss = rss // 1024
+    return int(rss)
+
+# --------------------------------------------------------------------
+# merge records of all workers into one report
+# peaks = dictionary {worker: peak RSS in kB}
+# wall = wall clock time of the whole run in sec
+
+def report(records,peaks,wall):
+  stages = {}
+  for stage in STAGES: stages[stage] = 0.0
+  workers = {}
+  bytes_in = bytes_out = atoms = 0
+
+  for rec in records:
+    stage = rec["stage"]
+    stages[stage] = stages.get(stage,0.0) + rec["seconds"]
+    bytes_in += rec["bytes_in"]
+    bytes_out += rec["bytes_out"]
+    if stage == "parse": atoms += rec["atoms"]
+
+    key = str(rec["worker"])
+    if key not in workers:
+      workers[key] = {"files":0, "atoms":0, "bytes_in":0, "bytes_out":0,
+                      "peak_rss_kb":peaks.get(rec["worker"])}
+      for s in STAGES: workers[key][s] = 0.0
+    w = workers[key]
+    w[stage] = w.get(stage,0.0) + rec["seconds"]
+    w["bytes_in"] += rec["bytes_in"]
+    w["bytes_out"] += rec["bytes_out"]
+    if stage == "parse":
+      w["files"] += 1
+      w["atoms"] += rec["atoms"]
+
+  rss = [p for p in peaks.values() if p is not None]
+  summary = {"wall_seconds":wall, "workers":len(workers),
+             "bytes_in":bytes_in, "bytes_out":bytes_out, "atoms":atoms,
+             "atoms_per_sec":atoms/wall if wall > 0 else 0.0,
+             "peak_rss_kb":max(rss) if rss else None,
+             "stages":stages}
+  return {"summary":summary, "workers":workers, "records":records}
+
+# --------------------------------------------------------------------
+# write report to file, CSV if file ends with .csv, else JSON
+# CSV holds the raw records followed by one total line per stage
+
+def writeReport(rep,file):
+  f = open(file,"w")
+  if file[-4:] == ".csv":
+    print(",".join(FIELDS), file=f)
+    for rec in rep["records"]:
+      print(",".join([str(rec[field]) for field in FIELDS]), file=f)
+    summary = rep["summary"]
+    for stage in STAGES:
+      print("total,,%s,%s,,," % (stage,summary["stages"][stage]), file=f)
+    print("total,,wall,%s,%d,%d,%d" % (summary["wall_seconds"],
+          summary["bytes_in"],summary["bytes_out"],summary["atoms"]), file=f)
+  else:
+    json.dump(rep,f,indent=2,sort_keys=True)
+  f.close()
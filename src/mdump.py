@@ -9,13 +9,11 @@
 # mdump tool
 
 from __future__ import print_function, absolute_import
-import types
-import glob
 import re
-import subprocess
-import sys
-from os import popen
+import hashlib
+import numpy as np
 from math import *             # any function could be used by set()
+from snapreader import snapreader, Snap, share
 oneline = "Read, write, manipulate mesh dump files"
 
 docstr = """
@@ -69,6 +67,7 @@ index,time,flag = m.iterator(0/1)          loop over mesh dump snapshots
 time,box,atoms,bonds,tris,lines = m.viz(index)  return list of viz objects
 nodes,elements,nvalues,evalues = m.mviz(index)  return list of mesh viz objects
 m.etype = "color"                          set column returned as "type" by viz
+key = m.meshkey(index)                     content hash of nodes and elements
 
   iterator() loops over selected timesteps
   iterator() called with arg = 0 first time, with arg = 1 on subsequent calls
@@ -82,7 +81,7 @@ m.etype = "color"                          set column returned as "type" by viz
     atoms = NULL
     bonds = NULL
     tris = id,type,x1,y1,z1,x2,y2,z2,x3,y3,z3,nx,ny,nz for each tri as 2d array
-      each element is decomposed into tris
+      each element is decomposed into tris, all elements in one NumPy pass
     lines = NULL
   mviz() returns info for all elements for specified timestep index
     can also call as mviz(time,1) and will find index of preceding snapshot
@@ -93,17 +92,24 @@ m.etype = "color"                          set column returned as "type" by viz
     nvalues = list of node values = id,type,value1,value2,...
     evalues = list of element values = id,type,value1,value2,...
   etype is column name viz() will return as element type (def = "" = elem type)
+  meshkey() returns the same string for snapshots with identical mesh geometry
+    can also call as meshkey(time,1)
+    used by ensight and vtk to write unchanged meshes only once
 """
 
 # History
 #   11/06, Steve Plimpton (SNL): original version
 #   12/09, David Hart (SNL): allow use of NumPy or Numeric
+#   10/26, reading shared with bdump, ldump, tdump via snapreader class
+#   10/26, vectorized element to tri decomposition in viz()
+#   10/26, meshkey() content hash to detect unchanged meshes
 
 # Variables
 #   flist = list of dump file names
 #   increment = 1 if reading snapshots one-at-a-time
 #   nextfile = which file to read from via next()
 #   eof = ptr into current file for where to read via next()
+#   lazy = 1 if snapshot values are only parsed when first accessed
 #   nsnaps = # of snapshots
 #   nselect = # of selected snapshots
 #   snaps = list of snapshots
@@ -112,6 +118,7 @@ m.etype = "color"                          set column returned as "type" by viz
 #   tselect = class for time selection
 #   eselect = class for element selection
 #   etype = name of vector used as element type by viz extract (def = "")
+#   lastmesh = node array, element array, content hash of last meshkey()
 #   Snap = one snapshot
 #     time = time stamp
 #     tselect = 0/1 if this snapshot selected
@@ -134,114 +141,49 @@ m.etype = "color"                          set column returned as "type" by viz
 
 # Imports and external programs
 
+# tris each element type is decomposed into, as indices of its nodes
+# 1 = tri, normal = up
+# 2 = tet, 4 tris, normals = out
+# 3 = square, 2 tris, normals = up
+# 4 = cube, 12 tris in pairs of lower/upper z, y, x faces, normals = out
 
-try:
-    import numpy as np
-    oldnumeric = False
-except BaseException:
-    import Numeric as np
-    oldnumeric = True
-
-try:
-    from DEFAULTS import PIZZA_GUNZIP
-except BaseException:
-    PIZZA_GUNZIP = "gunzip"
+TRIS = {1: [(0, 1, 2)],
+        2: [(0, 1, 3), (1, 2, 3), (0, 3, 2), (0, 2, 1)],
+        3: [(0, 1, 2), (0, 2, 3)],
+        4: [(0, 2, 1), (0, 3, 2), (4, 5, 6), (4, 6, 7),
+            (0, 1, 5), (0, 5, 4), (3, 6, 2), (3, 7, 6),
+            (0, 7, 3), (0, 4, 7), (1, 2, 6), (1, 6, 5)]}
 
 # Class definition
 
 
-class mdump:
+class mdump(snapreader):
 
     # --------------------------------------------------------------------
 
     def __init__(self, *list):
-        self.snaps = []
-        self.nsnaps = self.nselect = 0
-        self.names = {}
+        self.nselect = 0
         self.tselect = tselect(self)
         self.eselect = eselect(self)
         self.etype = ""
-
-        # flist = list of all dump file names
-
-        words = list[0].split()
-        self.flist = []
-        for word in words:
-            self.flist += glob.glob(word)
-        if len(self.flist) == 0 and len(list) == 1:
-            raise Exception("no dump file specified")
-
-        if len(list) == 1:
-            self.increment = 0
-            self.read_all()
-        else:
-            self.increment = 1
-            self.nextfile = 0
-            self.eof = 0
+        self.lastmesh = None
+        self.sortrows = 1
+        snapreader.__init__(self, *list)
 
     # --------------------------------------------------------------------
 
     def read_all(self):
 
-        # read all snapshots from each file
-        # test for gzipped files
-
-        for file in self.flist:
-            if file[-3:] == ".gz":
-                f = popen("%s -c %s" % (PIZZA_GUNZIP, file), 'r')
-            else:
-                f = open(file)
-
-            snap = self.read_snapshot(f)
-            while snap:
-                self.snaps.append(snap)
-                print(snap.time, end=' ')
-                sys.stdout.flush()
-                snap = self.read_snapshot(f)
-
-            f.close()
-        print()
-
-        # sort entries by timestep, cull and combine duplicates
+        # read all snapshots, sort them by timestep, cull and combine duplicates
+        # rows of all node, element, nvalue, evalue arrays are sorted by ID
+        #   when they are parsed
 
-        self.snaps.sort(self.compare_time)
-        self.cull()
-
-        # sort all node, element, nvalue, evalue arrays by ID
-
-        for snap in self.snaps:
-            if snap.nflag:
-                array = snap.nodes
-                ids = array[:, 0]
-                ordering = np.argsort(ids)
-                for i in range(len(array[0])):
-                    array[:, i] = np.take(array[:, i], ordering)
-            if snap.eflag:
-                array = snap.elements
-                ids = array[:, 0]
-                ordering = np.argsort(ids)
-                for i in range(len(array[0])):
-                    array[:, i] = np.take(array[:, i], ordering)
-            if snap.nvalueflag:
-                array = snap.nvalues
-                ids = array[:, 0]
-                ordering = np.argsort(ids)
-                for i in range(len(array[0])):
-                    array[:, i] = np.take(array[:, i], ordering)
-            if snap.evalueflag:
-                array = snap.evalues
-                ids = array[:, 0]
-                ordering = np.argsort(ids)
-                for i in range(len(array[0])):
-                    array[:, i] = np.take(array[:, i], ordering)
+        snapreader.read_all(self)
 
         # reference definitions of nodes and elements in previous timesteps
 
         self.reference()
 
-        self.nsnaps = len(self.snaps)
-        print("read %d snapshots" % self.nsnaps)
-
         # select all timesteps and elements
 
         self.tselect.all()
@@ -250,138 +192,79 @@ class mdump:
     # read next snapshot from list of files
 
     def next(self):
-
-        if not self.increment:
-            raise Exception("cannot read incrementally")
-
-        # read next snapshot in current file using eof as pointer
-        # if fail, try next file
-        # if new snapshot time stamp already exists, read next snapshot
-
-        while 1:
-            f = open(self.flist[self.nextfile], 'rb')
-            f.seek(self.eof)
-            snap = self.read_snapshot(f)
-            if not snap:
-                self.nextfile += 1
-                if self.nextfile == len(self.flist):
-                    return -1
-                f.close()
-                self.eof = 0
-                continue
-            self.eof = f.tell()
-            f.close()
-            try:
-                self.findtime(snap.time)
-                continue
-            except BaseException:
-                break
+        time = snapreader.next(self)
+        if time == -1:
+            return -1
 
         # select the new snapshot with all its elements
 
-        self.snaps.append(snap)
-        snap = self.snaps[self.nsnaps]
+        snap = self.snaps[-1]
         snap.tselect = 1
-        snap.nselect = snap.nelements
+        snap.nselect = 0
         if snap.eflag:
-            for i in range(snap.nelements):
-                snap.eselect[i] = 1
-        self.nsnaps += 1
+            snap.nselect = snap.nelements
+            snap.eselect[:] = 1
         self.nselect += 1
 
-        return snap.time
+        return time
 
     # --------------------------------------------------------------------
-    # read a single snapshot from file f
-    # return snapshot or 0 if failed
-
-    def read_snapshot(self, f):
-        try:
-            snap = Snap()
-            item = f.readline()
-            snap.time = int(f.readline())
-            snap.nflag = snap.eflag = snap.nvalueflag = snap.evalueflag = 0
-            str = f.readline()
-            if "NUMBER OF NODES" in str:
-                snap.nflag = 1
-            elif "NUMBER OF TRIANGLES" in str:
-                snap.eflag = 1
-            elif "NUMBER OF TETS" in str:
-                snap.eflag = 2
-            elif "NUMBER OF SQUARES" in str:
-                snap.eflag = 3
-            elif "NUMBER OF CUBES" in str:
-                snap.eflag = 4
-            elif "NUMBER OF NODE VALUES" in str:
-                snap.nvalueflag = 1
-            elif "NUMBER OF ELEMENT VALUES" in str:
-                snap.evalueflag = 1
-            else:
-                raise Exception("unrecognized snapshot in dump file")
-            n = int(f.readline())
-
-            if snap.eflag:
-                snap.eselect = np.zeros(n)
+    # read header of a single snapshot from file f
+    # values are read by snapreader
+
+    def read_header(self, f, snap):
+        item = f.readline()
+        snap.time = int(f.readline())
+        snap.nflag = snap.eflag = snap.nvalueflag = snap.evalueflag = 0
+        str = f.readline().decode()
+        if "NUMBER OF NODES" in str:
+            snap.nflag = 1
+        elif "NUMBER OF TRIANGLES" in str:
+            snap.eflag = 1
+        elif "NUMBER OF TETS" in str:
+            snap.eflag = 2
+        elif "NUMBER OF SQUARES" in str:
+            snap.eflag = 3
+        elif "NUMBER OF CUBES" in str:
+            snap.eflag = 4
+        elif "NUMBER OF NODE VALUES" in str:
+            snap.nvalueflag = 1
+        elif "NUMBER OF ELEMENT VALUES" in str:
+            snap.evalueflag = 1
+        else:
+            raise Exception("unrecognized snapshot in dump file")
+        n = int(f.readline())
 
-            if snap.nflag:
-                item = f.readline()
-                words = f.readline().split()
-                snap.xlo, snap.xhi = float(words[0]), float(words[1])
-                words = f.readline().split()
-                snap.ylo, snap.yhi = float(words[0]), float(words[1])
-                words = f.readline().split()
-                snap.zlo, snap.zhi = float(words[0]), float(words[1])
+        if snap.eflag:
+            snap.eselect = np.zeros(n)
 
+        if snap.nflag:
             item = f.readline()
-            if n:
-                words = f.readline().split()
-                ncol = len(words)
-                for i in range(1, n):
-                    words += f.readline().split()
-                floats = list(map(float, words))
-                if oldnumeric:
-                    values = np.zeros((n, ncol), np.Float)
-                else:
-                    values = np.zeros((n, ncol), np.float)
-                start = 0
-                stop = ncol
-                for i in range(n):
-                    values[i] = floats[start:stop]
-                    start = stop
-                    stop += ncol
-            else:
-                values = None
-
-            if snap.nflag:
-                snap.nodes = values
-                snap.nnodes = n
-            elif snap.eflag:
-                snap.elements = values
-                snap.nelements = n
-            elif snap.nvalueflag:
-                snap.nvalues = values
-                snap.nnvalues = n
-            elif snap.evalueflag:
-                snap.evalues = values
-                snap.nevalues = n
-            return snap
-        except BaseException:
-            return 0
+            words = f.readline().split()
+            snap.xlo, snap.xhi = float(words[0]), float(words[1])
+            words = f.readline().split()
+            snap.ylo, snap.yhi = float(words[0]), float(words[1])
+            words = f.readline().split()
+            snap.zlo, snap.zhi = float(words[0]), float(words[1])
+
+        item = f.readline()
+
+        if snap.nflag:
+            snap.nnodes = n
+            return "nodes", n
+        elif snap.eflag:
+            snap.nelements = n
+            return "elements", n
+        elif snap.nvalueflag:
+            snap.nnvalues = n
+            return "nvalues", n
+        else:
+            snap.nevalues = n
+            return "evalues", n
 
     # --------------------------------------------------------------------
-    # map atom column names
-
-    def map(self, *pairs):
-        if len(pairs) % 2 != 0:
-            raise Exception("mdump map() requires pairs of mappings")
-        for i in range(0, len(pairs), 2):
-            j = i + 1
-            self.names[pairs[j]] = pairs[i] - 1
-
     # delete unselected snapshots
 
-    # --------------------------------------------------------------------
-
     def delete(self):
         ndel = i = 0
         while i < self.nsnaps:
@@ -437,7 +320,7 @@ class mdump:
 
     def vecs(self, n, *list):
         snap = self.snaps[self.findtime(n)]
-        if not snap.evalues:
+        if not snap.evalueflag:
             raise Exception("snapshot has no element values")
 
         if len(list) == 0:
@@ -462,86 +345,69 @@ class mdump:
         else:
             return values
 
-    # --------------------------------------------------------------------
-    # sort snapshots on time stamp
-
-    def compare_time(self, a, b):
-        if a.time < b.time:
-            return -1
-        elif a.time > b.time:
-            return 1
-        else:
-            return 0
-
     # --------------------------------------------------------------------
     # delete successive snapshots with duplicate time stamp
     # if have same timestamp, combine them if internal flags are different
 
     def cull(self):
-        i = 1
-        while i < len(self.snaps):
-            if self.snaps[i].time == self.snaps[i - 1].time:
-                if self.snaps[i].nflag:
-                    if not self.snaps[i - 1].nflag:
-                        self.snaps[i - 1].nflag = 1
-                        self.snaps[i - 1].nnodes = self.snaps[i].nnodes
-                        self.snaps[i - 1].nodes = self.snaps[i].nodes
-                        self.snaps[i - 1].xlo = self.snaps[i].xlo
-                        self.snaps[i - 1].xhi = self.snaps[i].xhi
-                        self.snaps[i - 1].ylo = self.snaps[i].ylo
-                        self.snaps[i - 1].yhi = self.snaps[i].yhi
-                        self.snaps[i - 1].zlo = self.snaps[i].zlo
-                        self.snaps[i - 1].zhi = self.snaps[i].zhi
-                elif self.snaps[i].eflag:
-                    if not self.snaps[i - 1].eflag:
-                        self.snaps[i - 1].eflag = self.snaps[i].eflag
-                        self.snaps[i - 1].nelements = self.snaps[i].nelements
-                        self.snaps[i - 1].elements = self.snaps[i].elements
-                        self.snaps[i - 1].eselect = self.snaps[i].eselect
-                elif self.snaps[i].nvalueflag:
-                    if not self.snaps[i - 1].nvalueflag:
-                        self.snaps[i - 1].nvalueflag = 1
-                        self.snaps[i - 1].nnvalues = self.snaps[i].nnvalues
-                        self.snaps[i - 1].nvalues = self.snaps[i].nvalues
-                elif self.snaps[i].evalueflag:
-                    if not self.snaps[i - 1].evalueflag:
-                        self.snaps[i - 1].evalueflag = 1
-                        self.snaps[i - 1].nevalues = self.snaps[i].nevalues
-                        self.snaps[i - 1].evalues = self.snaps[i].evalues
-                del self.snaps[i]
-            else:
-                i += 1
+        snaps = []
+        for snap in self.snaps:
+            if not snaps or snap.time != snaps[-1].time:
+                snaps.append(snap)
+                continue
+            last = snaps[-1]
+            if snap.nflag:
+                if not last.nflag:
+                    last.nflag = 1
+                    last.nnodes = snap.nnodes
+                    share(last, snap, "nodes")
+                    last.xlo, last.xhi = snap.xlo, snap.xhi
+                    last.ylo, last.yhi = snap.ylo, snap.yhi
+                    last.zlo, last.zhi = snap.zlo, snap.zhi
+            elif snap.eflag:
+                if not last.eflag:
+                    last.eflag = snap.eflag
+                    last.nelements = snap.nelements
+                    share(last, snap, "elements")
+                    last.eselect = snap.eselect
+            elif snap.nvalueflag:
+                if not last.nvalueflag:
+                    last.nvalueflag = 1
+                    last.nnvalues = snap.nnvalues
+                    share(last, snap, "nvalues")
+            elif snap.evalueflag:
+                if not last.evalueflag:
+                    last.evalueflag = 1
+                    last.nevalues = snap.nevalues
+                    share(last, snap, "evalues")
+        self.snaps = snaps
 
     # --------------------------------------------------------------------
     # insure every snapshot has node and element connectivity info
     # if not, point it at most recent shapshot that does
 
     def reference(self):
-        for i in range(len(self.snaps)):
-            if not self.snaps[i].nflag:
-                for j in range(i, -1, -1):
-                    if self.snaps[j].nflag:
-                        self.snaps[i].nflag = self.snaps[j].nflag
-                        self.snaps[i].nnodes = self.snaps[j].nnodes
-                        self.snaps[i].nodes = self.snaps[j].nodes
-                        self.snaps[i].xlo = self.snaps[j].xlo
-                        self.snaps[i].xhi = self.snaps[j].xhi
-                        self.snaps[i].ylo = self.snaps[j].ylo
-                        self.snaps[i].yhi = self.snaps[j].yhi
-                        self.snaps[i].zlo = self.snaps[j].zlo
-                        self.snaps[i].zhi = self.snaps[j].zhi
-                        break
-            if not self.snaps[i].nflag:
+        nodes = elements = None
+        for snap in self.snaps:
+            if snap.nflag:
+                nodes = snap
+            elif nodes:
+                snap.nflag = nodes.nflag
+                snap.nnodes = nodes.nnodes
+                share(snap, nodes, "nodes")
+                snap.xlo, snap.xhi = nodes.xlo, nodes.xhi
+                snap.ylo, snap.yhi = nodes.ylo, nodes.yhi
+                snap.zlo, snap.zhi = nodes.zlo, nodes.zhi
+            else:
                 raise Exception("no nodal coords found in previous snapshots")
-            if not self.snaps[i].eflag:
-                for j in range(i, -1, -1):
-                    if self.snaps[j].eflag:
-                        self.snaps[i].eflag = self.snaps[j].eflag
-                        self.snaps[i].nelements = self.snaps[j].nelements
-                        self.snaps[i].elements = self.snaps[j].elements
-                        self.snaps[i].eselect = self.snaps[j].eselect
-                        break
-            if not self.snaps[i].eflag:
+            if snap.eflag:
+                elements = snap
+            elif elements:
+                snap.eflag = elements.eflag
+                snap.nelements = elements.nelements
+                share(snap, elements, "elements")
+                snap.eselect = elements.eselect
+            else:
                 raise Exception(
                     "no elem connections found in previous snapshots")
 
@@ -586,169 +452,17 @@ class mdump:
         atoms = []
         bonds = []
 
-        # create triangle list from all elements
+        # create triangle array from all selected elements
         # for type, either use element type (-1) or user-defined column in
         # evalues
 
-        tris = []
-        nodes = snap.nodes
-        for i in range(snap.nelements):
-            if not snap.eselect[i]:
-                continue
-            element = snap.elements[i]
-            if snap.evalueflag:
-                evalue = snap.evalues[i]
-            else:
-                evalues = []
-
-            # single tri, normal = up
-
-            if snap.eflag == 1:
-                v1 = nodes[int(element[2]) - 1][2:5].tolist()
-                v2 = nodes[int(element[3]) - 1][2:5].tolist()
-                v3 = nodes[int(element[4]) - 1][2:5].tolist()
-                list = v1 + v2 + v3
-                n = normal(list[0:3], list[3:6], list[6:9])
-                if type == -1:
-                    tris.append([element[0], element[1]] + list + n)
-                else:
-                    tris.append([element[0], evalue[type]] + list + n)
-
-            # single tet, convert to 4 tris, normals = out
-
-            elif snap.eflag == 2:
-                v1 = nodes[int(element[2]) - 1][2:5].tolist()
-                v2 = nodes[int(element[3]) - 1][2:5].tolist()
-                v3 = nodes[int(element[4]) - 1][2:5].tolist()
-                v4 = nodes[int(element[5]) - 1][2:5].tolist()
-                list = v1 + v2 + v4
-                n = normal(list[0:3], list[3:6], list[6:9])
-                if type == -1:
-                    tris.append([element[0], element[1]] + list + n)
-                else:
-                    tris.append([element[0], evalue[type]] + list + n)
-                list = v2 + v3 + v4
-                n = normal(list[0:3], list[3:6], list[6:9])
-                if type == -1:
-                    tris.append([element[0], element[1]] + list + n)
-                else:
-                    tris.append([element[0], evalue[type]] + list + n)
-                list = v1 + v4 + v3
-                n = normal(list[0:3], list[3:6], list[6:9])
-                if type == -1:
-                    tris.append([element[0], element[1]] + list + n)
-                else:
-                    tris.append([element[0], evalue[type]] + list + n)
-                list = v1 + v3 + v2
-                n = normal(list[0:3], list[3:6], list[6:9])
-                if type == -1:
-                    tris.append([element[0], element[1]] + list + n)
-                else:
-                    tris.append([element[0], evalue[type]] + list + n)
-
-            # single square, convert to 2 tris, normals = up
-
-            elif snap.eflag == 3:
-                v1 = nodes[int(element[2]) - 1][2:5].tolist()
-                v2 = nodes[int(element[3]) - 1][2:5].tolist()
-                v3 = nodes[int(element[4]) - 1][2:5].tolist()
-                v4 = nodes[int(element[5]) - 1][2:5].tolist()
-                list = v1 + v2 + v3
-                n = normal(list[0:3], list[3:6], list[6:9])
-                if type == -1:
-                    tris.append([element[0], element[1]] + list + n)
-                else:
-                    tris.append([element[0], evalue[type]] + list + n)
-                list = v1 + v3 + v4
-                n = normal(list[0:3], list[3:6], list[6:9])
-                if type == -1:
-                    tris.append([element[0], element[1]] + list + n)
-                else:
-                    tris.append([element[0], evalue[type]] + list + n)
-
-            # single cube, convert to 12 tris, normals = out
-
-            elif snap.eflag == 4:
-                v1 = nodes[int(element[2]) - 1][2:5].tolist()
-                v2 = nodes[int(element[3]) - 1][2:5].tolist()
-                v3 = nodes[int(element[4]) - 1][2:5].tolist()
-                v4 = nodes[int(element[5]) - 1][2:5].tolist()
-                v5 = nodes[int(element[6]) - 1][2:5].tolist()
-                v6 = nodes[int(element[7]) - 1][2:5].tolist()
-                v7 = nodes[int(element[8]) - 1][2:5].tolist()
-                v8 = nodes[int(element[9]) - 1][2:5].tolist()
-                list = v1 + v3 + v2   # lower z face
-                n = normal(list[0:3], list[3:6], list[6:9])
-                if type == -1:
-                    tris.append([element[0], element[1]] + list + n)
-                else:
-                    tris.append([element[0], evalue[type]] + list + n)
-                list = v1 + v4 + v3
-                n = normal(list[0:3], list[3:6], list[6:9])
-                if type == -1:
-                    tris.append([element[0], element[1]] + list + n)
-                else:
-                    tris.append([element[0], evalue[type]] + list + n)
-                list = v5 + v6 + v7   # upper z face
-                n = normal(list[0:3], list[3:6], list[6:9])
-                if type == -1:
-                    tris.append([element[0], element[1]] + list + n)
-                else:
-                    tris.append([element[0], evalue[type]] + list + n)
-                list = v5 + v7 + v8
-                n = normal(list[0:3], list[3:6], list[6:9])
-                if type == -1:
-                    tris.append([element[0], element[1]] + list + n)
-                else:
-                    tris.append([element[0], evalue[type]] + list + n)
-                list = v1 + v2 + v6  # lower y face
-                n = normal(list[0:3], list[3:6], list[6:9])
-                if type == -1:
-                    tris.append([element[0], element[1]] + list + n)
-                else:
-                    tris.append([element[0], evalue[type]] + list + n)
-                list = v1 + v6 + v5
-                n = normal(list[0:3], list[3:6], list[6:9])
-                if type == -1:
-                    tris.append([element[0], element[1]] + list + n)
-                else:
-                    tris.append([element[0], evalue[type]] + list + n)
-                list = v4 + v7 + v3  # upper y face
-                n = normal(list[0:3], list[3:6], list[6:9])
-                if type == -1:
-                    tris.append([element[0], element[1]] + list + n)
-                else:
-                    tris.append([element[0], evalue[type]] + list + n)
-                list = v4 + v8 + v7
-                n = normal(list[0:3], list[3:6], list[6:9])
-                if type == -1:
-                    tris.append([element[0], element[1]] + list + n)
-                else:
-                    tris.append([element[0], evalue[type]] + list + n)
-                list = v1 + v8 + v4  # lower x face
-                n = normal(list[0:3], list[3:6], list[6:9])
-                if type == -1:
-                    tris.append([element[0], element[1]] + list + n)
-                else:
-                    tris.append([element[0], evalue[type]] + list + n)
-                list = v1 + v5 + v8
-                n = normal(list[0:3], list[3:6], list[6:9])
-                if type == -1:
-                    tris.append([element[0], element[1]] + list + n)
-                else:
-                    tris.append([element[0], evalue[type]] + list + n)
-                list = v2 + v3 + v7  # upper x face
-                n = normal(list[0:3], list[3:6], list[6:9])
-                if type == -1:
-                    tris.append([element[0], element[1]] + list + n)
-                else:
-                    tris.append([element[0], evalue[type]] + list + n)
-                list = v2 + v7 + v6
-                n = normal(list[0:3], list[3:6], list[6:9])
-                if type == -1:
-                    tris.append([element[0], element[1]] + list + n)
-                else:
-                    tris.append([element[0], evalue[type]] + list + n)
+        select = snap.eselect != 0
+        if type == -1:
+            types = snap.elements[select, 1]
+        else:
+            types = snap.evalues[select, type]
+        tris = triangulate(snap.nodes, snap.elements[select], snap.eflag,
+                           types)
 
         lines = []
 
@@ -778,18 +492,29 @@ class mdump:
         if snap.nvalueflag:
             nvalues = snap.nvalues
         evalues = []
-        if snap.nvalueflag:
+        if snap.evalueflag:
             evalues = snap.evalues
 
         return time, box, snap.nodes, snap.elements, nvalues, evalues
 
     # --------------------------------------------------------------------
+    # return content hash of the nodes and elements of snapshot isnap
+    # hash of last arrays is kept, so consecutive snapshots referencing the
+    #   same node and element arrays are hashed once
 
-    def findtime(self, n):
-        for i in range(self.nsnaps):
-            if self.snaps[i].time == n:
-                return i
-        raise Exception("no step %d exists" % n)
+    def meshkey(self, index, flag=0):
+        if not flag:
+            isnap = index
+        else:
+            isnap = self.findtime(index)
+        snap = self.snaps[isnap]
+
+        nodes = snap.nodes
+        elements = snap.elements
+        last = self.lastmesh
+        if last is None or last[0] is not nodes or last[1] is not elements:
+            self.lastmesh = (nodes, elements, meshhash(nodes, elements))
+        return self.lastmesh[2]
 
     # --------------------------------------------------------------------
     # return maximum box size across all selected snapshots
@@ -824,13 +549,6 @@ class mdump:
         else:
             return 0
 
-# --------------------------------------------------------------------
-# one snapshot
-
-
-class Snap:
-    pass
-
 # --------------------------------------------------------------------
 # time selection class
 
@@ -989,28 +707,46 @@ class eselect:
                     snap.nselect -= 1
 
 # --------------------------------------------------------------------
-# compute normal for a triangle with 3 vertices
-
-
-def normal(x, y, z):
-    v1 = 3 * [0]
-    v1[0] = y[0] - x[0]
-    v1[1] = y[1] - x[1]
-    v1[2] = y[2] - x[2]
+# decompose elements into triangles, all elements at once
+# nodes = node rows id,type,x,y,z sorted by ID 1-N
+# elements = element rows id,type,node1,node2,...
+# types = one type value per element
+# return Nx14 array of id,type,x1,y1,z1,x2,y2,z2,x3,y3,z3,nx,ny,nz
+#   tris of one element are consecutive, in the order of TRIS
+
+
+def triangulate(nodes, elements, eflag, types):
+    corners = np.array(TRIS[eflag])
+    nelements = len(elements)
+    ntris = len(corners)
+    tris = np.zeros((nelements * ntris, 14))
+    if nelements == 0:
+        return tris
+
+    # vertex coords of every tri, nelements x ntris x 3 vertices x 3
+
+    nvertices = corners.max() + 1
+    index = elements[:, 2:2 + nvertices].astype(np.int64) - 1
+    v = nodes[:, 2:5][index[:, corners]]
+
+    n = np.cross(v[:, :, 1] - v[:, :, 0], v[:, :, 2] - v[:, :, 1])
+    n /= np.sqrt((n * n).sum(axis=2))[:, :, np.newaxis]
+
+    tris = tris.reshape(nelements, ntris, 14)
+    tris[:, :, 0] = elements[:, 0:1]
+    tris[:, :, 1] = np.asarray(types).reshape(-1, 1)
+    tris[:, :, 2:11] = v.reshape(nelements, ntris, 9)
+    tris[:, :, 11:14] = n
+    return tris.reshape(-1, 14)
 
-    v2 = 3 * [0]
-    v2[0] = z[0] - y[0]
-    v2[1] = z[1] - y[1]
-    v2[2] = z[2] - y[2]
-
-    n = 3 * [0]
-    n[0] = v1[1] * v2[2] - v1[2] * v2[1]
-    n[1] = v1[2] * v2[0] - v1[0] * v2[2]
-    n[2] = v1[0] * v2[1] - v1[1] * v2[0]
+# --------------------------------------------------------------------
+# content hash of node and element arrays, including their shapes
 
-    length = sqrt(n[0] * n[0] + n[1] * n[1] + n[2] * n[2])
-    n[0] /= length
-    n[1] /= length
-    n[2] /= length
 
-    return n
+def meshhash(nodes, elements):
+    h = hashlib.sha1()
+    for values in (nodes, elements):
+        values = np.ascontiguousarray(values, dtype=float)
+        h.update(str(values.shape).encode())
+        h.update(values.tobytes())
+    return h.hexdigest()
@@ -0,0 +1,252 @@
+# Pizza.py toolkit, www.cs.sandia.gov/~sjplimp/pizza.html
+# Steve Plimpton, sjplimp@sandia.gov, Sandia National Laboratories
+#
+# Copyright (2005) Sandia Corporation.  Under the terms of Contract
+# DE-AC04-94AL85000 with Sandia Corporation, the U.S. Government retains
+# certain rights in this software.  This software is distributed under
+# the GNU General Public License.
+
+# neighbor tool
+
+from __future__ import print_function, absolute_import
+import numpy as np
+
+oneline = "Find atom pairs within a cutoff via binned cell lists"
+
+docstr = """
+n = neighbor(d)                    d = dump object
+
+n.periodic = [1,1,0]               set periodicity in x,y,z (default = all 1)
+
+i,j,rsq = n.pairs(N,cutoff)        unique pairs of selected atoms in timestep N
+i,j,rsq = n.pairs(N,cutoff,1,2)    pairs of type 1 and type 2 atoms
+c = n.count(N,cutoff)              # of neighbors of each selected atom
+c = n.count(N,cutoff,1,2)          # of type 2 neighbors of each type 1 atom
+i,j,rsq = n.between(N,cutoff,g1,g2) pairs of an atom in g1 and an atom in g2
+
+  pairs() and count() operate on selected atoms of timestep N
+  i,j are indices into the list of selected atoms, as returned by vecs()
+    with no types, each pair is returned once with i < j
+    with 2 different types, i is a type1 atom and j a type2 atom
+    with 2 equal types, each pair of that type is returned once with i < j
+  rsq = squared distance of each pair, only pairs with rsq < cutoff^2
+  pairs are sorted by i, then j
+  distances use the minimum image convention in periodic dimensions
+  count() with types returns one value per selected type1 atom
+  g1,g2 = True/False masks or index arrays over the selected atoms
+    i is a g1 atom, j a g2 atom, an atom in both is not paired with itself
+
+i,j,rsq = pairlist(x,lo,hi,cutoff)           same on an Nx3 array of coords
+i,j,rsq = pairlist(x,lo,hi,cutoff,per,y)     pairs between coords x and y
+
+  lo,hi = lower/upper box corners, per = periodic flags (default = 1,1,1)
+  with y, i indexes x and j indexes y and all pairs are returned
+"""
+
+# History
+#   10/26, cell-list neighbor search for cluster.py and distance.py
+#   10/26, between() for pairs of 2 groups, used by group_energy.py
+
+# ToDo list
+#   triclinic boxes
+
+# Variables
+#   data = dump object
+#   periodic = 0/1 flags for periodicity in x,y,z
+
+# Imports and external programs
+
+# atoms binned into cells of size >= cutoff, only neighbor cells are searched
+# query atoms are processed in blocks of CHUNK to bound memory use
+
+CHUNK = 65536
+
+# Class definition
+
+class neighbor:
+
+  # --------------------------------------------------------------------
+
+  def __init__(self,data):
+    self.data = data
+    self.periodic = [1,1,1]
+
+  # --------------------------------------------------------------------
+
+  def pairs(self,n,cutoff,*types):
+    x,type,lo,hi = self.extract(n)
+    if len(types) == 0:
+      return pairlist(x,lo,hi,cutoff,self.periodic)
+    if len(types) != 2:
+      raise Exception("neighbor pairs() requires 0 or 2 atom types")
+    group1 = np.flatnonzero(type == types[0])
+    if types[0] == types[1]:
+      i,j,rsq = pairlist(x[group1],lo,hi,cutoff,self.periodic)
+      j = group1[j]
+    else:
+      group2 = np.flatnonzero(type == types[1])
+      i,j,rsq = pairlist(x[group1],lo,hi,cutoff,self.periodic,x[group2])
+      j = group2[j]
+    return group1[i],j,rsq
+
+  # --------------------------------------------------------------------
+
+  def count(self,n,cutoff,*types):
+    x,type,lo,hi = self.extract(n)
+    if len(types) == 0:
+      i,j,rsq = pairlist(x,lo,hi,cutoff,self.periodic)
+      return np.bincount(np.concatenate((i,j)),minlength=len(x))
+    if len(types) != 2:
+      raise Exception("neighbor count() requires 0 or 2 atom types")
+    group1 = np.flatnonzero(type == types[0])
+    if types[0] == types[1]:
+      i,j,rsq = pairlist(x[group1],lo,hi,cutoff,self.periodic)
+      return np.bincount(np.concatenate((i,j)),minlength=len(group1))
+    group2 = np.flatnonzero(type == types[1])
+    i,j,rsq = pairlist(x[group1],lo,hi,cutoff,self.periodic,x[group2])
+    return np.bincount(i,minlength=len(group1))
+
+  # --------------------------------------------------------------------
+
+  def between(self,n,cutoff,group1,group2):
+    x,type,lo,hi = self.extract(n)
+    group1 = members(group1)
+    group2 = members(group2)
+    i,j,rsq = pairlist(x[group1],lo,hi,cutoff,self.periodic,x[group2])
+    i = group1[i]
+    j = group2[j]
+    keep = i != j
+    return i[keep],j[keep],rsq[keep]
+
+  # --------------------------------------------------------------------
+  # coords and types of selected atoms in timestep n, box corners
+
+  def extract(self,n):
+    data = self.data
+    snap = data.snaps[data.findtime(n)]
+    lo = [snap.xlo,snap.ylo,snap.zlo]
+    hi = [snap.xhi,snap.yhi,snap.zhi]
+    if not snap.natoms:
+      return np.zeros((0,3)),np.zeros(0),lo,hi
+    atoms = snap.atoms[snap.aselect != 0]
+    cols = [data.names["x"],data.names["y"],data.names["z"]]
+    return atoms[:,cols],atoms[:,data.names["type"]],lo,hi
+
+# --------------------------------------------------------------------
+# find all pairs within cutoff via a cell list
+# without y: unique pairs i < j of coords x
+# with y: all pairs of coords x (index i) and coords y (index j)
+# return i,j,rsq arrays sorted by i, then j
+
+def pairlist(x,lo,hi,cutoff,periodic=(1,1,1),y=None):
+  x = np.asarray(x,dtype=float).reshape(-1,3)
+  self = y is None
+  if self: y = x
+  else: y = np.asarray(y,dtype=float).reshape(-1,3)
+  lo = np.asarray(lo,dtype=float)
+  prd = np.asarray(hi,dtype=float) - lo
+  periodic = np.asarray(periodic,dtype=bool) & (prd > 0)
+  cutsq = cutoff*cutoff
+
+  empty = np.zeros(0,dtype=np.int64)
+  if len(x) == 0 or len(y) == 0: return empty,empty,np.zeros(0)
+
+  # cells of at least cutoff size, coarsened if there are far more cells
+  # than atoms so the cell arrays stay small
+
+  ncell = np.maximum(1,np.floor(prd/cutoff)).astype(np.int64)
+  limit = max(27,2*len(y))
+  if ncell.prod() > limit:
+    factor = (float(ncell.prod())/limit)**(1.0/3.0)
+    ncell = np.maximum(1,np.floor(ncell/factor)).astype(np.int64)
+  size = np.where(prd > 0,prd/ncell,1.0)
+
+  # wrap coords into periodic box, bin y and sort it by cell
+
+  if periodic.any():
+    x = x.copy()
+    x[:,periodic] = lo[periodic] + np.mod(x[:,periodic]-lo[periodic],
+                                          prd[periodic])
+    if self: y = x
+    else:
+      y = y.copy()
+      y[:,periodic] = lo[periodic] + np.mod(y[:,periodic]-lo[periodic],
+                                            prd[periodic])
+
+  ybin = binned(y,lo,size,ncell)
+  ycell = ybin[:,0] + ncell[0]*(ybin[:,1] + ncell[1]*ybin[:,2])
+  order = np.argsort(ycell,kind="stable")
+  start = np.searchsorted(ycell[order],np.arange(ncell.prod()+1))
+  if self: xbin = ybin
+  else: xbin = binned(x,lo,size,ncell)
+
+  # stencil of neighbor cell offsets, each neighbor cell visited once
+  # even if a periodic dimension has only 1 or 2 cells
+
+  offsets = []
+  for d in range(3):
+    if periodic[d]: offsets.append(sorted(set([o % ncell[d] for o in (-1,0,1)])))
+    else: offsets.append([o for o in (-1,0,1) if abs(o) < ncell[d]])
+
+  ilist = []
+  jlist = []
+  rlist = []
+  for ox in offsets[0]:
+    for oy in offsets[1]:
+      for oz in offsets[2]:
+        nbin = xbin + np.array([ox,oy,oz])
+        valid = np.ones(len(x),dtype=bool)
+        for d in range(3):
+          if periodic[d]: nbin[:,d] %= ncell[d]
+          else: valid &= (nbin[:,d] >= 0) & (nbin[:,d] < ncell[d])
+        ncl = nbin[:,0] + ncell[0]*(nbin[:,1] + ncell[1]*nbin[:,2])
+
+        for block in range(0,len(x),CHUNK):
+          q = np.arange(block,min(block+CHUNK,len(x)))
+          q = q[valid[q]]
+          first = start[ncl[q]]
+          cnt = start[ncl[q]+1] - first
+          total = cnt.sum()
+          if total == 0: continue
+
+          # expand each query atom into the atoms of its neighbor cell
+
+          i = np.repeat(q,cnt)
+          j = order[np.arange(total) - np.repeat(np.cumsum(cnt)-cnt,cnt) +
+                    np.repeat(first,cnt)]
+          if self:
+            keep = i < j
+            i = i[keep]
+            j = j[keep]
+
+          delta = y[j] - x[i]
+          if periodic.any():
+            delta[:,periodic] -= prd[periodic] * \
+                np.round(delta[:,periodic]/prd[periodic])
+          rsq = np.einsum("ij,ij->i",delta,delta)
+          keep = rsq < cutsq
+          ilist.append(i[keep])
+          jlist.append(j[keep])
+          rlist.append(rsq[keep])
+
+  if not ilist: return empty,empty,np.zeros(0)
+  i = np.concatenate(ilist)
+  j = np.concatenate(jlist)
+  rsq = np.concatenate(rlist)
+  order = np.lexsort((j,i))
+  return i[order],j[order],rsq[order]
+
+# --------------------------------------------------------------------
+# indices of atoms in a group given as True/False mask or index array
+
+def members(group):
+  group = np.asarray(group)
+  if group.dtype == bool: return np.flatnonzero(group)
+  return group.astype(np.int64).reshape(-1)
+
+# --------------------------------------------------------------------
+# integer cell coords of each atom, atoms outside the box go to edge cells
+
+def binned(x,lo,size,ncell):
+  bins = np.floor((x-lo)/size).astype(np.int64)
+  return np.clip(bins,0,ncell-1)
@@ -10,6 +10,7 @@
 
 from __future__ import print_function, absolute_import
 from math import sqrt
+import numpy as np
 oneline = "Compute LAMMPS pairwise energies"
 
 docstr = """
@@ -33,11 +34,18 @@ e_vdwl,e_coul = p.single(rsq,itype,jtype,q1,q2,...)   compute LJ/Coul energy
     lj/cut = rsq,itype,jtype
     lj/cut/coul/cut = rsq,itype,jtype,q1,q2
     lj/charmm/coul/charmm = rsq,itype,jtype,q1,q2
+
+e_coul,e_vdwl = p.single(rsq,itype,jtype,q1,q2)   arrays of energies
+
+  if rsq is an array, energies of all pairs are returned as arrays
+  itype,jtype,q1,q2 are arrays of same length as rsq or single values
+  pairs are typically found by neighbor tool, e.g. between 2 groups of atoms
 """
 
 # History
 #   8/05, Steve Plimpton and Paul Crozier (SNL): original version
 #   9/05, Paul Crozier (SNL): added lj/cut and lj/cut/coul/cut
+#   10/26, single() of arrays of pairs for all styles
 
 # ToDo list
 
@@ -61,14 +69,17 @@ class pair:
             self.coeff_func = self.coeff_lj_cut
             self.init_func = self.init_lj_cut
             self.single_func = self.single_lj_cut
+            self.array_func = self.array_lj_cut
         elif style == "lj/cut/coul/cut":
             self.coeff_func = self.coeff_lj_cut_coul_cut
             self.init_func = self.init_lj_cut_coul_cut
             self.single_func = self.single_lj_cut_coul_cut
+            self.array_func = self.array_lj_cut_coul_cut
         elif style == "lj/charmm/coul/charmm":
             self.coeff_func = self.coeff_lj_charmm_coul_charmm
             self.init_func = self.init_lj_charmm_coul_charmm
             self.single_func = self.single_lj_charmm_coul_charmm
+            self.array_func = self.array_lj_charmm_coul_charmm
         else:
             raise Exception("this pair style not yet supported")
 
@@ -86,8 +97,11 @@ class pair:
 
     # --------------------------------------------------------------------
     # generic single method, as many args as needed
+    # array of rsq = many pairs at once
 
     def single(self, *list):
+        if np.ndim(list[0]):
+            return self.array_func(list)
         return self.single_func(list)
 
     # --------------------------------------------------------------------
@@ -136,6 +150,14 @@ class pair:
 
         return eng_vdwl
 
+    # --------------------------------------------------------------------
+    # args = rsq,itype,jtype as arrays
+
+    def array_lj_cut(self, list):
+        rsq = np.asarray(list[0], dtype=float)
+        return lj_array(rsq, list[1], list[2], self.lj3, self.lj4,
+                        self.cut_ljsq)
+
     # --------------------------------------------------------------------
     # --------------------------------------------------------------------
     # lj/cut/coul/cut methods
@@ -196,6 +218,17 @@ class pair:
 
         return eng_coul, eng_vdwl
 
+    # --------------------------------------------------------------------
+    # args = rsq,itype,jtype,q1,q2 as arrays
+
+    def array_lj_cut_coul_cut(self, list):
+        rsq = np.asarray(list[0], dtype=float)
+        eng_coul = coul_array(rsq, list[3], list[4], self.qqr2e,
+                              self.cut_coulsq)
+        eng_vdwl = lj_array(rsq, list[1], list[2], self.lj3, self.lj4,
+                            self.cut_ljsq)
+        return eng_coul, eng_vdwl
+
     # --------------------------------------------------------------------
     # --------------------------------------------------------------------
     # lj/charmm/coul/charmm methods
@@ -278,3 +311,58 @@ class pair:
             eng_vdwl = 0.0
 
         return eng_coul, eng_vdwl
+
+    # --------------------------------------------------------------------
+    # args = rsq,itype,jtype,q1,q2 as arrays
+
+    def array_lj_charmm_coul_charmm(self, list):
+        rsq = np.asarray(list[0], dtype=float)
+        eng_coul = coul_array(rsq, list[3], list[4], self.qqr2e,
+                              self.cut_coulsq)
+        eng_coul *= switch_array(rsq, self.cut_coulsq, self.cut_coul_innersq,
+                                 self.denom_coul)
+        eng_vdwl = lj_array(rsq, list[1], list[2], self.lj3, self.lj4,
+                            self.cut_ljsq)
+        eng_vdwl *= switch_array(rsq, self.cut_ljsq, self.cut_lj_innersq,
+                                 self.denom_lj)
+        return eng_coul, eng_vdwl
+
+# --------------------------------------------------------------------
+# LJ energy of pairs at distances rsq, 0 beyond cutoff
+# itype,jtype = arrays or single values, index lj3,lj4 coeffs
+
+
+def lj_array(rsq, itype, jtype, lj3, lj4, cutsq):
+    eng = np.zeros(rsq.shape)
+    inside = rsq < cutsq
+    itype = np.broadcast_to(itype, rsq.shape)[inside]
+    jtype = np.broadcast_to(jtype, rsq.shape)[inside]
+    r2inv = 1.0 / rsq[inside]
+    r6inv = r2inv * r2inv * r2inv
+    eng[inside] = r6inv * (np.asarray(lj3)[itype, jtype] * r6inv -
+                           np.asarray(lj4)[itype, jtype])
+    return eng
+
+# --------------------------------------------------------------------
+# Coulomb energy of pairs with charges q1,q2 at distances rsq
+
+
+def coul_array(rsq, q1, q2, qqr2e, cutsq):
+    eng = np.zeros(rsq.shape)
+    inside = rsq < cutsq
+    q1 = np.broadcast_to(q1, rsq.shape)[inside]
+    q2 = np.broadcast_to(q2, rsq.shape)[inside]
+    eng[inside] = qqr2e * q1 * q2 * np.sqrt(1.0 / rsq[inside])
+    return eng
+
+# --------------------------------------------------------------------
+# CHARMM switching factor between inner and outer cutoff, 1 inside inner
+
+
+def switch_array(rsq, cutsq, innersq, denom):
+    switch = np.ones(rsq.shape)
+    between = (rsq > innersq) & (rsq < cutsq)
+    r = rsq[between]
+    switch[between] = (cutsq - r) * (cutsq - r) * \
+        (cutsq + 2.0 * r - 3.0 * innersq) / denom
+    return switch
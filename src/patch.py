@@ -10,7 +10,9 @@
 
 from __future__ import print_function, absolute_import
 from math import sqrt, pi, cos, sin
-from data import data
+import numpy as np
+from data import data, Section
+import textwriter
 oneline = "Create patchy Lennard-Jones particles for LAMMPS input"
 
 docstr = """
@@ -23,6 +25,7 @@ p.dim = 2		   set dimension of created box (def = 3)
 p.blen = 0.97              set length of tether bonds (def = 0.97)
 p.dmin = 1.02              set min r from i-1 to i+1 tether site (def = 1.02)
 p.lattice = [Nx,Ny,Nz]     generate Nx by Ny by Nz lattice of particles
+p.legacy = 1               1 = place one particle at a time, 0 = arrays (def)
 
   if lattice is set, Nx*Ny*Nz must equal N for build
   lattice = [0,0,0] = generate N particles randomly, default
@@ -51,10 +54,15 @@ p.build(100,"hex2",1,2,3)  create 100 "hex2" particles with types 1,2,3
                                  from Alo to Ahi and height Blo to Bhi, type m
 
 p.write("data.patch")      write out system to LAMMPS data file
+
+  legacy = 0 orients and places all particles at once from a NumPy generator
+  legacy = 1 reproduces the particle-by-particle sequence of original version
+  both give the same statistics, but not the same coordinates
 """
 
 # History
 #   8/05, Steve Plimpton (SNL): original version
+#   10/26, particles placed as arrays, legacy option for original sequence
 
 # ToDo list
 
@@ -62,6 +70,9 @@ p.write("data.patch")      write out system to LAMMPS data file
 #   vfrac = desired volume fraction
 #   x,y,z = aspect ratio of box (def = 1,1,1)
 #   seed = random seed
+#   legacy = 1 for scalar write with original random # sequence
+#   rng = NumPy random generator for array writes, seeded from seed
+#   rngseed = seed the generator was created with
 #   molecules = list of atoms, grouped by molecule
 
 # Imports and external programs
@@ -90,21 +101,31 @@ class patch:
         self.dmin = 1.02
         self.lattice = [0, 0, 0]
         self.style = "molecular"
+        self.legacy = 0
+        self.rng = None
+        self.rngseed = None
 
     # --------------------------------------------------------------------
     # call style method with extra args
     # adds to volume and atom list
     # reset self.style for lines and triangles
+    # a style that draws no random #s makes the same particle every time,
+    #   so it is called once and its atoms and bonds are shared,
+    #   tris and segments are copied since legacy write changes them
 
     def build(self, n, style, *types):
         if style == "linebox" or style == "linetri":
             self.style = "line"
         if style == "tritet" or style == "tribox":
             self.style = "tri"
-        cmd = "atoms,bonds,tris,segments,volume = self.%s(*types)" % style
+        method = getattr(self, style)
         for i in range(n):
-            exec(cmd)
-            self.molecules.append([atoms, bonds, tris, segments])
+            if i == 0 or self.seed != seed:
+                seed = self.seed
+                atoms, bonds, tris, segments, volume = method(*types)
+            self.molecules.append([atoms, bonds,
+                                   [list(tri) for tri in tris],
+                                   [list(segment) for segment in segments]])
             self.volume += volume
 
     # --------------------------------------------------------------------
@@ -112,40 +133,134 @@ class patch:
     # write them to LAMMPS data file
 
     def write(self, file):
-        if self.dim == 3:
+        if self.dim == 3 and self.legacy:
+            self.write3d_legacy(file)
+        elif self.dim == 3:
             self.write3d(file)
+        elif self.legacy:
+            self.write2d_legacy(file)
         else:
             self.write2d(file)
 
     # --------------------------------------------------------------------
-    # write a 3d simulation to data file
+    # set box size from volume of particles and volume fraction
+    # return 1 if particles go on lattice sites, 0 if placed randomly
 
-    def write3d(self, file):
+    def setbox(self):
         volume = self.volume / self.vfrac
-        prd = pow(
-            volume /
-            self.xaspect /
-            self.yaspect /
-            self.zaspect,
-            1.0 /
-            3.0)
+        if self.dim == 3:
+            prd = pow(volume / self.xaspect / self.yaspect / self.zaspect,
+                      1.0 / 3.0)
+            self.zprd = self.zaspect * prd
+            self.zlo = -self.zprd / 2.0
+            self.zhi = self.zprd / 2.0
+        else:
+            prd = pow(volume / self.xaspect / self.yaspect, 1.0 / 2.0)
+            self.zprd = 1.0
+            self.zlo = -0.5
+            self.zhi = 0.5
         self.xprd = self.xaspect * prd
         self.xlo = -self.xprd / 2.0
         self.xhi = self.xprd / 2.0
         self.yprd = self.yaspect * prd
         self.ylo = -self.yprd / 2.0
         self.yhi = self.yprd / 2.0
-        self.zprd = self.zaspect * prd
-        self.zlo = -self.zprd / 2.0
-        self.zhi = self.zprd / 2.0
-
-        if self.lattice[0] or self.lattice[1] or self.lattice[2]:
-            latflag = 1
-            if self.lattice[0] * self.lattice[1] * self.lattice[2] != \
-                    len(self.molecules):
-                raise Exception("lattice inconsistent with # of molecules")
+
+        if self.dim == 3:
+            nlattice = self.lattice[0] * self.lattice[1] * self.lattice[2]
         else:
-            latflag = 0
+            nlattice = self.lattice[0] * self.lattice[1]
+        if self.lattice[0] or self.lattice[1] or \
+                (self.dim == 3 and self.lattice[2]):
+            if nlattice != len(self.molecules):
+                raise Exception("lattice inconsistent with # of molecules")
+            return 1
+        return 0
+
+    # --------------------------------------------------------------------
+    # write a 3d simulation to data file
+    # all particles are rotated, placed and wrapped as arrays
+
+    def write3d(self, file):
+        latflag = self.setbox()
+        rng = self.generator()
+        molecules = self.order(rng)
+        nmol = len(molecules)
+
+        # xp,yp,zp = randomly oriented, normalized basis vectors per particle
+        # xp is in random direction
+        # yp is random dir crossed into xp
+        # zp is xp crossed into yp
+
+        xp = normalize(rng.random_sample((nmol, 3)) - 0.5)
+        yp = normalize(np.cross(rng.random_sample((nmol, 3)) - 0.5, xp))
+        zp = normalize(np.cross(xp, yp))
+        orig = self.origins(rng, nmol, latflag)
+
+        # atoms in new rotated basis vectors, imol = particle of each atom
+
+        local, bonds, imol = unpack(molecules)
+        xp, yp, zp, orig = xp[imol], yp[imol], zp[imol], orig[imol]
+        xyz = orig + local[:, 1:2] * xp + local[:, 2:3] * yp + \
+            local[:, 3:4] * zp
+        xyz, image = self.pbc_array(xyz)
+        ids = np.arange(len(local)) + 1
+
+        # triangle corners as coords in particle, placed like its atoms
+        #   and kept near the atom they belong to
+
+        tris = np.zeros((0, 10))
+        if self.style == "tri":
+            flags = np.repeat([len(molecule[2]) > 0 for molecule in molecules],
+                              [len(molecule[0]) for molecule in molecules])
+            corners = np.array([tri for molecule in molecules
+                                for tri in molecule[2]], dtype=float)
+            corners = corners.reshape(-1, 3, 3)
+            rows = np.nonzero(flags)[0]
+            corners = orig[rows, None] + \
+                corners[:, :, 0:1] * xp[rows, None] + \
+                corners[:, :, 1:2] * yp[rows, None] + \
+                corners[:, :, 2:3] * zp[rows, None]
+            corners = self.pbc_near_array(corners, xyz[rows, None])
+            tris = np.column_stack((ids[rows], corners.reshape(-1, 9)))
+
+        # create the data file
+
+        d = data()
+        d.title = "LAMMPS data file for Nanoparticles"
+        d.headers["atoms"] = len(local)
+        d.headers["atom types"] = int(local[:, 0].max())
+        if len(bonds):
+            d.headers["bonds"] = len(bonds)
+            d.headers["bond types"] = 1
+        if len(tris):
+            d.headers["tris"] = len(tris)
+        d.headers["xlo xhi"] = (self.xlo, self.xhi)
+        d.headers["ylo yhi"] = (self.ylo, self.yhi)
+        d.headers["zlo zhi"] = (self.zlo, self.zhi)
+
+        if self.style == "molecular":
+            d.sections["Atoms"] = section("%d %d %d %g %g %g %d %d %d",
+                                          ids, imol + 1, local[:, 0],
+                                          *np.hstack((xyz, image)).T)
+        elif self.style == "tri":
+            d.sections["Atoms"] = section("%d %d %d %d %g %g %g %g %d %d %d",
+                                          ids, imol + 1, local[:, 0], flags,
+                                          1.0, *np.hstack((xyz, image)).T)
+        if len(bonds):
+            d.sections["Bonds"] = section("%d %d %d %d", *bonds.T)
+        if len(tris):
+            d.sections["Triangles"] = \
+                section("%d %g %g %g %g %g %g %g %g %g", *tris.T)
+
+        d.write(file)
+
+    # --------------------------------------------------------------------
+    # write a 3d simulation to data file
+    # original version, one particle and one atom at a time
+
+    def write3d_legacy(self, file):
+        latflag = self.setbox()
 
         idatom = idbond = idtri = idmol = 0
         atoms = []
@@ -203,8 +318,8 @@ class patch:
                 zorig = self.zlo + self.random() * self.zprd
             else:
                 ix = (idmol - 1) % self.lattice[0]
-                iy = (idmol - 1) / self.lattice[0] % self.lattice[1]
-                iz = (idmol - 1) / (self.lattice[0] * self.lattice[1])
+                iy = (idmol - 1) // self.lattice[0] % self.lattice[1]
+                iz = (idmol - 1) // (self.lattice[0] * self.lattice[1])
                 xorig = self.xlo + ix * self.xprd / self.lattice[0]
                 yorig = self.ylo + iy * self.yprd / self.lattice[1]
                 zorig = self.zlo + iz * self.zprd / self.lattice[2]
@@ -357,26 +472,83 @@ class patch:
 
     # --------------------------------------------------------------------
     # write a 2d simulation to data file
+    # all particles are rotated, placed and wrapped as arrays
 
     def write2d(self, file):
-        volume = self.volume / self.vfrac
-        prd = pow(volume / self.xaspect / self.yaspect, 1.0 / 2.0)
-        self.xprd = self.xaspect * prd
-        self.xlo = -self.xprd / 2.0
-        self.xhi = self.xprd / 2.0
-        self.yprd = self.yaspect * prd
-        self.ylo = -self.yprd / 2.0
-        self.yhi = self.yprd / 2.0
-        self.zprd = 1.0
-        self.zlo = -0.5
-        self.zhi = 0.5
+        latflag = self.setbox()
+        rng = self.generator()
+        molecules = self.order(rng)
+        nmol = len(molecules)
+
+        # xp,yp = randomly oriented, normalized basis vectors per particle
+        # xp is in random direction
+        # yp is (0,0,1) crossed into xp
+
+        xp = normalize(rng.random_sample((nmol, 2)) - 0.5)
+        yp = np.column_stack((-xp[:, 1], xp[:, 0]))
+        orig = self.origins(rng, nmol, latflag)[:, :2]
+
+        # atoms in new rotated basis vectors, z is not rotated
+
+        local, bonds, imol = unpack(molecules)
+        xp, yp, orig = xp[imol], yp[imol], orig[imol]
+        xyz = np.column_stack((orig + local[:, 1:2] * xp +
+                               local[:, 2:3] * yp, local[:, 3]))
+        xyz, image = self.pbc_array(xyz)
+        ids = np.arange(len(local)) + 1
+
+        # segment ends as displacements from atom, placed like the atom
+        #   and kept near it
+
+        lines = np.zeros((0, 5))
+        if self.style == "line":
+            flags = np.repeat([len(molecule[3]) > 0 for molecule in molecules],
+                              [len(molecule[0]) for molecule in molecules])
+            ends = np.array([segment for molecule in molecules
+                             for segment in molecule[3]], dtype=float)
+            rows = np.nonzero(flags)[0]
+            ends = ends.reshape(-1, 2, 2) + local[rows, None, 1:3]
+            ends = orig[rows, None] + ends[:, :, 0:1] * xp[rows, None] + \
+                ends[:, :, 1:2] * yp[rows, None]
+            ends = self.pbc_near_array(ends, xyz[rows, None, :2])
+            lines = np.column_stack((ids[rows], ends.reshape(-1, 4)))
 
-        if self.lattice[0] or self.lattice[1]:
-            latflag = 1
-            if self.lattice[0] * self.lattice[1] != len(self.molecules):
-                raise Exception("lattice inconsistent with # of molecules")
-        else:
-            latflag = 0
+        # create the data file
+
+        d = data()
+        d.title = "LAMMPS data file for Nanoparticles"
+        d.headers["atoms"] = len(local)
+        d.headers["atom types"] = int(local[:, 0].max())
+        if len(bonds):
+            d.headers["bonds"] = len(bonds)
+            d.headers["bond types"] = 1
+        if len(lines):
+            d.headers["lines"] = len(lines)
+        d.headers["xlo xhi"] = (self.xlo, self.xhi)
+        d.headers["ylo yhi"] = (self.ylo, self.yhi)
+        d.headers["zlo zhi"] = (self.zlo, self.zhi)
+
+        if self.style == "molecular":
+            d.sections["Atoms"] = section("%d %d %d %g %g %g %d %d %d",
+                                          ids, imol + 1, local[:, 0],
+                                          *np.hstack((xyz, image)).T)
+        elif self.style == "line":
+            d.sections["Atoms"] = section("%d %d %d %d %g %g %g %g %d %d %d",
+                                          ids, imol + 1, local[:, 0], flags,
+                                          1.0, *np.hstack((xyz, image)).T)
+        if len(bonds):
+            d.sections["Bonds"] = section("%d %d %d %d", *bonds.T)
+        if len(lines):
+            d.sections["Lines"] = section("%d %g %g %g %g", *lines.T)
+
+        d.write(file)
+
+    # --------------------------------------------------------------------
+    # write a 2d simulation to data file
+    # original version, one particle and one atom at a time
+
+    def write2d_legacy(self, file):
+        latflag = self.setbox()
 
         idatom = idbond = idmol = 0
         atoms = []
@@ -417,7 +589,7 @@ class patch:
                 zorig = 0.0
             else:
                 ix = (idmol - 1) % self.lattice[0]
-                iy = (idmol - 1) / self.lattice[0]
+                iy = (idmol - 1) // self.lattice[0]
                 xorig = self.xlo + ix * self.xprd / self.lattice[0]
                 yorig = self.ylo + iy * self.yprd / self.lattice[1]
                 zorig = 0.0
@@ -584,6 +756,58 @@ class patch:
             znew -= self.zprd
         return xnew, ynew, znew
 
+    # --------------------------------------------------------------------
+    # wrap N x dim coords into periodic box
+    # return wrapped coords and N x 3 image flags
+
+    def pbc_array(self, xyz):
+        lo = np.array([self.xlo, self.ylo, self.zlo])
+        prd = np.array([self.xprd, self.yprd, self.zprd])
+        image = np.floor((xyz - lo) / prd)
+        return xyz - image * prd, image
+
+    # --------------------------------------------------------------------
+    # shift new coords by a box length where they are more than half a box
+    #   from xyz, as pbc_near() does for one point, 2d coords use x,y only
+
+    def pbc_near_array(self, new, xyz):
+        prd = np.array([self.xprd, self.yprd, self.zprd])[:new.shape[-1]]
+        return new + prd * (xyz - new > 0.5 * prd) - \
+            prd * (new - xyz > 0.5 * prd)
+
+    # --------------------------------------------------------------------
+    # pop all particles, in random order if randomized is set
+
+    def order(self, rng):
+        molecules = self.molecules
+        self.molecules = []
+        if self.randomized:
+            molecules = [molecules[i] for i in rng.permutation(len(molecules))]
+        return molecules
+
+    # --------------------------------------------------------------------
+    # origin of each particle, random or lattice sites in order
+    # 2d callers use only the x,y columns
+
+    def origins(self, rng, nmol, latflag):
+        lo = np.array([self.xlo, self.ylo, self.zlo])
+        prd = np.array([self.xprd, self.yprd, self.zprd])
+        if not latflag:
+            return lo + rng.random_sample((nmol, 3)) * prd
+        imol = np.arange(nmol)
+        nx, ny, nz = self.lattice[0], self.lattice[1], max(self.lattice[2], 1)
+        site = np.column_stack((imol % nx, imol // nx % ny, imol // (nx * ny)))
+        return lo + site * prd / np.array([nx, ny, nz])
+
+    # --------------------------------------------------------------------
+    # NumPy generator for array writes, created again if seed is reset
+
+    def generator(self):
+        if self.rng is None or self.rngseed != self.seed:
+            self.rng = np.random.RandomState(self.seed)
+            self.rngseed = self.seed
+        return self.rng
+
     # --------------------------------------------------------------------
     # params = diam,type1,type2,type3
     # type1 = type of non-patch atoms, type2 = type of patch atoms
@@ -1336,7 +1560,7 @@ class patch:
     # --------------------------------------------------------------------
 
     def random(self):
-        k = self.seed / IQ
+        k = self.seed // IQ
         self.seed = IA * (self.seed - k * IQ) - IR * k
         if self.seed < 0:
             self.seed += IM
@@ -1352,6 +1576,44 @@ IA = 16807
 IQ = 127773
 IR = 2836
 
+# --------------------------------------------------------------------
+# rows of N x dim array scaled to unit length
+
+
+def normalize(v):
+    return v / np.sqrt((v * v).sum(1))[:, None]
+
+# --------------------------------------------------------------------
+# flatten atoms and bonds of all particles into arrays
+# return N x 4 array of type,x,y,z in particle coords,
+#   M x 4 array of bond ID,type,atom1,atom2 and particle index of each atom
+
+
+def unpack(molecules):
+    natoms = np.array([len(molecule[0]) for molecule in molecules], dtype=int)
+    nbonds = np.array([len(molecule[1]) for molecule in molecules], dtype=int)
+    local = np.array([atom for molecule in molecules
+                      for atom in molecule[0]], dtype=float).reshape(-1, 4)
+    pairs = np.array([bond for molecule in molecules
+                      for bond in molecule[1]], dtype=int).reshape(-1, 3)
+    imol = np.repeat(np.arange(len(molecules)), natoms)
+
+    # bond atoms are indices in particle, offset by all previous atoms
+
+    first = np.repeat(np.cumsum(natoms) - natoms, nbonds) + 1
+    bonds = np.column_stack((np.arange(len(pairs)) + 1, pairs[:, 0],
+                             pairs[:, 1] + first, pairs[:, 2] + first))
+    return local, bonds, imol
+
+# --------------------------------------------------------------------
+# data file section with fmt applied to each row of the columns
+# columns are formatted as floats, %d writes them as integers
+
+
+def section(fmt, *cols):
+    cols = [np.asarray(col, dtype=float) for col in cols]
+    return Section([line + "\n" for line in textwriter.lines(fmt, *cols)])
+
 # --------------------------------------------------------------------
 # push atom onto sphere surface of diam and return [type,x,y,z]
 
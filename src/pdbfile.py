@@ -15,6 +15,8 @@ import urllib.request
 import glob
 import types
 import sys
+import numpy as np
+import textwriter
 oneline = "Read, write PDB files in combo with LAMMPS snapshots"
 
 docstr = """
@@ -58,6 +60,7 @@ index,time,flag = p.iterator(1)
 
 # History
 #   8/05, Steve Plimpton (SNL): original version
+#   10/26, atoms written as whole arrays via textwriter
 
 # ToDo list
 #   for generic PDB file (no template) from a LJ unit system,
@@ -196,15 +199,7 @@ class pdbfile:
                 if flag == -1:
                     break
 
-                if n < 10:
-                    file = root + "000" + str(n)
-                elif n < 100:
-                    file = root + "00" + str(n)
-                elif n < 1000:
-                    file = root + "0" + str(n)
-                else:
-                    file = root + str(n)
-                file += ".pdb"
+                file = textwriter.numbered(root, n, ".pdb")
 
                 f = open(file, 'w')
                 self.convert(f, which)
@@ -217,15 +212,7 @@ class pdbfile:
         else:
             n = 0
             for infile in self.files:
-                if n < 10:
-                    file = root + "000" + str(n)
-                elif n < 100:
-                    file = root + "00" + str(n)
-                elif n < 1000:
-                    file = root + "0" + str(n)
-                else:
-                    file = root + str(n)
-                file += ".pdb"
+                file = textwriter.numbered(root, n, ".pdb")
 
                 f = open(file, 'w')
                 f.write(open(infile, 'r').read())
@@ -299,17 +286,18 @@ class pdbfile:
 
     def convert(self, f, which):
         time, box, atoms, bonds, tris, lines = self.data.viz(which)
+        atoms = np.asarray(atoms, dtype=float).reshape(-1, 5)
         if len(self.files):
-            for atom in atoms:
-                id = atom[0]
-                if id in self.atomlines:
-                    (begin, end) = self.atomlines[id]
-                    line = "%s%8.3f%8.3f%8.3f%s" % (
-                        begin, atom[2], atom[3], atom[4], end)
-                    print(line, end=' ', file=f)
+            ids = atoms[:, 0].astype(int).tolist()
+            keep = [id in self.atomlines for id in ids]
+            atoms = atoms[np.array(keep, dtype=bool)]
+            pieces = [self.atomlines[id] for id, flag in zip(ids, keep) if flag]
+            begin = [piece[0] for piece in pieces]
+            end = [piece[1] for piece in pieces]
+            textwriter.columns(f, "%s%8.3f%8.3f%8.3f%s", begin,
+                               atoms[:, 2], atoms[:, 3], atoms[:, 4], end)
         else:
-            for atom in atoms:
-                begin = "ATOM %6d %2d   R00     1    " % (atom[0], atom[1])
-                middle = "%8.3f%8.3f%8.3f" % (atom[2], atom[3], atom[4])
-                end = "  1.00  0.00    NONE"
-                print(begin + middle + end, file=f)
+            textwriter.columns(
+                f, "ATOM %6d %2d   R00     1    %8.3f%8.3f%8.3f" +
+                "  1.00  0.00    NONE\n", atoms[:, 0], atoms[:, 1],
+                atoms[:, 2], atoms[:, 3], atoms[:, 4])
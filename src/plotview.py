@@ -14,6 +14,7 @@ import glob
 import re
 import sys
 from tkinter import *
+from vec import vec
 oneline = "Plot multiple vectors from a data set"
 
 docstr = """
@@ -22,6 +23,11 @@ p = plotview(d,pl)      create GUI for viewing plots
   d = Pizza.py object that contains vectors (log, vec)
   pl = Pizza.py plotting object (gnu, matlab)
 
+p = plotview("thermo.npz",pl)  create GUI for vectors of a binary column file
+
+  file ending in .npz or .parquet, written by log, clog or vec write()
+  columns are read once as NumPy arrays, no text is parsed
+
 p.select(2)             select one plot as current (1-N)
 p.yes(3)                toggle one plot's visibility
 p.no(3)
@@ -38,6 +44,7 @@ p.save()                save currently selected plot to file.eps
 
 # History
 #   8/05, Matt Jones (BYU): original version
+#   10/26, source can be a binary column file
 
 # ToDo list
 #   option to plot all N vectors against linear index?
@@ -63,6 +70,8 @@ class plotview:
     # --------------------------------------------------------------------
 
     def __init__(self, source, plot):
+        if isinstance(source, str):
+            source = vec(source)
         self.source = source
         self.plot = plot
 
@@ -0,0 +1,444 @@
+# Pizza.py toolkit, www.cs.sandia.gov/~sjplimp/pizza.html
+# Steve Plimpton, sjplimp@sandia.gov, Sandia National Laboratories
+#
+# Copyright (2005) Sandia Corporation.  Under the terms of Contract
+# DE-AC04-94AL85000 with Sandia Corporation, the U.S. Government retains
+# certain rights in this software.  This software is distributed under
+# the GNU General Public License.
+
+# png tool
+
+from __future__ import print_function, absolute_import
+import struct
+import subprocess
+import zlib
+import numpy as np
+from svg import svg, rotation_matrix, compute_distance, table, props
+oneline = "3d visualization via NumPy software rendering into PNG files"
+
+docstr = """
+p = png(d)                  create PNG renderer for data in d
+
+  d = atom snapshot object (dump, data, mdump)
+  no external program or display is needed to create images
+
+p.bg("black")               set background color (def = "black")
+p.size(N)		    set image size to NxN
+p.size(N,M)		    set image size to NxM
+p.rotate(60,135)            view from z theta and azimuthal phi (def = 60,30)
+p.shift(x,y)                translate by x,y pixels in view window (def = 0,0)
+p.zoom(0.5)                 scale image by factor (def = 1)
+p.box(0/1/2)                0/1/2 = none/variable/fixed box
+p.box(0/1/2,"green")        set box color
+p.box(0/1/2,"red",4)        set box edge thickness
+p.file = "image"            file prefix for created images (def = "image")
+p.cpunum = 4                render all() frames with 4 processes (def = 1)
+
+p.show(N)                   show image of snapshot at timestep N
+a = p.pixels(N)             image of timestep N as YxXx3 array of uint8 RGB
+
+p.all()                     make images of all selected snapshots
+p.all(P)                    images of all, start file label at P
+p.all(N,M,P)                make M images of snapshot N, start label at P
+
+p.pan(60,135,1.0,40,135,1.5)    pan during all() operation
+p.pan()                         no pan during all() (default)
+
+  args = z theta, azimuthal phi, zoom factor at beginning and end
+  values at each step are interpolated between beginning and end values
+
+p.select = "$x > %g*3.0"    string to pass to d.aselect.test() during all()
+p.select = ""               no extra aselect (default)
+
+  %g varies from 0.0 to 1.0 from beginning to end of all()
+
+p.acol(2,"green")		   set atom colors by atom type (1-N)
+p.acol([2,4],["red","blue"])	   1st arg = one type or list of types
+p.acol(0,"blue")          	   2nd arg = one color or list of colors
+p.acol(range(20),["red","blue"])   if list lengths unequal, interpolate
+p.acol(range(10),"loop")           assign colors in loop, randomly ordered
+
+  if 1st arg is 0, set all types to 2nd arg
+  if list of types has a 0 (e.g. range(10)), +1 is added to each value
+  interpolate means colors blend smoothly from one value to the next
+
+p.arad([1,2],[0.5,0.3])            set atom radii, same rules as acol()
+
+p.bcol()			   set bond color, same args as acol()
+p.brad()			   set bond thickness, same args as arad()
+
+p.tcol()			   set triangle color, same args as acol()
+p.lcol()                           set line color, same args as acol()
+p.lrad()                           set line thickness, same args as arad()
+
+p.adef()                           set atom/bond/tri/line properties to default
+p.bdef()			   default = "loop" for colors, 0.45 for radii
+p.tdef()  			   default = 0.25 for bond/line thickness
+p.ldef()  			   default = 0 fill
+
+  by default 100 types are assigned
+  if atom/bond/tri/line has type > # defined properties, is an error
+
+from vizinfo import colors         access color list
+print colors                       list defined color names and RGB values
+colors["nickname"] = [R,G,B]       set new RGB values from 0 to 255
+
+  140 pre-defined colors: red, green, blue, purple, yellow, black, white, etc
+
+Settings specific to png tool:
+
+p.shade = 0.7               fraction of color from lighting (def = 0.7)
+
+  atoms are shaded spheres, bonds, lines and box edges are tubes
+  drawn as overlapping spheres, triangles are filled and flat shaded
+  a z-buffer keeps the object nearest to the viewer in each pixel
+  bond/line thickness and box edge thickness are radii in box units
+"""
+
+# History
+#   10/26, headless renderer with the view and settings of svg
+
+# ToDo list
+#   labels are not drawn
+#   triangles are not drawn with fill type
+#   no antialiasing
+
+# Variables
+#   same as svg, plus
+#   shade = fraction of color from lighting, rest is ambient
+
+# Imports and external programs
+
+try:
+    from DEFAULTS import PIZZA_DISPLAY
+except BaseException:
+    PIZZA_DISPLAY = "display"
+
+# fragments = candidate pixels of objects, processed in blocks of FRAGMENTS
+# LIGHT = direction of the light in view coords, x right, y up, z to viewer
+
+FRAGMENTS = 1 << 22
+LIGHT = np.array([-1.0, 1.0, 2.0]) / np.sqrt(6.0)
+
+# Class definition
+# camera, frames of all(), panning and colors are the ones of svg
+
+
+class png(svg):
+
+    # --------------------------------------------------------------------
+
+    def __init__(self, data):
+        svg.__init__(self, data)
+        self.shade = 0.7
+
+    # --------------------------------------------------------------------
+
+    def show(self, ntime):
+        self.write(self.file, self.snapshot(ntime))
+        cmd = "%s %s.png" % (PIZZA_DISPLAY, self.file)
+        subprocess.getoutput(cmd)
+
+    # --------------------------------------------------------------------
+
+    def pixels(self, ntime):
+        return self.snapshot(ntime)
+
+    # --------------------------------------------------------------------
+    # image of one snapshot, centered on its box
+
+    def snapshot(self, ntime):
+        data = self.data
+        which = data.findtime(ntime)
+        time, box, atoms, bonds, tris, lines = data.viz(which)
+        if self.boxflag == 2:
+            box = data.maxbox()
+        self.distance = compute_distance(box)
+        self.center(box)
+        return self.render(box, atoms, bonds, tris, lines)
+
+    # --------------------------------------------------------------------
+    # render one image and write it to file.png
+
+    def single(self, file, box, atoms, bonds, tris, lines, scaleflag):
+        if scaleflag:
+            self.center(box)
+        self.write(file, self.render(box, atoms, bonds, tris, lines))
+
+    # --------------------------------------------------------------------
+
+    def write(self, file, image):
+        writepng(file + ".png", image)
+
+    # --------------------------------------------------------------------
+    # draw all objects into a z-buffered YxXx3 image
+
+    def render(self, box, atoms, bonds, tris, lines):
+        matrix = rotation_matrix('x', -self.ztheta, 'z', 270.0 - self.azphi)
+        vizinfo = self.vizinfo
+        canvas = Canvas(self.xpixels, self.ypixels, self.bgcol, self.factor,
+                        self.shade)
+
+        atoms = table(atoms, 5)
+        if len(atoms):
+            color, rad, index = props(vizinfo.acolor, vizinfo.arad,
+                                      vizinfo.nacolor, atoms[:, 1], "atom")
+            x, y, z = self.project(atoms[:, 2:5], matrix)
+            canvas.spheres(x, y, z, rad[index] * self.factor, color[index])
+
+        tris = table(tris, 11)
+        if len(tris):
+            color, fill, index = props(vizinfo.tcolor, vizinfo.tfill,
+                                       vizinfo.ntcolor, tris[:, 1], "tri")
+            canvas.triangles(self.project(tris[:, 2:5], matrix),
+                             self.project(tris[:, 5:8], matrix),
+                             self.project(tris[:, 8:11], matrix),
+                             color[index])
+
+        # bonds longer than 1/4 of the box are dropped, e.g. periodic ones
+
+        bonds = table(bonds, 10)
+        if len(bonds):
+            bound = 0.25 * self.distance
+            keep = (np.fabs(bonds[:, 2] - bonds[:, 5]) <= bound) & \
+                (np.fabs(bonds[:, 3] - bonds[:, 6]) <= bound)
+            bonds = bonds[keep]
+            color, thick, index = props(vizinfo.bcolor, vizinfo.brad,
+                                        vizinfo.nbcolor, bonds[:, 1], "bond")
+            canvas.tubes(self.project(bonds[:, 2:5], matrix),
+                         self.project(bonds[:, 5:8], matrix),
+                         thick[index] * self.factor, color[index])
+
+        lines = table(lines, 8)
+        if len(lines):
+            color, thick, index = props(vizinfo.lcolor, vizinfo.lrad,
+                                        vizinfo.nlcolor, lines[:, 1], "line")
+            canvas.tubes(self.project(lines[:, 2:5], matrix),
+                         self.project(lines[:, 5:8], matrix),
+                         thick[index] * self.factor, color[index])
+
+        if self.boxflag:
+            x1, y1, z1 = box[0], box[1], box[2]
+            x2, y2, z2 = box[3], box[4], box[5]
+            edges = np.array([[x1, y1, z1, x1, y1, z2],
+                              [x2, y1, z1, x2, y1, z2],
+                              [x2, y2, z1, x2, y2, z2],
+                              [x1, y2, z1, x1, y2, z2],
+                              [x1, y1, z1, x2, y1, z1],
+                              [x1, y2, z1, x2, y2, z1],
+                              [x1, y2, z2, x2, y2, z2],
+                              [x1, y1, z2, x2, y1, z2],
+                              [x1, y1, z1, x1, y2, z1],
+                              [x2, y1, z1, x2, y2, z1],
+                              [x2, y1, z2, x2, y2, z2],
+                              [x1, y1, z2, x1, y2, z2]], dtype=float)
+            color = np.tile(np.array(self.bxcol, dtype=float) * 255, (12, 1))
+            canvas.tubes(self.project(edges[:, 0:3], matrix),
+                         self.project(edges[:, 3:6], matrix),
+                         np.full(12, self.bxthick * self.factor), color)
+
+        return canvas.image()
+
+# --------------------------------------------------------------------
+# z-buffered RGB image
+# x,y = pixel coords from svg project(), y down, z = rotated depth in box
+#   units, larger z is nearer to the viewer
+# each object is split into fragments = candidate pixels with depth and
+#   color, a fragment is drawn if it is nearest in its pixel so far
+
+
+class Canvas:
+
+    def __init__(self, width, height, bg, factor, shade):
+        self.width = width
+        self.height = height
+        self.factor = factor
+        self.shade = shade
+        self.zbuf = np.full(width * height, -np.inf)
+        self.rgb = np.empty((width * height, 3), dtype=np.float32)
+        self.rgb[:] = np.array(bg, dtype=float) * 255
+
+    # --------------------------------------------------------------------
+
+    def image(self):
+        rgb = np.clip(np.rint(self.rgb), 0, 255).astype(np.uint8)
+        return rgb.reshape(self.height, self.width, 3)
+
+    # --------------------------------------------------------------------
+    # depth test of fragments at flat pixel indices pix
+    # return mask of fragments nearest to the viewer so far, to be drawn
+
+    def nearest(self, pix, depth):
+        np.maximum.at(self.zbuf, pix, depth)
+        return depth >= self.zbuf[pix]
+
+    # --------------------------------------------------------------------
+    # spheres of pixel radius r, shaded via their surface normal
+    # spheres with the same integer radius share one pixel stencil around
+    #   the pixel nearest their center, holding offsets the sphere can cover
+    # spheres are drawn in image order so the z-buffer is accessed locally
+
+    def spheres(self, x, y, z, r, color):
+        r = np.maximum(r, 0.75)
+        seen = (x + r >= 0) & (x - r < self.width) & \
+            (y + r >= 0) & (y - r < self.height)
+        rint = np.ceil(r).astype(int)
+        for size in np.unique(rint[seen]):
+            group = np.flatnonzero(seen & (rint == size))
+            group = group[np.argsort(np.rint(y[group]) * self.width +
+                                     x[group], kind="stable")]
+            oy, ox = np.mgrid[-size:size + 1, -size:size + 1]
+            gap = np.maximum(np.fabs(ox) - 0.5, 0) ** 2 + \
+                np.maximum(np.fabs(oy) - 0.5, 0) ** 2
+            ox = ox[gap <= size * size].astype(np.int32)
+            oy = oy[gap <= size * size].astype(np.int32)
+            step = max(1, FRAGMENTS // len(ox))
+            for i in range(0, len(group), step):
+                block = group[i:i + step]
+                cx = np.rint(x[block]).astype(np.int32)
+                cy = np.rint(y[block]).astype(np.int32)
+                fx = (x[block] - cx).astype(np.float32)[:, np.newaxis]
+                fy = (y[block] - cy).astype(np.float32)[:, np.newaxis]
+                rad = r[block].astype(np.float32)
+                dx = ox - fx
+                dy = oy - fy
+                hsq = (rad * rad)[:, np.newaxis] - dx * dx - dy * dy
+                mask = hsq >= 0
+                h = np.sqrt(hsq[mask])
+                which, col = np.nonzero(mask)
+                px = cx[which] + ox[col]
+                py = cy[which] + oy[col]
+                clip = (px >= 0) & (px < self.width) & \
+                    (py >= 0) & (py < self.height)
+                if not clip.all():
+                    which, col, h = which[clip], col[clip], h[clip]
+                    px, py = px[clip], py[clip]
+                pix = py.astype(np.int64) * self.width + px
+                front = self.nearest(pix, z[block][which] + h / self.factor)
+                which, col, h = which[front], col[front], h[front]
+                light = (LIGHT[0] * (ox[col] - fx[which, 0]) -
+                         LIGHT[1] * (oy[col] - fy[which, 0]) +
+                         LIGHT[2] * h) / rad[which]
+                self.rgb[pix[front]] = self.lit(color[block][which], light)
+
+    # --------------------------------------------------------------------
+    # tubes between end points p1,p2 of pixel radius r
+    # drawn as spheres spaced by at most a pixel and half their radius
+
+    def tubes(self, p1, p2, r, color):
+        x1, y1, z1 = p1
+        x2, y2, z2 = p2
+        if not len(x1):
+            return
+        length = np.hypot(x2 - x1, y2 - y1)
+        nsample = np.ceil(length / np.clip(0.5 * r, 0.375, 1.0)).astype(int) + 1
+        tube = np.repeat(np.arange(len(x1)), nsample)
+        first = np.repeat(np.cumsum(nsample) - nsample, nsample)
+        t = (np.arange(len(tube)) - first) / \
+            np.maximum(nsample - 1, 1)[tube].astype(float)
+        self.spheres(x1[tube] + t * (x2 - x1)[tube],
+                     y1[tube] + t * (y2 - y1)[tube],
+                     z1[tube] + t * (z2 - z1)[tube], r[tube], color[tube])
+
+    # --------------------------------------------------------------------
+    # filled triangles with corners p1,p2,p3, flat shaded from both sides
+    # candidate pixels are the bounding box of each triangle
+
+    def triangles(self, p1, p2, p3, color):
+        x1, y1, z1 = p1
+        x2, y2, z2 = p2
+        x3, y3, z3 = p3
+
+        # normal in view coords, y up and z scaled to pixels
+
+        ax, ay, az = x2 - x1, y1 - y2, (z2 - z1) * self.factor
+        bx, by, bz = x3 - x1, y1 - y3, (z3 - z1) * self.factor
+        nx = ay * bz - az * by
+        ny = az * bx - ax * bz
+        nz = ax * by - ay * bx
+        norm = np.sqrt(nx * nx + ny * ny + nz * nz)
+        norm[norm == 0] = 1
+        light = np.fabs(LIGHT[0] * nx + LIGHT[1] * ny + LIGHT[2] * nz) / norm
+        shaded = self.lit(color, light)
+
+        xlo = np.clip(np.floor(np.minimum(np.minimum(x1, x2), x3)), 0,
+                      self.width).astype(np.int64)
+        xhi = np.clip(np.ceil(np.maximum(np.maximum(x1, x2), x3)) + 1, 0,
+                      self.width).astype(np.int64)
+        ylo = np.clip(np.floor(np.minimum(np.minimum(y1, y2), y3)), 0,
+                      self.height).astype(np.int64)
+        yhi = np.clip(np.ceil(np.maximum(np.maximum(y1, y2), y3)) + 1, 0,
+                      self.height).astype(np.int64)
+        nx = xhi - xlo
+        area = nx * (yhi - ylo)
+        area[(nx <= 0) | (yhi <= ylo)] = 0
+
+        # blocks of triangles with at most FRAGMENTS candidate pixels
+        #   unless a single triangle is larger
+
+        ends = np.cumsum(area)
+        start = 0
+        while start < len(area):
+            stop = np.searchsorted(ends, ends[start] - area[start] +
+                                   FRAGMENTS, side="right")
+            stop = max(stop, start + 1)
+            block = np.arange(start, stop)
+            start = stop
+            count = area[block]
+            total = count.sum()
+            if not total:
+                continue
+            tri = np.repeat(block, count)
+            local = np.arange(total) - \
+                np.repeat(np.cumsum(count) - count, count)
+            px = xlo[tri] + local % nx[tri]
+            py = ylo[tri] + local // nx[tri]
+
+            # barycentric coords of pixel centers, inside if all >= 0
+
+            ex = px - x1[tri]
+            ey = py - y1[tri]
+            ux, uy = x2[tri] - x1[tri], y2[tri] - y1[tri]
+            vx, vy = x3[tri] - x1[tri], y3[tri] - y1[tri]
+            det = ux * vy - uy * vx
+            det[det == 0] = np.inf
+            s = (ex * vy - ey * vx) / det
+            t = (ux * ey - uy * ex) / det
+            eps = -1.0e-9
+            inside = (s >= eps) & (t >= eps) & (s + t <= 1.0 - eps)
+            tri = tri[inside]
+            s = s[inside]
+            t = t[inside]
+            depth = z1[tri] + s * (z2 - z1)[tri] + t * (z3 - z1)[tri]
+            pix = py[inside] * self.width + px[inside]
+            front = self.nearest(pix, depth)
+            self.rgb[pix[front]] = shaded[tri[front]]
+
+    # --------------------------------------------------------------------
+    # colors scaled by ambient plus lighting term of each fragment
+
+    def lit(self, color, light):
+        intensity = (1.0 - self.shade) + self.shade * np.clip(light, 0, 1)
+        return color * intensity[:, np.newaxis]
+
+# --------------------------------------------------------------------
+# write YxXx3 uint8 image as 8-bit RGB PNG file
+
+
+def writepng(file, image):
+    height, width = image.shape[0], image.shape[1]
+    raw = np.empty((height, width * 3 + 1), dtype=np.uint8)
+    raw[:, 0] = 0
+    raw[:, 1:] = image.reshape(height, width * 3)
+
+    def chunk(kind, data):
+        return struct.pack(">I", len(data)) + kind + data + \
+            struct.pack(">I", zlib.crc32(kind + data) & 0xffffffff)
+
+    f = open(file, "wb")
+    f.write(b"\x89PNG\r\n\x1a\n")
+    f.write(chunk(b"IHDR", struct.pack(">IIBBBBB", width, height,
+                                       8, 2, 0, 0, 0)))
+    f.write(chunk(b"IDAT", zlib.compress(raw.tobytes(), 6)))
+    f.write(chunk(b"IEND", b""))
+    f.close()
@@ -14,7 +14,10 @@ import re
 import subprocess
 import os
 import sys
+import tempfile
 from vizinfo import vizinfo
+import renderfarm
+import textwriter
 oneline = "3d visualization via Raster3d program"
 
 docstr = """
@@ -32,6 +35,7 @@ r.box(0/1/2)                0/1/2 = none/variable/fixed box
 r.box(0/1/2,"green")        set box color
 r.box(0/1/2,"red",4)        set box edge thickness
 r.file = "image"            file prefix for created images (def = "image")
+r.cpunum = 4                render all() frames with 4 processes (def = 1)
 
 r.show(N)                   show image of snapshot at timestep N
 
@@ -50,6 +54,11 @@ r.select = ""               no extra aselect (default)
 
   %g varies from 0.0 to 1.0 from beginning to end of all()
 
+  with cpunum > 1, frames are read and set up in order, then rendered
+    in parallel, each frame via its own temporary Raster3d input file
+    the view is the same as with cpunum = 1: without pan, every frame
+    is centered like the 1st one, with pan each frame is centered itself
+
 r.label(x,y,"h",size,"red","This is a label")    add label to each image
 r.nolabel()                                      delete all labels
 
@@ -95,6 +104,7 @@ colors["nickname"] = [R,G,B]       set new RGB values from 0 to 255
 # History
 #   8/05, Steve Plimpton (SNL): original version
 #   9/05, Steve Plimpton (SNL): adjusted box and label attributes
+#   10/26, parallel all() via renderfarm, temporary input file per frame
 
 # ToDo list
 #   when do aselect with select str while looping N times on same timestep
@@ -108,6 +118,7 @@ colors["nickname"] = [R,G,B]       set new RGB values from 0 to 255
 #   distance = size of simulation box (largest dim)
 #   eye = viewpoint distance from center of scene
 #   file = filename prefix to use for images produced
+#   cpunum = # of processes rendering the frames of all()
 #   boxflag = 0/1/2 for drawing simulation box: none/variable/fixed
 #   bxcol = color of box
 #   bxthick = thickness of box
@@ -156,6 +167,8 @@ class raster:
         self.labels = []
         self.panflag = 0
         self.select = ""
+        self.cpunum = 1
+        self.xtrans = self.ytrans = self.ztrans = 0.0
 
         self.vizinfo = vizinfo()
         self.adef()
@@ -236,19 +249,26 @@ class raster:
             box = data.maxbox()
         self.distance = compute_distance(box)
 
+        print(self.center(self.file, box, atoms, bonds, tris, lines))
+        self.single(0, self.file, box, atoms, bonds, tris, lines)
+        cmd = "%s %s.png" % (PIZZA_DISPLAY, self.file)
+        subprocess.getoutput(cmd)
+
+    # --------------------------------------------------------------------
+    # pre-call single() to re-center simulation data
+    # Raster3d reports the translation that centers the scene incl the box
+    #   this keeps the view fixed even if atoms move around
+    # return output of Raster3d
+
+    def center(self, file, box, atoms, bonds, tris, lines):
         self.xtrans = self.ytrans = self.ztrans = 0.0
-        output = self.single(1, self.file, box, atoms, bonds, tris, lines)
-        print(output)
+        output = self.single(1, file, box, atoms, bonds, tris, lines)
         nums = re.findall(
-            "translation to:\\s*(\\S*)\\s*(\\S*)\\s*(\\S*)\\s",
-            output)
+            "translation to:\\s*(\\S*)\\s*(\\S*)\\s*(\\S*)\\s", output)
         self.xtrans = float(nums[0][0])
         self.ytrans = float(nums[0][1])
         self.ztrans = float(nums[0][2])
-
-        self.single(0, self.file, box, atoms, bonds, tris, lines)
-        cmd = "%s %s.png" % (PIZZA_DISPLAY, self.file)
-        subprocess.getoutput(cmd)
+        return output
 
     # --------------------------------------------------------------------
 
@@ -267,6 +287,21 @@ class raster:
     # --------------------------------------------------------------------
 
     def all(self, *list):
+        if len(list) <= 1:
+            ncount = self.data.nselect
+        else:
+            ncount = list[1]
+        renderfarm.run(self, self.frames(*list), self.cpunum)
+        print("\n%d images" % ncount)
+
+    # --------------------------------------------------------------------
+    # generate the frames of all() in order, one (label,job) per image
+    # loop over all selected steps or ncount times on same step
+    # distance from 1st snapshot box or max box for all selected steps
+    # re-center simulation data on 1st step, or in each frame if panning
+    #   so frames rendered in any order or process get the same view
+
+    def frames(self, *list):
         data = self.data
         if len(list) == 0:
             nstart = 0
@@ -278,125 +313,69 @@ class raster:
             ntime = list[0]
             nstart = list[2]
             ncount = list[1]
+            which = data.findtime(ntime)
 
         if self.boxflag == 2:
             box = data.maxbox()
 
-        # loop over all selected steps
-        # distance from 1st snapshot box or max box for all selected steps
-        # pre-call single() to re-center simulation data on 1st step or if
-        # panning
-
-        if len(list) <= 1:
-
-            n = nstart
-            i = flag = 0
-            while 1:
+        n = nstart
+        i = flag = 0
+        while 1:
+            if len(list) <= 1:
                 which, time, flag = data.iterator(flag)
                 if flag == -1:
                     break
+                label = time
+            else:
+                if i == ncount:
+                    break
+                time = ntime
+                label = n
 
+            fraction = 0.0
+            if ncount > 1:
                 fraction = float(i) / (ncount - 1)
 
-                if self.select != "":
-                    newstr = self.select % fraction
-                    data.aselect.test(newstr, time)
-                time, boxone, atoms, bonds, tris, lines = data.viz(which)
-
-                if self.boxflag < 2:
-                    box = boxone
-                if n == nstart:
-                    self.distance = compute_distance(box)
-
-                if n < 10:
-                    file = self.file + "000" + str(n)
-                elif n < 100:
-                    file = self.file + "00" + str(n)
-                elif n < 1000:
-                    file = self.file + "0" + str(n)
-                else:
-                    file = self.file + str(n)
-
-                if self.panflag:
-                    self.ztheta = self.ztheta_start + \
-                        fraction * (self.ztheta_stop - self.ztheta_start)
-                    self.azphi = self.azphi_start + \
-                        fraction * (self.azphi_stop - self.azphi_start)
-                    self.scale = self.scale_start + \
-                        fraction * (self.scale_stop - self.scale_start)
-
-                if n == nstart or self.panflag:
-                    self.xtrans = self.ytrans = self.ztrans = 0.0
-                    output = self.single(
-                        1, file, box, atoms, bonds, tris, lines)
-                    nums = re.findall(
-                        "translation to:\\s*(\\S*)\\s*(\\S*)\\s*(\\S*)\\s", output)
-                    self.xtrans = float(nums[0][0])
-                    self.ytrans = float(nums[0][1])
-                    self.ztrans = float(nums[0][2])
-
-                self.single(0, file, box, atoms, bonds, tris, lines)
-                print(time, end=' ')
-                sys.stdout.flush()
-                i += 1
-                n += 1
-
-        # loop ncount times on same step
-        # distance from 1st snapshot box or max box for all selected steps
-        # pre-call single() to re-center simulation data on 1st step or if
-        # panning
+            if self.select != "":
+                newstr = self.select % fraction
+                data.aselect.test(newstr, time)
+            time, boxone, atoms, bonds, tris, lines = data.viz(which)
 
-        else:
+            if self.boxflag < 2:
+                box = boxone
+            if n == nstart:
+                self.distance = compute_distance(box)
 
-            which = data.findtime(ntime)
+            file = textwriter.numbered(self.file, n, "")
 
-            n = nstart
-            for i in range(ncount):
-                fraction = float(i) / (ncount - 1)
+            if self.panflag:
+                self.ztheta = self.ztheta_start + \
+                    fraction * (self.ztheta_stop - self.ztheta_start)
+                self.azphi = self.azphi_start + \
+                    fraction * (self.azphi_stop - self.azphi_start)
+                self.scale = self.scale_start + \
+                    fraction * (self.scale_stop - self.scale_start)
 
-                if self.select != "":
-                    newstr = self.select % fraction
-                    data.aselect.test(newstr, ntime)
-                time, boxone, atoms, bonds, tris, lines = data.viz(which)
-
-                if self.boxflag < 2:
-                    box = boxone
-                if n == nstart:
-                    self.distance = compute_distance(box)
-
-                if n < 10:
-                    file = self.file + "000" + str(n)
-                elif n < 100:
-                    file = self.file + "00" + str(n)
-                elif n < 1000:
-                    file = self.file + "0" + str(n)
-                else:
-                    file = self.file + str(n)
-
-                if self.panflag:
-                    self.ztheta = self.ztheta_start + \
-                        fraction * (self.ztheta_stop - self.ztheta_start)
-                    self.azphi = self.azphi_start + \
-                        fraction * (self.azphi_stop - self.azphi_start)
-                    self.scale = self.scale_start + \
-                        fraction * (self.scale_stop - self.scale_start)
-
-                if n == nstart or self.panflag:
-                    self.xtrans = self.ytrans = self.ztrans = 0.0
-                    output = self.single(
-                        1, file, box, atoms, bonds, tris, lines)
-                    nums = re.findall(
-                        "translation to:\\s*(\\S*)\\s*(\\S*)\\s*(\\S*)\\s", output)
-                    self.xtrans = float(nums[0][0])
-                    self.ytrans = float(nums[0][1])
-                    self.ztrans = float(nums[0][2])
-
-                self.single(0, file, box, atoms, bonds, tris, lines)
-                print(n, end=' ')
-                sys.stdout.flush()
-                n += 1
+            if n == nstart and not self.panflag:
+                self.center(file, box, atoms, bonds, tris, lines)
 
-        print("\n%d images" % ncount)
+            camera = (self.ztheta, self.azphi, self.scale, self.distance,
+                      self.xtrans, self.ytrans, self.ztrans)
+            yield label, (file, box, atoms, bonds, tris, lines, camera,
+                          self.panflag)
+            i += 1
+            n += 1
+
+    # --------------------------------------------------------------------
+    # render one frame of all() with the camera it was generated with
+
+    def frame(self, job):
+        file, box, atoms, bonds, tris, lines, camera, recenter = job
+        self.ztheta, self.azphi, self.scale, self.distance, \
+            self.xtrans, self.ytrans, self.ztrans = camera
+        if recenter:
+            self.center(file, box, atoms, bonds, tris, lines)
+        self.single(0, file, box, atoms, bonds, tris, lines)
 
     # --------------------------------------------------------------------
 
@@ -404,7 +383,8 @@ class raster:
 
         matrix = rotation_matrix('x', -self.ztheta, 'z', 270.0 - self.azphi)
 
-        f = open("tmp.r3d", "w")
+        fd, tmpfile = tempfile.mkstemp(".r3d", "raster")
+        f = os.fdopen(fd, "w")
 
         color = self.bgcol
         xshift = 1.6 * self.distance / self.scale * self.xshift / self.xpixels
@@ -533,11 +513,12 @@ class raster:
         f.close()
 
         if len(self.labels) == 0:
-            cmd = "cat tmp.r3d | %s -png %s.png" % (PIZZA_RENDER, file)
+            cmd = "cat %s | %s -png %s.png" % (tmpfile, PIZZA_RENDER, file)
         else:
-            cmd = "cat tmp.r3d | %s -png %s.png" % (PIZZA_LABEL3D, file)
+            cmd = "cat %s | %s -png %s.png" % (tmpfile, PIZZA_LABEL3D, file)
 
         output = subprocess.getoutput(cmd)
+        os.remove(tmpfile)
         return output
 
     # --------------------------------------------------------------------
@@ -0,0 +1,84 @@
+# renderfarm functions, not a top-level Pizza.py tool
+
+# History
+#   10/26, parallel frame rendering of raster and svg
+
+# ToDo list
+
+# Variables
+#   BATCH = # of frames handed to the pool per worker at once
+#   tool = copy of the raster or svg object in each worker process
+
+# Imports and external programs
+
+from __future__ import print_function, absolute_import
+import copy
+import multiprocessing
+import sys
+
+# frames are prepared in order by the calling process, which reads
+#   snapshots, applies select strings and sets the camera of each frame
+# only rendering is spread across processes, so every frame gets the same
+#   camera as in a serial run and frames are printed in order
+# at most BATCH*cpunum frames are held in memory at once
+
+BATCH = 4
+
+tool = None
+
+# --------------------------------------------------------------------
+# render jobs of a raster or svg object via its frame() method
+# jobs = iterator of (label,job), label is printed once job is rendered
+# return # of rendered frames
+
+
+def run(obj, jobs, cpunum=1):
+    if cpunum <= 1:
+        n = 0
+        for label, job in jobs:
+            obj.frame(job)
+            print(label, end=' ')
+            sys.stdout.flush()
+            n += 1
+        return n
+
+    # workers get a copy of obj without its (possibly large) data object
+
+    worker = copy.copy(obj)
+    worker.data = None
+    pool = multiprocessing.Pool(cpunum, start, (worker,))
+
+    n = 0
+    try:
+        while 1:
+            batch = []
+            for label, job in jobs:
+                batch.append((label, job))
+                if len(batch) == BATCH * cpunum:
+                    break
+            if not batch:
+                break
+            pool.map(render, [job for label, job in batch], 1)
+            for label, job in batch:
+                print(label, end=' ')
+            sys.stdout.flush()
+            n += len(batch)
+    except BaseException:
+        pool.terminate()
+        pool.join()
+        raise
+    pool.close()
+    pool.join()
+    return n
+
+# --------------------------------------------------------------------
+# worker process setup and rendering of one frame
+
+
+def start(obj):
+    global tool
+    tool = obj
+
+
+def render(job):
+    tool.frame(job)
@@ -0,0 +1,341 @@
+# snapreader class, not a top-level Pizza.py tool
+
+# History
+#   10/26, shared snapshot reader of bdump, ldump, mdump and tdump
+
+# ToDo list
+
+# Variables
+#   flist = list of dump file names
+#   increment = 1 if reading snapshots one-at-a-time
+#   nextfile = which file to read from via next()
+#   eof = ptr into current file for where to read via next()
+#     uncompressed offset for gzipped files
+#   lazy = 1 if values are parsed on first access, 0 if parsed when read
+#   sortrows = 1 if value rows are sorted by their 1st column (ID)
+#   nsnaps = # of snapshots
+#   snaps = list of snapshots
+#   names = dictionary of column names:
+#     key = "id", value = column # (0 to M-1)
+#   Snap = one snapshot
+#     blocks = dictionary of not yet parsed values
+#       key = attribute name ("atoms", "nodes", ...), value = Block
+#   LOCK = serializes parsing of Blocks, snapshots may be accessed by
+#     a prefetch thread (see framecache) and the caller at the same time
+
+# Imports and external programs
+
+from __future__ import print_function, absolute_import
+import glob
+import os
+import sys
+import threading
+from itertools import islice
+from subprocess import Popen, PIPE
+import numpy as np
+
+try:
+    from DEFAULTS import PIZZA_GUNZIP
+except BaseException:
+    PIZZA_GUNZIP = "gunzip"
+
+LOCK = threading.Lock()
+
+# Class definition
+
+
+class snapreader:
+    """
+    Base class of the dump-style readers bdump, ldump, mdump and tdump
+
+    a derived class defines read_header(f,snap), which reads the header
+    lines of one snapshot from binary file f into snap and returns the
+    attribute name and # of rows of the values that follow, e.g. ("atoms",N)
+
+    read_all() only records where the values of each snapshot start in
+    uncompressed files, values are parsed by one NumPy call when the
+    attribute is first accessed, gzipped files are parsed when read
+    """
+
+    # --------------------------------------------------------------------
+
+    def __init__(self, *list):
+        self.snaps = []
+        self.nsnaps = 0
+        self.names = {}
+        self.lazy = 1
+        if not hasattr(self, "sortrows"):
+            self.sortrows = 0
+
+        # flist = list of all dump file names
+
+        words = list[0].split()
+        self.flist = []
+        for word in words:
+            self.flist += glob.glob(word)
+        if len(self.flist) == 0 and len(list) == 1:
+            raise Exception("no %s file specified" % self.__class__.__name__)
+
+        if len(list) == 1:
+            self.increment = 0
+            self.read_all()
+        else:
+            self.increment = 1
+            self.nextfile = 0
+            self.eof = 0
+
+    # --------------------------------------------------------------------
+
+    def read_all(self):
+
+        # read all snapshots from each file
+        # gzipped files cannot seek, so their values are parsed right away
+
+        for file in self.flist:
+            f = openfile(file)
+            lazy = self.lazy and file[-3:] != ".gz"
+
+            snap = self.read_snapshot(f, file, lazy)
+            while snap:
+                self.snaps.append(snap)
+                print(snap.time, end=' ')
+                sys.stdout.flush()
+                snap = self.read_snapshot(f, file, lazy)
+
+            f.close()
+        print()
+
+        # sort entries by timestep, cull duplicates
+
+        self.snaps.sort(key=lambda snap: snap.time)
+        self.cull()
+        self.nsnaps = len(self.snaps)
+        print("read %d snapshots" % self.nsnaps)
+
+    # --------------------------------------------------------------------
+    # read next snapshot from list of files
+
+    def next(self):
+
+        if not self.increment:
+            raise Exception("cannot read incrementally")
+
+        # read next snapshot in current file using eof as pointer
+        # if fail, try next file
+        # if new snapshot time stamp already exists, read next snapshot
+
+        while 1:
+            if self.nextfile >= len(self.flist):
+                return -1
+            file = self.flist[self.nextfile]
+            f = openfile(file, self.eof)
+            snap = self.read_snapshot(f, file)
+            if not snap:
+                f.close()
+                self.nextfile += 1
+                if self.nextfile == len(self.flist):
+                    return -1
+                self.eof = 0
+                continue
+            self.eof = f.tell()
+            f.close()
+            try:
+                self.findtime(snap.time)
+                continue
+            except BaseException:
+                break
+
+        self.snaps.append(snap)
+        self.nsnaps += 1
+
+        return snap.time
+
+    # --------------------------------------------------------------------
+    # read a single snapshot from file f
+    # return snapshot or 0 if failed
+    # lazy = only record file offset of values, else parse them now
+
+    def read_snapshot(self, f, file=None, lazy=0):
+        try:
+            snap = Snap()
+            name, n = self.read_header(f, snap)
+            if lazy and n:
+                offset = f.tell()
+                count = 0
+                line = b""
+                for line in islice(f, n):
+                    count += 1
+                if count < n or line[-1:] != b"\n":
+                    return 0
+                snap.blocks = {name: Block(os.path.abspath(file), offset, n,
+                                           self.sortrows)}
+            else:
+                values = readrows(f, n)
+                if self.sortrows and n:
+                    values = values[np.argsort(values[:, 0])]
+                setattr(snap, name, values)
+            return snap
+        except BaseException:
+            return 0
+
+    # --------------------------------------------------------------------
+    # map atom column names
+
+    def map(self, *pairs):
+        if len(pairs) % 2 != 0:
+            raise Exception("%s map() requires pairs of mappings" %
+                            self.__class__.__name__)
+        for i in range(0, len(pairs), 2):
+            j = i + 1
+            self.names[pairs[j]] = pairs[i] - 1
+
+    # --------------------------------------------------------------------
+    # return vector of snapshot time stamps
+
+    def time(self):
+        return [snap.time for snap in self.snaps]
+
+    # --------------------------------------------------------------------
+
+    def findtime(self, n):
+        for i in range(self.nsnaps):
+            if self.snaps[i].time == n:
+                return i
+        raise Exception("no step %d exists" % n)
+
+    # --------------------------------------------------------------------
+    # delete successive snapshots with duplicate time stamp
+
+    def cull(self):
+        snaps = []
+        for snap in self.snaps:
+            if snaps and snap.time == snaps[-1].time:
+                continue
+            snaps.append(snap)
+        self.snaps = snaps
+
+# --------------------------------------------------------------------
+# one snapshot
+# values not yet parsed are read from their Block on first access
+# a 2nd thread asking for the same values waits for the 1st to parse them
+
+
+class Snap:
+
+    def __getattr__(self, name):
+        blocks = self.__dict__.get("blocks")
+        if blocks is not None:
+            with LOCK:
+                if name in self.__dict__:
+                    return self.__dict__[name]
+                if name in blocks:
+                    values = blocks.pop(name).load()
+                    setattr(self, name, values)
+                    return values
+        raise AttributeError(name)
+
+# --------------------------------------------------------------------
+# location of the n value rows of one snapshot in an uncompressed file
+# parsed values are kept, so snapshots sharing a Block share the array
+
+
+class Block:
+
+    def __init__(self, file, offset, n, sort=0):
+        self.file = file
+        self.offset = offset
+        self.n = n
+        self.sort = sort
+        self.values = None
+
+    def load(self):
+        if self.values is None:
+            f = open(self.file, 'rb')
+            f.seek(self.offset)
+            values = readrows(f, self.n)
+            f.close()
+            if self.sort:
+                values = values[np.argsort(values[:, 0])]
+            self.values = values
+        return self.values
+
+# --------------------------------------------------------------------
+# let snapshot dst use the (possibly not yet parsed) values name of src
+
+
+def share(dst, src, name):
+    blocks = src.__dict__.get("blocks")
+    if blocks and name in blocks:
+        if not dst.__dict__.get("blocks"):
+            dst.blocks = {}
+        dst.blocks[name] = blocks[name]
+        dst.__dict__.pop(name, None)
+    else:
+        setattr(dst, name, getattr(src, name))
+
+# --------------------------------------------------------------------
+# parse the next n lines of binary file f into an n x ncol array
+# all values are converted by a single NumPy call
+
+
+def readrows(f, n):
+    if not n:
+        return None
+    lines = list(islice(f, n))
+    if len(lines) < n or lines[-1][-1:] != b"\n":
+        raise Exception("incomplete snapshot")
+    ncol = len(lines[0].split())
+    return np.array(b"".join(lines).split(), dtype=float).reshape(n, ncol)
+
+# --------------------------------------------------------------------
+# open file for binary reading at offset, gunzip on the fly
+
+
+def openfile(file, offset=0):
+    if file[-3:] == ".gz":
+        return gunzipped(file, offset)
+    f = open(file, 'rb')
+    if offset:
+        f.seek(offset)
+    return f
+
+# --------------------------------------------------------------------
+# output of gunzip, keeps track of the uncompressed position for tell()
+# offset = # of uncompressed bytes to skip
+
+
+class gunzipped:
+
+    def __init__(self, file, offset=0):
+        self.proc = Popen("%s -c %s" % (PIZZA_GUNZIP, file), shell=True,
+                          stdout=PIPE)
+        self.f = self.proc.stdout
+        self.pos = 0
+        while self.pos < offset:
+            block = self.f.read(min(offset - self.pos, 1 << 20))
+            if not block:
+                break
+            self.pos += len(block)
+
+    def readline(self):
+        line = self.f.readline()
+        self.pos += len(line)
+        return line
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        line = self.readline()
+        if not line:
+            raise StopIteration
+        return line
+
+    next = __next__
+
+    def tell(self):
+        return self.pos
+
+    def close(self):
+        self.f.close()
+        self.proc.wait()
@@ -9,12 +9,15 @@
 # svg tool
 
 from __future__ import print_function, absolute_import
-from math import sqrt, atan, cos, sin, fabs
+from math import atan, cos, sin
 import re
 import subprocess
 import os
 import sys
+import numpy as np
 from vizinfo import vizinfo
+import renderfarm
+import textwriter
 oneline = "3d visualization via SVG files"
 
 docstr = """
@@ -32,6 +35,7 @@ s.box(0/1/2)                0/1/2 = none/variable/fixed box
 s.box(0/1/2,"green")        set box color
 s.box(0/1/2,"red",4)        set box edge thickness
 s.file = "image"            file prefix for created images (def = "image")
+s.cpunum = 4                write all() frames with 4 processes (def = 1)
 
 s.show(N)                   show image of snapshot at timestep N
 
@@ -50,6 +54,9 @@ s.select = ""               no extra aselect (default)
 
   %g varies from 0.0 to 1.0 from beginning to end of all()
 
+  with cpunum > 1, frames are read and set up in order, then written
+    in parallel, the view is the same as with cpunum = 1
+
 s.label(x,y,"h",size,"red","This is a label")    add label to each image
 s.nolabel()                                      delete all labels
 
@@ -99,6 +106,8 @@ s.thick = 2.0               pixel thickness of black atom border
 # History
 #   8/05, Matt Jones (BYU): original version
 #   9/05, Steve Plimpton: adjusted box and label attributes
+#   10/26, parallel all() via renderfarm
+#   10/26, objects rotated, projected and depth sorted as NumPy arrays
 
 # ToDo list
 #   when do aselect with select str while looping N times on same timestep
@@ -111,6 +120,7 @@ s.thick = 2.0               pixel thickness of black atom border
 #   xshift,yshift = xy translation of scene (in pixels)
 #   distance = size of simulation box (largest dim)
 #   file = filename prefix to use for images produced
+#   cpunum = # of processes writing the frames of all()
 #   boxflag = 0/1/2 for drawing simulation box: none/variable/fixed
 #   bxcol = color of box
 #   bxthick = thickness of box
@@ -150,6 +160,7 @@ class svg:
         self.panflag = 0
         self.select = ""
         self.thick = 1.0
+        self.cpunum = 1
 
         self.vizinfo = vizinfo()
         self.adef()
@@ -233,6 +244,21 @@ class svg:
     # --------------------------------------------------------------------
 
     def all(self, *list):
+        if len(list) <= 1:
+            ncount = self.data.nselect
+        else:
+            ncount = list[1]
+        renderfarm.run(self, self.frames(*list), self.cpunum)
+        print("\n%d images" % ncount)
+
+    # --------------------------------------------------------------------
+    # generate the frames of all() in order, one (label,job) per image
+    # loop over all selected steps or ncount times on same step
+    # distance from 1st snapshot box or max box for all selected steps
+    # scale and center on 1st step or if panning, the result is part of
+    #   each job so frames rendered in any order or process get the same view
+
+    def frames(self, *list):
         data = self.data
         if len(list) == 0:
             nstart = 0
@@ -244,111 +270,66 @@ class svg:
             ntime = list[0]
             nstart = list[2]
             ncount = list[1]
+            which = data.findtime(ntime)
 
         if self.boxflag == 2:
             box = data.maxbox()
 
-        # loop over all selected steps
-        # distance from 1st snapshot box or max box for all selected steps
-        # call single() w/ scaling on 1st step or if panning
-
-        if len(list) <= 1:
-
-            n = nstart
-            i = flag = 0
-            while 1:
+        n = nstart
+        i = flag = 0
+        while 1:
+            if len(list) <= 1:
                 which, time, flag = data.iterator(flag)
                 if flag == -1:
                     break
+                label = time
+            else:
+                if i == ncount:
+                    break
+                time = ntime
+                label = n
 
+            fraction = 0.0
+            if ncount > 1:
                 fraction = float(i) / (ncount - 1)
 
-                if self.select != "":
-                    newstr = self.select % fraction
-                    data.aselect.test(newstr, time)
-                time, boxone, atoms, bonds, tris, lines = data.viz(which)
-
-                if self.boxflag < 2:
-                    box = boxone
-                if n == nstart:
-                    self.distance = compute_distance(box)
-
-                if n < 10:
-                    file = self.file + "000" + str(n)
-                elif n < 100:
-                    file = self.file + "00" + str(n)
-                elif n < 1000:
-                    file = self.file + "0" + str(n)
-                else:
-                    file = self.file + str(n)
-
-                if self.panflag:
-                    self.ztheta = self.ztheta_start + \
-                        fraction * (self.ztheta_stop - self.ztheta_start)
-                    self.azphi = self.azphi_start + \
-                        fraction * (self.azphi_stop - self.azphi_start)
-                    self.scale = self.scale_start + \
-                        fraction * (self.scale_stop - self.scale_start)
-
-                scaleflag = 0
-                if n == nstart or self.panflag:
-                    scaleflag = 1
-
-                self.single(file, box, atoms, bonds, tris, lines, scaleflag)
-                print(time, end=' ')
-                sys.stdout.flush()
-                i += 1
-                n += 1
-
-        # loop ncount times on same step
-        # distance from 1st snapshot box or max box for all selected steps
-        # call single() w/ scaling on 1st step or if panning
+            if self.select != "":
+                newstr = self.select % fraction
+                data.aselect.test(newstr, time)
+            time, boxone, atoms, bonds, tris, lines = data.viz(which)
 
-        else:
+            if self.boxflag < 2:
+                box = boxone
+            if n == nstart:
+                self.distance = compute_distance(box)
 
-            which = data.findtime(ntime)
+            file = textwriter.numbered(self.file, n, "")
 
-            n = nstart
-            for i in range(ncount):
-                fraction = float(i) / (ncount - 1)
+            if self.panflag:
+                self.ztheta = self.ztheta_start + \
+                    fraction * (self.ztheta_stop - self.ztheta_start)
+                self.azphi = self.azphi_start + \
+                    fraction * (self.azphi_stop - self.azphi_start)
+                self.scale = self.scale_start + \
+                    fraction * (self.scale_stop - self.scale_start)
 
-                if self.select != "":
-                    newstr = self.select % fraction
-                    data.aselect.test(newstr, ntime)
-                time, boxone, atoms, bonds, tris, lines = data.viz(which)
-
-                if self.boxflag < 2:
-                    box = boxone
-                if n == nstart:
-                    self.distance = compute_distance(box)
-
-                if n < 10:
-                    file = self.file + "000" + str(n)
-                elif n < 100:
-                    file = self.file + "00" + str(n)
-                elif n < 1000:
-                    file = self.file + "0" + str(n)
-                else:
-                    file = self.file + str(n)
-
-                if self.panflag:
-                    self.ztheta = self.ztheta_start + \
-                        fraction * (self.ztheta_stop - self.ztheta_start)
-                    self.azphi = self.azphi_start + \
-                        fraction * (self.azphi_stop - self.azphi_start)
-                    self.scale = self.scale_start + \
-                        fraction * (self.scale_stop - self.scale_start)
-
-                scaleflag = 0
-                if n == nstart or self.panflag:
-                    scaleflag = 1
-
-                self.single(file, box, atoms, bonds, tris, lines, scaleflag)
-                print(n, end=' ')
-                sys.stdout.flush()
-                n += 1
+            if n == nstart or self.panflag:
+                self.center(box)
 
-        print("\n%d images" % ncount)
+            camera = (self.ztheta, self.azphi, self.scale, self.distance,
+                      self.factor, self.offsetx, self.offsety)
+            yield label, (file, box, atoms, bonds, tris, lines, camera)
+            i += 1
+            n += 1
+
+    # --------------------------------------------------------------------
+    # render one frame of all() with the camera it was generated with
+
+    def frame(self, job):
+        file, box, atoms, bonds, tris, lines, camera = job
+        self.ztheta, self.azphi, self.scale, self.distance, \
+            self.factor, self.offsetx, self.offsety = camera
+        self.single(file, box, atoms, bonds, tris, lines, 0)
 
     # --------------------------------------------------------------------
 
@@ -370,92 +351,106 @@ class svg:
 
         matrix = rotation_matrix('x', -self.ztheta, 'z', 270.0 - self.azphi)
         if scaleflag:
-            self.factor = self.xpixels * self.scale / (1.6 * self.distance)
-            xctr = 0.5 * (box[0] + box[3])
-            yctr = 0.5 * (box[1] + box[4])
-            zctr = 0.5 * (box[2] + box[5])
-            self.offsetx = matrix[0] * xctr + \
-                matrix[3] * yctr + matrix[6] * zctr
-            self.offsety = matrix[1] * xctr + \
-                matrix[4] * yctr + matrix[7] * zctr
-
-        olist = []
-
-        for atom in atoms:
-            atom[0] = 0
-            newatom = self.transform(atom, matrix)
-            olist.append(newatom)
-
-        for tri in tris:
-            tri[0] = 1
-            newtri = self.transform(tri, matrix)
-            olist.append(newtri)
-
-        bound = 0.25 * self.distance
-        for bond in bonds:
-            newbond = [2, bond[1]]
-            dx = bond[5] - bond[2]
-            dy = bond[6] - bond[3]
-            dz = bond[7] - bond[4]
-            r = sqrt(dx * dx + dy * dy + dz * dz)
-            if not r:
-                r = 1
-            rad = self.vizinfo.arad[int(bond[9])]
-            newbond.append(bond[2] + (r / r - rad / r) * dx)
-            newbond.append(bond[3] + (r / r - rad / r) * dy)
-            newbond.append(bond[4] + (r / r - rad / r) * dz)
-
-            # cut off second side of bond
-
-            dx = bond[2] - bond[5]
-            dy = bond[3] - bond[6]
-            dz = bond[4] - bond[7]
-            r = sqrt(dx * dx + dy * dy + dz * dz)
-            if not r:
-                r = 1
-            rad = self.vizinfo.arad[int(bond[8])]
-            newbond.append(bond[5] + (r / r - rad / r) * dx)
-            newbond.append(bond[6] + (r / r - rad / r) * dy)
-            newbond.append(bond[7] + (r / r - rad / r) * dz)
-
-            if fabs(newbond[2] - newbond[5]) > bound or \
-                    fabs(newbond[3] - newbond[6]) > bound:
-                continue
-
-            newbond = self.transform(newbond, matrix)
-            if newbond[4] < newbond[7]:
-                newbond[4] = newbond[7]
-            olist.append(newbond)
-
-        for line in lines:
-            line[0] = 3
-            newline = self.transform(line, matrix)
-            olist.append(newline)
+            self.center(box)
+
+        # each kind of object is one array, rotated and projected at once
+        # depth = rotated z of 1st point (of the nearer end for bonds)
+        # elements = one line of SVG per object
+
+        depth = []
+        elements = []
+        vizinfo = self.vizinfo
+
+        atoms = table(atoms, 5)
+        if len(atoms):
+            color, rad, index = props(vizinfo.acolor, vizinfo.arad,
+                                      vizinfo.nacolor, atoms[:, 1], "atom")
+            style = styles(' r="%s" fill="rgb(%s,%s,%s)" stroke-width="%s" />',
+                           rad * self.factor, color[:, 0], color[:, 1],
+                           color[:, 2], self.thick)
+            x, y, z = self.project(atoms[:, 2:5], matrix)
+            depth.append(z)
+            elements += textwriter.lines('<circle cx="%s" cy="%s"%s',
+                                         x, y, style[index])
+
+        tris = table(tris, 11)
+        if len(tris):
+            color, fill, index = props(vizinfo.tcolor, vizinfo.tfill,
+                                       vizinfo.ntcolor, tris[:, 1], "tri")
+            style = styles(' fill="rgb(%s,%s,%s)" stroke="black" '
+                           'stroke-width="0.01" />',
+                           color[:, 0], color[:, 1], color[:, 2])
+            x1, y1, z1 = self.project(tris[:, 2:5], matrix)
+            x2, y2, z2 = self.project(tris[:, 5:8], matrix)
+            x3, y3, z3 = self.project(tris[:, 8:11], matrix)
+            depth.append(z1)
+            elements += textwriter.lines(
+                '<polygon points= "%s,%s %s,%s %s,%s"%s',
+                x1, y1, x2, y2, x3, y3, style[index])
+
+        # bonds are cut off at the radius of the atom at each end
+        # bonds longer than 1/4 of the box are dropped, e.g. periodic ones
+
+        bonds = table(bonds, 10)
+        if len(bonds):
+            arad = np.array(vizinfo.arad, dtype=float)
+            start = self.shorten(bonds[:, 2:5], bonds[:, 5:8],
+                                 arad[bonds[:, 9].astype(int)])
+            end = self.shorten(bonds[:, 5:8], bonds[:, 2:5],
+                               arad[bonds[:, 8].astype(int)])
+            bound = 0.25 * self.distance
+            keep = (np.fabs(start[:, 0] - end[:, 0]) <= bound) & \
+                (np.fabs(start[:, 1] - end[:, 1]) <= bound)
+            bonds = bonds[keep]
+            color, thick, index = props(vizinfo.bcolor, vizinfo.brad,
+                                        vizinfo.nbcolor, bonds[:, 1], "bond")
+            style = styles(STROKE, color[:, 0], color[:, 1], color[:, 2],
+                           thick * self.factor)
+            x1, y1, z1 = self.project(start[keep], matrix)
+            x2, y2, z2 = self.project(end[keep], matrix)
+            depth.append(np.maximum(z1, z2))
+            elements += textwriter.lines(LINE, x1, y1, x2, y2, style[index])
+
+        lines = table(lines, 8)
+        if len(lines):
+            color, thick, index = props(vizinfo.lcolor, vizinfo.lrad,
+                                        vizinfo.nlcolor, lines[:, 1], "line")
+            style = styles(STROKE, color[:, 0], color[:, 1], color[:, 2],
+                           thick * self.factor)
+            x1, y1, z1 = self.project(lines[:, 2:5], matrix)
+            x2, y2, z2 = self.project(lines[:, 5:8], matrix)
+            depth.append(z1)
+            elements += textwriter.lines(LINE, x1, y1, x2, y2, style[index])
 
         if self.boxflag:
             x1, y1, z1 = box[0], box[1], box[2]
             x2, y2, z2 = box[3], box[4], box[5]
-            blines = []
-            blines.append([4, 0, x1, y1, z1, x1, y1, z2])
-            blines.append([4, 0, x2, y1, z1, x2, y1, z2])
-            blines.append([4, 0, x2, y2, z1, x2, y2, z2])
-            blines.append([4, 0, x1, y2, z1, x1, y2, z2])
-            blines.append([4, 0, x1, y1, z1, x2, y1, z1])
-            blines.append([4, 0, x1, y2, z1, x2, y2, z1])
-            blines.append([4, 0, x1, y2, z2, x2, y2, z2])
-            blines.append([4, 0, x1, y1, z2, x2, y1, z2])
-            blines.append([4, 0, x1, y1, z1, x1, y2, z1])
-            blines.append([4, 0, x2, y1, z1, x2, y2, z1])
-            blines.append([4, 0, x2, y1, z2, x2, y2, z2])
-            blines.append([4, 0, x1, y1, z2, x1, y2, z2])
-            for line in blines:
-                newline = self.transform(line, matrix)
-                olist.append(newline)
-
-        # convert objects by factor/offset and sort by z-depth
-
-        self.convert(olist)
-        olist.sort(cmprz)
+            edges = np.array([[x1, y1, z1, x1, y1, z2],
+                              [x2, y1, z1, x2, y1, z2],
+                              [x2, y2, z1, x2, y2, z2],
+                              [x1, y2, z1, x1, y2, z2],
+                              [x1, y1, z1, x2, y1, z1],
+                              [x1, y2, z1, x2, y2, z1],
+                              [x1, y2, z2, x2, y2, z2],
+                              [x1, y1, z2, x2, y1, z2],
+                              [x1, y1, z1, x1, y2, z1],
+                              [x2, y1, z1, x2, y2, z1],
+                              [x2, y1, z2, x2, y2, z2],
+                              [x1, y1, z2, x1, y2, z2]], dtype=float)
+            x1, y1, z1 = self.project(edges[:, 0:3], matrix)
+            x2, y2, z2 = self.project(edges[:, 3:6], matrix)
+            depth.append(z1)
+            color = self.bxcol
+            style = STROKE % (color[0] * 255, color[1] * 255, color[2] * 255,
+                              self.bxthick * self.factor)
+            elements += textwriter.lines(LINE, x1, y1, x2, y2, style)
+
+        # sort by z-depth, objects of equal depth keep their order
+
+        if depth:
+            order = np.argsort(np.concatenate(depth), kind="stable")
+        else:
+            order = []
 
         # write SVG file
 
@@ -473,10 +468,21 @@ class svg:
                  (self.bgcol[0] * 255, self.bgcol[1] * 255, self.bgcol[2] * 255)
         print(color, file=f)
 
-        for element in olist:
-            self.write(f, 0, element)
+        for i in range(0, len(order), textwriter.CHUNK):
+            block = order[i:i + textwriter.CHUNK]
+            f.write("".join([elements[j] + "\n" for j in block]))
+
         for label in self.labels:
-            self.write(f, 1, label)
+            x = (label[0] * self.xpixels) + (self.xpixels / 2.0)
+            y = (self.ypixels / 2.0) - (label[1] * self.ypixels)
+            color = label[4]
+            print(
+                '<text x="%s" y="%s" font-size="%s" font-family="%s" '
+                'stroke="rgb(%s,%s,%s)" fill="rgb(%s,%s,%s"> %s </text>' %
+                (x, y, label[3], label[2],
+                 color[0] * 255, color[1] * 255, color[2] * 255,
+                 color[0] * 255, color[1] * 255, color[2] * 255,
+                 label[5]), file=f)
 
         footer = "</g></svg>"
         print(footer, file=f)
@@ -484,308 +490,45 @@ class svg:
         f.close()
 
     # --------------------------------------------------------------------
-    # rotate with matrix
-
-    def transform(self, obj, matrix):
-
-        onew = obj[0:2]
-
-        if obj[0] == 0:                      # transform atom
-            onew.append(
-                matrix[0] *
-                obj[2] +
-                matrix[3] *
-                obj[3] +
-                matrix[6] *
-                obj[4])
-            onew.append(
-                matrix[1] *
-                obj[2] +
-                matrix[4] *
-                obj[3] +
-                matrix[7] *
-                obj[4])
-            onew.append(
-                matrix[2] *
-                obj[2] +
-                matrix[5] *
-                obj[3] +
-                matrix[8] *
-                obj[4])
-
-        elif obj[0] == 1:                    # transform triangle
-            onew.append(
-                matrix[0] *
-                obj[2] +
-                matrix[3] *
-                obj[3] +
-                matrix[6] *
-                obj[4])
-            onew.append(
-                matrix[1] *
-                obj[2] +
-                matrix[4] *
-                obj[3] +
-                matrix[7] *
-                obj[4])
-            onew.append(
-                matrix[2] *
-                obj[2] +
-                matrix[5] *
-                obj[3] +
-                matrix[8] *
-                obj[4])
-            onew.append(
-                matrix[0] *
-                obj[5] +
-                matrix[3] *
-                obj[6] +
-                matrix[6] *
-                obj[7])
-            onew.append(
-                matrix[1] *
-                obj[5] +
-                matrix[4] *
-                obj[6] +
-                matrix[7] *
-                obj[7])
-            onew.append(
-                matrix[2] *
-                obj[5] +
-                matrix[5] *
-                obj[6] +
-                matrix[8] *
-                obj[7])
-            onew.append(
-                matrix[0] *
-                obj[8] +
-                matrix[3] *
-                obj[9] +
-                matrix[6] *
-                obj[10])
-            onew.append(
-                matrix[1] *
-                obj[8] +
-                matrix[4] *
-                obj[9] +
-                matrix[7] *
-                obj[10])
-            onew.append(
-                matrix[2] *
-                obj[8] +
-                matrix[5] *
-                obj[9] +
-                matrix[8] *
-                obj[10])
-
-        else:                                # transform bond or line
-            onew.append(
-                matrix[0] *
-                obj[2] +
-                matrix[3] *
-                obj[3] +
-                matrix[6] *
-                obj[4])
-            onew.append(
-                matrix[1] *
-                obj[2] +
-                matrix[4] *
-                obj[3] +
-                matrix[7] *
-                obj[4])
-            onew.append(
-                matrix[2] *
-                obj[2] +
-                matrix[5] *
-                obj[3] +
-                matrix[8] *
-                obj[4])
-            onew.append(
-                matrix[0] *
-                obj[5] +
-                matrix[3] *
-                obj[6] +
-                matrix[6] *
-                obj[7])
-            onew.append(
-                matrix[1] *
-                obj[5] +
-                matrix[4] *
-                obj[6] +
-                matrix[7] *
-                obj[7])
-            onew.append(
-                matrix[2] *
-                obj[5] +
-                matrix[5] *
-                obj[6] +
-                matrix[8] *
-                obj[7])
-
-        return onew
+    # scale factor and offset that center box in the view window
 
-    # --------------------------------------------------------------------
+    def center(self, box):
+        matrix = rotation_matrix('x', -self.ztheta, 'z', 270.0 - self.azphi)
+        self.factor = self.xpixels * self.scale / (1.6 * self.distance)
+        xctr = 0.5 * (box[0] + box[3])
+        yctr = 0.5 * (box[1] + box[4])
+        zctr = 0.5 * (box[2] + box[5])
+        self.offsetx = matrix[0] * xctr + \
+            matrix[3] * yctr + matrix[6] * zctr
+        self.offsety = matrix[1] * xctr + \
+            matrix[4] * yctr + matrix[7] * zctr
 
-    def convert(self, objlist):
-        factor = self.factor
-        offsetx = self.offsetx
-        offsety = self.offsety
-        xctr = 0.5 * self.xpixels + self.xshift
-        yctr = 0.5 * self.ypixels - self.yshift
-
-        for obj in objlist:
-            if obj[0] == 0:                                # convert atom
-                obj[2] = factor * (obj[2] - offsetx) + xctr
-                obj[3] = yctr - factor * (obj[3] - offsety)
-            elif obj[0] == 1:                              # convert triangle
-                obj[2] = factor * (obj[2] - offsetx) + xctr
-                obj[3] = yctr - factor * (obj[3] - offsety)
-                obj[5] = factor * (obj[5] - offsetx) + xctr
-                obj[6] = yctr - factor * (obj[6] - offsety)
-                obj[8] = factor * (obj[8] - offsetx) + xctr
-                obj[9] = yctr - factor * (obj[9] - offsety)
-            else:                                          # convert bond or line
-                obj[2] = factor * (obj[2] - offsetx) + xctr
-                obj[3] = yctr - factor * (obj[3] - offsety)
-                obj[5] = factor * (obj[5] - offsetx) + xctr
-                obj[6] = yctr - factor * (obj[6] - offsety)
+    # --------------------------------------------------------------------
+    # rotate Nx3 coords with matrix, convert x,y by factor/offset to pixels
+    # return pixel x,y and rotated z, one array each
+
+    def project(self, xyz, matrix):
+        x = xyz[:, 0]
+        y = xyz[:, 1]
+        z = xyz[:, 2]
+        xnew = matrix[0] * x + matrix[3] * y + matrix[6] * z
+        ynew = matrix[1] * x + matrix[4] * y + matrix[7] * z
+        znew = matrix[2] * x + matrix[5] * y + matrix[8] * z
+        xnew = self.factor * (xnew - self.offsetx) + \
+            (0.5 * self.xpixels + self.xshift)
+        ynew = (0.5 * self.ypixels - self.yshift) - \
+            self.factor * (ynew - self.offsety)
+        return xnew, ynew, znew
 
     # --------------------------------------------------------------------
+    # move end point p1 of segments p1-p2 by rad towards p2
 
-    def write(self, f, flag, *args):
-        if len(args):
-            obj = args[0]
-
-        if flag == 0:
-            if obj[0] == 0:     # atom with its color and radius
-                itype = int(obj[1])
-                if itype > self.vizinfo.nacolor:
-                    raise Exception("atom type too big")
-                color = self.vizinfo.acolor[itype]
-                rad = self.vizinfo.arad[itype]
-                print(
-                    '<circle cx="%s" cy="%s" r="%s" fill="rgb(%s,%s,%s)" stroke-width="%s" />' %
-                    (obj[2],
-                     obj[3],
-                        rad *
-                        self.factor,
-                        color[0] *
-                        255,
-                        color[1] *
-                        255,
-                        color[2] *
-                        255,
-                        self.thick),
-                    file=f)
-
-            elif obj[0] == 1:    # tri with its color (need to add fill type)
-                itype = int(obj[1])
-                if itype > self.vizinfo.ntcolor:
-                    raise Exception("tri type too big")
-                color = self.vizinfo.tcolor[itype]
-                print(
-                    '<polygon points= "%s,%s %s,%s %s,%s" fill="rgb(%s,%s,%s)" stroke="black" stroke-width="0.01" />' %
-                    (obj[2],
-                     obj[3],
-                        obj[5],
-                        obj[6],
-                        obj[8],
-                        obj[9],
-                        color[0] *
-                        255,
-                        color[1] *
-                        255,
-                        color[2] *
-                        255),
-                    file=f)
-
-            elif obj[0] == 2:    # bond with its color and thickness
-                itype = int(obj[1])
-                if itype > self.vizinfo.nbcolor:
-                    raise Exception("bond type too big")
-                color = self.vizinfo.bcolor[itype]
-                thick = self.vizinfo.brad[itype]
-                print(
-                    '<line x1="%s" y1="%s" x2="%s" y2="%s" stroke="rgb(%s,%s,%s)" stroke-width="%s" />' %
-                    (obj[2],
-                     obj[3],
-                        obj[5],
-                        obj[6],
-                        color[0] *
-                        255,
-                        color[1] *
-                        255,
-                        color[2] *
-                        255,
-                        thick *
-                        self.factor),
-                    file=f)
-
-            elif obj[0] == 3:    # line with its color and thickness
-                itype = int(obj[1])
-                if itype > self.vizinfo.nlcolor:
-                    raise Exception("line type too big")
-                color = self.vizinfo.lcolor[itype]
-                thick = self.vizinfo.lrad[itype]
-                print(
-                    '<line x1="%s" y1="%s" x2="%s" y2="%s" stroke="rgb(%s,%s,%s)" stroke-width="%s" />' %
-                    (obj[2],
-                     obj[3],
-                        obj[5],
-                        obj[6],
-                        color[0] *
-                        255,
-                        color[1] *
-                        255,
-                        color[2] *
-                        255,
-                        thick *
-                        self.factor),
-                    file=f)
-
-            elif obj[0] == 4:    # box line with built-in color and thickness
-                color = self.bxcol
-                thick = self.bxthick
-                print(
-                    '<line x1="%s" y1="%s" x2="%s" y2="%s" stroke="rgb(%s,%s,%s)" stroke-width="%s" />' %
-                    (obj[2],
-                     obj[3],
-                        obj[5],
-                        obj[6],
-                        color[0] *
-                        255,
-                        color[1] *
-                        255,
-                        color[2] *
-                        255,
-                        thick *
-                        self.factor),
-                    file=f)
-
-        elif flag == 1:
-            x = (obj[0] * self.xpixels) + (self.xpixels / 2.0)
-            y = (self.ypixels / 2.0) - (obj[1] * self.ypixels)
-            color = obj[4]
-            print(
-                '<text x="%s" y="%s" font-size="%s" font-family="%s" stroke="rgb(%s,%s,%s)" fill="rgb(%s,%s,%s"> %s </text>' %
-                (x,
-                 y,
-                 obj[3],
-                    obj[2],
-                    color[0] *
-                    255,
-                    color[1] *
-                    255,
-                    color[2] *
-                    255,
-                    color[0] *
-                    255,
-                    color[1] *
-                    255,
-                    color[2] *
-                    255,
-                    obj[5]),
-                file=f)
+    def shorten(self, p1, p2, rad):
+        delta = p2 - p1
+        r = np.sqrt(delta[:, 0] * delta[:, 0] + delta[:, 1] * delta[:, 1] +
+                    delta[:, 2] * delta[:, 2])
+        r[r == 0] = 1
+        return p1 + ((r / r - rad / r)[:, np.newaxis]) * delta
 
     # --------------------------------------------------------------------
 
@@ -852,16 +595,43 @@ class svg:
         self.vizinfo.setradii("line", ltypes, radii)
 
 # --------------------------------------------------------------------
-# compare function for the sort method, orders according to z coordinate
+# SVG element of a bond, line or box edge, STROKE = its type dependent part
+
+LINE = '<line x1="%s" y1="%s" x2="%s" y2="%s"%s'
+STROKE = ' stroke="rgb(%s,%s,%s)" stroke-width="%s" />'
+
+# --------------------------------------------------------------------
+# list of objects from viz() as N x ncol array of floats
+
+
+def table(objs, ncol):
+    if len(objs) == 0:
+        return np.zeros((0, ncol))
+    return np.asarray(objs, dtype=float)
+
+# --------------------------------------------------------------------
+# RGB color (0-255) and size of each type used by objects of given types
+# colors,sizes = vizinfo lists indexed by type, ncolor = # of types
+# index = position of the type of each object in the used types
+
+
+def props(colors, sizes, ncolor, types, what):
+    itype = types.astype(int)
+    if len(itype) and itype.max() > ncolor:
+        raise Exception("%s type too big" % what)
+    used, index = np.unique(itype, return_inverse=True)
+    color = np.array([colors[i] for i in used], dtype=float).reshape(-1, 3)
+    color *= 255
+    size = np.array([sizes[i] for i in used], dtype=float)
+    return color, size, index
+
+# --------------------------------------------------------------------
+# type dependent part of the SVG element for each used type
+# formatted once per type instead of once per object
 
 
-def cmprz(a, b):
-    if a[4] > b[4]:
-        return 1
-    elif a[4] < b[4]:
-        return -1
-    elif a[4] == b[4]:
-        return 0
+def styles(fmt, *cols):
+    return np.array(textwriter.lines(fmt, *cols), dtype=object)
 
 # --------------------------------------------------------------------
 # return characteristic distance of simulation domain = max dimension
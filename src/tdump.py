@@ -9,13 +9,8 @@
 # tdump tool
 
 from __future__ import print_function, absolute_import
-import types
-import glob
-import re
-import subprocess
-import sys
-from math import sqrt
-from os import popen
+import numpy as np
+from snapreader import snapreader, Snap
 oneline = "Read dump files with triangle info"
 
 docstr = """
@@ -59,12 +54,14 @@ t.owrap(...)		          wrap tris to same image as their atoms
 
 # History
 #   4/11, Steve Plimpton (SNL): original version
+#   10/26, reading shared with bdump, mdump, ldump via snapreader class
 
 # Variables
 #   flist = list of dump file names
 #   increment = 1 if reading snapshots one-at-a-time
 #   nextfile = which file to read from via next()
 #   eof = ptr into current file for where to read via next()
+#   lazy = 1 if snapshot values are only parsed when first accessed
 #   nsnaps = # of snapshots
 #   snaps = list of snapshots
 #   names = dictionary of column names:
@@ -75,212 +72,31 @@ t.owrap(...)		          wrap tris to same image as their atoms
 #     xlo,xhi,ylo,yhi,zlo,zhi = box bounds (float)
 #     atoms[i][j] = 2d array of floats, i = 0 to natoms-1, j = 0 to ncols-1
 
-# Imports and external programs
-
-
-try:
-    import numpy as np
-    oldnumeric = False
-except BaseException:
-    import Numeric as np
-    oldnumeric = True
-
-try:
-    from DEFAULTS import PIZZA_GUNZIP
-except BaseException:
-    PIZZA_GUNZIP = "gunzip"
-
 # Class definition
 
 
-class tdump:
-
-    # --------------------------------------------------------------------
-
-    def __init__(self, *list):
-        self.snaps = []
-        self.nsnaps = 0
-        self.names = {}
-
-        # flist = list of all dump file names
-
-        words = list[0].split()
-        self.flist = []
-        for word in words:
-            self.flist += glob.glob(word)
-        if len(self.flist) == 0 and len(list) == 1:
-            raise Exception("no ldump file specified")
-
-        if len(list) == 1:
-            self.increment = 0
-            self.read_all()
-        else:
-            self.increment = 1
-            self.nextfile = 0
-            self.eof = 0
-
-    # --------------------------------------------------------------------
-
-    def read_all(self):
-
-        # read all snapshots from each file
-        # test for gzipped files
-
-        for file in self.flist:
-            if file[-3:] == ".gz":
-                f = popen("%s -c %s" % (PIZZA_GUNZIP, file), 'r')
-            else:
-                f = open(file)
-
-            snap = self.read_snapshot(f)
-            while snap:
-                self.snaps.append(snap)
-                print(snap.time, end=' ')
-                sys.stdout.flush()
-                snap = self.read_snapshot(f)
-
-            f.close()
-        print()
-
-        # sort entries by timestep, cull duplicates
-
-        self.snaps.sort(self.compare_time)
-        self.cull()
-        self.nsnaps = len(self.snaps)
-        print("read %d snapshots" % self.nsnaps)
-
-    # --------------------------------------------------------------------
-    # read next snapshot from list of files
-
-    def next(self):
-
-        if not self.increment:
-            raise Exception("cannot read incrementally")
-
-        # read next snapshot in current file using eof as pointer
-        # if fail, try next file
-        # if new snapshot time stamp already exists, read next snapshot
-
-        while 1:
-            f = open(self.flist[self.nextfile], 'rb')
-            f.seek(self.eof)
-            snap = self.read_snapshot(f)
-            if not snap:
-                self.nextfile += 1
-                if self.nextfile == len(self.flist):
-                    return -1
-                f.close()
-                self.eof = 0
-                continue
-            self.eof = f.tell()
-            f.close()
-            try:
-                self.findtime(snap.time)
-                continue
-            except BaseException:
-                break
-
-        self.snaps.append(snap)
-        snap = self.snaps[self.nsnaps]
-        self.nsnaps += 1
-
-        return snap.time
-
-    # --------------------------------------------------------------------
-    # read a single snapshot from file f
-    # return snapshot or 0 if failed
-
-    def read_snapshot(self, f):
-        try:
-            snap = Snap()
-            item = f.readline()
-            snap.time = int(f.readline().split()[0])    # just grab 1st field
-            item = f.readline()
-            snap.natoms = int(f.readline())
-
-            item = f.readline()
-            words = f.readline().split()
-            snap.xlo, snap.xhi = float(words[0]), float(words[1])
-            words = f.readline().split()
-            snap.ylo, snap.yhi = float(words[0]), float(words[1])
-            words = f.readline().split()
-            snap.zlo, snap.zhi = float(words[0]), float(words[1])
-
-            item = f.readline()
-
-            if snap.natoms:
-                words = f.readline().split()
-                ncol = len(words)
-                for i in range(1, snap.natoms):
-                    words += f.readline().split()
-                floats = list(map(float, words))
-                if oldnumeric:
-                    atoms = np.zeros((snap.natoms, ncol), np.Float)
-                else:
-                    atoms = np.zeros((snap.natoms, ncol), np.float)
-                start = 0
-                stop = ncol
-                for i in range(snap.natoms):
-                    atoms[i] = floats[start:stop]
-                    start = stop
-                    stop += ncol
-            else:
-                atoms = None
-            snap.atoms = atoms
-            return snap
-        except BaseException:
-            return 0
-
-    # --------------------------------------------------------------------
-    # map atom column names
-
-    def map(self, *pairs):
-        if len(pairs) % 2 != 0:
-            raise Exception("tdump map() requires pairs of mappings")
-        for i in range(0, len(pairs), 2):
-            j = i + 1
-            self.names[pairs[j]] = pairs[i] - 1
+class tdump(snapreader):
 
     # --------------------------------------------------------------------
-    # return vector of snapshot time stamps
-
-    def time(self):
-        vec = self.nsnaps * [0]
-        i = 0
-        for snap in self.snaps:
-            vec[i] = snap.time
-            i += 1
-        return vec
-
-    # --------------------------------------------------------------------
-    # sort snapshots on time stamp
-
-    def compare_time(self, a, b):
-        if a.time < b.time:
-            return -1
-        elif a.time > b.time:
-            return 1
-        else:
-            return 0
-
-    # --------------------------------------------------------------------
-
-    def findtime(self, n):
-        for i in range(self.nsnaps):
-            if self.snaps[i].time == n:
-                return i
-        raise Exception("no step %d exists" % n)
-
-    # --------------------------------------------------------------------
-    # delete successive snapshots with duplicate time stamp
-
-    def cull(self):
-        i = 1
-        while i < len(self.snaps):
-            if self.snaps[i].time == self.snaps[i - 1].time:
-                del self.snaps[i]
-            else:
-                i += 1
+    # read header of a single snapshot from file f
+    # values are read by snapreader
+
+    def read_header(self, f, snap):
+        item = f.readline()
+        snap.time = int(f.readline().split()[0])    # just grab 1st field
+        item = f.readline()
+        snap.natoms = int(f.readline())
+
+        item = f.readline()
+        words = f.readline().split()
+        snap.xlo, snap.xhi = float(words[0]), float(words[1])
+        words = f.readline().split()
+        snap.ylo, snap.yhi = float(words[0]), float(words[1])
+        words = f.readline().split()
+        snap.zlo, snap.zhi = float(words[0]), float(words[1])
+
+        item = f.readline()
+        return "atoms", snap.natoms
 
     # --------------------------------------------------------------------
     # return list of lines to viz for snapshot isnap
@@ -314,20 +130,22 @@ class tdump:
         corner3y = self.names["corner3y"]
         corner3z = self.names["corner3z"]
 
-        # create line list from id,type,corner1x,...corner3z
-        # don't add line if all 4 values are 0 since not a line
+        # create tri list from id,type,corner1x,...corner3z
+        # don't add tri if 1st and 2nd corner are all 0 since not a tri
+        # normals of all tris are computed at once
 
-        tris = []
-        for i in range(snap.natoms):
-            atom = snap.atoms[i]
-            c1 = [atom[corner1x], atom[corner1y], atom[corner1z]]
-            c2 = [atom[corner2x], atom[corner2y], atom[corner2z]]
-            c3 = [atom[corner3x], atom[corner3y], atom[corner3z]]
-            n = normal(c1, c2, c3)
-            if c1[0] == 0.0 and c1[1] == 0.0 and c1[2] == 0.0 and \
-                    c2[0] == 0.0 and c2[1] == 0.0 and c2[2] == 0.0:
-                continue
-            tris.append([atom[id], atom[type]] + c1 + c2 + c3 + n)
+        if not snap.natoms:
+            return time, box, None, None, [], None
+        atoms = snap.atoms
+        c1 = atoms[:, [corner1x, corner1y, corner1z]]
+        c2 = atoms[:, [corner2x, corner2y, corner2z]]
+        c3 = atoms[:, [corner3x, corner3y, corner3z]]
+        keep = (c1 != 0.0).any(axis=1) | (c2 != 0.0).any(axis=1)
+        n = np.cross(c2 - c1, c3 - c2)
+        length = np.sqrt((n * n).sum(axis=1))
+        length[length == 0.0] = 1.0
+        n /= length[:, np.newaxis]
+        tris = np.hstack((atoms[:, [id, type]], c1, c2, c3, n))[keep].tolist()
 
         return time, box, None, None, tris, None
 
@@ -382,37 +200,3 @@ class tdump:
             atoms[i][corner3x] += delx
             atoms[i][corner3y] += dely
             atoms[i][corner3z] += delz
-
-# --------------------------------------------------------------------
-# one snapshot
-
-
-class Snap:
-    pass
-
-# --------------------------------------------------------------------
-# compute normal for a triangle with 3 vertices
-
-
-def normal(x, y, z):
-    v1 = 3 * [0]
-    v1[0] = y[0] - x[0]
-    v1[1] = y[1] - x[1]
-    v1[2] = y[2] - x[2]
-
-    v2 = 3 * [0]
-    v2[0] = z[0] - y[0]
-    v2[1] = z[1] - y[1]
-    v2[2] = z[2] - y[2]
-
-    n = 3 * [0]
-    n[0] = v1[1] * v2[2] - v1[2] * v2[1]
-    n[1] = v1[2] * v2[0] - v1[0] * v2[2]
-    n[2] = v1[0] * v2[1] - v1[1] * v2[0]
-
-    length = sqrt(n[0] * n[0] + n[1] * n[1] + n[2] * n[2])
-    n[0] /= length
-    n[1] /= length
-    n[2] /= length
-
-    return n
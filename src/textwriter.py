@@ -0,0 +1,80 @@
+# textwriter functions, not a top-level Pizza.py tool
+
+# History
+#   10/26, shared array-based text output of xyz, cfg, pdbfile and ensight
+
+# ToDo list
+
+# Variables
+#   CHUNK = # of rows formatted by one % operation and written at once
+
+# Imports and external programs
+
+from __future__ import print_function, absolute_import
+import numpy as np
+
+# rows are formatted a block at a time so memory stays bounded
+#   for large snapshots while the per-row Python overhead disappears
+
+CHUNK = 100000
+
+# --------------------------------------------------------------------
+# write an N x M array with fmt applied to each row
+# fmt holds M conversions and ends with a newline, e.g. "%d %g %g %g\n"
+
+
+def write(f, fmt, values):
+    for i in range(0, len(values), CHUNK):
+        block = values[i:i + CHUNK]
+        f.write((fmt * len(block)) % tuple(block.ravel().tolist()))
+
+# --------------------------------------------------------------------
+# write rows built from M columns of length N with fmt applied to each row
+# columns can mix numbers and strings, e.g. begin/end text of PDB lines
+# a scalar column is repeated for every row
+
+
+def columns(f, fmt, *cols):
+    n = max([len(col) for col in cols if np.ndim(col)] + [0])
+    values = np.empty((n, len(cols)), dtype=object)
+    for j, col in enumerate(cols):
+        values[:, j] = col
+    write(f, fmt, values)
+
+# --------------------------------------------------------------------
+# list of N strings, fmt applied to each row of the M columns
+# fmt holds no newline, columns as for columns()
+# all-float columns skip the object array, %d formats them as integers
+
+
+def lines(fmt, *cols):
+    n = max([len(col) for col in cols if np.ndim(col)] + [0])
+    if not n:
+        return []
+    if all([np.asarray(col).dtype.kind == "f" for col in cols]):
+        values = np.empty((n, len(cols)))
+    else:
+        values = np.empty((n, len(cols)), dtype=object)
+    for j, col in enumerate(cols):
+        values[:, j] = col
+    text = []
+    for i in range(0, n, CHUNK):
+        block = values[i:i + CHUNK]
+        text += ((fmt + "\n") * len(block) %
+                 tuple(block.ravel().tolist())).split("\n")[:-1]
+    return text
+
+# --------------------------------------------------------------------
+# numbered file name root0000.suffix, root0001.suffix, etc
+
+
+def numbered(root, n, suffix):
+    if n < 10:
+        file = root + "000" + str(n)
+    elif n < 100:
+        file = root + "00" + str(n)
+    elif n < 1000:
+        file = root + "0" + str(n)
+    else:
+        file = root + str(n)
+    return file + suffix
@@ -10,15 +10,19 @@
 
 from __future__ import print_function, absolute_import
 import types
+import numpy as np
+import columnfile
 oneline = "Create numeric vectors from columns in file or list of vecs"
 
 docstr = """
 v = vec("file1")                    read in numeric vectors from a file
 v = vec(array)                      array = list of numeric vectors
+v = vec("file.npz")                 read binary column file written by write()
 
   skip blank lines and lines that start with non-numeric characters
   example array with 2 vecs = [[1,2,3,4,5], [10,20,30,40,50]]
   assigns names = "col1", "col2", etc
+  file ending in .npz or .parquet keeps the vector names it was written with
 
 nvec = v.nvec                       # of vectors
 nlen = v.nlen		            lengths of vectors
@@ -26,12 +30,16 @@ names = v.names		            list of vector names
 x,y,... = l.get(1,"col2",...)       return one or more vectors of values
 l.write("file.txt")	            write all vectors to a file
 l.write("file.txt","col1",7,...)    write listed vectors to a file
+l.write("file.npz","col1",7,...)    write vectors as binary columns
 
   get and write allow abbreviated (uniquely) vector names or digits (1-Nvec)
+  get returns NumPy arrays that are views into the stored data
+  file ending in .npz = NumPy arrays, .parquet = Parquet (needs pyarrow)
 """
 
 # History
 #   8/05, Steve Plimpton (SNL): original version
+#   10/26, data stored as 2d NumPy array, binary column files (.npz, .parquet)
 
 # ToDo list
 
@@ -40,7 +48,8 @@ l.write("file.txt","col1",7,...)    write listed vectors to a file
 #   nvec = # of vectors
 #   names = list of vector names
 #   ptr = dictionary, key = name, value = index into data for which column
-#   data[i][j] = 2d array of floats, i = 0 to # of entries, j = 0 to nvecs-1
+#   data[i][j] = 2d NumPy array of floats,
+#     i = 0 to # of entries, j = 0 to nvecs-1
 
 # Imports and external programs
 
@@ -53,33 +62,36 @@ class vec:
     # --------------------------------------------------------------------
 
     def __init__(self, data):
-        self.data = []
-        
-        if isinstance(data, str):
+        names = None
+
+        if isinstance(data, str) and columnfile.cached(data):
+            names, self.data = columnfile.read(data)
+        elif isinstance(data, str):
+            rows = []
             with open(data, 'r') as file:
                 lines = file.readlines()
             for line in lines:
                 words = line.split()
                 if words and words[0][0] in "0123456789.-":
-                    self.data.append(list(map(float, words)))
+                    rows.append(list(map(float, words)))
+            self.data = np.array(rows, dtype=float)
         elif isinstance(data, list):
             nlen = len(data[0])
             for lst in data[1:]:
                 if len(lst) != nlen:
                     raise ValueError("Lists are not all the same length")
-            for i in range(nlen):
-                values = [lst[i] for lst in data]
-                self.data.append(list(map(float, values)))
+            self.data = np.array(data, dtype=float).T
         else:
             raise ValueError("Invalid argument to vec")
-        
-        if not self.data:
+
+        if not self.data.size:
             self.nlen = self.nvec = 0
         else:
-            self.nlen = len(self.data)
-            self.nvec = len(self.data[0])
+            self.nlen, self.nvec = self.data.shape
 
-        self.names = [f"col{i+1}" for i in range(self.nvec)]
+        if names is None:
+            names = [f"col{i+1}" for i in range(self.nvec)]
+        self.names = names
 
         self.ptr = {name: i for i, name in enumerate(self.names)}
 
@@ -91,6 +103,34 @@ class vec:
         if len(keys) == 0:
             raise Exception("no vectors specified")
 
+        vecs = [self.data[:, i] for i in self.columns(keys)]
+        if len(keys) == 1:
+            return vecs[0]
+        else: return vecs
+
+    # --------------------------------------------------------------------
+
+    def write(self, filename,*keys):
+        if len(keys):
+            map = self.columns(keys)
+        else:
+            map = list(range(self.nvec))
+
+        if columnfile.cached(filename):
+            columnfile.write(filename, [self.names[i] for i in map],
+                             self.data[:, map])
+            return
+
+        f = open(filename, "w")
+        for row in self.data[:, map].tolist():
+            print(" ".join([str(value) for value in row]), end=' \n', file=f)
+        f.close()
+
+    # --------------------------------------------------------------------
+    # column indices of vector names or digits (1-Nvec),
+    #   names can be unique abbreviations
+
+    def columns(self, keys):
         map = []
         for key in keys:
             if type(key) == int:
@@ -106,42 +146,4 @@ class vec:
                     map.append(index)
                 else:
                     raise Exception("unique vector %s not found" % key)
-
-        vecs = []
-        for i in range(len(keys)):
-            vecs.append(self.nlen * [0])
-            for j in range(self.nlen):
-                vecs[i][j] = self.data[j][map[i]]
-
-        if len(keys) == 1:
-            return vecs[0]
-        else: return vecs
-
-    # --------------------------------------------------------------------
-
-    def write(self, filename,*keys):
-        if len(keys):
-            map = []
-            for key in keys:
-                if type(key) == int:
-                    map.append(key-1)
-                elif key in self.ptr: map.append(self.ptr[key])
-                else:
-                    count = 0
-                    for i in range(self.nvec):
-                        if self.names[i].find(key) == 0:
-                            count += 1
-                            index = i
-                    if count == 1:
-                        map.append(index)
-                    else:
-                        raise Exception("unique vector %s not found" % key)
-        else:
-            map = list(range(self.nvec))
-
-        f = open(filename, "w")
-        for i in range(self.nlen):
-            for j in range(len(map)):
-                print(self.data[i][map[j]], end=' ', file=f)
-            print(file=f)
-        f.close()
+        return map
@@ -120,8 +120,8 @@ class vizinfo:
             id = ids[i]
 
             if rgbs[0] == "loop":
-                list = list(colors.keys())
-                red, green, blue = colors[list[i % len(colors)]]
+                names = list(colors.keys())
+                red, green, blue = colors[names[i % len(colors)]]
             elif ntypes == nrgbs:
                 red, green, blue = colors[rgbs[i]]
             else:
@@ -19,6 +19,7 @@
 from __future__ import print_function, absolute_import
 import types
 import os
+import tempfile
 import numpy
 
 oneline = "Control VMD from python"
@@ -35,6 +36,8 @@ v.data(file[,atomstyle])       load new data file (default atom style 'full')
 v.replace(file[,type])	       replace current frames with new file
 v.append(file[,type]) 	       append file to current frame(s)
 v.set(snap,x,y,z,(True|False)) set coordinates from a pizza.py snapshot to new or current frame
+			       x,y,z = columns of coords in snapshot atoms
+			       passed to VMD as a temporary DCD file
 
 v.frame(frame)		       set current frame
 v.flush()		       flush pending input to VMD and update GUI
@@ -46,6 +49,7 @@ v.debug([True|False])	       display generated VMD script commands?
 
 # History
 #   11/10, Axel Kohlmeyer (Temple U): original version
+#   10/26, set() passes coords as a binary DCD file, not as Tcl text
 
 
 try:
@@ -237,15 +241,68 @@ class vmd:
 
     # --------------------------------------------------------------------
     # add or overwrite coordinates with coordinates in a snapshot
+    # coords are written to a temporary DCD file that VMD reads natively,
+    #   to overwrite the current frame the file is read as a new frame,
+    #   copied into the current frame and deleted again
     def set(self, snap, x, y, z, append=True):
-        self.__call__('set vmdsel [atomselect top all]')
-        if append:
-            self.__call__('animate dup [molinfo top]')
-        cmd = '$vmdsel set {x y z} {'
-        for idx in range(0, snap.natoms):
-            cmd += ' {' + str(snap[idx, x]) + ' ' + \
-                str(snap[idx, y]) + ' ' + str(snap[idx, z]) + '}'
-        cmd += '}'
-        self.__call__(cmd)
-        self.__call__('$vmdsel delete ; unset vmdsel')
+        atoms = getattr(snap, "atoms", snap)
+        box = None
+        if hasattr(snap, "xlo"):
+            box = (snap.xhi - snap.xlo, snap.yhi - snap.ylo,
+                   snap.zhi - snap.zlo)
+        fd, filename = tempfile.mkstemp(suffix=".dcd")
+        os.close(fd)
+        try:
+            writedcd(filename, atoms[:, x], atoms[:, y], atoms[:, z], box)
+            if not append:
+                self.__call__('set vmdframe [molinfo top get frame]')
+            self.__call__('mol addfile ' + filename + ' type dcd waitfor all')
+            if not append:
+                self.__call__(
+                    'set vmdlast [expr [molinfo top get numframes] - 1]')
+                self.__call__('set vmdnew [atomselect top all frame $vmdlast]')
+                self.__call__(
+                    'set vmdsel [atomselect top all frame $vmdframe]')
+                self.__call__('$vmdsel set {x y z} [$vmdnew get {x y z}]')
+                self.__call__('$vmdsel delete ; $vmdnew delete')
+                self.__call__('animate delete beg $vmdlast end $vmdlast top')
+                self.__call__('animate goto $vmdframe')
+                self.__call__('unset vmdsel vmdnew vmdlast vmdframe')
+        finally:
+            os.remove(filename)
         self.flush()
+
+# --------------------------------------------------------------------
+# write one frame of coords as a CHARMM format DCD file
+# box = (xprd,yprd,zprd) of orthogonal box, stored as unit cell, or None
+# each record is framed by its length in bytes, as in Fortran files
+
+
+def writedcd(filename, x, y, z, box=None):
+    icntrl = numpy.zeros(20, dtype="<i4")
+    icntrl[0] = 1                      # of frames
+    icntrl[2] = 1                      # timesteps between frames
+    icntrl[10] = box is not None       # unit cell in each frame
+    icntrl[19] = 24                    # CHARMM version
+    title = b"%-80s" % b"REMARKS written by Pizza.py vmd tool"
+
+    f = open(filename, "wb")
+    record(f, b"CORD" + icntrl.tobytes())
+    record(f, numpy.array([1], dtype="<i4").tobytes() + title)
+    record(f, numpy.array([len(x)], dtype="<i4").tobytes())
+    if box is not None:
+        cell = [box[0], 90.0, box[1], 90.0, 90.0, box[2]]
+        record(f, numpy.array(cell, dtype="<f8").tobytes())
+    for coords in (x, y, z):
+        record(f, numpy.asarray(coords, dtype="<f4").tobytes())
+    f.close()
+
+# --------------------------------------------------------------------
+# write one record of bytes, framed by its length
+
+
+def record(f, data):
+    size = numpy.array([len(data)], dtype="<i4").tobytes()
+    f.write(size)
+    f.write(data)
+    f.write(size)
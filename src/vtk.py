@@ -9,8 +9,8 @@
 # vtk tool
 
 from __future__ import print_function, absolute_import
-import sys, re
-
+import sys, re, os, hashlib
+import numpy as np
 
 
 oneline = "Convert LAMMPS snapshots to VTK format"
@@ -25,17 +25,26 @@ v.many("new")           write snapshots to new0000.vtk, new0001.vtk, etc
 v.single(N)             write snapshot for timestep N to tmp.vtk
 v.single(N,"file")      write snapshot for timestep N to file.vtk
 
+v.change = 1            many() writes surfaces again when they change (def = 0)
+
   surfaces in snapshot will be written to SURF1.vtk, SURF2.vtk, etc
     where each surface (triangle type) is in a different file
+  by default surfaces are only written for the 1st snapshot
+  with change = 1, many() and manyGran() write them for the 1st snapshot
+    and each snapshot whose tris differ from the last written ones
+    (compared by a content hash), e.g. tmp0000_SURF1.vtk, tmp0042_SURF1.vtk
 """
 
 # History
 #   8/05, Steve Plimpton (SNL): original version
+#   10/26, change = 1 writes surfaces only for snapshots they changed in
 
 # ToDo list
 
 # Variables
 #   data = data file to read from
+#   change = 0 for surfaces of 1st snapshot only, 1 for changing surfaces
+#   lastkey = content hash of last written surfaces
 
 # Class definition
 
@@ -45,6 +54,7 @@ class vtk:
 
   def __init__(self,data):
     self.data = data
+    self.change = 0
 
   # --------------------------------------------------------------------
 
@@ -91,10 +101,6 @@ class vtk:
       if flag == -1: break
       time,box,atoms,bonds,tris,lines = self.data.viz(which)
 
-      if surfflag == 0 and len(tris):
-        surfflag = 1
-        surface(tris)
-
       if n < 10:
         file = root + "000" + str(n) + ".vtk"
       elif n < 100:
@@ -104,6 +110,11 @@ class vtk:
       else:
         file = root + str(n) + ".vtk"
 
+      if self.change: self.surfaces(tris,n,file)
+      elif surfflag == 0 and len(tris):
+        surfflag = 1
+        surface(tris)
+
       particle(file,atoms)
 
       print(time, end=' ')
@@ -118,6 +129,10 @@ class vtk:
     outputfl = True
     if "output" in kwargs: outputfl = kwargs["output"]
 
+    # optional lpptimer object collecting per-file write timings
+    timer = None
+    if "timer" in kwargs: timer = kwargs["timer"]
+
     # read startIndex (offset for filename due to parallel processing)
     startIndex = 0
     fileNos = []
@@ -150,12 +165,14 @@ class vtk:
       atoms=self.data.snaps[n].atoms
       names=self.data.names
 
-      if surfflag == 0 and len(tris):
+      file, file_bb, file_walls = generateFilename(root,fileNos,n)
+
+      if self.change: self.surfaces(tris,n,file)
+      elif surfflag == 0 and len(tris):
         surfflag = 1
         surface(tris)
 
-      file, file_bb, file_walls = generateFilename(root,fileNos,n)
-
+      if timer: tstart = timer.clock()
       boundingBox(file_bb,xlo,xhi,ylo,yhi,zlo,zhi)
       nvalues = 0
       try: nvalues = len(self.data.snaps[0].atoms[0])
@@ -163,6 +180,11 @@ class vtk:
 
 
       particleGran(file,atoms,names,nvalues)
+      if timer:
+        natoms = 0
+        if atoms is not None: natoms = len(atoms)
+        timer.add("write",timer.clock()-tstart,file,atoms=natoms,
+                  bytes_out=os.path.getsize(file)+os.path.getsize(file_bb))
       
       if outputfl: print(time, end=' ')
       if outputfl: sys.stdout.flush()
@@ -181,6 +203,18 @@ class vtk:
     if len(tris): surface(tris)
     particle(file,atoms)
 
+  # --------------------------------------------------------------------
+  # write surfaces of snapshot n with prefix of its file name
+  # skipped if its tris have the same content hash as the last written ones
+
+  def surfaces(self,tris,n,file):
+    if n == 0: self.lastkey = None
+    if not len(tris): return
+    key = hashlib.sha1(np.ascontiguousarray(tris,dtype=float)).hexdigest()
+    if key == self.lastkey: return
+    self.lastkey = key
+    surface(tris,file[:-4] + "_")
+
 # ----------------------------------------------------------------------------
 # generates the filename of the output-vtk-files from
 # - a root string,
@@ -209,11 +243,12 @@ def generateFilename(root,fileNos,n):
 
 # --------------------------------------------------------------------
 # write list of triangles into VTK surface files: SURF1.vtk, SURF2.vtk, ...
+# file names can be preceded by a prefix
 # all triangles of one type constitute 1 surface = 1 file
 # create list of unique vertices (via dictionary) from triangle list
 
-def surface(tris):
-  ntypes = tris[-1][1]
+def surface(tris,prefix=""):
+  ntypes = int(max([tri[1] for tri in tris]))
 
   for i in range(ntypes):
     itype = i + 1
@@ -240,7 +275,7 @@ def surface(tris):
     for key in keys:
       vinverse[v[key]] = key
 
-    filename = "SURF" + str(itype) + ".vtk"
+    filename = prefix + "SURF" + str(itype) + ".vtk"
     f = open(filename,"w")
 
     print("# vtk DataFile Version 3.0", file=f)
@@ -309,6 +344,8 @@ def boundingBox(file,xlo,xhi,ylo,yhi,zlo,zhi):
   print("Z_COORDINATES 2 float", file=f)
   print(zlo,zhi, file=f)
 
+  f.close()
+
 def typestr(o):
   string = str(type(o))
   sp = string.split('\'')
@@ -12,6 +12,8 @@
 
 from __future__ import print_function, absolute_import
 import sys
+import numpy as np
+import textwriter
 
 oneline = "Convert LAMMPS snapshots to XYZ format"
 
@@ -28,6 +30,7 @@ x.single(N,"file")      write snapshot for timestep N to file.xyz
 
 # History
 #   8/05, Steve Plimpton (SNL): original version
+#   10/26, atoms written as whole arrays via textwriter
 
 # ToDo list
 
@@ -62,11 +65,7 @@ class xyz:
                 break
             time, box, atoms, bonds, tris, lines = self.data.viz(which)
 
-            print(len(atoms), file=f)
-            print("Atoms", file=f)
-            for atom in atoms:
-                itype = int(atom[1])
-                print(itype, atom[2], atom[3], atom[4], file=f)
+            self.write(f, atoms)
 
             print(time, end=' ')
             sys.stdout.flush()
@@ -90,21 +89,9 @@ class xyz:
                 break
             time, box, atoms, bonds, tris, lines = self.data.viz(which)
 
-            if n < 10:
-                file = root + "000" + str(n)
-            elif n < 100:
-                file = root + "00" + str(n)
-            elif n < 1000:
-                file = root + "0" + str(n)
-            else:
-                file = root + str(n)
-            file += ".xyz"
+            file = textwriter.numbered(root, n, ".xyz")
             f = open(file, "w")
-            print(len(atoms), file=f)
-            print("Atoms", file=f)
-            for atom in atoms:
-                itype = int(atom[1])
-                print(itype, atom[2], atom[3], atom[4], file=f)
+            self.write(f, atoms)
             print(time, end=' ')
             sys.stdout.flush()
             f.close()
@@ -125,9 +112,15 @@ class xyz:
         which = self.data.findtime(time)
         time, box, atoms, bonds, tris, lines = self.data.viz(which)
         f = open(file, "w")
+        self.write(f, atoms)
+        f.close()
+
+    # --------------------------------------------------------------------
+    # write one snapshot, all atoms are formatted as one array
+
+    def write(self, f, atoms):
         print(len(atoms), file=f)
         print("Atoms", file=f)
-        for atom in atoms:
-            itype = int(atom[1])
-            print(itype, atom[2], atom[3], atom[4], file=f)
-        f.close()
+        atoms = np.asarray(atoms, dtype=float).reshape(-1, 5)
+        textwriter.columns(f, "%d %s %s %s\n", atoms[:, 1].astype(int),
+                           atoms[:, 2], atoms[:, 3], atoms[:, 4])